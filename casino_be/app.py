@@ -272,9 +272,37 @@ def create_app(config_class=Config):
     websocket_manager.init_app(app)
     
     # Initialize SpaceCrash Game Loop
-    from .services.spacecrash_game_loop import spacecrash_game_loop
+    from .services.spacecrash_game_loop import spacecrash_game_loop, DEFAULT_ROOM_CONFIGS
     spacecrash_game_loop.websocket_manager = websocket_manager
     spacecrash_game_loop.app = app
+    # Snapshots from a previous app belong to its database
+    if spacecrash_game_loop.running:
+        for room in spacecrash_game_loop.rooms.values():
+            room.state_cache.clear()
+    else:
+        spacecrash_game_loop.configure_rooms(app.config.get('SPACECRASH_ROOMS', DEFAULT_ROOM_CONFIGS))
+    
+    # Poker table actors start on demand (and below, for hands in progress); ones from a previous app are flushed and stopped
+    from .services.poker_table_actor import poker_table_actors
+    poker_table_actors.configure(app, websocket_manager)
+
+    # Blackjack and baccarat shoes live in memory per table and are restored from their snapshots on first use
+    from .services.blackjack_shoe import blackjack_shoes
+    from .services.baccarat_shoe import baccarat_shoes
+    blackjack_shoes.configure(app)
+    baccarat_shoes.configure(app)
+
+    # Baccarat and roulette rounds collect bets in memory and settle each round in one transaction
+    from .services.table_rounds import table_rounds
+    table_rounds.configure(app, websocket_manager)
+
+    # Crystal Garden growth cycles run for every due garden at once, in chunks
+    from .services.crystal_garden_cycles import growth_cycles
+    growth_cycles.configure(app)
+
+    # Garden state and codex responses are cached per player and pushed to their socket as diffs
+    from .services.garden_views import garden_views
+    garden_views.configure(app, websocket_manager)
     
     # Start game loop after app context is ready
     if not app.config.get('TESTING', False):
@@ -286,6 +314,11 @@ def create_app(config_class=Config):
                 import time
                 time.sleep(1)  # Wait 1 second for app to be ready
                 spacecrash_game_loop.start()
+                # Replicas share tables through per-table leases: each resumes and deals only the tables it can claim
+                poker_table_actors.resume_active_tables()
+                poker_table_actors.seed_auto_dealer()
+                if app.config.get('CRYSTAL_GARDEN_ENABLED') and app.config.get('CRYSTAL_GARDEN_AUTO_CYCLE'):
+                    growth_cycles.start()
             
             thread = threading.Thread(target=delayed_start, daemon=True)
             thread.start()
@@ -293,6 +326,10 @@ def create_app(config_class=Config):
     # Store socketio and game loop in app for access in routes
     app.socketio = socketio
     app.spacecrash_game_loop = spacecrash_game_loop
+    app.poker_table_actors = poker_table_actors
+    app.table_rounds = table_rounds
+    app.growth_cycles = growth_cycles
+    app.garden_views = garden_views
 
     # --- JWT Setup ---
     jwt = JWTManager(app)
@@ -72,6 +72,46 @@ class Config:
     # Feature Flags
     CRYSTAL_GARDEN_ENABLED = os.getenv('CRYSTAL_GARDEN_ENABLED', 'True').lower() in ('true', '1', 't')
 
+    # Poker equity calculator: worker processes per /api/internal/poker/equity request
+    POKER_EQUITY_WORKERS = int(os.getenv('POKER_EQUITY_WORKERS', '1'))
+
+    # Poker table actors: seconds between write-behind flushes of a busy table, and where the
+    # per-table action journal used for crash recovery lives (default: <instance_path>/poker_journal)
+    POKER_ACTOR_FLUSH_INTERVAL = float(os.getenv('POKER_ACTOR_FLUSH_INTERVAL', '1.0'))
+    POKER_ACTOR_JOURNAL_DIR = os.getenv('POKER_ACTOR_JOURNAL_DIR')
+    # Seconds a process's claim on a poker table lasts without renewal; once it lapses (the process
+    # died) another replica may take the table over
+    POKER_ACTOR_LEASE_TTL = float(os.getenv('POKER_ACTOR_LEASE_TTL', '30.0'))
+
+    # Poker auto dealer: start the next hand at any table with two or more ready players,
+    # this many seconds after it became ready (previous hand over, second player seated).
+    # Each replica only deals at tables its own actors hold the lease on
+    POKER_AUTO_DEAL = os.getenv('POKER_AUTO_DEAL', 'True').lower() in ('true', '1', 't')
+    POKER_AUTO_DEAL_DELAY = float(os.getenv('POKER_AUTO_DEAL_DELAY', '5.0'))
+
+    # Blackjack shoes: share of each table's shoe dealt before the cut card (a table's rules may
+    # set 'penetration' instead), and whether the next shoe is shuffled in the background
+    BLACKJACK_SHOE_PENETRATION = float(os.getenv('BLACKJACK_SHOE_PENETRATION', '0.75'))
+    BLACKJACK_PRESHUFFLE = os.getenv('BLACKJACK_PRESHUFFLE', 'True').lower() in ('true', '1', 't')
+
+    # Baccarat shoes: the same for baccarat tables, whose cut card traditionally sits 16 cards from the end
+    BACCARAT_SHOE_PENETRATION = float(os.getenv('BACCARAT_SHOE_PENETRATION', '0.95'))
+    BACCARAT_PRESHUFFLE = os.getenv('BACCARAT_PRESHUFFLE', 'True').lower() in ('true', '1', 't')
+
+    # Baccarat and roulette rounds: seconds a table takes bets after the first bet of a round
+    ROUND_BETTING_WINDOW = float(os.getenv('ROUND_BETTING_WINDOW', '15.0'))
+
+    # Crystal Garden: seconds per growth cycle, gardens advanced per transaction by a cycle pass,
+    # and whether a background thread runs passes. Flowers grow with time without passes; the
+    # roll key keeps each flower's bloom unpredictable from its id and planting time (derived from
+    # JWT_SECRET_KEY when CRYSTAL_GARDEN_ROLL_KEY is not set).
+    CRYSTAL_GARDEN_CYCLE_INTERVAL = float(os.getenv('CRYSTAL_GARDEN_CYCLE_INTERVAL', '3600.0'))
+    CRYSTAL_GARDEN_CYCLE_CHUNK = int(os.getenv('CRYSTAL_GARDEN_CYCLE_CHUNK', '500'))
+    CRYSTAL_GARDEN_AUTO_CYCLE = os.getenv('CRYSTAL_GARDEN_AUTO_CYCLE', 'False').lower() in ('true', '1', 't')
+    CRYSTAL_GARDEN_ROLL_KEY = _validated_config['CRYSTAL_GARDEN_ROLL_KEY']
+    GARDEN_VIEW_CACHE_SIZE = int(os.getenv('GARDEN_VIEW_CACHE_SIZE', '10000'))
+    GARDEN_VIEW_TTL = float(os.getenv('GARDEN_VIEW_TTL', '5.0'))
+
 
 class TestingConfig(Config):
     TESTING = True
@@ -86,6 +126,8 @@ class TestingConfig(Config):
     # Disable rate limiting for tests
     RATELIMIT_ENABLED = False
     RATELIMIT_DEFAULT_LIMITS_ENABLED = False
+    # Hands are started explicitly in tests
+    POKER_AUTO_DEAL = False
     # Ensure engine options for SQLite are appropriate if not using in-memory
     SQLALCHEMY_ENGINE_OPTIONS = {
         'connect_args': {'check_same_thread': False}
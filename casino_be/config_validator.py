@@ -10,6 +10,8 @@ import os
 import sys
 import warnings
 import secrets
+import hashlib
+import hmac
 from typing import List, Tuple, Optional
 
 
@@ -224,6 +226,20 @@ class ConfigValidator:
         
         return service_token
 
+    def validate_crystal_garden_config(self, jwt_secret: str) -> str:
+        """Validate the Crystal Garden roll key, deriving one from the JWT secret if it is not set."""
+        roll_key = os.getenv('CRYSTAL_GARDEN_ROLL_KEY')
+
+        if not roll_key:
+            # An empty key would let anyone work out each flower's bloom from its id and planting time
+            roll_key = hmac.new(jwt_secret.encode(), b'crystal-garden-roll-key', hashlib.sha256).hexdigest()
+            self.warnings.append(
+                "CRYSTAL_GARDEN_ROLL_KEY not set - derived from JWT_SECRET_KEY. "
+                "Set it explicitly so rotating the JWT secret does not re-roll unbloomed flowers."
+            )
+
+        return roll_key
+
     def validate_rate_limiting_config(self) -> str:
         """Validate rate limiting configuration."""
         rate_limit_uri = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
@@ -283,6 +299,7 @@ class ConfigValidator:
             config['SERVICE_API_TOKEN'] = self.validate_service_config()
             config['RATELIMIT_STORAGE_URI'] = self.validate_rate_limiting_config()
             config['CORS_ORIGINS'] = self.validate_cors_config()
+            config['CRYSTAL_GARDEN_ROLL_KEY'] = self.validate_crystal_garden_config(config['JWT_SECRET_KEY'])
             
             # Additional configuration
             config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() in ('true', '1', 't')
@@ -0,0 +1,28 @@
+"""add room to spacecrash_game
+
+Revision ID: a3c1e5f7b9d2
+Revises: 8fa28c7146ce
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c1e5f7b9d2'
+down_revision = '8fa28c7146ce'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('spacecrash_game', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('room', sa.String(length=50), nullable=False, server_default='classic'))
+        batch_op.create_index(batch_op.f('ix_spacecrash_game_room'), ['room'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('spacecrash_game', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_spacecrash_game_room'))
+        batch_op.drop_column('room')
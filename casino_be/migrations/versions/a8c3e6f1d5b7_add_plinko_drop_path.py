@@ -0,0 +1,28 @@
+"""add rows and path to plinko_drop_log
+
+Revision ID: a8c3e6f1d5b7
+Revises: f7b2d5e9c4a6
+Create Date: 2026-10-19 03:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c3e6f1d5b7'
+down_revision = 'f7b2d5e9c4a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('plinko_drop_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rows', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('path', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('plinko_drop_log', schema=None) as batch_op:
+        batch_op.drop_column('path')
+        batch_op.drop_column('rows')
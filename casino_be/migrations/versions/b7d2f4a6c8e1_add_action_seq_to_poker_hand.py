@@ -0,0 +1,26 @@
+"""add action_seq to poker_hand
+
+Revision ID: b7d2f4a6c8e1
+Revises: a3c1e5f7b9d2
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a6c8e1'
+down_revision = 'a3c1e5f7b9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('poker_hand', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('action_seq', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('poker_hand', schema=None) as batch_op:
+        batch_op.drop_column('action_seq')
@@ -0,0 +1,46 @@
+"""log blackjack hands as actions with a current state row
+
+Revision ID: b9d4f7a2e6c8
+Revises: a8c3e6f1d5b7
+Create Date: 2026-10-19 04:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4f7a2e6c8'
+down_revision = 'a8c3e6f1d5b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blackjack_hand', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active_hand_index', sa.SmallInteger(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('hand_count', sa.SmallInteger(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('event_count', sa.SmallInteger(), nullable=False, server_default='0'))
+        batch_op.alter_column('player_cards', existing_type=sa.JSON(), nullable=True)
+        batch_op.alter_column('dealer_cards', existing_type=sa.JSON(), nullable=True)
+        batch_op.alter_column('player_hands', existing_type=sa.JSON(), nullable=True)
+        batch_op.alter_column('dealer_hand', existing_type=sa.JSON(), nullable=True)
+
+    with op.batch_alter_table('blackjack_action', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seq', sa.SmallInteger(), nullable=True))
+        batch_op.create_index('ix_blackjack_action_hand_seq', ['hand_id', 'seq'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('blackjack_action', schema=None) as batch_op:
+        batch_op.drop_index('ix_blackjack_action_hand_seq')
+        batch_op.drop_column('seq')
+
+    with op.batch_alter_table('blackjack_hand', schema=None) as batch_op:
+        batch_op.alter_column('dealer_hand', existing_type=sa.JSON(), nullable=False)
+        batch_op.alter_column('player_hands', existing_type=sa.JSON(), nullable=False)
+        batch_op.alter_column('dealer_cards', existing_type=sa.JSON(), nullable=False)
+        batch_op.alter_column('player_cards', existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_column('event_count')
+        batch_op.drop_column('hand_count')
+        batch_op.drop_column('active_hand_index')
@@ -0,0 +1,28 @@
+"""lease poker tables to the process whose actor runs them
+
+Revision ID: c2e7a9d4f1b6
+Revises: b9d4f7a2e6c8
+Create Date: 2026-10-19 05:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e7a9d4f1b6'
+down_revision = 'b9d4f7a2e6c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('poker_table', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('actor_owner', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('actor_lease_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('poker_table', schema=None) as batch_op:
+        batch_op.drop_column('actor_lease_until')
+        batch_op.drop_column('actor_owner')
@@ -0,0 +1,36 @@
+"""add poker_hand_event
+
+Revision ID: c4e8a1d3f5b7
+Revises: b7d2f4a6c8e1
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1d3f5b7'
+down_revision = 'b7d2f4a6c8e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('poker_hand_event',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('hand_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(length=20), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.BigInteger(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['hand_id'], ['poker_hand.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('hand_id', 'seq', name='uq_poker_hand_event_seq')
+    )
+
+
+def downgrade():
+    op.drop_table('poker_hand_event')
@@ -0,0 +1,30 @@
+"""add shoe_state to blackjack_table and details to blackjack_hand
+
+Revision ID: d5f9b3a7c2e4
+Revises: c4e8a1d3f5b7
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f9b3a7c2e4'
+down_revision = 'c4e8a1d3f5b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blackjack_table', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('shoe_state', sa.JSON(), nullable=True))
+    with op.batch_alter_table('blackjack_hand', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('details', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('blackjack_hand', schema=None) as batch_op:
+        batch_op.drop_column('details')
+    with op.batch_alter_table('blackjack_table', schema=None) as batch_op:
+        batch_op.drop_column('shoe_state')
@@ -0,0 +1,26 @@
+"""add shoe_state to baccarat_table
+
+Revision ID: e6a1c4d8b3f5
+Revises: d5f9b3a7c2e4
+Create Date: 2026-10-19 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a1c4d8b3f5'
+down_revision = 'd5f9b3a7c2e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('baccarat_table', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('shoe_state', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('baccarat_table', schema=None) as batch_op:
+        batch_op.drop_column('shoe_state')
@@ -0,0 +1,62 @@
+"""add game_round, and round_id to baccarat_hand and roulette_game
+
+Revision ID: f7b2d5e9c4a6
+Revises: e6a1c4d8b3f5
+Create Date: 2026-10-19 02:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b2d5e9c4a6'
+down_revision = 'e6a1c4d8b3f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('game_round',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('game_type', sa.String(length=50), nullable=False),
+    sa.Column('table_id', sa.Integer(), nullable=False),
+    sa.Column('outcome', sa.JSON(), nullable=True),
+    sa.Column('bet_count', sa.Integer(), nullable=False),
+    sa.Column('total_wagered', sa.BigInteger(), nullable=False),
+    sa.Column('total_returned', sa.BigInteger(), nullable=False),
+    sa.Column('opened_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('settled_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('game_round', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_game_round_game_type'), ['game_type'], unique=False)
+        batch_op.create_index('ix_game_round_game_table', ['game_type', 'table_id', 'settled_at'], unique=False)
+
+    with op.batch_alter_table('baccarat_hand', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('round_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_baccarat_hand_round_id'), ['round_id'], unique=False)
+        batch_op.create_foreign_key('fk_baccarat_hand_round_id', 'game_round', ['round_id'], ['id'], ondelete='SET NULL')
+
+    with op.batch_alter_table('roulette_game', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('round_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_roulette_game_round_id'), ['round_id'], unique=False)
+        batch_op.create_foreign_key('fk_roulette_game_round_id', 'game_round', ['round_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('roulette_game', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_roulette_game_round_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_roulette_game_round_id'))
+        batch_op.drop_column('round_id')
+
+    with op.batch_alter_table('baccarat_hand', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_baccarat_hand_round_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_baccarat_hand_round_id'))
+        batch_op.drop_column('round_id')
+
+    with op.batch_alter_table('game_round', schema=None) as batch_op:
+        batch_op.drop_index('ix_game_round_game_table')
+        batch_op.drop_index(batch_op.f('ix_game_round_game_type'))
+
+    op.drop_table('game_round')
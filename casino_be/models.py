@@ -207,6 +207,7 @@ class BlackjackTable(db.Model):
     max_bet = db.Column(db.BigInteger, nullable=False)
     deck_count = db.Column(db.Integer, nullable=False)
     rules = db.Column(JSON, nullable=True)
+    shoe_state = db.Column(JSON, nullable=True) # Snapshot of the table's shoe: undealt cards, cut card, shoe number
     is_active = db.Column(db.Boolean, nullable=False, default=True)
     created_at = db.Column(db.DateTime(timezone=True), server_default=db.text('CURRENT_TIMESTAMP'), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), server_default=db.text('CURRENT_TIMESTAMP'), nullable=False)
@@ -225,12 +226,19 @@ class BlackjackHand(db.Model):
     initial_bet = db.Column(BigInteger, nullable=False)
     total_bet = db.Column(BigInteger, nullable=False)
     win_amount = db.Column(BigInteger, default=0, nullable=False)
-    player_cards = db.Column(JSON, nullable=False)
-    dealer_cards = db.Column(JSON, nullable=False)
-    player_hands = db.Column(JSON, nullable=False)
-    dealer_hand = db.Column(JSON, nullable=False)
+    # Cards and hands are replayed from the hand's actions (blackjack_helper.hand_view); these hold
+    # them only for hands dealt before the action log
+    player_cards = db.Column(JSON, nullable=True)
+    dealer_cards = db.Column(JSON, nullable=True)
+    player_hands = db.Column(JSON, nullable=True)
+    dealer_hand = db.Column(JSON, nullable=True)
+    # Current state, updated in place on every action
+    active_hand_index = db.Column(db.SmallInteger, nullable=False, default=0)
+    hand_count = db.Column(db.SmallInteger, nullable=False, default=1)
+    event_count = db.Column(db.SmallInteger, nullable=False, default=0) # Actions logged; the next one's seq
     status = db.Column(db.String(50), nullable=False, default='active', index=True)
     result = db.Column(db.String(50), nullable=True)
+    details = db.Column(JSON, nullable=True) # Written when dealt: shoe number (a legacy hand's own deck)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
     completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -246,12 +254,15 @@ class BlackjackAction(db.Model):
     __tablename__ = 'blackjack_action'
     id = db.Column(db.Integer, primary_key=True)
     hand_id = db.Column(db.Integer, db.ForeignKey('blackjack_hand.id', ondelete='CASCADE'), nullable=False, index=True)
-    action_type = db.Column(db.String(20), nullable=False)
-    hand_index = db.Column(db.Integer, nullable=False)
+    seq = db.Column(db.SmallInteger, nullable=True) # Order within the hand; a second writer of the same seq fails
+    action_type = db.Column(db.String(20), nullable=False) # deal, hit, stand, double, split
+    hand_index = db.Column(db.Integer, nullable=False) # The player hand acted on, or -1 for the dealer
     card_dealt = db.Column(db.String(10), nullable=True)
-    hand_total = db.Column(db.Integer, nullable=True)
+    hand_total = db.Column(db.Integer, nullable=True) # That hand's total after the action
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
 
+    __table_args__ = (Index('ix_blackjack_action_hand_seq', 'hand_id', 'seq', unique=True),)
+
     def __repr__(self):
         return f"<BlackjackAction {self.id} (Hand: {self.hand_id}, Action: {self.action_type})>"
 
@@ -288,6 +299,7 @@ class SpacecrashGame(db.Model):
     crash_point = db.Column(db.Float, nullable=True)
     public_seed = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(50), nullable=False, default='pending', index=True)
+    room = db.Column(db.String(50), nullable=False, default='classic', server_default='classic', index=True)
     betting_start_time = db.Column(db.DateTime(timezone=True), nullable=True)
     game_start_time = db.Column(db.DateTime(timezone=True), nullable=True)
     game_end_time = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -333,6 +345,9 @@ class PokerTable(db.Model):
     rake_percentage = db.Column(db.Numeric(5, 4), default=Decimal("0.00"), nullable=False) # e.g., 0.05 for 5%
     max_rake_sats = db.Column(db.BigInteger, default=0, nullable=False) # Max rake in satoshis, 0 for no cap beyond percentage
     current_dealer_seat_id = db.Column(db.Integer, nullable=True) # Seat ID of the current dealer
+    # Process whose table actor owns the table, and until when; renewed by the actor while it runs
+    actor_owner = db.Column(db.String(64), nullable=True)
+    actor_lease_until = db.Column(db.DateTime(timezone=True), nullable=True)
 
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
@@ -363,6 +378,7 @@ class PokerHand(db.Model):
     player_street_investments = db.Column(JSON, nullable=True, default=lambda: {}) # Tracks {user_id: amount} for current street
     min_next_raise_amount = db.Column(db.BigInteger, nullable=True) # Minimum valid increment for the next raise
     last_raiser_user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True) # Tracks the last player who bet/raised
+    action_seq = db.Column(db.Integer, default=0, nullable=False) # Last PokerHandEvent seq materialised into this row
 
     # Relationships for ForeignKey fields
     current_turn_player = db.relationship('User', foreign_keys=[current_turn_user_id], backref=db.backref('poker_hands_current_turn', lazy='dynamic'))
@@ -372,6 +388,31 @@ class PokerHand(db.Model):
     def __repr__(self):
         return f"<PokerHand {self.id} (Table: {self.table_id}, Pot: {self.pot_size_sats}, Start: {self.start_time})>"
 
+class PokerHandEvent(db.Model):
+    """
+    One entry in a hand's append-only action log, written by the poker table actor.
+
+    seq 0 ('start') carries the table as dealt; every later row is one player command
+    (fold/check/call/bet/raise, timeout, stand_up) that replays against it. PokerHand's
+    JSON columns are projections of this log, materialised at street changes.
+    """
+    __tablename__ = 'poker_hand_event'
+    id = db.Column(db.Integer, primary_key=True)
+    hand_id = db.Column(db.Integer, db.ForeignKey('poker_hand.id', ondelete='CASCADE'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    event_type = db.Column(db.String(20), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True) # Not a foreign key: the log outlives seats and accounts
+    amount = db.Column(BigInteger, nullable=True)
+    payload = db.Column(JSON, nullable=True) # Only the 'start' event has one
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('hand_id', 'seq', name='uq_poker_hand_event_seq'), # Also the index replay scans
+    )
+
+    def __repr__(self):
+        return f"<PokerHandEvent {self.hand_id}#{self.seq} {self.event_type}>"
+
 class PokerPlayerState(db.Model):
     __tablename__ = 'poker_player_state'
     id = db.Column(db.Integer, primary_key=True)
@@ -409,6 +450,8 @@ class PlinkoDropLog(db.Model):
     slot_landed_label = db.Column(db.String(50), nullable=False)
     multiplier_applied = db.Column(db.Float, nullable=False)
     winnings_amount = db.Column(db.BigInteger, nullable=False, default=0)  # In satoshis
+    rows = db.Column(db.Integer, nullable=True)  # Board the server dropped on; None for client-reported drops
+    path = db.Column(db.Integer, nullable=True)  # Bit i set when the ball went right at row i
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     
     # Relationships
@@ -425,10 +468,29 @@ class TokenBlacklist(db.Model):
     def __repr__(self):
         return f'<TokenBlacklist {self.jti}>'
 
+class GameRound(db.Model):
+    """One shared betting round at a baccarat or roulette table: every player's bets settle on its outcome"""
+    __tablename__ = 'game_round'
+    id = db.Column(db.Integer, primary_key=True)
+    game_type = db.Column(db.String(50), nullable=False, index=True) # 'baccarat' or 'roulette'
+    table_id = db.Column(db.Integer, nullable=False) # BaccaratTable id, or the roulette table's configured id
+    outcome = db.Column(JSON, nullable=True) # Cards and scores, or the winning number
+    bet_count = db.Column(db.Integer, default=0, nullable=False)
+    total_wagered = db.Column(BigInteger, default=0, nullable=False)
+    total_returned = db.Column(BigInteger, default=0, nullable=False)
+    opened_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    settled_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (Index('ix_game_round_game_table', 'game_type', 'table_id', 'settled_at'),)
+
+    def __repr__(self):
+        return f"<GameRound {self.id} ({self.game_type} table {self.table_id})>"
+
 class RouletteGame(db.Model):
     __tablename__ = 'roulette_game'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    round_id = db.Column(db.Integer, db.ForeignKey('game_round.id', ondelete='SET NULL'), nullable=True, index=True) # Set for bets settled in a shared round
     bet_amount = db.Column(db.BigInteger, nullable=False)
     bet_type = db.Column(db.String(50), nullable=False)  # e.g., 'straight_up_0', 'red', 'even', 'column_1', 'dozen_1'
     winning_number = db.Column(db.Integer, nullable=True) # Nullable until wheel spins
@@ -451,6 +513,7 @@ class BaccaratTable(db.Model):
     max_bet = db.Column(BigInteger, nullable=False)
     max_tie_bet = db.Column(BigInteger, nullable=False)
     commission_rate = db.Column(Numeric(5, 4), default=Decimal("0.05"), nullable=False) # e.g., 0.05 for 5%
+    shoe_state = db.Column(JSON, nullable=True) # Snapshot of the table's shoe: undealt cards, cut card, shoe number
     is_active = db.Column(db.Boolean, default=True, nullable=False, index=True)
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
@@ -466,6 +529,7 @@ class BaccaratHand(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     table_id = db.Column(db.Integer, db.ForeignKey('baccarat_table.id', ondelete='RESTRICT'), nullable=False, index=True) # Prevent table deletion if hands exist
     game_session_id = db.Column(db.Integer, db.ForeignKey('game_session.id', ondelete='CASCADE'), nullable=False, index=True) # Hands are part of a session
+    round_id = db.Column(db.Integer, db.ForeignKey('game_round.id', ondelete='SET NULL'), nullable=True, index=True) # Set for hands dealt to a shared round
     initial_bet_player = db.Column(BigInteger, default=0, nullable=False)
     initial_bet_banker = db.Column(BigInteger, default=0, nullable=False)
     initial_bet_tie = db.Column(BigInteger, default=0, nullable=False)
@@ -7,6 +7,8 @@ from http import HTTPStatus
 
 from casino_be.models import db, User, BaccaratTable, BaccaratHand, GameSession, Transaction # Absolute import
 from casino_be.schemas import BaccaratTableSchema, BaccaratHandSchema, PlaceBaccaratBetSchema # Absolute import
+from casino_be.services.baccarat_shoe import get_baccarat_shoes
+from casino_be.services.table_rounds import get_table_rounds
 from casino_be.utils import baccarat_helper # Absolute import
 
 baccarat_bp = Blueprint('baccarat_bp', __name__, url_prefix='/api/baccarat')
@@ -106,13 +108,16 @@ def play_baccarat_hand_route():
         )
         db.session.add(wager_tx)
 
-        # Assuming baccarat_helper.play_baccarat_hand has defaults for num_decks and tie_payout_rate
-        # if table.rules is not a field. BaccaratTable model has commission_rate.
-        helper_result = baccarat_helper.play_baccarat_hand(
-            player_bet_amount=Decimal(bet_player_sats), banker_bet_amount=Decimal(bet_banker_sats), tie_bet_amount=Decimal(bet_tie_sats),
-            commission_rate=table.commission_rate
-            # num_decks and tie_payout_rate will use defaults in helper if not passed
-        )
+        # The hand is dealt from the table's shoe; tie_payout_rate uses the helper's default.
+        # BaccaratTable model has commission_rate.
+        shoes = get_baccarat_shoes()
+        shoe = shoes.start_hand(table)
+        with shoe.dealing():
+            helper_result = baccarat_helper.play_baccarat_hand(
+                player_bet_amount=Decimal(bet_player_sats), banker_bet_amount=Decimal(bet_banker_sats), tie_bet_amount=Decimal(bet_tie_sats),
+                commission_rate=table.commission_rate, shoe=shoe
+            )
+        shoes.save(table, shoe) # Shoe snapshot commits with the hand
 
         if "error" in helper_result:
             current_app.logger.error(f"Baccarat helper error for user {user.id} on table {table_id}: {helper_result['error']}")
@@ -151,6 +156,28 @@ def play_baccarat_hand_route():
         current_app.logger.error(f"Baccarat play hand error for user {user.id} on table {table_id}: {str(e)}", exc_info=True)
         return jsonify({'status': False, 'status_message': 'Failed to play Baccarat hand due to an internal error.'}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+ROUND_ERROR_STATUS = {'not_found': HTTPStatus.NOT_FOUND}
+
+@baccarat_bp.route('/tables/<int:table_id>/round/bets', methods=['POST'])
+@jwt_required()
+def place_baccarat_round_bet(table_id):
+    """
+    Bet on the table's shared round. Every player's bets settle together on one hand when the
+    betting window closes; the result is broadcast to the table's room and kept for GET .../round.
+    Expects JSON: { "bet_on_player": <int>, "bet_on_banker": <int>, "bet_on_tie": <int> } (sats, each optional)
+    """
+    data = request.get_json(silent=True) or {}
+    result = get_table_rounds().get('baccarat').place_bet(table_id, current_user, data)
+    if "error" in result:
+        return jsonify({'status': False, 'status_message': result['error']}), ROUND_ERROR_STATUS.get(result['code'], HTTPStatus.BAD_REQUEST)
+    return jsonify({'status': True, **result}), HTTPStatus.ACCEPTED
+
+@baccarat_bp.route('/tables/<int:table_id>/round', methods=['GET'])
+@jwt_required()
+def get_baccarat_round(table_id):
+    """The table's open round and its recently settled ones, with the caller's own bets and returns"""
+    return jsonify({'status': True, **get_table_rounds().get('baccarat').round_state(table_id, current_user.id)}), HTTPStatus.OK
+
 @baccarat_bp.route('/hands/<int:hand_id>', methods=['GET'])
 @jwt_required()
 def get_baccarat_hand(hand_id):
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
+from sqlalchemy.exc import IntegrityError
 
-from casino_be.models import db, User, BlackjackTable # Absolute import
+from casino_be.models import db, User, BlackjackTable, BlackjackHand # Absolute import
 from casino_be.schemas import ( # Absolute import
     BlackjackTableSchema, JoinBlackjackSchema, BlackjackActionRequestSchema,
     UserSchema, BlackjackHandSchema
@@ -38,8 +39,9 @@ def join_blackjack_table(): # Renamed from join_blackjack to be specific
         return jsonify({'status': False, 'status_message': f'Table with ID {table_id} is not active'}), 400
 
     try:
-        # handle_join_blackjack is expected to manage db session commit/rollback
+        # handle_join_blackjack only flushes its writes; the route commits them
         result_hand_data = handle_join_blackjack(current_user, table, bet_amount)
+        db.session.commit()
 
         # Schemas for response (UserSchema for updated balance, BlackjackHandSchema for hand details)
         user_data = UserSchema().dump(current_user)
@@ -51,6 +53,7 @@ def join_blackjack_table(): # Renamed from join_blackjack to be specific
         return jsonify({'status': True, 'hand': result_hand_data, 'user': user_data }), 201
     except ValueError as ve:
         # Specific error from game logic (e.g., insufficient balance, table full if not handled by helper)
+        db.session.rollback() # The helper may have inserted rows before raising
         return jsonify({'status': False, 'status_message': str(ve)}), 400
     except Exception as e:
         # General error, helper should ideally rollback
@@ -71,8 +74,9 @@ def perform_blackjack_action(): # Renamed from blackjack_action
     hand_index = data.get('hand_index', 0) # Default to 0 if not provided (for non-split hands)
 
     try:
-        # handle_blackjack_action is expected to manage db session commit/rollback
+        # handle_blackjack_action only flushes its writes; the route commits them
         action_result_data = handle_blackjack_action(current_user, hand_id, action_type, hand_index)
+        db.session.commit()
 
         user_data = UserSchema().dump(current_user)
         # action_result_data could be complex; ensure it's serializable.
@@ -82,8 +86,22 @@ def perform_blackjack_action(): # Renamed from blackjack_action
         return jsonify({'status': True, 'action_result': action_result_data, 'user': user_data }), 200
     except ValueError as ve:
         # Specific error from game logic (e.g., invalid action, not user's turn)
+        db.session.rollback() # The helper may have inserted rows before raising
         return jsonify({'status': False, 'status_message': str(ve)}), 400
+    except IntegrityError:
+        # Another action on the hand logged the same seq first
+        db.session.rollback()
+        return jsonify({'status': False, 'status_message': 'The hand changed while this action was taken. Reload it and try again.'}), 409
     except Exception as e:
         db.session.rollback() # Ensure rollback
         current_app.logger.error(f"Error in blackjack action: {str(e)}", exc_info=True)
         return jsonify({'status': False, 'status_message': 'Error in blackjack action.'}), 500
+
+@blackjack_bp.route('/hands/<int:hand_id>', methods=['GET'])
+@jwt_required()
+def get_blackjack_hand(hand_id):
+    """One of the player's hands, its cards replayed from the action log"""
+    hand = BlackjackHand.query.filter_by(id=hand_id, user_id=current_user.id).first()
+    if not hand:
+        return jsonify({'status': False, 'status_message': f'Hand with ID {hand_id} not found'}), 404
+    return jsonify({'status': True, 'hand': BlackjackHandSchema().dump(hand)}), 200
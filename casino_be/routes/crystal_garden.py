@@ -4,6 +4,7 @@ from flask_jwt_extended import jwt_required, current_user
 # models import was missing from the previous read, but error trace shows it's needed
 from casino_be.models import db, User, CrystalSeed, PlayerGarden, CrystalFlower, CrystalCodexEntry # Ensure all needed models are here
 from casino_be.services.crystal_garden_service import CrystalGardenService, ServiceError, ItemNotFoundError
+from casino_be.services.garden_views import garden_views
 from casino_be.utils.decorators import feature_flag_required
 
 crystal_garden_bp = Blueprint('crystal_garden_bp', __name__, url_prefix='/api/crystal-garden')
@@ -21,6 +22,14 @@ def handle_service_error(error: ServiceError):
     return jsonify_service_error(error)
 
 
+def cached_view_response(view):
+    """A cached view's encoded body with its ETag; 304 when the client already has it"""
+    response = current_app.response_class(view.body, mimetype='application/json')
+    response.set_etag(view.etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
 @crystal_garden_bp.route('/buy-seed', methods=['POST'])
 @jwt_required()
 @feature_flag_required('CRYSTAL_GARDEN_ENABLED')
@@ -83,8 +92,7 @@ def plant_seed_route(): # Renamed
 @feature_flag_required('CRYSTAL_GARDEN_ENABLED')
 def get_garden_state_route(): # Renamed
     try:
-        garden_state = service.get_garden_state(user_id=current_user.id)
-        return jsonify(garden_state), 200
+        return cached_view_response(garden_views.get('garden', current_user.id))
     except ServiceError as e:
         return handle_service_error(e)
     except Exception as e:
@@ -96,8 +104,7 @@ def get_garden_state_route(): # Renamed
 @feature_flag_required('CRYSTAL_GARDEN_ENABLED')
 def get_codex_route(): # Renamed
     try:
-        codex_entries = service.get_player_codex(user_id=current_user.id)
-        return jsonify([entry.to_dict() for entry in codex_entries]), 200
+        return cached_view_response(garden_views.get('codex', current_user.id))
     except ServiceError as e:
         return handle_service_error(e)
     except Exception as e:
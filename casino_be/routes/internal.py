@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 from datetime import datetime, timezone
 
-from casino_be.models import db, User, Transaction # Absolute import
+from casino_be.models import db, User, Transaction, BaccaratTable # Absolute import
 from casino_be.utils.decorators import service_token_required # Absolute import
 from casino_be.schemas import UserSchema # Absolute import
+from casino_be.utils import poker_equity, baccarat_odds
+from casino_be.services.baccarat_shoe import get_baccarat_shoes
+from casino_be.services.crystal_garden_cycles import get_growth_cycles
 
 internal_bp = Blueprint('internal', __name__, url_prefix='/api/internal')
 
@@ -82,3 +85,85 @@ def update_player_balance():
             exc_info=True
         )
         return jsonify({'status': False, 'status_message': 'Failed to update balance due to an internal error.'}), 500
+
+
+@internal_bp.route('/poker/equity', methods=['POST'])
+@service_token_required
+def poker_equity_calculation():
+    """
+    Hold'em equity for run-it-twice payouts, insurance, hand review and collusion analysis.
+    Protected by a service API token.
+    Expects JSON: { "hands": [["HA", "DA"], ["SK", "CK"]], "board": <list_optional>,
+                    "dead": <list_optional>, "iterations": <int_optional>, "seed": <int_optional> }
+    Enumerates every run-out when few remain, otherwise samples `iterations` of them.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'status': False, 'status_message': 'Invalid JSON payload.'}), 400
+
+    iterations = data.get('iterations', poker_equity.DEFAULT_ITERATIONS)
+    seed = data.get('seed')
+    if seed is not None and not isinstance(seed, int):
+        return jsonify({'status': False, 'status_message': 'seed must be an integer.'}), 400
+
+    try:
+        result = poker_equity.calculate_equity(
+            data.get('hands'), data.get('board') or [], data.get('dead') or [],
+            iterations=iterations, seed=seed,
+            workers=current_app.config.get('POKER_EQUITY_WORKERS', 1),
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'status': False, 'status_message': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error calculating poker equity: {str(e)}", exc_info=True)
+        return jsonify({'status': False, 'status_message': 'Failed to calculate equity due to an internal error.'}), 500
+
+    return jsonify({'status': True, **result}), 200
+
+
+@internal_bp.route('/baccarat/tables/<int:table_id>/odds', methods=['GET'])
+@service_token_required
+def baccarat_shoe_odds(table_id):
+    """
+    Exact odds and house edge per bet for the next hand from a baccarat table's current shoe,
+    for watching the live edge as the shoe is dealt down.
+    Protected by a service API token.
+    """
+    table = db.session.get(BaccaratTable, table_id)
+    if not table:
+        return jsonify({'status': False, 'status_message': f'Baccarat table {table_id} not found.'}), 404
+
+    try:
+        shoe = get_baccarat_shoes().get(table)
+        result = baccarat_odds.shoe_odds(shoe, commission_rate=table.commission_rate)
+    except ValueError as e:
+        return jsonify({'status': False, 'status_message': str(e)}), 409
+    except Exception as e:
+        current_app.logger.error(f"Error calculating odds for baccarat table {table_id}: {str(e)}", exc_info=True)
+        return jsonify({'status': False, 'status_message': 'Failed to calculate odds due to an internal error.'}), 500
+
+    return jsonify({'status': True, 'table_id': table_id, 'past_cut': shoe.past_cut, **result}), 200
+
+
+@internal_bp.route('/crystal-garden/cycles', methods=['GET'])
+@service_token_required
+def crystal_garden_cycles_status():
+    """Progress of the running (or last) Crystal Garden growth cycle pass, and the scheduler's settings"""
+    return jsonify({'status': True, **get_growth_cycles().status()}), 200
+
+
+@internal_bp.route('/crystal-garden/cycles', methods=['POST'])
+@service_token_required
+def crystal_garden_cycles_run():
+    """
+    Run a growth cycle pass over every due garden now. A pass already running is reported
+    instead of starting another.
+    Optional JSON: { "after_id": <garden id to resume after> }
+    """
+    data = request.get_json(silent=True) or {}
+    after_id = data.get('after_id', 0)
+    if isinstance(after_id, bool) or not isinstance(after_id, int) or after_id < 0:
+        return jsonify({'status': False, 'status_message': 'after_id must be a non-negative integer.'}), 400
+
+    progress = get_growth_cycles().run(after_id=after_id)
+    return jsonify({'status': progress['state'] != 'failed', 'progress': progress}), 200 if progress['state'] != 'failed' else 500
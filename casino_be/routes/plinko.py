@@ -2,11 +2,17 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from http import HTTPStatus
 
+from datetime import datetime, timezone
+from sqlalchemy import insert
+
 from casino_be.models import db, User, PlinkoDropLog, Transaction # Absolute import
-from casino_be.schemas import PlinkoPlayRequestSchema, PlinkoPlayResponseSchema # Absolute import
+from casino_be.schemas import ( # Absolute import
+    PlinkoPlayRequestSchema, PlinkoPlayResponseSchema,
+    PlinkoDropsRequestSchema, PlinkoDropsResponseSchema
+)
 from casino_be.utils.plinko_helper import ( # Absolute import
-    validate_plinko_params, calculate_winnings,
-    PAYOUT_MULTIPLIERS, SATOSHIS_PER_UNIT
+    validate_plinko_params, get_board, drop_balls, settle_drops, path_steps,
+    SATOSHIS_PER_UNIT
 )
 from casino_be.exceptions import ValidationException, InsufficientFundsException
 from casino_be.error_codes import ErrorCodes
@@ -14,16 +20,8 @@ from marshmallow import ValidationError # Import ValidationError
 
 plinko_bp = Blueprint('plinko', __name__, url_prefix='/api/plinko')
 
-@plinko_bp.route('/play', methods=['POST'])
-@jwt_required()
-def plinko_play():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-
-    if not user:
-        current_app.logger.error(f"Plinko play attempt by non-existent user ID: {current_user_id}")
-        return jsonify({'error': 'User not found after authentication.'}), HTTPStatus.INTERNAL_SERVER_ERROR
 
+def _load_request(schema, current_user_id):
     try:
         json_data = request.get_json()
         if not json_data:
@@ -31,31 +29,85 @@ def plinko_play():
             # Or raise ValidationException for consistent error format.
             raise ValidationException(status_message="Invalid JSON payload.")
 
-        schema = PlinkoPlayRequestSchema()
         # Marshmallow load will raise ValidationError if validation fails
         loaded_data = schema.load(json_data) # This will raise ValidationError on issues
     except ValidationError as e: # Catch Marshmallow's ValidationError specifically
         # Let global handler process this. It expects details to be e.messages.
         raise ValidationException(status_message="Input validation failed.", details=e.messages)
+    except ValidationException:
+        raise
     except Exception as e: # Catch other potential errors during JSON parsing or initial load
         current_app.logger.error(f"Unexpected error during Plinko request parsing for user {current_user_id}: {str(e)}", exc_info=True)
         raise ValidationException(status_message="Invalid request format.")
 
-
-    stake_amount_float = loaded_data['stake_amount']
-    chosen_stake_label = loaded_data['chosen_stake_label']
-    slot_landed_label = loaded_data['slot_landed_label']
-
     # This validation can be removed if schema handles it fully, but good for defense in depth
-    # Assuming validate_plinko_params raises ValidationException or returns a dict
-    validation_result = validate_plinko_params(stake_amount_float, chosen_stake_label, slot_landed_label)
+    validation_result = validate_plinko_params(loaded_data['stake_amount'], loaded_data['chosen_stake_label'])
     if not validation_result['success']:
         # Convert this specific validation error into ValidationException
         specific_error_code = ErrorCodes.VALIDATION_ERROR
         if "Stake amount" in validation_result['error'] and "out of range" in validation_result['error']:
             specific_error_code = ErrorCodes.INVALID_AMOUNT
         raise ValidationException(status_message=validation_result['error'], error_code=specific_error_code)
+    return loaded_data
+
+
+def _drop(user, stake_amount_sats, chosen_stake_label, rows, count):
+    """
+    Drop count balls for user at stake_amount_sats each and settle them in one commit: a relative
+    balance update, one bulk PlinkoDropLog insert, and a bet and (when anything came back) a win
+    transaction. A single ball's transactions point at its drop; a batch's list the drop ids.
+    Returns the drops as dicts. The caller checks the balance and rolls back on error.
+    """
+    board = get_board(rows, chosen_stake_label)
+    paths, slots = drop_balls(board, count)
+    winnings = settle_drops(board, stake_amount_sats, slots)
+    total_staked, total_winnings = stake_amount_sats * count, sum(winnings)
+    now = datetime.now(timezone.utc)
+
+    user.balance = User.balance + (total_winnings - total_staked) # Applied relative to the stored balance
+    drop_ids = db.session.scalars(
+        insert(PlinkoDropLog).returning(PlinkoDropLog.id, sort_by_parameter_order=True),
+        [{'user_id': user.id, 'stake_amount': stake_amount_sats, 'chosen_stake_label': chosen_stake_label,
+          'slot_landed_label': board.labels[slot], 'multiplier_applied': board.multipliers[slot] / 100,
+          'winnings_amount': won, 'rows': rows, 'path': path, 'created_at': now}
+         for path, slot, won in zip(paths, slots, winnings)]
+    ).all()
+
+    if count == 1:
+        drop_id, landed = drop_ids[0], board.labels[slots[0]]
+        bet_details = {'description': f'Plinko bet: {chosen_stake_label}, Landed: {landed}'}
+        win_details = {'description': f'Plinko win. Stake: {stake_amount_sats / SATOSHIS_PER_UNIT}, Landed: {landed}'}
+    else:
+        drop_id = None
+        bet_details = win_details = {'description': f'Plinko drops: {count} x {chosen_stake_label}, {rows} rows',
+                                     'plinko_drop_ids': drop_ids}
+    transactions = [{'user_id': user.id, 'amount': -total_staked, 'transaction_type': 'plinko_bet',
+                     'status': 'completed', 'details': bet_details, 'plinko_drop_id': drop_id}]
+    if total_winnings > 0:
+        transactions.append({'user_id': user.id, 'amount': total_winnings, 'transaction_type': 'plinko_win',
+                             'status': 'completed', 'details': win_details, 'plinko_drop_id': drop_id})
+    db.session.execute(insert(Transaction), transactions)
+    db.session.commit()
+
+    return [{'id': drop_id, 'slot': slot, 'slot_landed_label': board.labels[slot],
+             'multiplier': board.multipliers[slot] / 100, 'path': path_steps(path, rows),
+             'winnings': won / SATOSHIS_PER_UNIT}
+            for drop_id, path, slot, won in zip(drop_ids, paths, slots, winnings)]
+
+@plinko_bp.route('/play', methods=['POST'])
+@jwt_required()
+def plinko_play():
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
 
+    if not user:
+        current_app.logger.error(f"Plinko play attempt by non-existent user ID: {current_user_id}")
+        return jsonify({'error': 'User not found after authentication.'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    loaded_data = _load_request(PlinkoPlayRequestSchema(), current_user_id)
+
+    stake_amount_float = loaded_data['stake_amount']
+    chosen_stake_label = loaded_data['chosen_stake_label']
     stake_amount_sats = int(stake_amount_float * SATOSHIS_PER_UNIT)
 
     if user.balance < stake_amount_sats:
@@ -63,62 +115,19 @@ def plinko_play():
         raise InsufficientFundsException(status_message='Insufficient funds for Plinko game.')
 
     try:
-        multiplier = PAYOUT_MULTIPLIERS.get(slot_landed_label)
-        if multiplier is None: # Should be caught by validate_plinko_params
-            current_app.logger.error(f"Invalid slot_landed_label '{slot_landed_label}' made it past validation for user {user.id}.")
-            return jsonify(PlinkoPlayResponseSchema().dump({
-                'success': False, 'error': 'Internal error: Invalid slot outcome.'
-            })), HTTPStatus.INTERNAL_SERVER_ERROR
-
-        plinko_log = PlinkoDropLog(
-            user_id=current_user_id,
-            stake_amount=stake_amount_sats,
-            chosen_stake_label=chosen_stake_label,
-            slot_landed_label=slot_landed_label,
-            multiplier_applied=multiplier,
-            winnings_amount=0
-        )
-        db.session.add(plinko_log)
-        db.session.flush()
-
-        user.balance -= stake_amount_sats
-        bet_transaction = Transaction(
-            user_id=user.id,
-            amount=-stake_amount_sats,
-            transaction_type='plinko_bet',
-            status='completed',
-            details={'description': f'Plinko bet: {chosen_stake_label}, Landed: {slot_landed_label}'},
-            plinko_drop_id=plinko_log.id
-        )
-        db.session.add(bet_transaction)
-
-        winnings_sats = calculate_winnings(stake_amount_sats, slot_landed_label)
-        plinko_log.winnings_amount = winnings_sats
-
-        if winnings_sats > 0:
-            user.balance += winnings_sats
-            win_transaction = Transaction(
-                user_id=user.id,
-                amount=winnings_sats,
-                transaction_type='plinko_win',
-                status='completed',
-                details={'description': f'Plinko win. Stake: {stake_amount_float}, Landed: {slot_landed_label}'},
-                plinko_drop_id=plinko_log.id
-            )
-            db.session.add(win_transaction)
-
-        db.session.commit()
-
-        winnings_float = float(winnings_sats) / SATOSHIS_PER_UNIT
+        ball = _drop(user, stake_amount_sats, chosen_stake_label, loaded_data['rows'], 1)[0]
         new_balance_float = float(user.balance) / SATOSHIS_PER_UNIT
 
-        current_app.logger.info(f"Plinko play successful for user {user.id}: Bet {stake_amount_float}, Won {winnings_float}. New balance: {new_balance_float}")
+        current_app.logger.info(f"Plinko play successful for user {user.id}: Bet {stake_amount_float}, Won {ball['winnings']}. New balance: {new_balance_float}")
 
         response_data = {
             'success': True,
-            'winnings': winnings_float,
+            'winnings': ball['winnings'],
             'new_balance': new_balance_float,
-            'message': f"Bet {stake_amount_float} on {chosen_stake_label}, landed on {slot_landed_label}. Won {winnings_float}."
+            'slot_landed_label': ball['slot_landed_label'],
+            'multiplier': ball['multiplier'],
+            'path': ball['path'],
+            'message': f"Bet {stake_amount_float} on {chosen_stake_label}, landed on {ball['slot_landed_label']}. Won {ball['winnings']}."
         }
         return jsonify(PlinkoPlayResponseSchema().dump(response_data)), HTTPStatus.OK
 
@@ -129,3 +138,41 @@ def plinko_play():
             'success': False,
             'error': 'An internal error occurred during game processing.'
         })), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@plinko_bp.route('/drops', methods=['POST'])
+@jwt_required()
+def plinko_drops():
+    """
+    Autoplay: up to MAX_BALLS balls at the same stake, dropped by the server and settled together.
+    Expects JSON: { "stake_amount": <float, per ball>, "chosen_stake_label": <tier>, "rows": <8-16>, "balls": <1-100> }
+    """
+    current_user_id = get_jwt_identity()
+    user = User.query.get(current_user_id)
+    if not user:
+        current_app.logger.error(f"Plinko drops attempt by non-existent user ID: {current_user_id}")
+        return jsonify({'error': 'User not found after authentication.'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    loaded_data = _load_request(PlinkoDropsRequestSchema(), current_user_id)
+    stake_amount_sats = int(loaded_data['stake_amount'] * SATOSHIS_PER_UNIT)
+    count = loaded_data['balls']
+
+    if user.balance < stake_amount_sats * count:
+        current_app.logger.warning(f"User {user.id} insufficient funds for {count} Plinko balls: Balance {user.balance} sats, Stake {stake_amount_sats} sats each")
+        raise InsufficientFundsException(status_message='Insufficient funds for Plinko game.')
+
+    try:
+        balls = _drop(user, stake_amount_sats, loaded_data['chosen_stake_label'], loaded_data['rows'], count)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Plinko drops processing error for user {user.id}: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': 'An internal error occurred during game processing.'}), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    return jsonify(PlinkoDropsResponseSchema().dump({
+        'success': True,
+        'rows': loaded_data['rows'],
+        'balls': balls,
+        'total_staked': stake_amount_sats * count / SATOSHIS_PER_UNIT,
+        'total_winnings': sum(ball['winnings'] for ball in balls),
+        'new_balance': float(user.balance) / SATOSHIS_PER_UNIT
+    })), HTTPStatus.OK
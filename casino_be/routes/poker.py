@@ -1,25 +1,26 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
 from datetime import datetime, timezone
+from http import HTTPStatus
+from marshmallow import ValidationError
 
-from casino_be.models import db, User, PokerTable, PokerHand, PokerPlayerState # Absolute import
+from casino_be.models import db, User, PokerTable # Absolute import
 from casino_be.schemas import ( # Absolute import
     PokerTableSchema, JoinPokerTableSchema, PokerActionSchema,
     UserSchema, PokerHandSchema, PokerPlayerStateSchema
 )
 from casino_be.utils import poker_helper # Absolute import
-from sqlalchemy.orm import joinedload # For optimized querying
-
-def get_websocket_manager():
-    """Get WebSocket manager instance"""
-    try:
-        from services.websocket_manager import websocket_manager
-        return websocket_manager
-    except ImportError:
-        return None
+from casino_be.services.poker_table_actor import poker_table_actors
 
 poker_bp = Blueprint('poker', __name__, url_prefix='/api/poker')
 
+# Raised by an actor call when the actor has stopped (RuntimeError) or did not answer in time (TimeoutError)
+ACTOR_UNAVAILABLE = (RuntimeError, TimeoutError)
+
+def _actor_unavailable(table_id, error):
+    message = str(error) or f'Poker table {table_id} did not respond in time; please retry.'
+    return jsonify({'status': False, 'status_message': message}), HTTPStatus.SERVICE_UNAVAILABLE
+
 @poker_bp.route('/tables', methods=['GET'])
 def list_poker_tables():
     try:
@@ -45,7 +46,7 @@ def join_poker_table(table_id):
     seat_id = validated_data.get('seat_id')
 
     if not seat_id:
-        poker_table_obj = PokerTable.query.options(joinedload(PokerTable.player_states)).get(table_id)
+        poker_table_obj = db.session.get(PokerTable, table_id)
         if not poker_table_obj:
             return jsonify({'status': False, 'status_message': f'Poker table {table_id} not found.'}), 404
         if not poker_table_obj.is_active:
@@ -59,7 +60,15 @@ def join_poker_table(table_id):
         seat_id = available_seat
         current_app.logger.info(f"User {user.id} joining poker table {table_id}, automatically assigned to seat {seat_id}.")
 
-    result = poker_helper.handle_sit_down(user_id=user.id, table_id=table_id, seat_id=seat_id, buy_in_amount=buy_in_amount)
+    # The table's actor runs the sit-down and publishes the new seat to watchers as a diff
+    actor = poker_table_actors.get(table_id)
+    if not actor:
+        return jsonify({'status': False, 'status_message': f'Poker table {table_id} not found.'}), 404
+    try:
+        result = actor.run_db_operation(poker_helper.handle_sit_down, user_id=user.id, table_id=table_id, seat_id=seat_id, buy_in_amount=buy_in_amount)
+    except ACTOR_UNAVAILABLE as e:
+        return _actor_unavailable(table_id, e)
+    db.session.refresh(user) # Balance was debited on the actor's session
 
     if "error" in result:
         status_code = 400
@@ -71,23 +80,6 @@ def join_poker_table(table_id):
         return jsonify({'status': False, 'status_message': result['error']}), status_code
 
     updated_user_data = UserSchema().dump(user)
-    
-    # Broadcast poker table state update via WebSocket
-    websocket_manager = get_websocket_manager()
-    if websocket_manager:
-        try:
-            # Get updated table state after join
-            current_hand = PokerHand.query.filter_by(table_id=table_id)\
-                .filter(PokerHand.status.in_(['betting', 'preflop', 'flop', 'turn', 'river', 'showdown', 'in_progress'])) \
-                .order_by(PokerHand.start_time.desc())\
-                .first()
-            hand_id_to_pass = current_hand.id if current_hand else None
-            state_data = poker_helper.get_table_state(table_id=table_id, hand_id=hand_id_to_pass, user_id=user.id)
-            if "error" not in state_data:
-                websocket_manager.broadcast_poker_update(table_id, state_data)
-        except Exception as e:
-            current_app.logger.warning(f"Failed to broadcast poker join update: {e}")
-    
     current_app.logger.info(f"User {user.id} successfully joined poker table {table_id} at seat {seat_id} with buy-in {buy_in_amount}.")
     return jsonify({
         'status': True,
@@ -100,7 +92,14 @@ def join_poker_table(table_id):
 @jwt_required()
 def leave_poker_table(table_id):
     user = current_user
-    result = poker_helper.handle_stand_up(user_id=user.id, table_id=table_id)
+    actor = poker_table_actors.get(table_id)
+    if not actor:
+        return jsonify({'status': False, 'status_message': f'Poker table {table_id} not found.'}), 404
+    try:
+        result = actor.stand_up(user.id)
+    except ACTOR_UNAVAILABLE as e:
+        return _actor_unavailable(table_id, e)
+    db.session.refresh(user) # Stack was cashed out on the actor's session
 
     if "error" in result:
         status_code = 400
@@ -108,23 +107,6 @@ def leave_poker_table(table_id):
         return jsonify({'status': False, 'status_message': result['error']}), status_code
 
     updated_user_data = UserSchema().dump(user)
-    
-    # Broadcast poker table state update via WebSocket
-    websocket_manager = get_websocket_manager()
-    if websocket_manager:
-        try:
-            # Get updated table state after leave
-            current_hand = PokerHand.query.filter_by(table_id=table_id)\
-                .filter(PokerHand.status.in_(['betting', 'preflop', 'flop', 'turn', 'river', 'showdown', 'in_progress'])) \
-                .order_by(PokerHand.start_time.desc())\
-                .first()
-            hand_id_to_pass = current_hand.id if current_hand else None
-            state_data = poker_helper.get_table_state(table_id=table_id, hand_id=hand_id_to_pass, user_id=user.id)
-            if "error" not in state_data:
-                websocket_manager.broadcast_poker_update(table_id, state_data)
-        except Exception as e:
-            current_app.logger.warning(f"Failed to broadcast poker leave update: {e}")
-    
     current_app.logger.info(f"User {user.id} successfully left poker table {table_id}.")
     return jsonify({
         'status': True,
@@ -136,12 +118,13 @@ def leave_poker_table(table_id):
 @jwt_required()
 def get_poker_table_state(table_id):
     user = current_user
-    current_hand = PokerHand.query.filter_by(table_id=table_id)\
-        .filter(PokerHand.status.in_(['betting', 'preflop', 'flop', 'turn', 'river', 'showdown', 'in_progress'])) \
-        .order_by(PokerHand.start_time.desc())\
-        .first()
-    hand_id_to_pass = current_hand.id if current_hand else None
-    state_data = poker_helper.get_table_state(table_id=table_id, hand_id=hand_id_to_pass, user_id=user.id)
+    actor = poker_table_actors.get(table_id)
+    if not actor:
+        return jsonify({'status': False, 'status_message': f'Poker table {table_id} not found.'}), HTTPStatus.NOT_FOUND
+    try:
+        state_data = actor.table_state(user.id)
+    except ACTOR_UNAVAILABLE as e:
+        return _actor_unavailable(table_id, e)
 
     if "error" in state_data:
         status_code = 404 if "not found" in state_data["error"].lower() else 400
@@ -153,45 +136,27 @@ def get_poker_table_state(table_id):
 def start_poker_hand_route(table_id):
     user = current_user
     current_app.logger.info(f"User {user.id} attempting to start a new hand at table {table_id}.")
-    table = PokerTable.query.get(table_id)
-    if not table:
+    actor = poker_table_actors.get(table_id)
+    if not actor:
         current_app.logger.warning(f"Start hand attempt failed: Table {table_id} not found.")
         return jsonify({'status': False, 'status_message': f'Poker table {table_id} not found.'}), HTTPStatus.NOT_FOUND
 
-    player_state = PokerPlayerState.query.filter_by(user_id=user.id, table_id=table_id).first()
-    if not player_state or player_state.is_sitting_out:
-        current_app.logger.warning(f"User {user.id} attempt to start hand at table {table_id} failed: User not actively seated.")
-        return jsonify({'status': False, 'status_message': 'User not actively seated at this table.'}), HTTPStatus.FORBIDDEN
-
-    active_hand = PokerHand.query.filter(
-        PokerHand.table_id == table_id,
-        PokerHand.status.notin_(['completed', 'showdown'])
-    ).first()
-    if active_hand:
-        current_app.logger.warning(f"User {user.id} attempt to start hand at table {table_id} failed: Active hand {active_hand.id} already in progress (status: {active_hand.status}).")
-        return jsonify({'status': False, 'status_message': f'An active hand ({active_hand.status}) is already in progress.'}), HTTPStatus.CONFLICT
-
-    active_player_count = PokerPlayerState.query.filter(
-        PokerPlayerState.table_id == table_id,
-        PokerPlayerState.is_sitting_out == False,
-        PokerPlayerState.stack_sats > 0
-    ).count()
-    if active_player_count < 2: # MIN_PLAYERS_TO_START
-        current_app.logger.warning(f"User {user.id} attempt to start hand at table {table_id} failed: Insufficient active players ({active_player_count}).")
-        return jsonify({'status': False, 'status_message': f'Not enough active players ({active_player_count}) to start a new hand. Minimum 2 required.'}), HTTPStatus.CONFLICT
-
     try:
-        current_app.logger.info(f"All checks passed for table {table_id}. User {user.id} initiating start_new_hand.")
-        result = poker_helper.start_new_hand(table_id=table_id)
+        # Seat, active-hand and player-count checks are answered by the actor from memory
+        result = actor.start_hand(user.id)
         if "error" in result:
-            current_app.logger.error(f"Error starting new hand for table {table_id} by user {user.id}: {result['error']}")
+            current_app.logger.warning(f"Start hand attempt by user {user.id} at table {table_id} failed: {result['error']}")
             error_msg_lower = result["error"].lower()
             status_code = HTTPStatus.BAD_REQUEST
-            if "not enough active players" in error_msg_lower: status_code = HTTPStatus.CONFLICT
+            if result.get("code") == "not_seated": status_code = HTTPStatus.FORBIDDEN
+            elif result.get("code") in ("hand_in_progress", "not_enough_players"): status_code = HTTPStatus.CONFLICT
+            elif "not enough active players" in error_msg_lower: status_code = HTTPStatus.CONFLICT
             elif "table not found" in error_msg_lower: status_code = HTTPStatus.NOT_FOUND
             return jsonify({'status': False, 'status_message': result['error']}), status_code
         current_app.logger.info(f"New hand {result.get('hand_id')} started successfully at table {table_id} by user {user.id}.")
         return jsonify({'status': True, 'message': 'New hand started.', 'hand_details': result}), HTTPStatus.CREATED
+    except ACTOR_UNAVAILABLE as e:
+        return _actor_unavailable(table_id, e)
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Unexpected exception when starting new hand for table {table_id} by user {user.id}: {str(e)}", exc_info=True)
@@ -210,68 +175,31 @@ def poker_hand_action(table_id, hand_id):
     user = current_user
     action_type = validated_data['action_type'].lower()
     amount = validated_data.get('amount')
+    if action_type in ('bet', 'raise') and amount is None:
+        return jsonify({'status': False, 'status_message': f'Amount is required for a {action_type}.'}), HTTPStatus.BAD_REQUEST
 
-    hand = PokerHand.query.filter_by(id=hand_id, table_id=table_id).first()
-    if not hand:
+    actor = poker_table_actors.get(table_id)
+    if not actor:
         return jsonify({'status': False, 'status_message': f'Hand {hand_id} not found or not associated with table {table_id}.'}), HTTPStatus.NOT_FOUND
 
-    current_app.logger.debug(f"Hand {hand_id} on table {table_id}: Checking for player timeouts before action by user {user.id}.")
-    timeout_action_taken = poker_helper.check_and_handle_player_timeouts(table_id=table_id, session=db.session)
-    if timeout_action_taken:
-        current_app.logger.info(f"Hand {hand_id} on table {table_id}: Timeout action was processed. Re-fetching hand state.")
-        db.session.refresh(hand)
-        if hand.status in ['completed', 'showdown']:
-            current_app.logger.info(f"Hand {hand_id} is now '{hand.status}' after timeout processing. Action by {user.id} may no longer be valid or needed.")
-
-    if hand.current_turn_user_id != user.id:
-        if hand.status not in ['betting', 'preflop', 'flop', 'turn', 'river', 'in_progress']:
-             return jsonify({'status': False, 'status_message': f'Betting is over for hand {hand_id}. Current status: {hand.status}'}), HTTPStatus.BAD_REQUEST
-        return jsonify({'status': False, 'status_message': "It's not your turn."}), HTTPStatus.FORBIDDEN
-
-    result = None
-    if action_type == 'fold': result = poker_helper.handle_fold(user_id=user.id, table_id=table_id, hand_id=hand_id)
-    elif action_type == 'check': result = poker_helper.handle_check(user_id=user.id, table_id=table_id, hand_id=hand_id)
-    elif action_type == 'call': result = poker_helper.handle_call(user_id=user.id, table_id=table_id, hand_id=hand_id)
-    elif action_type == 'bet':
-        if amount is None: return jsonify({'status': False, 'status_message': 'Amount is required for a bet.'}), HTTPStatus.BAD_REQUEST
-        result = poker_helper.handle_bet(user_id=user.id, table_id=table_id, hand_id=hand_id, amount=amount)
-    elif action_type == 'raise':
-        if amount is None: return jsonify({'status': False, 'status_message': 'Amount is required for a raise.'}), HTTPStatus.BAD_REQUEST
-        result = poker_helper.handle_raise(user_id=user.id, table_id=table_id, hand_id=hand_id, amount=amount)
-    else:
-        return jsonify({'status': False, 'status_message': f'Invalid action type: {action_type}'}), HTTPStatus.BAD_REQUEST
+    # Turn order, expired clocks and bet validation are all checked by the actor against its in-memory state
+    try:
+        result = actor.act(user.id, hand_id, action_type, amount)
+    except ACTOR_UNAVAILABLE as e:
+        return _actor_unavailable(table_id, e)
 
-    if result and "error" in result:
+    if "error" in result:
         status_code = HTTPStatus.BAD_REQUEST
         error_msg_lower = result["error"].lower()
         if "not found" in error_msg_lower: status_code = HTTPStatus.NOT_FOUND
-        elif "not active in hand" in error_msg_lower: status_code = HTTPStatus.FORBIDDEN
+        elif "not active in hand" in error_msg_lower or "not your turn" in error_msg_lower: status_code = HTTPStatus.FORBIDDEN
         elif "insufficient stack" in error_msg_lower: status_code = HTTPStatus.PAYMENT_REQUIRED
         return jsonify({'status': False, 'status_message': result['error'], 'details': result.get('details')}), status_code
 
     updated_user_data = UserSchema().dump(user)
-    game_flow_data = result.get("game_flow", {}) if result else {}
-    
-    # Broadcast poker action via WebSocket
-    websocket_manager = get_websocket_manager()
-    if websocket_manager:
-        try:
-            # Get updated table state
-            state_data = poker_helper.get_table_state(table_id=table_id, hand_id=hand_id, user_id=user.id)
-            if "error" not in state_data:
-                websocket_manager.broadcast_poker_update(table_id, state_data)
-                
-                # Also broadcast the specific action
-                action_data = {
-                    'user_id': user.id,
-                    'action_type': action_type,
-                    'amount': amount,
-                    'hand_id': hand_id
-                }
-                websocket_manager.broadcast_poker_action(table_id, action_data)
-        except Exception as e:
-            current_app.logger.warning(f"Failed to broadcast poker action update: {e}")
-    
+    game_flow_data = result.get("game_flow", {})
+
+    # Watchers get the change as a poker_diff published by the actor, not a full state broadcast
     current_app.logger.info(f"User {user.id} performed action '{action_type}' (amount: {amount if amount is not None else 'N/A'}) on hand {hand_id} at table {table_id}.")
     return jsonify({
         'status': True,
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
 from datetime import datetime, timezone
+from sqlalchemy import insert
 
-from casino_be.models import db, User, RouletteGame # Absolute import
+from casino_be.models import db, User, RouletteGame, Transaction # Absolute import
 from casino_be.utils import roulette_helper # Absolute import
+from casino_be.services.table_rounds import get_table_rounds
 
 roulette_bp = Blueprint('roulette', __name__, url_prefix='/api/roulette')
 
@@ -28,6 +30,11 @@ def roulette_bet():
     except ValueError:
         return jsonify({"error": "Invalid bet_amount"}), 400
 
+    try:
+        mask, bet_multiplier = roulette_helper.compile_bet(bet_type_req, bet_value_req)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     user = current_user
     # Assuming user.balance is in main currency unit, not satoshis, based on original code.
     # If balance is in satoshis, conversion would be needed here or amounts handled as satoshis throughout.
@@ -37,19 +44,14 @@ def roulette_bet():
     user.balance -= bet_amount
 
     winning_number = roulette_helper.spin_wheel()
-    multiplier = roulette_helper.get_bet_type_multiplier(bet_type_req, bet_value_req, winning_number)
+    multiplier = bet_multiplier if mask >> winning_number & 1 else 0
 
     payout = 0
     if multiplier > 0:
         payout = roulette_helper.calculate_payout(bet_amount, multiplier)
         user.balance += payout
 
-    stored_bet_type = bet_type_req
-    if bet_value_req is not None and bet_type_req in ["straight_up", "column", "dozen"]:
-        stored_bet_type = f"{bet_type_req}_{bet_value_req}"
-    elif bet_type_req not in ["red", "black", "even", "odd", "low", "high"]:
-        if bet_value_req is not None:
-             stored_bet_type = f"{bet_type_req}_{bet_value_req}"
+    stored_bet_type = roulette_helper.describe_bet(bet_type_req, bet_value_req)
 
     game_record = RouletteGame(
         user_id=user.id,
@@ -83,6 +85,86 @@ def roulette_bet():
         "new_balance": user.balance # user.balance is Python float here
     }), 200
 
+@roulette_bp.route('/slip', methods=['POST'])
+@jwt_required()
+def roulette_slip():
+    """
+    Several bets on one private spin, settled together in one commit.
+    Expects JSON: { "bets": [ { "bet_type": <str>, "bet_value": <optional>, "bet_amount": <int sats> }, ... ] }
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Missing data"}), 400
+    try:
+        slip = roulette_helper.compile_slip(data.get('bets'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    user = current_user
+    total_staked = sum(bet['amount'] for bet in slip)
+    if user.balance < total_staked:
+        return jsonify({"error": "Insufficient balance"}), 400
+
+    winning_number = roulette_helper.spin_wheel()
+    paid = roulette_helper.settle_bets([bet['mask'] for bet in slip], [bet['amount'] for bet in slip],
+                                       [bet['multiplier'] for bet in slip], winning_number)
+    total_returned = sum(paid)
+    now = datetime.now(timezone.utc)
+
+    try:
+        user.balance = User.balance + (total_returned - total_staked) # Applied relative to the stored balance
+        game_ids = db.session.scalars(
+            insert(RouletteGame).returning(RouletteGame.id, sort_by_parameter_order=True),
+            [{'user_id': user.id, 'bet_amount': bet['amount'], 'bet_type': bet['bet_type'],
+              'winning_number': winning_number, 'payout': returned, 'timestamp': now}
+             for bet, returned in zip(slip, paid)]
+        ).all()
+        details = {'roulette_game_ids': game_ids, 'bets': len(slip)}
+        transactions = [{'user_id': user.id, 'amount': -total_staked, 'transaction_type': 'roulette_wager',
+                         'status': 'completed', 'details': details}]
+        if total_returned > 0:
+            transactions.append({'user_id': user.id, 'amount': total_returned, 'transaction_type': 'roulette_win',
+                                 'status': 'completed', 'details': {**details, 'winning_number': winning_number}})
+        db.session.execute(insert(Transaction), transactions)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Roulette slip by user {user.id} failed: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to process bet due to a server error."}), 500
+
+    return jsonify({
+        "winning_number": winning_number,
+        "bets": [{"id": game_id, "bet_type": bet['bet_type'], "bet_amount": bet['amount'], "payout": returned}
+                 for game_id, bet, returned in zip(game_ids, slip, paid)],
+        "total_staked": total_staked,
+        "total_returned": total_returned,
+        "new_balance": user.balance
+    }), 200
+
+@roulette_bp.route('/tables/<int:table_id>/round/bets', methods=['POST'])
+@jwt_required()
+def roulette_round_bet(table_id):
+    """
+    Bet on the table's shared spin. Every player's bets settle together on one spin when the
+    betting window closes; the result is broadcast to the table's room and kept for GET .../round.
+    Expects JSON: { "bet_type": <str>, "bet_value": <optional>, "bet_amount": <int sats> }
+                  or { "bets": [ <the same>, ... ] }
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Missing data"}), 400
+
+    result = get_table_rounds().get('roulette').place_bet(table_id, current_user, data)
+    if "error" in result:
+        return jsonify({"error": result['error']}), 404 if result['code'] == 'not_found' else 400
+    return jsonify(result), 202
+
+@roulette_bp.route('/tables/<int:table_id>/round', methods=['GET'])
+@jwt_required()
+def roulette_round(table_id):
+    """The table's open round and its recently settled spins, with the caller's own bets and returns"""
+    return jsonify(get_table_rounds().get('roulette').round_state(table_id, current_user.id)), 200
+
 @roulette_bp.route('/history', methods=['GET'])
 @jwt_required()
 def roulette_history():
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, current_user
 from marshmallow import ValidationError
-from datetime import datetime, timezone
+from sqlalchemy.orm import contains_eager
 
 from casino_be.models import db, User, SpacecrashGame, SpacecrashBet # Absolute import
 from casino_be.schemas import ( # Absolute import
@@ -9,35 +9,47 @@ from casino_be.schemas import ( # Absolute import
     SpacecrashGameHistorySchema, SpacecrashPlayerBetSchema
 )
 from casino_be.utils import spacecrash_handler # Absolute import
+from casino_be.services.spacecrash_game_loop import SpacecrashStateCache, build_game_state, DEFAULT_ROOM
 from .admin import is_admin # Relative import for sibling module
 
-def get_websocket_manager():
-    """Get WebSocket manager instance"""
-    try:
-        from services.websocket_manager import websocket_manager
-        return websocket_manager
-    except ImportError:
-        return None
+def _get_room(room_name):
+    """Resolve a room name (default room when omitted) against the game loop's configured rooms"""
+    return current_app.spacecrash_game_loop.get_room(room_name or DEFAULT_ROOM)
+
+def _unknown_room_response(room_name):
+    return jsonify({'status': False, 'status_message': f'Unknown Spacecrash room: {room_name}.'}), 404
+
+def _queue_bet_event(room, event_type, bet_data, game_id):
+    """Hand a bet delta to the room's game loop buffer, which broadcasts queued events once per tick"""
+    room.bet_events.push(game_id, dict(bet_data, event=event_type))
 
 spacecrash_bp = Blueprint('spacecrash', __name__, url_prefix='/api/spacecrash')
 
 @spacecrash_bp.route('/bet', methods=['POST'])
 @jwt_required()
 def spacecrash_place_bet():
-    data = request.get_json()
+    data = request.get_json() or {}
+    room_name = data.pop('room', None) or DEFAULT_ROOM # Not a bet column; resolved against the loop's rooms
+    room = _get_room(room_name)
+    if not room:
+        return _unknown_room_response(room_name)
+
     try:
-        validated_data = SpacecrashBetSchema().load(data)
+        validated_bet = SpacecrashBetSchema().load(data) # load_instance=True: returns a transient SpacecrashBet
     except ValidationError as err:
         return jsonify({'status': False, 'status_message': err.messages}), 400
 
     user = current_user
-    bet_amount = validated_data['bet_amount']
-    auto_eject_at = validated_data.get('auto_eject_at')
+    bet_amount = validated_bet.bet_amount
+    auto_eject_at = validated_bet.auto_eject_at
+
+    if bet_amount < room.min_bet or (room.max_bet is not None and bet_amount > room.max_bet):
+        return jsonify({'status': False, 'status_message': f'Bet amount is outside the limits for room {room.name}.'}), 400
 
     if user.balance < bet_amount:
         return jsonify({'status': False, 'status_message': 'Insufficient balance.'}), 400
 
-    current_game = SpacecrashGame.query.filter_by(status='betting').order_by(SpacecrashGame.created_at.desc()).first()
+    current_game = SpacecrashGame.query.filter_by(status='betting', room=room.name).order_by(SpacecrashGame.created_at.desc()).first()
     if not current_game:
         return jsonify({'status': False, 'status_message': 'No active game accepting bets at the moment.'}), 404
 
@@ -54,24 +66,11 @@ def spacecrash_place_bet():
         db.session.add(new_bet)
         db.session.commit()
 
-        # Broadcast game state update via WebSocket
-        websocket_manager = get_websocket_manager()
-        if websocket_manager:
-            try:
-                # Get updated game data with new bet
-                updated_game = SpacecrashGame.query.get(current_game.id)
-                game_data = SpacecrashGameSchema().dump(updated_game)
-                
-                # Add current bets to game data
-                bets_query = SpacecrashBet.query.filter_by(game_id=updated_game.id).all()
-                game_data['player_bets'] = SpacecrashPlayerBetSchema(many=True).dump(bets_query)
-                
-                websocket_manager.broadcast_spacecrash_update(game_data)
-            except Exception as e:
-                current_app.logger.warning(f"Failed to broadcast Spacecrash bet update: {e}")
-
-        current_app.logger.info(f"User {user.id} placed Spacecrash bet {new_bet.id} for {bet_amount} on game {current_game.id}")
-        return jsonify({'status': True, 'status_message': 'Bet placed successfully.', 'bet': SpacecrashPlayerBetSchema().dump(new_bet)}), 201
+        bet_data = SpacecrashPlayerBetSchema().dump(new_bet)
+        _queue_bet_event(room, 'bet', bet_data, current_game.id)
+
+        current_app.logger.info(f"User {user.id} placed Spacecrash bet {new_bet.id} for {bet_amount} on game {current_game.id} in room {room.name}")
+        return jsonify({'status': True, 'status_message': 'Bet placed successfully.', 'bet': bet_data}), 201
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error placing Spacecrash bet for user {user.id}: {str(e)}", exc_info=True)
@@ -81,11 +80,17 @@ def spacecrash_place_bet():
 @jwt_required()
 def spacecrash_eject_bet():
     user = current_user
-    active_bet = SpacecrashBet.query.join(SpacecrashGame).filter(
+    data = request.get_json(silent=True) or {}
+    query = SpacecrashBet.query.join(SpacecrashGame).options(
+        contains_eager(SpacecrashBet.game) # Load the game from the same join instead of a second query
+    ).filter(
         SpacecrashBet.user_id == user.id,
         SpacecrashGame.status == 'in_progress',
         SpacecrashBet.status == 'placed' # Ensure bet is active (not already ejected/busted)
-    ).first()
+    )
+    if data.get('room'): # Players with bets in several rooms say which one to eject from
+        query = query.filter(SpacecrashGame.room == data['room'])
+    active_bet = query.first()
 
     if not active_bet:
         return jsonify({'status': False, 'status_message': 'No active bet to eject or game is not in progress.'}), 404
@@ -123,38 +128,46 @@ def spacecrash_eject_bet():
 
     try:
         db.session.commit()
-        
-        # Broadcast game state update via WebSocket
-        websocket_manager = get_websocket_manager()
-        if websocket_manager:
-            try:
-                # Get updated game data with ejected bet
-                updated_game = SpacecrashGame.query.get(active_bet.game_id)
-                game_data = SpacecrashGameSchema().dump(updated_game)
-                
-                # Add current bets to game data
-                bets_query = SpacecrashBet.query.filter_by(game_id=updated_game.id).all()
-                game_data['player_bets'] = SpacecrashPlayerBetSchema(many=True).dump(bets_query)
-                
-                websocket_manager.broadcast_spacecrash_update(game_data)
-            except Exception as e:
-                current_app.logger.warning(f"Failed to broadcast Spacecrash eject update: {e}")
-        
+
+        bet_data = SpacecrashPlayerBetSchema().dump(active_bet)
+        room = _get_room(active_bet.game.room)
+        if room: # A room dropped from config has no loop to broadcast for it
+            _queue_bet_event(room, 'eject', bet_data, active_bet.game_id)
+
         return jsonify({
             'status': True, 'status_message': message,
             'ejected_at': active_bet.ejected_at,
             'win_amount': active_bet.win_amount,
-            'bet': SpacecrashPlayerBetSchema().dump(active_bet)
+            'bet': bet_data
         }), 200
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Error ejecting Spacecrash bet for user {user.id}: {str(e)}", exc_info=True)
         return jsonify({'status': False, 'status_message': 'Failed to eject bet due to an internal error.'}), 500
 
+@spacecrash_bp.route('/rooms', methods=['GET'])
+def spacecrash_rooms():
+    rooms = current_app.spacecrash_game_loop.rooms.values()
+    return jsonify({'status': True, 'rooms': [room.to_dict() for room in rooms]}), 200
+
 @spacecrash_bp.route('/current_game', methods=['GET'])
 def spacecrash_current_game_state():
     """Get current SpaceCrash game state with real-time multiplier"""
+    room_name = request.args.get('room', DEFAULT_ROOM)
+    room = _get_room(room_name)
+    if not room:
+        return _unknown_room_response(room_name)
+
+    body, status_code = room.state_cache.get(
+        SpacecrashStateCache.CURRENT_GAME,
+        lambda: _build_current_game_payload(room)
+    )
+    return current_app.response_class(body, status=status_code, mimetype='application/json')
+
+def _build_current_game_payload(room):
+    """Query the room's current (or last completed) game; used when no game loop is publishing snapshots"""
     game = SpacecrashGame.query.filter(
+        SpacecrashGame.room == room.name,
         SpacecrashGame.status.in_(['in_progress', 'betting'])
     ).order_by(
         db.case(
@@ -166,37 +179,29 @@ def spacecrash_current_game_state():
     ).first()
 
     if not game: # If no betting or in_progress, show last completed
-        game = SpacecrashGame.query.filter_by(status='completed').order_by(SpacecrashGame.game_end_time.desc()).first()
+        game = SpacecrashGame.query.filter_by(status='completed', room=room.name).order_by(SpacecrashGame.game_end_time.desc()).first()
         if not game:
-            return jsonify({'status': False, 'status_message': 'No current or recent game found.'}), 404
-
-    game_data = SpacecrashGameSchema().dump(game)
-
-    # Add real-time multiplier and timing information
-    if game.status == 'in_progress' and game.game_start_time:
-        game_data['current_multiplier'] = spacecrash_handler.get_current_multiplier(game)
-    elif game.status == 'betting': # Game is betting, multiplier is 1.0 before start
-        game_data['current_multiplier'] = 1.0
-        # Add betting time remaining
-        if game.betting_start_time:
-            from services.spacecrash_game_loop import spacecrash_game_loop
-            betting_elapsed = (datetime.now(timezone.utc) - game.betting_start_time).total_seconds()
-            time_remaining = max(0, spacecrash_game_loop.BETTING_PHASE_DURATION - betting_elapsed)
-            game_data['betting_time_remaining'] = time_remaining
-    elif game.status == 'completed': # Game is completed, show actual crash point
-        game_data['current_multiplier'] = game.crash_point
-
-    bets_query = SpacecrashBet.query.filter_by(game_id=game.id).all()
-    game_data['player_bets'] = SpacecrashPlayerBetSchema(many=True).dump(bets_query)
-    return jsonify({'status': True, 'game': game_data}), 200
+            return {'status': False, 'status_message': 'No current or recent game found.'}, 404
+
+    bets = SpacecrashBet.query.filter_by(game_id=game.id).all()
+    return {'status': True, 'game': build_game_state(game, bets, room.betting_phase_duration)}, 200
 
 @spacecrash_bp.route('/history', methods=['GET'])
 def spacecrash_game_history():
-    recent_games = SpacecrashGame.query.filter_by(status='completed').order_by(SpacecrashGame.game_end_time.desc()).limit(20).all()
-    if not recent_games:
-        return jsonify({'status': True, 'history': []}), 200
-    history_data = SpacecrashGameHistorySchema(many=True).dump(recent_games)
-    return jsonify({'status': True, 'history': history_data}), 200
+    room_name = request.args.get('room', DEFAULT_ROOM)
+    room = _get_room(room_name)
+    if not room:
+        return _unknown_room_response(room_name)
+
+    body, status_code = room.state_cache.get(
+        SpacecrashStateCache.HISTORY,
+        lambda: _build_history_payload(room.name, room.state_cache.history.maxlen)
+    )
+    return current_app.response_class(body, status=status_code, mimetype='application/json')
+
+def _build_history_payload(room_name, limit):
+    recent_games = SpacecrashGame.query.filter_by(status='completed', room=room_name).order_by(SpacecrashGame.game_end_time.desc()).limit(limit).all()
+    return {'status': True, 'history': SpacecrashGameHistorySchema(many=True).dump(recent_games)}, 200
 
 @spacecrash_bp.route('/admin/next_phase', methods=['POST'])
 @jwt_required()
@@ -210,6 +215,10 @@ def spacecrash_admin_next_phase():
     # Optional params for specific phase transitions, e.g., client_seed for 'in_progress'
     client_seed_param = data.get('client_seed', 'default_client_seed_for_testing_123')
     nonce_param = data.get('nonce', 1)
+    room_name = data.get('room', DEFAULT_ROOM)
+    room = _get_room(room_name)
+    if not room:
+        return _unknown_room_response(room_name)
 
 
     game = None
@@ -217,18 +226,18 @@ def spacecrash_admin_next_phase():
         game = SpacecrashGame.query.get(game_id)
     else: # Try to find a suitable game based on target_phase
         if target_phase == 'betting': # Start betting for a 'pending' game or create new if last was 'completed'
-            game = SpacecrashGame.query.filter_by(status='pending').order_by(SpacecrashGame.created_at.desc()).first()
+            game = SpacecrashGame.query.filter_by(status='pending', room=room.name).order_by(SpacecrashGame.created_at.desc()).first()
             if not game: # Or if last game is completed/cancelled, create a new one
-                 last_game = SpacecrashGame.query.order_by(SpacecrashGame.created_at.desc()).first()
+                 last_game = SpacecrashGame.query.filter_by(room=room.name).order_by(SpacecrashGame.created_at.desc()).first()
                  if not last_game or last_game.status in ['completed', 'cancelled']:
-                    game = spacecrash_handler.create_new_game()
+                    game = spacecrash_handler.create_new_game(room=room.name)
                     db.session.add(game) # Add to session, commit will be handled by handler or at end
                  else: # A game is in a state that doesn't allow new game creation (e.g. betting/in_progress)
                     return jsonify({'status': False, 'status_message': f'Cannot start new game; game {last_game.id} is currently {last_game.status}.'}), 400
         elif target_phase == 'in_progress':
-            game = SpacecrashGame.query.filter_by(status='betting').order_by(SpacecrashGame.created_at.desc()).first()
+            game = SpacecrashGame.query.filter_by(status='betting', room=room.name).order_by(SpacecrashGame.created_at.desc()).first()
         elif target_phase == 'completed':
-            game = SpacecrashGame.query.filter_by(status='in_progress').order_by(SpacecrashGame.created_at.desc()).first()
+            game = SpacecrashGame.query.filter_by(status='in_progress', room=room.name).order_by(SpacecrashGame.created_at.desc()).first()
 
     if not game:
         return jsonify({'status': False, 'status_message': f'No suitable game found to transition for ID {game_id or "any"} to phase {target_phase}.'}), 404
@@ -244,7 +253,7 @@ def spacecrash_admin_next_phase():
                 # This logic assumes 'game' is the correct instance to move to betting.
                 # If 'game' is an old completed game, create_new_game should have been called before this.
                 if game.status != 'pending': # If it's completed/cancelled, implies we want a new game cycle
-                    game = spacecrash_handler.create_new_game()
+                    game = spacecrash_handler.create_new_game(room=game.room)
                     db.session.add(game)
                     db.session.flush() # Ensure game has ID if new
                 success = spacecrash_handler.start_betting_phase(game)
@@ -253,7 +262,9 @@ def spacecrash_admin_next_phase():
             if game.status == 'betting':
                 # Ensure client_seed is set if not already (e.g. for testing)
                 current_client_seed = game.client_seed or client_seed_param
-                success = spacecrash_handler.start_game_round(game, current_client_seed, nonce_param)
+                game_room = _get_room(game.room)
+                house_edge = game_room.house_edge if game_room else room.house_edge
+                success = spacecrash_handler.start_game_round(game, current_client_seed, nonce_param, house_edge=house_edge)
                 message = f"Game {game.id} started (in progress). Crash point: {game.crash_point}" if success else f"Failed to start game {game.id}."
         elif target_phase == 'completed':
             if game.status == 'in_progress':
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields, validate, ValidationError, pre_load, validates, validates_schema
+from marshmallow import Schema, fields, validate, ValidationError, pre_load, post_dump, validates, validates_schema
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, auto_field
 from marshmallow.validate import OneOf, Range, Length, Email, Regexp
 from datetime import datetime, timezone
@@ -14,7 +14,8 @@ from .models import ( # Relative import
     PlinkoDropLog,  # Plinko models
     BaccaratTable, BaccaratHand, BaccaratAction # Baccarat models
 )
-from .utils.plinko_helper import STAKE_CONFIG, PAYOUT_MULTIPLIERS # Relative import
+from .utils.plinko_helper import STAKE_CONFIG, PLINKO_ROWS, DEFAULT_ROWS, MAX_BALLS # Relative import
+from .utils.blackjack_helper import hand_view # Relative import
 from .utils.security import validate_password_strength, sanitize_input # Relative import
 
 # --- Enhanced Security Validators ---
@@ -399,6 +400,7 @@ class BlackjackTableSchema(SQLAlchemyAutoSchema):
         load_instance = True
         sqla_session = db.session
         include_relationships = True
+        exclude = ("shoe_state",) # The undealt cards never leave the server
 
 class BlackjackCardSchema(Schema):
     suit = fields.Str()
@@ -418,6 +420,12 @@ class BlackjackHandSchema(SQLAlchemyAutoSchema):
         load_instance = True
         sqla_session = db.session
 
+    @post_dump(pass_original=True)
+    def add_hand_view(self, data, original, **kwargs):
+        """Cards and hands are replayed from the action log; the hole card stays hidden while the hand is active"""
+        data.update(hand_view(original, reveal=False))
+        return data
+
 class BlackjackActionSchema(SQLAlchemyAutoSchema):
     class Meta:
         model = BlackjackAction
@@ -475,6 +483,7 @@ class SpacecrashGameSchema(SQLAlchemyAutoSchema):
     crash_point = auto_field(dump_only=True)
     public_seed = auto_field(dump_only=True)
     status = auto_field(dump_only=True)
+    room = auto_field(dump_only=True)
     game_start_time = auto_field(dump_only=True)
     game_end_time = auto_field(dump_only=True)
     created_at = auto_field(dump_only=True)
@@ -487,13 +496,14 @@ class SpacecrashGameHistorySchema(SQLAlchemyAutoSchema):
     class Meta:
         model = SpacecrashGame
         sqla_session = db.session
-        only = ("id", "crash_point", "game_end_time", "public_seed", "status") # Only show relevant history fields
+        only = ("id", "crash_point", "game_end_time", "public_seed", "status", "room") # Only show relevant history fields
 
     id = auto_field(dump_only=True)
     crash_point = auto_field(dump_only=True)
     game_end_time = auto_field(dump_only=True)
     public_seed = auto_field(dump_only=True)
     status = auto_field(dump_only=True)
+    room = auto_field(dump_only=True)
 
 # --- Poker Schemas (New) ---
 
@@ -541,7 +551,8 @@ class PokerTableSchema(SQLAlchemyAutoSchema):
         include_relationships = True
         # Exclude game_sessions to avoid circular dependency with GameSessionSchema.
         # Hands might be too much for a list view, consider a separate endpoint or flag.
-        exclude = ("game_sessions",)
+        # The actor lease columns are internal to the poker actors.
+        exclude = ("game_sessions", "actor_owner", "actor_lease_until")
 
     id = auto_field(dump_only=True)
     name = auto_field()
@@ -639,12 +650,38 @@ class PokerTableStateResponseSchema(Schema):
 class PlinkoPlayRequestSchema(Schema):
     stake_amount = fields.Float(required=True, validate=validate.Range(min=0.01))
     chosen_stake_label = fields.String(required=True, validate=validate.OneOf(list(STAKE_CONFIG.keys())))
-    slot_landed_label = fields.String(required=True, validate=validate.OneOf(list(PAYOUT_MULTIPLIERS.keys())))
+    rows = fields.Integer(load_default=DEFAULT_ROWS, validate=validate.Range(min=PLINKO_ROWS.start, max=PLINKO_ROWS.stop - 1))
+    slot_landed_label = fields.String(load_default=None) # Accepted from older clients but ignored: the server drops the ball
+
+class PlinkoDropsRequestSchema(Schema):
+    stake_amount = fields.Float(required=True, validate=validate.Range(min=0.01)) # Per ball
+    chosen_stake_label = fields.String(required=True, validate=validate.OneOf(list(STAKE_CONFIG.keys())))
+    rows = fields.Integer(load_default=DEFAULT_ROWS, validate=validate.Range(min=PLINKO_ROWS.start, max=PLINKO_ROWS.stop - 1))
+    balls = fields.Integer(required=True, validate=validate.Range(min=1, max=MAX_BALLS))
+
+class PlinkoBallSchema(Schema):
+    id = fields.Integer()
+    slot = fields.Integer()
+    slot_landed_label = fields.String()
+    multiplier = fields.Float()
+    path = fields.List(fields.Integer()) # 0 for left, 1 for right, row by row
+    winnings = fields.Float()
+
+class PlinkoDropsResponseSchema(Schema):
+    success = fields.Boolean(required=True)
+    rows = fields.Integer()
+    balls = fields.List(fields.Nested(PlinkoBallSchema))
+    total_staked = fields.Float()
+    total_winnings = fields.Float()
+    new_balance = fields.Float()
 
 class PlinkoPlayResponseSchema(Schema):
     success = fields.Boolean(required=True)
     winnings = fields.Float(allow_none=True) # Allow none if error or no win
     new_balance = fields.Float(allow_none=True) # Allow none if error
+    slot_landed_label = fields.String(allow_none=True)
+    multiplier = fields.Float(allow_none=True)
+    path = fields.List(fields.Integer(), allow_none=True)
     message = fields.String(allow_none=True)
     error = fields.String(allow_none=True)
 
@@ -704,7 +741,7 @@ class BaccaratHandSchema(SQLAlchemyAutoSchema):
         sqla_session = db.session
         # Define fields to include to control what's exposed
         fields = (
-            "id", "user_id", "table_id", "game_session_id",
+            "id", "user_id", "table_id", "game_session_id", "round_id",
             "initial_bet_player", "initial_bet_banker", "initial_bet_tie", "total_bet_amount",
             "win_amount", "player_cards", "banker_cards", "player_score", "banker_score",
             "outcome", "commission_paid", "status", "details",
@@ -716,6 +753,7 @@ class BaccaratHandSchema(SQLAlchemyAutoSchema):
     user_id = auto_field(dump_only=True)
     table_id = auto_field(dump_only=True)
     game_session_id = auto_field(dump_only=True)
+    round_id = auto_field(dump_only=True)
     initial_bet_player = auto_field()
     initial_bet_banker = auto_field()
     initial_bet_tie = auto_field()
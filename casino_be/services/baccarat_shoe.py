@@ -0,0 +1,41 @@
+"""
+Baccarat Shoes
+One persistent multi-deck shoe per baccarat table, with the traditional burn and a deep cut card
+"""
+
+from casino_be.services.card_shoe import CardShoe, ShoeRegistry
+
+BACCARAT_DECKS = 6
+PENETRATION = 0.95  # Leaves about 15 cards behind the cut card in a six-deck shoe
+
+
+class BaccaratShoe(CardShoe):
+    """
+    A baccarat table's shoe. Each new shoe turns over its first card and burns that many more
+    (face cards and tens count 10, an ace 1); the burned cards are kept on the shoe for audit.
+    """
+
+    def burn(self):
+        first = self.deck.deal_str()
+        rank = first[1]
+        count = 1 if rank == 'A' else 10 if rank in 'TJQK' else int(rank)
+        self.burned = [first] + self.deck.deal_strs(min(count, self.deck.remaining))
+
+
+class BaccaratShoeRegistry(ShoeRegistry):
+    """Shoes for every baccarat table"""
+
+    shoe_class = BaccaratShoe
+    game = 'Baccarat'
+    penetration_config = 'BACCARAT_SHOE_PENETRATION'
+    preshuffle_config = 'BACCARAT_PRESHUFFLE'
+    default_decks = BACCARAT_DECKS
+    default_penetration = PENETRATION
+
+
+# Global instance
+baccarat_shoes = BaccaratShoeRegistry()
+
+def get_baccarat_shoes():
+    """Get the global baccarat shoe registry"""
+    return baccarat_shoes
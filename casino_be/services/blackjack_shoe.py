@@ -0,0 +1,27 @@
+"""
+Blackjack Shoes
+One persistent multi-deck shoe per blackjack table, dealt down to a cut card and then replaced
+"""
+
+from casino_be.services.card_shoe import CardShoe, ShoeRegistry
+
+
+class BlackjackShoe(CardShoe):
+    """A blackjack table's shoe; nothing is burned, and the cut card defaults to 75% penetration"""
+
+
+class BlackjackShoeRegistry(ShoeRegistry):
+    """Shoes for every blackjack table; penetration may be overridden per table in rules['penetration']"""
+
+    shoe_class = BlackjackShoe
+    game = 'Blackjack'
+    penetration_config = 'BLACKJACK_SHOE_PENETRATION'
+    preshuffle_config = 'BLACKJACK_PRESHUFFLE'
+
+
+# Global instance
+blackjack_shoes = BlackjackShoeRegistry()
+
+def get_blackjack_shoes():
+    """Get the global blackjack shoe registry"""
+    return blackjack_shoes
@@ -0,0 +1,241 @@
+"""
+Card Shoes
+Persistent multi-deck shoes for the table games, dealt down to a cut card and then replaced
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import inspect, select
+
+from casino_be.models import db
+from casino_be.utils import cards
+
+logger = logging.getLogger(__name__)
+
+PENETRATION = 0.75          # Share of the shoe dealt before the cut card comes out
+MIN_CARDS_BEHIND_CUT = 10   # Enough for one more round however deep the cut is placed
+
+
+class CardShoe:
+    """
+    A table's shoe: a cards.Deck dealt by cursor, and the number of cards left behind the cut
+    card. Hands are dealt to completion from the shoe they started in; the cut card only takes
+    effect at the start of the next hand. If a long hand does use the last card, the shoe is
+    replaced on the spot. Every method is safe to call from concurrent requests, and
+    `with shoe.dealing():` keeps one hand's cards together when hands share the shoe.
+    Games that burn cards from each new shoe override burn().
+    """
+
+    def __init__(self, deck: cards.Deck, num_decks: int, cut: int, number: int = 1):
+        self.deck = deck
+        self.num_decks = num_decks
+        self.cut = cut          # Cards behind the cut card; the shoe is finished once remaining <= cut
+        self.number = number    # Counts shoes at this table; tagged on each hand for audit
+        self.burned: list[str] = []
+        self.next_shoe: Optional[Future] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def shuffled(cls, num_decks: int, penetration: float = PENETRATION, number: int = 1,
+                 deck: Optional[cards.Deck] = None) -> 'CardShoe':
+        shoe = cls(deck if deck is not None else cards.Deck.shuffled(num_decks), num_decks, 0, number)
+        shoe.burn()
+        shoe.cut = cut_position(shoe.deck.remaining, penetration)
+        return shoe
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> 'CardShoe':
+        return cls(cards.Deck.from_state(snapshot['deck']), snapshot['decks'], snapshot['cut'], snapshot['shoe'])
+
+    def snapshot(self) -> dict:
+        """
+        The undealt cards and cut position as stored in the table's shoe_state (~420 characters for
+        6 decks), with the shoe number and cards dealt from it that together version the snapshot
+        """
+        with self._lock:
+            return {'deck': self.deck.to_state(), 'cut': self.cut, 'shoe': self.number, 'decks': self.num_decks,
+                    'dealt': self.dealt}
+
+    @property
+    def dealt(self) -> int:
+        """Cards dealt (or burned) from this shoe so far"""
+        return self.num_decks * 52 - self.deck.remaining
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        return (self.number, self.dealt)
+
+    def dealing(self):
+        """Context manager holding the shoe for one hand"""
+        return self._lock
+
+    def burn(self):
+        """Cards a fresh shoe discards before its first hand (none by default)"""
+
+    @property
+    def remaining(self) -> int:
+        return self.deck.remaining
+
+    @property
+    def past_cut(self) -> bool:
+        return self.deck.remaining <= self.cut
+
+    def deal_str(self) -> str:
+        with self._lock:
+            if not self.deck.remaining:
+                self._replace(penetration=None)
+            return self.deck.deal_str()
+
+    def deal_strs(self, count: int) -> list[str]:
+        with self._lock:
+            return [self.deal_str() for _ in range(count)]
+
+    def begin_hand(self, penetration: float = PENETRATION) -> bool:
+        """Shuffle up if the cut card has come out; True when a new shoe was put in"""
+        with self._lock:
+            if not self.past_cut:
+                return False
+            self._replace(penetration)
+            return True
+
+    def _replace(self, penetration: Optional[float]):
+        """Swap in the next shoe, waiting for its background shuffle if one was started"""
+        deck = self.next_shoe.result() if self.next_shoe is not None else cards.Deck.shuffled(self.num_decks)
+        self.next_shoe = None
+        self.deck = deck
+        self.number += 1
+        self.burned = []
+        self.burn()
+        if penetration is not None:
+            self.cut = cut_position(deck.remaining, penetration)
+        else:
+            # Emptied mid-hand: keep the cut at the same depth
+            self.cut = min(self.cut, deck.remaining)
+
+
+def snapshot_version(snapshot) -> Tuple[int, int]:
+    """(shoe number, cards dealt) of a stored snapshot; snapshots from before versioning count as unversioned"""
+    if not isinstance(snapshot, dict):
+        return (0, 0)
+    return (snapshot.get('shoe', 0), snapshot.get('dealt', 0))
+
+
+def cut_position(shoe_size: int, penetration: float) -> int:
+    """Cards left behind the cut card for a shoe of shoe_size dealt to the given penetration"""
+    behind = shoe_size - int(shoe_size * penetration)
+    return min(shoe_size, max(behind, MIN_CARDS_BEHIND_CUT))
+
+
+class ShoeRegistry:
+    """
+    Keeps each table's shoe in memory, restores it from the table's shoe_state snapshot, and
+    pre-shuffles the next one. Subclasses name the game's shoe class and config keys.
+
+    Another process may deal from the same table, so the snapshot is re-read with the table row
+    locked whenever the shoe is taken, and the in-memory shoe is replaced by the stored one if
+    the stored version (shoe number, cards dealt) is ahead of it. A stored version behind the
+    in-memory one is this process's own deal not yet committed, and is kept.
+    """
+
+    shoe_class = CardShoe
+    game = 'Card'
+    penetration_config = None   # App config key for the default penetration
+    preshuffle_config = None    # App config key switching background pre-shuffles
+    default_decks = 1           # For tables without a deck_count
+    default_penetration = PENETRATION
+
+    def __init__(self, penetration: Optional[float] = None, preshuffle: bool = True):
+        self.penetration = penetration if penetration is not None else self.default_penetration
+        self.preshuffle = preshuffle
+        self._shoes: Dict[int, CardShoe] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def configure(self, app):
+        """Bind to an app; shoes from a previous app belong to its database and are dropped"""
+        self.clear()
+        self.penetration = app.config.get(self.penetration_config, self.default_penetration)
+        self.preshuffle = app.config.get(self.preshuffle_config, True)
+
+    def start_hand(self, table) -> CardShoe:
+        """
+        The table's shoe, ready to deal a new hand: loaded from table.shoe_state (or shuffled) on
+        first use in this process or when another process has dealt from it since, and replaced if
+        its cut card has come out. The caller stores save(table, shoe) with the hand.
+        """
+        shoe = self.get(table)
+        if shoe.begin_hand(self._penetration(table)):
+            logger.info(f"{self.game} table {table.id}: cut card reached, shoe {shoe.number} in play")
+        self._maybe_preshuffle(shoe)
+        return shoe
+
+    def get(self, table) -> CardShoe:
+        """The table's shoe as it stands, for dealing the rest of a hand"""
+        stored = self._stored_snapshot(table)
+        with self._lock:
+            shoe = self._shoes.get(table.id)
+            if shoe is not None and snapshot_version(stored) > shoe.version:
+                logger.info(f"{self.game} table {table.id}: shoe dealt elsewhere since shoe {shoe.number} "
+                            f"card {shoe.dealt}, reloading at {snapshot_version(stored)}")
+                shoe = None
+            if shoe is None:
+                shoe = self._load(table, stored)
+                self._shoes[table.id] = shoe
+            return shoe
+
+    def peek(self, table_id: int) -> Optional[CardShoe]:
+        return self._shoes.get(table_id)
+
+    def save(self, table, shoe: CardShoe):
+        """Write the shoe's snapshot to the table row; committed with the caller's hand"""
+        self._maybe_preshuffle(shoe)
+        table.shoe_state = shoe.snapshot()
+
+    def forget(self, table_id: int):
+        with self._lock:
+            self._shoes.pop(table_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._shoes.clear()
+
+    def decks_for(self, table) -> int:
+        return getattr(table, 'deck_count', None) or self.default_decks
+
+    def _stored_snapshot(self, table):
+        """The table's committed shoe_state, read with its row locked until the caller commits"""
+        state = inspect(table, raiseerr=False)
+        if state is None or not state.persistent:
+            return getattr(table, 'shoe_state', None)  # A table not in the database, e.g. a simulation's
+        model = type(table)
+        return db.session.execute(
+            select(model.shoe_state).where(model.id == table.id).with_for_update()
+        ).scalar_one_or_none()
+
+    def _load(self, table, snapshot) -> CardShoe:
+        num_decks = self.decks_for(table)
+        if snapshot and snapshot.get('decks') == num_decks:
+            try:
+                return self.shoe_class.from_snapshot(snapshot)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"{self.game} table {table.id}: unreadable shoe snapshot, shuffling a new shoe: {e}")
+        number = snapshot.get('shoe', 0) + 1 if isinstance(snapshot, dict) else 1
+        return self.shoe_class.shuffled(num_decks, self._penetration(table), number)
+
+    def _penetration(self, table) -> float:
+        rules = getattr(table, 'rules', None) or {}
+        return float(rules.get('penetration', self.penetration))
+
+    def _maybe_preshuffle(self, shoe: CardShoe):
+        """Once the cut card is out, shuffle the next shoe off the request path"""
+        if not self.preshuffle or shoe.next_shoe is not None or not shoe.past_cut:
+            return
+        with self._lock:
+            if shoe.next_shoe is not None:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'{self.game.lower()}-shuffle')
+            shoe.next_shoe = self._executor.submit(cards.Deck.shuffled, shoe.num_decks)
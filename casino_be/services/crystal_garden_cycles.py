@@ -0,0 +1,245 @@
+"""
+Crystal Garden growth cycles
+Advances every garden that is due a cycle, a chunk of gardens per transaction, from one background thread
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+
+from casino_be.models import db, CrystalFlower, CrystalSeed, PlayerGarden
+from casino_be.services.garden_views import garden_views
+from casino_be.utils.crystal_growth import (
+    CYCLE_INTERVAL, compile_outcomes, flower_uniforms, growth_stage, roll_bloom_attributes
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500  # Gardens advanced per transaction
+
+
+class GrowthCycles:
+    """
+    Growth cycles for every garden at once. A garden is due when its last_cycle_time is older
+    than the interval (or unset). A pass walks the due gardens in id order, CHUNK_SIZE at a
+    time, and advances each chunk in one transaction:
+
+    - sprouting flowers bloom, their attributes rolled per seed in one batch and written with
+      one bulk update by primary key;
+    - seeded flowers sprout, with one UPDATE;
+    - the gardens' last_cycle_time is stamped, with one UPDATE.
+
+    A garden stamped in a pass is no longer due, so a pass that stops part way (an error, a
+    restart) is resumed by the next one. Seeds' outcome tables are loaded once per pass.
+    Each committed chunk's players get their cached views dropped (services.garden_views).
+
+    Flowers also grow with time alone (utils.crystal_growth) and materialise() stores what they
+    have grown into when a player looks, so passes are only needed to push gardens on faster
+    than their clock. Blooms roll the same attributes either way.
+    """
+
+    def __init__(self, interval: float = CYCLE_INTERVAL, chunk_size: int = CHUNK_SIZE):
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.app = None
+        self.progress: Dict[str, Any] = {'state': 'idle'}  # The running pass, or the last one
+        self.passes = 0
+        self._lock = threading.Lock()  # One pass at a time
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def configure(self, app):
+        self.app = app
+        self.interval = app.config.get('CRYSTAL_GARDEN_CYCLE_INTERVAL', CYCLE_INTERVAL)
+        self.chunk_size = app.config.get('CRYSTAL_GARDEN_CYCLE_CHUNK', CHUNK_SIZE)
+
+    @staticmethod
+    def cycle_seconds() -> float:
+        return current_app.config.get('CRYSTAL_GARDEN_CYCLE_INTERVAL', CYCLE_INTERVAL)
+
+    @staticmethod
+    def roll_secret() -> str:
+        return current_app.config.get('CRYSTAL_GARDEN_ROLL_KEY') or ''
+
+    def outcome_tables(self, seed_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, tuple]]:
+        """Compiled outcomes of every seed, or of seed_ids, from one query"""
+        query = select(CrystalSeed.id, CrystalSeed.potential_outcomes)
+        if seed_ids is not None:
+            query = query.where(CrystalSeed.id.in_(set(seed_ids)))
+        return {seed_id: compile_outcomes(outcomes) for seed_id, outcomes in db.session.execute(query)}
+
+    def bloom(self, flowers: List[tuple], tables: Dict[int, Dict[str, tuple]]) -> List[Dict[str, Any]]:
+        """
+        Bloom attributes for (id, seed id, planted_at, power-ups) flowers, as one dict per flower
+        with its id. Flowers are rolled a seed at a time.
+        """
+        by_seed: Dict[int, List[tuple]] = {}
+        for flower in flowers:
+            by_seed.setdefault(flower[1], []).append(flower)
+        secret = self.roll_secret()
+        blooms = []
+        for seed_id, group in by_seed.items():
+            uniforms = flower_uniforms([f[0] for f in group], [f[2] for f in group], secret)
+            rolled = roll_bloom_attributes(tables.get(seed_id) or compile_outcomes(None), uniforms, [f[3] for f in group])
+            blooms.extend({'id': flower[0], **{attribute: values[i] for attribute, values in rolled.items()}}
+                          for i, flower in enumerate(group))
+        return blooms
+
+    def materialise(self, flowers: List[CrystalFlower], now: datetime) -> int:
+        """
+        Store the stage each flower has grown into by now, and the attributes of those that
+        have bloomed. Flushed, not committed. Returns the number of flowers changed.
+        """
+        cycle_seconds = self.cycle_seconds()
+        changed, blooming = [], []
+        for flower in flowers:
+            stage = growth_stage(flower.growth_stage, flower.planted_at, now, cycle_seconds, flower.active_power_ups)
+            if stage != flower.growth_stage:
+                flower.growth_stage = stage
+                changed.append(flower)
+            if stage == 'blooming' and flower.color is None and flower.size is None:
+                blooming.append(flower)
+        if blooming:
+            tables = self.outcome_tables(flower.crystal_seed_id for flower in blooming)
+            rolled = self.bloom([(f.id, f.crystal_seed_id, f.planted_at, f.active_power_ups) for f in blooming], tables)
+            for flower, attributes in zip(blooming, rolled):
+                for attribute, value in attributes.items():
+                    if attribute != 'id':
+                        setattr(flower, attribute, value)
+            changed.extend(flower for flower in blooming if flower not in changed)
+        if changed:
+            db.session.flush()
+        return len(changed)
+
+    def advance(self, garden_ids: List[int], now: datetime, tables: Optional[Dict[int, Dict[str, tuple]]] = None) -> Dict[str, int]:
+        """
+        One cycle for the given gardens, flushed but not committed. Returns the number of
+        flowers that sprouted and bloomed.
+        """
+        session = db.session
+        if tables is None:
+            tables = self.outcome_tables()
+
+        sprouting = session.execute(
+            select(CrystalFlower.id, CrystalFlower.crystal_seed_id, CrystalFlower.planted_at, CrystalFlower.active_power_ups)
+            .where(CrystalFlower.player_garden_id.in_(garden_ids), CrystalFlower.growth_stage == 'sprouting')
+            .order_by(CrystalFlower.id)
+        ).all()
+        blooms = [{**attributes, 'growth_stage': 'blooming'} for attributes in self.bloom(sprouting, tables)]
+        if blooms:
+            session.execute(update(CrystalFlower), blooms)
+
+        sprouted = session.execute(
+            update(CrystalFlower)
+            .where(CrystalFlower.player_garden_id.in_(garden_ids), CrystalFlower.growth_stage == 'seeded')
+            .values(growth_stage='sprouting')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        session.execute(
+            update(PlayerGarden).where(PlayerGarden.id.in_(garden_ids)).values(last_cycle_time=now)
+            .execution_options(synchronize_session=False)
+        )
+        return {'sprouted': sprouted, 'bloomed': len(blooms)}
+
+    def run(self, now: Optional[datetime] = None, after_id: int = 0) -> Dict[str, Any]:
+        """
+        One pass over every due garden with an id above after_id. Returns the pass's progress:
+        gardens, chunks, flowers sprouted and bloomed, the last garden id committed, and its state.
+        """
+        if not self._lock.acquire(blocking=False):
+            return dict(self.progress)
+        try:
+            return self._run(now or datetime.now(timezone.utc), after_id)
+        finally:
+            self._lock.release()
+
+    def _run(self, now: datetime, after_id: int) -> Dict[str, Any]:
+        session = db.session
+        due = or_(PlayerGarden.last_cycle_time.is_(None),
+                  PlayerGarden.last_cycle_time <= now - timedelta(seconds=self.interval))
+        started = time.monotonic()
+        progress = self.progress = {
+            'state': 'running', 'started_at': now.isoformat(), 'finished_at': None,
+            'due': session.scalar(select(db.func.count()).select_from(PlayerGarden).where(due, PlayerGarden.id > after_id)),
+            'gardens': 0, 'chunks': 0, 'sprouted': 0, 'bloomed': 0, 'last_garden_id': after_id, 'error': None,
+        }
+        tables = self.outcome_tables()
+        cursor = after_id
+        while True:
+            garden_ids = session.scalars(
+                select(PlayerGarden.id).where(due, PlayerGarden.id > cursor)
+                .order_by(PlayerGarden.id).limit(self.chunk_size)
+            ).all()
+            if not garden_ids:
+                break
+            try:
+                counts = self.advance(garden_ids, now, tables)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Crystal Garden cycle failed after garden {cursor}: {e}", exc_info=True)
+                progress.update(state='failed', error=str(e))
+                break
+            garden_views.changed(session.scalars(
+                select(PlayerGarden.user_id).where(PlayerGarden.id.in_(garden_ids))
+            ).all())
+            cursor = garden_ids[-1]
+            progress['gardens'] += len(garden_ids)
+            progress['chunks'] += 1
+            progress['sprouted'] += counts['sprouted']
+            progress['bloomed'] += counts['bloomed']
+            progress['last_garden_id'] = cursor
+
+        if progress['state'] == 'running':
+            progress['state'] = 'finished'
+        progress['finished_at'] = datetime.now(timezone.utc).isoformat()
+        progress['seconds'] = round(time.monotonic() - started, 3)
+        self.passes += 1
+        logger.info(f"Crystal Garden cycle {progress['state']}: {progress['gardens']}/{progress['due']} gardens, "
+                    f"{progress['sprouted']} sprouted, {progress['bloomed']} bloomed in {progress['seconds']}s")
+        return dict(progress)
+
+    def status(self) -> Dict[str, Any]:
+        return {'interval': self.interval, 'chunk_size': self.chunk_size, 'passes': self.passes,
+                'scheduled': self._thread is not None and self._thread.is_alive(), 'progress': dict(self.progress)}
+
+    def start(self):
+        """Run a pass now and then every interval, from a background thread"""
+        with self._condition:
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='crystal-garden-cycles', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+    def _loop(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    self.run()
+                except Exception as e:
+                    logger.error(f"Crystal Garden cycle pass failed: {e}", exc_info=True)
+                finally:
+                    db.session.remove()
+            with self._condition:
+                if not self._stopping:
+                    self._condition.wait(self.interval)
+                if self._stopping:
+                    return
+
+
+growth_cycles = GrowthCycles()
+
+
+def get_growth_cycles() -> GrowthCycles:
+    return growth_cycles
@@ -1,10 +1,12 @@
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select # Added for SQLAlchemy 2.0 compatibility
 from datetime import datetime, timezone
-import random
 import json # Though direct dict access for JSON field is usually fine with SQLAlchemy
 
 from casino_be.models import db, User, CrystalSeed, CrystalFlower, PlayerGarden, CrystalCodexEntry
+from casino_be.services.crystal_garden_cycles import growth_cycles
+from casino_be.services.garden_views import garden_views
+from casino_be.utils.crystal_growth import next_stage_at
 
 # --- Custom Exceptions ---
 class ServiceError(Exception):
@@ -102,6 +104,7 @@ class CrystalGardenService:
             # Log e
             raise ServiceError(f"Error processing seed purchase: {str(e)}")
 
+        garden_views.changed(user_id)
         return seed
 
     def plant_seed(self, user_id: int, seed_id: int, garden_plot_x: int, garden_plot_y: int) -> CrystalFlower:
@@ -143,25 +146,47 @@ class CrystalGardenService:
             db.session.rollback()
             # Log e
             raise ServiceError(f"Error planting seed: {str(e)}")
+        garden_views.changed(user_id)
         return new_flower
 
+    def _materialise(self, flowers) -> int:
+        """
+        Store what the flowers have grown into since they were last looked at. Returns the
+        number changed; when any were, the commit has expired the loaded objects.
+        """
+        try:
+            changed = growth_cycles.materialise(flowers, datetime.now(timezone.utc))
+            if changed:
+                db.session.commit()
+            return changed
+        except Exception as e:
+            db.session.rollback()
+            # Log e
+            raise ServiceError(f"Error updating crystal growth: {str(e)}")
+
     def get_garden_state(self, user_id: int) -> dict:
         """
-        Retrieves the state of the player's garden.
+        Retrieves the state of the player's garden, with each flower grown to the present.
         """
         garden = self.get_or_create_player_garden(user_id)
 
-        flowers = db.session.scalars(select(CrystalFlower).filter_by(player_garden_id=garden.id)).all()
+        flowers_query = select(CrystalFlower).filter_by(player_garden_id=garden.id)
+        flowers = db.session.scalars(flowers_query).all()
+        if self._materialise(flowers):
+            flowers = db.session.scalars(flowers_query).all() # Reload them together
+        cycle_seconds = growth_cycles.cycle_seconds()
 
         flower_list = []
         for flower in flowers:
+            grows_at = next_stage_at(flower.growth_stage, flower.planted_at, cycle_seconds, flower.active_power_ups)
             flower_list.append({
                 "id": flower.id, "crystal_seed_id": flower.crystal_seed_id,
                 "planted_at": flower.planted_at.isoformat(), "growth_stage": flower.growth_stage,
                 "color": flower.color, "size": flower.size, "clarity": flower.clarity,
                 "special_type": flower.special_type, "appraised_value": flower.appraised_value,
                 "position_x": flower.position_x, "position_y": flower.position_y,
-                "active_power_ups": flower.active_power_ups if flower.active_power_ups else []
+                "active_power_ups": flower.active_power_ups if flower.active_power_ups else [],
+                "next_stage_at": grows_at.isoformat() if grows_at else None
             })
 
         return {
@@ -207,107 +232,45 @@ class CrystalGardenService:
             if flower.active_power_ups is None:
                 flower.active_power_ups = []
 
-            # Add power-up (could store more info, like timestamp)
-            flower.active_power_ups.append(power_up_type)
-            # For SQLAlchemy to detect change in JSON mutable type
-            flower.active_power_ups = list(flower.active_power_ups)
-
-            if flower.details is None:
-                flower.details = {}
-
-            if power_up_type == 'fertilizer':
-                current_growth_mod = flower.details.get('growth_modifier', 1.0)
-                flower.details['growth_modifier'] = round(current_growth_mod + 0.1, 3) # Using round for float precision
-            elif power_up_type == 'moon_glow':
-                current_clarity_mod = flower.details.get('clarity_modifier', 1.0)
-                flower.details['clarity_modifier'] = round(current_clarity_mod + 0.05, 3) # Using round
-
-            # Mark 'details' as modified for SQLAlchemy if it's a JSON field
-            # This is often handled automatically if the top-level assignment flower.details = new_dict occurs,
-            # but explicit marking is safer with nested modifications if not reassigning the whole dict.
-            # However, since we are potentially reassigning (if flower.details was None) or directly setting keys
-            # on an existing dict, SQLAlchemy's default tracking should detect this.
-            # If issues arise, uncomment:
-            # from sqlalchemy.orm.attributes import flag_modified
-            # flag_modified(flower, "details")
+            # Add power-up (could store more info, like timestamp). Their effects are derived from
+            # this list: each fertilizer speeds growth and each moon glow lifts the bloom's clarity
+            # (utils.crystal_growth).
+            # Assigning a new list lets SQLAlchemy detect the change in the JSON column
+            flower.active_power_ups = list(flower.active_power_ups) + [power_up_type]
 
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             # Log e
             raise ServiceError(f"Error applying power-up: {str(e)}")
+        garden_views.changed(user_id)
         return flower
 
-    def _randomize_attribute(self, outcomes, key, power_ups_active=None):
-        """Helper to randomize a single attribute based on potential_outcomes."""
-        # power_ups_active is not used yet, but could be for biasing
-        config = outcomes.get(key, {})
-        if not config: return None
-
-        if "distribution" in config and config["distribution"] == "uniform":
-            min_val, max_val = config.get("min", 0), config.get("max", 1)
-            return random.uniform(min_val, max_val)
-        elif isinstance(config, dict): # Weighted choices for things like color, special_type
-            choices = list(config.keys())
-            weights = [float(w) for w in config.values()] # Ensure weights are float
-            if not choices or sum(weights) == 0: return None # Avoid error with empty choices or all zero weights
-            return random.choices(choices, weights=weights, k=1)[0]
-        return None
-
     def process_growth_cycle(self, garden_id: int) -> dict:
         """
         Processes one growth cycle for all flowers in a garden.
+        Gardens due a cycle are otherwise advanced together by growth_cycles.
         """
         garden = db.session.get(PlayerGarden, garden_id)
         if not garden:
             raise ItemNotFoundError(f"PlayerGarden {garden_id} not found.")
 
-        flowers = db.session.scalars(select(CrystalFlower).filter_by(player_garden_id=garden.id)).all()
-        summary = {"updated_flowers": 0, "newly_bloomed": 0}
-
-        for flower in flowers:
-            updated = True
-            if flower.growth_stage == 'seeded':
-                flower.growth_stage = 'sprouting'
-            elif flower.growth_stage == 'sprouting':
-                flower.growth_stage = 'blooming'
-                summary["newly_bloomed"] += 1
-
-                seed = db.session.get(CrystalSeed, flower.crystal_seed_id)
-                if seed and seed.potential_outcomes:
-                    # Ensure potential_outcomes is a dict
-                    outcomes = seed.potential_outcomes if isinstance(seed.potential_outcomes, dict) else {}
-
-                    flower.color = self._randomize_attribute(outcomes, "colors", flower.active_power_ups)
-                    flower.size = round(self._randomize_attribute(outcomes, "sizes", flower.active_power_ups) or 1.0, 2)
-                    flower.clarity = round(self._randomize_attribute(outcomes, "clarities", flower.active_power_ups) or 0.1, 2)
-                    flower.special_type = self._randomize_attribute(outcomes, "special_types", flower.active_power_ups)
-                else: # Fallback if no outcomes defined
-                    flower.color = random.choice(['blue', 'red', 'green'])
-                    flower.size = round(random.uniform(1.0, 5.0), 2)
-                    flower.clarity = round(random.uniform(0.1, 1.0), 2)
-                    flower.special_type = 'none'
-
-            #elif flower.growth_stage == 'blooming':
-                # Future: Could transition to 'withered' here based on time or cycles
-                # updated = False
-            else: # 'blooming', 'withered', or other
-                updated = False
-
-            if updated:
-                summary["updated_flowers"] += 1
-
+        now = datetime.now(timezone.utc)
         try:
-            garden.last_cycle_time = datetime.now(timezone.utc)
+            counts = growth_cycles.advance([garden.id], now)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             # Log e
             raise ServiceError(f"Error finalizing growth cycle: {str(e)}")
+        garden_views.changed(garden.user_id)
 
-        summary["garden_id"] = garden_id
-        summary["last_cycle_time"] = garden.last_cycle_time.isoformat()
-        return summary
+        return {
+            "updated_flowers": counts["sprouted"] + counts["bloomed"],
+            "newly_bloomed": counts["bloomed"],
+            "garden_id": garden_id,
+            "last_cycle_time": now.isoformat(),
+        }
 
     def appraise_crystal(self, user_id: int, flower_id: int) -> CrystalFlower:
         """
@@ -321,6 +284,7 @@ class CrystalGardenService:
         if not flower:
             raise ItemNotFoundError(f"CrystalFlower {flower_id} not found for user {user_id}.")
 
+        self._materialise([flower])
         if flower.growth_stage != 'blooming':
             raise InvalidActionError("Only blooming flowers can be appraised.")
 
@@ -341,6 +305,7 @@ class CrystalGardenService:
             db.session.rollback()
             # Log e
             raise ServiceError(f"Error during appraisal: {str(e)}")
+        garden_views.changed(user_id)
         return flower
 
     def sell_crystal(self, user_id: int, flower_id: int) -> dict:
@@ -355,6 +320,7 @@ class CrystalGardenService:
         if not flower:
             raise ItemNotFoundError(f"CrystalFlower {flower_id} not found for user {user_id}.")
 
+        self._materialise([flower])
         if flower.growth_stage != 'blooming':
             raise InvalidActionError("Only blooming flowers can be sold.")
         if flower.appraised_value is None:
@@ -401,6 +367,7 @@ class CrystalGardenService:
             db.session.rollback()
             # Log e
             raise ServiceError(f"Error selling crystal: {str(e)}")
+        garden_views.changed(user_id, ('garden', 'codex'))
 
         return {"sold_value": sold_value, "message": f"Crystal {crystal_name} sold."}
 
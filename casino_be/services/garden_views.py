@@ -0,0 +1,188 @@
+"""
+Garden Views
+Per-user cached Crystal Garden and codex responses, served as pre-encoded JSON with ETags and
+pushed to connected players as diffs when they change
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED = 10000  # Views kept, least recently used dropped first
+VIEW_TTL = 5.0      # Seconds any view is served before it is rebuilt, so other processes' changes show up
+KINDS = ('garden', 'codex')
+
+
+@dataclass(frozen=True)
+class CachedView:
+    body: bytes    # The response, encoded once
+    etag: str
+    seq: int       # Bumped whenever the user's view of this kind changes
+    expires_at: datetime  # When it is rebuilt: at the TTL, or sooner if growth changes it
+
+    def state(self):
+        return json.loads(self.body)
+
+
+def _build(kind: str, user_id: int):
+    from casino_be.services.crystal_garden_service import CrystalGardenService
+
+    service = CrystalGardenService()
+    if kind == 'garden':
+        return service.get_garden_state(user_id)
+    return [entry.to_dict() for entry in service.get_player_codex(user_id)]
+
+
+def _keyed_changes(old: Iterable[dict], new: Iterable[dict]) -> Dict[Any, Optional[dict]]:
+    """{id: changed fields} for items that are new or changed, {id: None} for ones that went"""
+    old_by_id = {item['id']: item for item in old}
+    changes = {}
+    for item in new:
+        previous = old_by_id.pop(item['id'], None)
+        changed = dict(item) if previous is None else {key: value for key, value in item.items() if previous.get(key) != value}
+        if changed:
+            changes[item['id']] = changed
+    for item_id in old_by_id:
+        changes[item_id] = None
+    return changes
+
+
+def view_diff(kind: str, previous, current) -> dict:
+    """
+    What changed between two views of a kind: {'garden': {fields}, 'flowers': {id: ...}} for a
+    garden, {'entries': {id: ...}} for a codex, with unchanged sections left out.
+    """
+    if kind == 'codex':
+        entries = _keyed_changes(previous or [], current)
+        return {'entries': entries} if entries else {}
+    previous = previous or {}
+    diff = {}
+    garden = {key: value for key, value in current.items() if key != 'flowers' and previous.get(key) != value}
+    if garden:
+        diff['garden'] = garden
+    flowers = _keyed_changes(previous.get('flowers', []), current['flowers'])
+    if flowers:
+        diff['flowers'] = flowers
+    return diff
+
+
+class GardenViews:
+    """
+    The garden state and codex responses of recently active players, each kept as encoded
+    bytes and an ETag until the service changes it (changed()), for at most `ttl` seconds, and
+    for a garden no later than its next flower grows into a new stage by time. A view built
+    while a change lands is not kept.
+
+    When a player with a socket changes, their new view is built straight away and the
+    difference pushed as 'garden_diff' with the view's seq; a client that sees a gap in seq
+    asks for a 'garden_resync' snapshot. The cache is per process, like the table rounds and
+    poker actors; changed() only reaches this process, so the TTL bounds how long a change made
+    through another replica goes unseen here.
+    """
+
+    def __init__(self, max_cached: int = MAX_CACHED, ttl: float = VIEW_TTL):
+        self.max_cached = max_cached
+        self.ttl = ttl
+        self.websocket_manager = None
+        self.hits = 0
+        self.misses = 0
+        self._views: "OrderedDict[Tuple[str, int], CachedView]" = OrderedDict()
+        self._versions: Dict[Tuple[str, int], int] = {}
+        self._seqs: Dict[Tuple[str, int], Tuple[int, str]] = {}  # Last seq and the etag it was given to
+        self._lock = threading.Lock()
+
+    def configure(self, app, websocket_manager=None):
+        """Bind to an app; views from a previous app are dropped"""
+        self.websocket_manager = websocket_manager
+        self.max_cached = app.config.get('GARDEN_VIEW_CACHE_SIZE', MAX_CACHED)
+        self.ttl = app.config.get('GARDEN_VIEW_TTL', VIEW_TTL)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+            self._versions.clear()
+            self._seqs.clear()
+
+    def get(self, kind: str, user_id: int) -> CachedView:
+        """The user's view of kind, from the cache or built and cached now"""
+        key = (kind, user_id)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None and view.expires_at > datetime.now(timezone.utc):
+                self._views.move_to_end(key)
+                self.hits += 1
+                return view
+            version = self._versions.get(key, 0)
+            self.misses += 1
+
+        state = _build(kind, user_id)
+        body = json.dumps(state, separators=(',', ':')).encode()
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+        with self._lock:
+            seq, last_etag = self._seqs.get(key, (0, None))
+            if etag != last_etag:
+                seq += 1
+                self._seqs[key] = (seq, etag)
+            view = CachedView(body, etag, seq, self._expiry(kind, state))
+            if self._versions.get(key, 0) == version:
+                self._views[key] = view
+                self._views.move_to_end(key)
+                while len(self._views) > self.max_cached:
+                    self._views.popitem(last=False)
+        return view
+
+    def _expiry(self, kind: str, state) -> datetime:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        if kind != 'garden':
+            return expires_at
+        times = [datetime.fromisoformat(flower['next_stage_at']) for flower in state['flowers'] if flower.get('next_stage_at')]
+        return min(times + [expires_at])
+
+    def changed(self, user_ids, kinds: Iterable[str] = ('garden',)):
+        """
+        The service changed these users' gardens (or codex): drop their views, and push the
+        difference to those with a socket open.
+        """
+        user_ids = [user_ids] if isinstance(user_ids, int) else list(user_ids)
+        dropped = {}
+        with self._lock:
+            for user_id in user_ids:
+                for kind in kinds:
+                    key = (kind, user_id)
+                    self._versions[key] = self._versions.get(key, 0) + 1
+                    dropped[key] = self._views.pop(key, None)
+
+        if not self.websocket_manager:
+            return
+        for (kind, user_id), previous in dropped.items():
+            if user_id not in self.websocket_manager.connected_users:
+                continue
+            try:
+                view = self.get(kind, user_id)
+                if previous is not None and previous.etag == view.etag:
+                    continue
+                changes = view_diff(kind, previous.state() if previous is not None else None, view.state())
+                self.websocket_manager.send_garden_diff(user_id, {
+                    'kind': kind, 'seq': view.seq, 'etag': view.etag, 'changes': changes,
+                })
+            except Exception as e:
+                logger.error(f"Error pushing {kind} changes to user {user_id}: {e}", exc_info=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {'cached': len(self._views), 'hits': self.hits, 'misses': self.misses}
+
+
+garden_views = GardenViews()
+
+
+def get_garden_views() -> GardenViews:
+    return garden_views
@@ -0,0 +1,103 @@
+"""
+Poker Auto Dealer
+One background thread starting the next hand at every poker table that is ready for one
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUTO_DEAL_DELAY = 5.0       # Seconds between a table becoming ready (e.g. a hand ending) and the next deal
+MIN_PLAYERS = 2
+
+
+class PokerAutoDealer:
+    """
+    In-memory seat counters for every poker table, and the thread that deals from them.
+
+    Table actors report (ready players, last hand id, whether that hand is still live) after
+    their commands, and seed() takes the counters for tables without an actor from one grouped
+    query. A table with MIN_PLAYERS ready and no live hand is due `delay` seconds after it was
+    first reported that way; reporting it again does not push the deal back. When it is due,
+    deal is called with (table_id, last hand id) from the dealer thread. The hand id lets the
+    table's actor - which serialises starts, so it is the per-table lock - ignore a deal that a
+    client's start_hand already answered. Deal must not block.
+    """
+
+    def __init__(self, deal: Callable[[int, Hashable], None], delay: float = AUTO_DEAL_DELAY):
+        self.deal = deal
+        self.delay = delay
+        self.dealt = 0
+        self._counters: Dict[int, Tuple[int, Hashable, bool]] = {}  # table_id -> (ready, last hand id, hand live)
+        self._due: Dict[int, float] = {}  # table_id -> monotonic time of its next deal
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def observe(self, table_id: int, ready_players: int, hand_id: Hashable = None, hand_live: bool = False):
+        """Record a table's counters; arms its deal when it becomes ready, disarms it when not"""
+        with self._condition:
+            self._counters[table_id] = (ready_players, hand_id, hand_live)
+            if hand_live or ready_players < MIN_PLAYERS:
+                self._due.pop(table_id, None)
+                return
+            if table_id in self._due:
+                return
+            self._due[table_id] = time.monotonic() + self.delay
+            self._ensure_thread()
+            self._condition.notify()
+
+    def seed(self, counters: Dict[int, Tuple[int, Hashable, bool]]):
+        """Counters for many tables at once, e.g. every active table at startup"""
+        for table_id, (ready_players, hand_id, hand_live) in counters.items():
+            self.observe(table_id, ready_players, hand_id, hand_live)
+
+    def retry(self, table_id: int):
+        """Arm the table again from its last counters (its deal could not be handed over)"""
+        counters = self._counters.get(table_id)
+        if counters is not None:
+            self.observe(table_id, *counters)
+
+    def forget(self, table_id: int):
+        with self._condition:
+            self._counters.pop(table_id, None)
+            self._due.pop(table_id, None)
+
+    def pending(self, table_id: int) -> Optional[float]:
+        """Seconds until the table's next deal, if one is armed"""
+        due = self._due.get(table_id)
+        return max(0.0, due - time.monotonic()) if due is not None else None
+
+    def clear(self):
+        with self._condition:
+            self._counters.clear()
+            self._due.clear()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='poker-auto-dealer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    next_due = min(self._due.values(), default=None)
+                    if next_due is not None and next_due <= now:
+                        break
+                    self._condition.wait(next_due - now if next_due is not None else None)
+                ready = [table_id for table_id, due in self._due.items() if due <= now]
+                deals = []
+                for table_id in ready:
+                    del self._due[table_id]
+                    deals.append((table_id, self._counters[table_id][1]))
+
+            for table_id, hand_id in deals:
+                self.dealt += 1
+                try:
+                    self.deal(table_id, hand_id)
+                except Exception as e:
+                    logger.error(f"Poker auto dealer failed to deal at table {table_id}: {e}", exc_info=True)
@@ -0,0 +1,753 @@
+"""
+Poker Table Actors
+Each active poker table is owned by one actor thread holding its authoritative in-memory state
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import joinedload
+
+from casino_be.models import PokerHand, PokerHandEvent, PokerPlayerState, PokerTable, Transaction, db
+from casino_be.services.poker_auto_dealer import AUTO_DEAL_DELAY, MIN_PLAYERS, PokerAutoDealer
+from casino_be.services.poker_turn_timer import PokerTurnTimer
+from casino_be.utils import poker_helper, poker_table_state
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 1.0        # Seconds a dirty table may wait for its write-behind flush
+IDLE_TIMEOUT = 300.0        # Seconds without commands before an actor flushes and exits
+COMMAND_TIMEOUT = 10.0      # Seconds a request thread waits for the actor to answer
+LEASE_TTL = 30.0            # Seconds a process's claim on a table lasts unless its actor renews it
+
+
+class TableOwnedElsewhere(RuntimeError):
+    """Another process holds the table's lease, so its actor is the only one that may run the table"""
+
+
+def _lease_free(owner: str, now: datetime):
+    """Filter for tables that `owner` may claim: unowned, already its own, or with a lapsed lease"""
+    return or_(PokerTable.actor_owner.is_(None), PokerTable.actor_owner == owner, PokerTable.actor_lease_until < now)
+
+
+class ActionJournal:
+    """
+    Append-only JSON-lines log of the actions applied since the table's last flush.
+
+    Each line is written and fsynced before the action's result is returned, so a crash loses
+    nothing: recovery replays the entries whose seq is beyond what reached poker_hand_event.
+    The file is truncated once a flush has committed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def entries(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping torn journal line in {self.path}")  # Partial write at crash time
+
+    def truncate(self):
+        self._file.truncate(0)
+        self._file.seek(0)
+
+    def close(self):
+        self._file.close()
+
+
+class PokerTableActor:
+    """
+    Serialises every read and write of one table through a command queue.
+
+    Actions validate and apply against the in-memory TableState (no queries), are journaled,
+    and reach the database write-behind as rows appended to poker_hand_event, at most
+    flush_interval after the first unflushed one. The PokerHand / PokerPlayerState rows are
+    projections of that log: they are only rewritten (and pending transactions inserted) at
+    checkpoints - street changes, hand completion, and before anything else reads them - so
+    the per-action cost is one small insert rather than a rewrite of the hand's JSON columns.
+    Operations that still live in poker_helper (starting a hand, sitting down, standing up)
+    run on the actor thread after a checkpoint, and the state is reloaded afterwards.
+
+    The player to act's deadline is registered with the shared PokerTurnTimer, which posts
+    the expiry back onto this actor's queue when it passes. Likewise the table's seat counters
+    go to the shared PokerAutoDealer, which posts the next deal once the table has sat ready
+    for its delay.
+
+    Watchers are kept current with versioned diffs: after each command the public (redacted)
+    view is compared with the last one published, and only the changed fields plus new
+    history events go to the table's room, tagged with a sequence number. Hole cards go
+    privately to their owner when they change. A client that joins, or sees a gap in the
+    sequence, asks for a snapshot, which carries the seq it is current to.
+
+    All of this assumes the actor is the table's only writer, so before loading it claims the
+    table's lease (actor_owner / actor_lease_until on the row) for `owner`, renews it every
+    third of lease_ttl, and clears it on a clean exit. If another live process holds the lease
+    the actor exits at once and queued commands fail with TableOwnedElsewhere; if a renewal
+    finds the lease taken over, it stops without flushing rather than overwrite the new owner.
+    """
+
+    def __init__(self, app, table_id: int, journal_dir: str, flush_interval: float = FLUSH_INTERVAL,
+                 idle_timeout: float = IDLE_TIMEOUT, on_exit: Optional[Callable] = None,
+                 timer: Optional[PokerTurnTimer] = None, websocket_manager=None,
+                 dealer: Optional[PokerAutoDealer] = None, owner: Optional[str] = None,
+                 lease_ttl: float = LEASE_TTL):
+        self.app = app
+        self.owner = owner or process_owner()
+        self.lease_ttl = lease_ttl
+        self.timer = timer
+        self.dealer = dealer
+        self.websocket_manager = websocket_manager
+        self.table_id = table_id
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.journal = ActionJournal(os.path.join(journal_dir, f'table_{table_id}.jsonl'))
+        self.state: Optional[poker_table_state.TableState] = None
+        self.running = False
+        self.flush_count = 0
+        self._on_exit = on_exit
+        self._commands: queue.Queue = queue.Queue()
+        self._commands_lock = threading.Lock()  # Orders enqueueing against the actor exiting
+        self._dirty_since: Optional[float] = None
+        self._checkpoint_due = False
+        self._pending_events = []  # PokerHandEvent rows not yet inserted
+        self._projection_stale = False  # Events applied since the hand / seat rows were last written
+        self._scheduled = None  # (deadline, turn token) last handed to the timer
+        self._last_hand_id: Optional[int] = None  # Latest hand this actor has loaded or started
+        self._reported = None  # Seat counters last handed to the dealer
+        self.seq = 0  # Version of the published table view
+        self._published: Optional[Dict[str, Any]] = None
+        self._published_events = (None, 0)  # (hand_id, history length) already sent
+        self._private_sent: Dict[int, tuple] = {}  # user_id -> hole cards already sent to them
+        self._thread: Optional[threading.Thread] = None
+        self._renew_lease_at = 0.0  # Monotonic time the lease is next renewed
+        self._stop_error: Optional[Exception] = None  # Why the actor stopped, for commands left queued
+
+    # --- Public API: called from request threads ---
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=f'poker-table-{self.table_id}', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Flush and stop; commands still queued are answered first"""
+        if not self.running:
+            return
+        self._commands.put(None)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def act(self, user_id: int, hand_id: int, action_type: str, amount: Optional[int] = None) -> Dict[str, Any]:
+        return self._call(self._act, user_id, hand_id, action_type, amount)
+
+    def table_state(self, viewer_user_id: Optional[int] = None) -> Dict[str, Any]:
+        return self._call(self._table_state, viewer_user_id)
+
+    def start_hand(self, user_id: int) -> Dict[str, Any]:
+        return self._call(self._start_hand, user_id)
+
+    def stand_up(self, user_id: int) -> Dict[str, Any]:
+        return self._call(self._stand_up, user_id)
+
+    def run_db_operation(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a poker_helper function that works on the database rows, e.g. handle_sit_down"""
+        return self._call(self._run_db_operation, fn, args, kwargs)
+
+    def flush(self):
+        return self._call(self._flush)
+
+    def on_timer(self, token):
+        """Called from the timer thread; queues the expiry without waiting for it"""
+        return self._post(self._timer_fired, token)
+
+    def deal_next_hand(self, after_hand_id: Optional[int]):
+        """Called from the dealer thread; queues the deal without waiting for it"""
+        return self._post(self._deal_next_hand, after_hand_id)
+
+    def _call(self, fn, *args):
+        return self._post(fn, *args).result(timeout=COMMAND_TIMEOUT)
+
+    def _post(self, fn, *args) -> Future:
+        future = Future()
+        with self._commands_lock:
+            if not self.running:
+                raise self._stop_error or RuntimeError(f"Poker table actor {self.table_id} has stopped.")
+            self._commands.put((fn, args, future))
+        return future
+
+    # --- Actor thread ---
+
+    def _run(self):
+        with self.app.app_context():
+            try:
+                self._claim_lease()
+                self._load()
+                self._report_counters()
+                self._loop()
+                self._release_lease()
+            except TableOwnedElsewhere as e:
+                logger.warning(str(e))
+                self._stop_error = e
+            except Exception as e:
+                logger.error(f"Poker table actor {self.table_id} crashed: {e}", exc_info=True)
+            finally:
+                with self._commands_lock:
+                    self.running = False
+                self._drain_with_error()
+                self.journal.close()
+                db.session.remove()
+                if self._on_exit:
+                    self._on_exit(self)
+
+    def _loop(self):
+        last_command = time.monotonic()
+        while True:
+            if time.monotonic() >= self._renew_lease_at:
+                self._claim_lease()
+            timeout = self.idle_timeout
+            if self._dirty_since is not None:
+                timeout = max(0.0, self._dirty_since + self.flush_interval - time.monotonic())
+            timeout = min(timeout, max(0.0, self._renew_lease_at - time.monotonic()))
+            try:
+                command = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                command = ()
+
+            if command is None:
+                self._flush(materialise=True)
+                if self.timer:
+                    self.timer.schedule(self.table_id, None)
+                return
+            if command:
+                fn, args, future = command
+                last_command = time.monotonic()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    db.session.rollback()
+                    future.set_exception(e)
+                self._sync_deadline()
+                self._publish()
+                self._report_counters()
+
+            if self._dirty_since is not None and (self._checkpoint_due or time.monotonic() - self._dirty_since >= self.flush_interval):
+                self._flush()
+            elif (self._dirty_since is None and self._scheduled[0] is None
+                  and time.monotonic() - last_command >= self.idle_timeout):
+                logger.info(f"Poker table actor {self.table_id} idle, stopping")
+                self._flush(materialise=True)
+                return
+
+    def _drain_with_error(self):
+        while True:
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            if command:
+                command[2].set_exception(self._stop_error or RuntimeError(f"Poker table actor {self.table_id} has stopped."))
+
+    def _claim_lease(self):
+        """Take or renew the table's lease; raises TableOwnedElsewhere if another process holds it"""
+        now = datetime.now(timezone.utc)
+        claimed = db.session.execute(
+            update(PokerTable).where(PokerTable.id == self.table_id, _lease_free(self.owner, now))
+            .values(actor_owner=self.owner, actor_lease_until=now + timedelta(seconds=self.lease_ttl),
+                    updated_at=PokerTable.updated_at)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            self._renew_lease_at = time.monotonic() + self.lease_ttl / 3
+            return
+        if db.session.get(PokerTable, self.table_id) is None:
+            raise LookupError(f"Poker table {self.table_id} not found.")
+        raise TableOwnedElsewhere(f"Poker table {self.table_id} is being run by another process.")
+
+    def _release_lease(self):
+        db.session.execute(
+            update(PokerTable).where(PokerTable.id == self.table_id, PokerTable.actor_owner == self.owner)
+            .values(actor_owner=None, actor_lease_until=None, updated_at=PokerTable.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def _load(self):
+        """Read the table's projections, then replay the logged events and the journal on top"""
+        session = db.session
+        session.expire_all()
+        table = session.get(PokerTable, self.table_id)
+        if table is None:
+            raise LookupError(f"Poker table {self.table_id} not found.")
+        player_states = session.scalars(
+            select(PokerPlayerState).options(joinedload(PokerPlayerState.user)).filter_by(table_id=self.table_id)
+        ).all()
+        hand = session.scalars(
+            select(PokerHand).filter(PokerHand.table_id == self.table_id, PokerHand.status != 'completed')
+            .order_by(PokerHand.start_time.desc()).limit(1)
+        ).first()
+        logged = []
+        if hand is not None:
+            logged = session.execute(
+                select(PokerHandEvent.seq, PokerHandEvent.event_type, PokerHandEvent.user_id,
+                       PokerHandEvent.amount, PokerHandEvent.created_at)
+                .filter(PokerHandEvent.hand_id == hand.id, PokerHandEvent.seq > hand.action_seq)
+                .order_by(PokerHandEvent.seq)
+            ).all()
+        self.state = poker_table_state.TableState.from_models(table, player_states, hand)
+        if hand is not None:
+            self._last_hand_id = hand.id
+        session.rollback()  # End the read transaction; nothing stays attached to the session
+        self._pending_events = []
+        self._projection_stale = False
+
+        replayed = self._replay(logged, journaled=False) + self._replay_journal()
+        if self.state.hand is not None and self.state.hand.status == 'showdown' and not self.state.hand.winners:
+            # Hands left waiting at showdown by the row-by-row handlers are settled on takeover
+            poker_table_state.settle_showdown(self.state)
+            self._mark_dirty(checkpoint=True)
+        if replayed or self._checkpoint_due:
+            self._flush()
+        else:
+            self.journal.truncate()
+        self._sync_deadline()
+        if self._published is None:
+            self._mark_published()
+
+    def _replay_journal(self) -> int:
+        """Events that were applied but never reached poker_hand_event"""
+        hand = self.state.hand
+        if hand is None:
+            return 0
+        entries = [(entry['seq'], entry['action'], entry['user_id'], entry.get('amount'), datetime.fromisoformat(entry['ts']))
+                   for entry in self.journal.entries() if entry.get('hand_id') == hand.hand_id]
+        return self._replay(entries, journaled=True)
+
+    def _replay(self, events, journaled: bool) -> int:
+        """Apply (seq, event_type, user_id, amount, created_at) events beyond the hand's action_seq"""
+        hand = self.state.hand
+        replayed = 0
+        for seq, event_type, user_id, amount, created_at in events:
+            if seq <= hand.action_seq:
+                continue
+            poker_table_state.apply_event(self.state, event_type, user_id, amount, created_at)
+            hand.action_seq = seq
+            if journaled:
+                self._pending_events.append(self._event_row(seq, event_type, user_id, amount, created_at))
+            replayed += 1
+        if replayed:
+            source = "journaled" if journaled else "logged"
+            logger.info(f"Poker table {self.table_id}: replayed {replayed} {source} action(s) for hand {hand.hand_id}")
+            self._projection_stale = True
+            self._mark_dirty(checkpoint=True)
+        return replayed
+
+    def _mark_dirty(self, checkpoint: bool = False):
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        self._checkpoint_due = self._checkpoint_due or checkpoint
+
+    def _event_row(self, seq, event_type, user_id=None, amount=None, created_at=None, payload=None) -> Dict[str, Any]:
+        return {'hand_id': self.state.hand.hand_id, 'seq': seq, 'event_type': event_type, 'user_id': user_id,
+                'amount': amount, 'payload': payload, 'created_at': created_at or datetime.now(timezone.utc)}
+
+    def _record(self, user_id: int, action: str, amount: Optional[int], now: datetime, status_before: str):
+        hand = self.state.hand
+        hand.action_seq += 1
+        self.journal.append({'seq': hand.action_seq, 'hand_id': hand.hand_id, 'user_id': user_id,
+                             'action': action, 'amount': amount, 'ts': now.isoformat()})
+        self._pending_events.append(self._event_row(hand.action_seq, action, user_id, amount, now))
+        self._projection_stale = True
+        self._mark_dirty(checkpoint=hand.status != status_before)
+
+    def _turn_token(self):
+        """Identifies the current turn: any action or new hand changes it"""
+        hand = self.state.hand if self.state else None
+        return (hand.hand_id, hand.action_seq) if hand else None
+
+    def _sync_deadline(self):
+        """Hand the player to act's deadline to the timer when the turn has changed"""
+        deadline = poker_table_state.turn_deadline(self.state) if self.state else None
+        scheduled = (deadline, self._turn_token())
+        if scheduled != self._scheduled:
+            self._scheduled = scheduled
+            if self.timer:
+                self.timer.schedule(self.table_id, deadline, scheduled[1])
+
+    def _expire_turn(self, now: datetime) -> Optional[Dict[str, Any]]:
+        """Auto-check or auto-fold the player to act if their clock has run out"""
+        hand = self.state.hand
+        if hand is None:
+            return None
+        timed_out_user_id = hand.current_turn_user_id
+        status_before = hand.status
+        game_flow = poker_table_state.expire_turn(self.state, now)
+        if game_flow is not None:
+            resolved_as = self.state.seats[timed_out_user_id].last_action
+            logger.info(f"Poker table {self.table_id}: user {timed_out_user_id} timed out in hand {hand.hand_id} ({resolved_as})")
+            self._record(timed_out_user_id, 'timeout', None, now, status_before)
+        return game_flow
+
+    def _timer_fired(self, token):
+        if token == self._turn_token():  # Otherwise the player acted in time
+            self._expire_turn(datetime.now(timezone.utc))
+
+    def _report_counters(self):
+        """Hand the dealer this table's seat counters when they have changed"""
+        if self.dealer is None or self.state is None:
+            return
+        hand = self.state.hand
+        ready = 0
+        if self.state.is_active:
+            ready = sum(1 for s in self.state.seats.values() if not s.is_sitting_out and s.stack_sats > 0)
+        counters = (ready, self._last_hand_id, hand is not None and hand.status != 'completed')
+        if counters != self._reported:
+            self._reported = counters
+            self.dealer.observe(self.table_id, *counters)
+
+    def _mark_published(self):
+        """Take the current state as what watchers already have (the baseline for diffs)"""
+        self._published = poker_table_state.table_view(self.state)
+        hand = self.state.hand
+        self._published_events = (hand.hand_id, len(hand.hand_history)) if hand else (None, 0)
+        self._private_sent = {seat.user_id: tuple(seat.hole_cards) for seat in self.state.seats.values()}
+
+    def _new_events(self) -> list:
+        hand = self.state.hand
+        if hand is None:
+            return []
+        hand_id, sent = self._published_events
+        events = hand.hand_history[sent:] if hand_id == hand.hand_id else list(hand.hand_history)
+        self._published_events = (hand.hand_id, len(hand.hand_history))
+        return events
+
+    def _publish(self):
+        """Send watchers what changed since the last publish: one public diff, private hole cards to their owners"""
+        if self.state is None:
+            return
+        try:
+            view = poker_table_state.table_view(self.state)
+            changes = poker_table_state.view_diff(self._published, view)
+            events = self._new_events()
+            if not changes and not events:
+                return
+            self.seq += 1
+            self._published = view
+            if not self.websocket_manager:
+                return
+            self.websocket_manager.broadcast_poker_diff(self.table_id, {
+                'seq': self.seq, 'changes': changes, 'events': events,
+            })
+
+            hand_id = self.state.hand.hand_id if self.state.hand else None
+            for seat in self.state.seats.values():
+                cards = tuple(seat.hole_cards)
+                if self._private_sent.get(seat.user_id) != cards:
+                    self._private_sent[seat.user_id] = cards
+                    if cards:
+                        self.websocket_manager.send_poker_private(seat.user_id, self.table_id, {
+                            'seq': self.seq, 'hand_id': hand_id, 'hole_cards': list(cards),
+                        })
+            for user_id in set(self._private_sent) - set(self.state.seats):
+                del self._private_sent[user_id]
+        except Exception as e:
+            logger.warning(f"Failed to publish poker table {self.table_id} update: {e}", exc_info=True)
+
+    def _act(self, user_id, hand_id, action_type, amount):
+        now = datetime.now(timezone.utc)
+        self._expire_turn(now)
+        hand = self.state.hand
+        if hand is None or hand.hand_id != hand_id:
+            return {"error": f"Poker hand {hand_id} not found."}
+
+        status_before = hand.status
+        result = poker_table_state.apply_action(self.state, user_id, action_type, amount, now)
+        if "error" not in result:
+            self._record(user_id, action_type, amount, now, status_before)
+        return result
+
+    def _table_state(self, viewer_user_id):
+        """Full view for one viewer (a snapshot); seq is the last diff it already includes"""
+        self._expire_turn(datetime.now(timezone.utc))
+        self._publish()  # A timeout just applied must be published before the snapshot claims its seq
+        view = poker_table_state.table_view(self.state, viewer_user_id)
+        view['seq'] = self.seq
+        return view
+
+    def _start_hand(self, user_id):
+        """Same checks as the start_hand route, answered from memory before handing off to start_new_hand"""
+        seat = self.state.seats.get(user_id)
+        if seat is None or seat.is_sitting_out:
+            return {"error": "User not actively seated at this table.", "code": "not_seated"}
+        return self._deal()
+
+    def _deal_next_hand(self, after_hand_id):
+        """The dealer's start: skipped if a hand has been started since it saw the table ready"""
+        if after_hand_id != self._last_hand_id:
+            return None
+        result = self._deal()
+        if "error" in result:
+            logger.info(f"Poker table {self.table_id}: auto deal skipped: {result['error']}")
+            self._reported = None  # Report again so the dealer re-arms if the table is still ready
+        return result
+
+    def _deal(self):
+        hand = self.state.hand
+        if hand is not None and hand.is_betting:
+            return {"error": f"An active hand ({hand.status}) is already in progress.", "code": "hand_in_progress"}
+        ready = sum(1 for s in self.state.seats.values() if not s.is_sitting_out and s.stack_sats > 0)
+        if ready < MIN_PLAYERS:
+            return {"error": f"Not enough active players ({ready}) to start a new hand. Minimum {MIN_PLAYERS} required.",
+                    "code": "not_enough_players"}
+        result = self._run_db_operation(poker_helper.start_new_hand, (), {'table_id': self.table_id})
+        if "error" not in result and self.state.hand is not None and self.state.hand.hand_id == result.get("hand_id"):
+            # seq 0: the table as dealt, which the hand's later events replay against
+            self._pending_events.append(self._event_row(0, 'start', payload=poker_table_state.snapshot(self.state)))
+            self._mark_dirty()
+            self._flush()
+        return result
+
+    def _stand_up(self, user_id):
+        """Fold the player out of the live hand in memory, then cash out through handle_stand_up"""
+        now = datetime.now(timezone.utc)
+        hand = self.state.hand
+        status_before = hand.status if hand else None
+        if poker_table_state.remove_from_hand(self.state, user_id, 'stood_up', now) is not None:
+            self._record(user_id, 'stand_up', None, now, status_before)
+        return self._run_db_operation(poker_helper.handle_stand_up, (), {'user_id': user_id, 'table_id': self.table_id})
+
+    def _run_db_operation(self, fn, args, kwargs):
+        self._flush(materialise=True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            db.session.rollback()  # No-op after the helper's own commit; discards anything half-done
+            self._load()
+
+    def _flush(self, materialise: bool = False):
+        """
+        Append the new events in one transaction and truncate the journal. At a checkpoint (or when
+        asked to materialise) the same transaction rewrites the hand and seat projections and
+        inserts the pending transactions; until then those are re-derived from the events on recovery.
+        """
+        if self.state is None:
+            return
+        materialise = self._checkpoint_due or (materialise and self._projection_stale)
+        if self._dirty_since is None and not materialise:
+            return
+        session = db.session
+        state = self.state
+        try:
+            if self._pending_events:
+                session.execute(insert(PokerHandEvent), self._pending_events)
+            if materialise:
+                if state.hand is not None:
+                    session.execute(update(PokerHand).where(PokerHand.id == state.hand.hand_id).values(**state.hand.row()))
+                if state.seats:
+                    session.execute(update(PokerPlayerState), [seat.row() for seat in state.seats.values()])
+                if state.pending_transactions:
+                    session.execute(insert(Transaction), state.pending_transactions)
+            session.commit()
+        except Exception:
+            session.rollback()
+            logger.error(f"Poker table {self.table_id}: write-behind flush failed, will retry", exc_info=True)
+            self._dirty_since = time.monotonic()  # Back off one interval; the journal still covers everything
+            return
+        self._pending_events = []
+        if materialise:
+            state.pending_transactions = []
+            self._projection_stale = False
+            self._checkpoint_due = False
+        self.journal.truncate()
+        self._dirty_since = None
+        self.flush_count += 1
+
+
+def replay_hand(hand_id: int) -> Optional[poker_table_state.TableState]:
+    """
+    Rebuild a hand from its poker_hand_event log alone, in one ordered scan - for audits and
+    disputes. None if the hand has no 'start' event (hands started before the log existed).
+    """
+    rows = db.session.execute(
+        select(PokerHandEvent.seq, PokerHandEvent.event_type, PokerHandEvent.user_id, PokerHandEvent.amount,
+               PokerHandEvent.created_at, PokerHandEvent.payload)
+        .filter(PokerHandEvent.hand_id == hand_id).order_by(PokerHandEvent.seq)
+    ).all()
+    if not rows or rows[0].event_type != 'start':
+        return None
+    return poker_table_state.replay(rows[0].payload, [tuple(row)[:5] for row in rows[1:]])
+
+
+def process_owner() -> str:
+    """Names this process in a table's lease"""
+    return f"{socket.gethostname()}:{os.getpid()}"[-64:]
+
+
+class PokerActorRegistry:
+    """
+    Creates table actors on first use and forgets them when they exit.
+
+    A table must be run by a single process: with several replicas, each table's actor claims a
+    lease on its row (see PokerTableActor), and a replica whose actor could not claim it answers
+    that table's commands with TableOwnedElsewhere until the owner exits or its lease lapses.
+    Route a table's traffic to one replica (or run poker in a single process) so players are not
+    turned away while another replica holds the table.
+    """
+
+    def __init__(self, app=None, websocket_manager=None):
+        self.app = app
+        self.owner = process_owner()
+        self.websocket_manager = websocket_manager
+        self.turn_timer = PokerTurnTimer(self._dispatch_timeout)
+        self.auto_dealer = PokerAutoDealer(self._dispatch_deal)
+        self._actors: Dict[int, PokerTableActor] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, app, websocket_manager=None):
+        """Bind to an app; actors belonging to a previous app are flushed and stopped"""
+        self.stop_all()
+        self.turn_timer.clear()
+        self.auto_dealer.clear()
+        self.auto_dealer.delay = app.config.get('POKER_AUTO_DEAL_DELAY', AUTO_DEAL_DELAY)
+        self.app = app
+        self.websocket_manager = websocket_manager
+
+    def resume_active_tables(self) -> int:
+        """Start actors for tables with a hand in progress so their turn clocks keep running after a restart"""
+        with self.app.app_context():
+            table_ids = db.session.scalars(
+                select(PokerHand.table_id).join(PokerTable).filter(
+                    PokerHand.status.in_(poker_table_state.BETTING_STATUSES),
+                    _lease_free(self.owner, datetime.now(timezone.utc)),
+                ).distinct()
+            ).all()
+            for table_id in table_ids:
+                self.get(table_id)
+            db.session.remove()
+        if table_ids:
+            logger.info(f"Resumed poker table actors for tables {', '.join(map(str, table_ids))}")
+        return len(table_ids)
+
+    def seed_auto_dealer(self) -> int:
+        """Load every active table's seat counters into the dealer in one grouped query"""
+        if not self.app.config.get('POKER_AUTO_DEAL', False):
+            return 0
+        with self.app.app_context():
+            # Tables another replica is running are dealt by that replica
+            ready = select(PokerPlayerState.table_id, func.count(PokerPlayerState.id)).join(PokerTable).filter(
+                PokerTable.is_active.is_(True), _lease_free(self.owner, datetime.now(timezone.utc)),
+                PokerPlayerState.user_id.isnot(None),
+                PokerPlayerState.is_sitting_out.is_(False), PokerPlayerState.stack_sats > 0,
+            ).group_by(PokerPlayerState.table_id)
+            counts = dict(db.session.execute(ready).all())
+            live = set(db.session.scalars(
+                select(PokerHand.table_id).filter(PokerHand.status != 'completed').distinct()
+            ).all())
+            db.session.remove()
+        # Tables without an actor: the hand id a fresh actor reports is None too
+        self.auto_dealer.seed({table_id: (count, None, table_id in live) for table_id, count in counts.items()
+                               if self.peek(table_id) is None})
+        ready_tables = sum(1 for table_id, count in counts.items() if count >= MIN_PLAYERS and table_id not in live)
+        if ready_tables:
+            logger.info(f"Poker auto dealer: {ready_tables} table(s) ready for a hand")
+        return ready_tables
+
+    def get(self, table_id: int) -> Optional[PokerTableActor]:
+        """The table's actor, started if needed; None if there is no such table"""
+        with self._lock:
+            actor = self._actors.get(table_id)
+            if actor is None or not actor.running:
+                if db.session.get(PokerTable, table_id) is None:
+                    return None
+                actor = PokerTableActor(
+                    self.app, table_id, self._journal_dir(),
+                    flush_interval=self.app.config.get('POKER_ACTOR_FLUSH_INTERVAL', FLUSH_INTERVAL),
+                    on_exit=self._forget, timer=self.turn_timer, websocket_manager=self.websocket_manager,
+                    dealer=self.auto_dealer if self.app.config.get('POKER_AUTO_DEAL', False) else None,
+                    owner=self.owner, lease_ttl=self.app.config.get('POKER_ACTOR_LEASE_TTL', LEASE_TTL),
+                )
+                actor.start()
+                self._actors[table_id] = actor
+            return actor
+
+    def peek(self, table_id: int) -> Optional[PokerTableActor]:
+        actor = self._actors.get(table_id)
+        return actor if actor is not None and actor.running else None
+
+    def stop_all(self):
+        with self._lock:
+            actors = list(self._actors.values())
+            self._actors.clear()
+        for actor in actors:
+            actor.stop()
+
+    def _dispatch_timeout(self, table_id: int, token):
+        actor = self.peek(table_id)
+        if actor is None:
+            # The actor died with a turn pending: restarting it re-registers (and so fires) the deadline
+            with self.app.app_context():
+                self.get(table_id)
+                db.session.remove()
+            return
+        try:
+            actor.on_timer(token)
+        except TableOwnedElsewhere:
+            pass  # The owning process runs the table's clock
+        except RuntimeError:
+            # Stopped between peek and post; retry against a fresh actor
+            self.turn_timer.schedule(table_id, datetime.now(timezone.utc), token)
+
+    def _dispatch_deal(self, table_id: int, hand_id):
+        actor = self.peek(table_id)
+        if actor is None:
+            with self.app.app_context():
+                actor = self.get(table_id)
+                db.session.remove()
+            if actor is None:
+                self.auto_dealer.forget(table_id)
+                return
+        try:
+            actor.deal_next_hand(hand_id)
+        except TableOwnedElsewhere:
+            self.auto_dealer.forget(table_id)  # Dealt by the owning process
+        except RuntimeError:
+            # Stopped between peek and post; the next attempt gets a fresh actor
+            self.auto_dealer.retry(table_id)
+
+    def _forget(self, actor: PokerTableActor):
+        with self._lock:
+            if self._actors.get(actor.table_id) is actor:
+                del self._actors[actor.table_id]
+
+    def _journal_dir(self) -> str:
+        return self.app.config.get('POKER_ACTOR_JOURNAL_DIR') or os.path.join(self.app.instance_path, 'poker_journal')
+
+
+# Global instance
+poker_table_actors = PokerActorRegistry()
+
+def get_poker_table_actors():
+    """Get the global poker table actor registry"""
+    return poker_table_actors
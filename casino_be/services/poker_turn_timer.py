@@ -0,0 +1,80 @@
+"""
+Poker Turn Timer
+One background thread firing every table's action deadline on time
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PokerTurnTimer:
+    """
+    Heap of turn deadlines across all poker tables.
+
+    Each table has at most one live deadline: scheduling again replaces it, and the
+    replaced heap entry is skipped when it surfaces. When a deadline passes, dispatch
+    is called with (table_id, token) from the timer thread; the token lets the table
+    tell whether the turn that was timed is still the current one. Dispatch must not
+    block - it hands the expiry to the table's own thread.
+    """
+
+    def __init__(self, dispatch: Callable[[int, Hashable], None]):
+        self.dispatch = dispatch
+        self.fired = 0
+        self._heap = []
+        self._live: Dict[int, Tuple[float, int]] = {}  # table_id -> (due, entry id) of its current deadline
+        self._entry_ids = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, table_id: int, deadline: Optional[datetime], token: Hashable = None):
+        """Set (or with deadline=None, cancel) the table's pending deadline"""
+        with self._condition:
+            if deadline is None:
+                self._live.pop(table_id, None)
+                return
+            entry_id = next(self._entry_ids)
+            due = deadline.timestamp()
+            self._live[table_id] = (due, entry_id)
+            heapq.heappush(self._heap, (due, entry_id, table_id, token))
+            self._ensure_thread()
+            if self._heap[0][1] == entry_id:
+                self._condition.notify()  # New earliest deadline: re-arm the wait
+
+    def pending(self, table_id: int) -> Optional[float]:
+        """Epoch seconds of the table's live deadline, if any"""
+        entry = self._live.get(table_id)
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._condition:
+            self._heap.clear()
+            self._live.clear()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='poker-turn-timer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.time():
+                    self._condition.wait(self._heap[0][0] - time.time() if self._heap else None)
+                due, entry_id, table_id, token = heapq.heappop(self._heap)
+                if self._live.get(table_id) != (due, entry_id):
+                    continue  # Replaced or cancelled
+                del self._live[table_id]
+
+            self.fired += 1
+            try:
+                self.dispatch(table_id, token)
+            except Exception as e:
+                logger.error(f"Poker turn timer dispatch failed for table {table_id}: {e}", exc_info=True)
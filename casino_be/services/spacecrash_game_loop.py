@@ -4,12 +4,15 @@ Handles the real-time game flow for SpaceCrash games
 """
 
 import asyncio
+import heapq
 import threading
 import time
 import logging
 import hashlib
+import json
+from collections import deque
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Tuple
 
 from flask import current_app
 from sqlalchemy import create_engine, select, func
@@ -17,27 +20,205 @@ from sqlalchemy.orm import sessionmaker
 
 from casino_be.models import SpacecrashGame, SpacecrashBet, User, db
 from casino_be.utils import spacecrash_handler
-from casino_be.schemas import SpacecrashGameSchema, SpacecrashPlayerBetSchema
+from casino_be.schemas import SpacecrashGameSchema, SpacecrashPlayerBetSchema, SpacecrashGameHistorySchema
 
 logger = logging.getLogger(__name__)
 
+HISTORY_SIZE = 20           # Completed games kept for GET /api/spacecrash/history
+SNAPSHOT_MAX_AGE = 1.0      # Seconds a route-built payload may be reused when no loop is running
+
+
+def build_game_state(game: SpacecrashGame, bets: List[SpacecrashBet], betting_phase_duration: float) -> Dict[str, Any]:
+    """Serialize a game plus its bets into the shape served by /current_game and broadcast over WebSocket"""
+    game_data = SpacecrashGameSchema().dump(game)
+
+    if game.status == 'in_progress' and game.game_start_time:
+        game_data['current_multiplier'] = spacecrash_handler.get_current_multiplier(game)
+    elif game.status == 'betting':
+        game_data['current_multiplier'] = 1.0
+        if game.betting_start_time:
+            betting_elapsed = (datetime.now(timezone.utc) - spacecrash_handler.ensure_utc(game.betting_start_time)).total_seconds()
+            game_data['betting_time_remaining'] = max(0, betting_phase_duration - betting_elapsed)
+    elif game.status == 'completed':
+        game_data['current_multiplier'] = game.crash_point
+
+    game_data['player_bets'] = SpacecrashPlayerBetSchema(many=True).dump(bets)
+    return game_data
+
+
+class SpacecrashStateCache:
+    """
+    Pre-serialized SpaceCrash payloads for the polling endpoints.
+
+    While the game loop runs in this process it pushes fresh bytes at every tick and
+    transition, and those are served as-is. Otherwise routes rebuild a payload on demand;
+    a per-key lock makes concurrent pollers share a single rebuild (single-flight).
+    """
+
+    CURRENT_GAME = 'current_game'
+    HISTORY = 'history'
+
+    def __init__(self, history_size: int = HISTORY_SIZE, max_age: float = SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self.live = False  # True while a game loop owns the payloads
+        self.history = deque(maxlen=history_size)
+        self._entries: Dict[str, Tuple[bytes, int, float]] = {}
+        self._locks = {self.CURRENT_GAME: threading.Lock(), self.HISTORY: threading.Lock()}
+
+    @staticmethod
+    def encode(payload: Dict[str, Any]) -> bytes:
+        return json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+
+    def put(self, key: str, payload: Dict[str, Any], status_code: int = 200):
+        self._entries[key] = (self.encode(payload), status_code, time.monotonic())
+
+    def get(self, key: str, builder: Callable[[], Tuple[Dict[str, Any], int]]) -> Tuple[bytes, int]:
+        """Return (body, status_code) for key, calling builder at most once per refresh across threads"""
+        entry = self._entries.get(key)
+        if self._is_fresh(entry):
+            return entry[0], entry[1]
+
+        with self._locks[key]:
+            entry = self._entries.get(key)
+            if self._is_fresh(entry):  # Another thread rebuilt it while we waited
+                return entry[0], entry[1]
+            payload, status_code = builder()
+            self.put(key, payload, status_code)
+            return self._entries[key][0], status_code
+
+    def set_history(self, games_data: List[Dict[str, Any]]):
+        """Replace the ring buffer with completed games, newest first"""
+        self.history.clear()
+        self.history.extend(games_data)
+        self._put_history()
+
+    def push_history(self, game_data: Dict[str, Any]):
+        self.history.appendleft(game_data)
+        self._put_history()
+
+    def clear(self):
+        self.history.clear()
+        self._entries.clear()
+
+    def _put_history(self):
+        self.put(self.HISTORY, {'status': True, 'history': list(self.history)})
+
+    def _is_fresh(self, entry) -> bool:
+        if entry is None:
+            return False
+        return self.live or (time.monotonic() - entry[2]) < self.max_age
+
+class SpacecrashBetEventBuffer:
+    """
+    Per-round aggregation of bet and eject events pushed by the request path.
+
+    The game loop drains it once per tick and broadcasts the batch as a single delta,
+    so n players ejecting cost n small events instead of n full game re-serializations.
+    Events are keyed by user, keeping only each player's latest bet state for the tick.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._game_id = None
+        self._events: Dict[int, Dict[str, Any]] = {}
+
+    def push(self, game_id: int, event: Dict[str, Any]):
+        with self._lock:
+            if game_id != self._game_id:
+                # New round: anything still buffered belongs to a finished game
+                self._game_id = game_id
+                self._events = {}
+            self._events[event['user_id']] = event
+
+    def drain(self) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        with self._lock:
+            game_id, events = self._game_id, list(self._events.values())
+            self._events = {}
+        return game_id, events
+
+
+DEFAULT_ROOM = 'classic'
+
+# Built-in room set; override with app.config['SPACECRASH_ROOMS'] using the same shape.
+# Keys missing from a room's dict fall back to SpacecrashRoom's defaults.
+DEFAULT_ROOM_CONFIGS = {
+    'classic': {},
+    'turbo': {'betting_phase_duration': 5, 'max_game_duration': 30, 'tick_interval': 0.5},
+    'high_roller': {'betting_phase_duration': 15, 'min_bet': 1_000_000},
+    'low_edge': {'house_edge': 0.005},
+}
+
+
+def spacecrash_channel(room_name: str) -> str:
+    """WebSocket room for a SpaceCrash room; the default room keeps the original 'spacecrash' channel"""
+    return 'spacecrash' if room_name == DEFAULT_ROOM else f'spacecrash_{room_name}'
+
+
+class SpacecrashRoom:
+    """One independent crash game: its own timing, house edge, bet limits, snapshots and WebSocket room"""
+
+    def __init__(self, name: str, betting_phase_duration: float = 10, min_game_duration: float = 3,
+                 max_game_duration: float = 120, house_edge: float = 0.01, min_bet: int = 1,
+                 max_bet: Optional[int] = None, tick_interval: float = 1):
+        self.name = name
+        self.betting_phase_duration = betting_phase_duration  # seconds
+        self.min_game_duration = min_game_duration            # minimum seconds before crash
+        self.max_game_duration = max_game_duration            # maximum seconds before forced crash
+        self.house_edge = house_edge
+        self.min_bet = min_bet
+        self.max_bet = max_bet
+        self.tick_interval = tick_interval                    # seconds between state machine cycles
+        self.channel = spacecrash_channel(name)
+
+        # Pre-serialized payloads for /current_game and /history
+        self.state_cache = SpacecrashStateCache()
+        # Bet/eject deltas from the request path, flushed once per tick
+        self.bet_events = SpacecrashBetEventBuffer()
+        self.current_game_id = None
+        self.history_loaded = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'channel': self.channel,
+            'betting_phase_duration': self.betting_phase_duration,
+            'max_game_duration': self.max_game_duration,
+            'house_edge': self.house_edge,
+            'min_bet': self.min_bet,
+            'max_bet': self.max_bet,
+        }
+
+
 class SpacecrashGameLoop:
-    """Manages real-time SpaceCrash game flow with WebSocket broadcasting"""
+    """
+    Runs every SpaceCrash room on one scheduler thread with WebSocket broadcasting.
+
+    Rooms sit in a heap keyed by their next tick deadline; the thread sleeps until the
+    earliest deadline, advances that room's state machine and re-schedules it. Room
+    count is bounded by the time a tick takes, not by threads.
+    """
     
-    def __init__(self, websocket_manager=None, app=None):
+    def __init__(self, websocket_manager=None, app=None, room_configs: Optional[Dict[str, Dict[str, Any]]] = None):
         self.websocket_manager = websocket_manager
         self.app = app
         self.running = False
         self.loop_thread = None
-        self.current_game_id = None
-        
-        # Game timing configuration
-        self.BETTING_PHASE_DURATION = 10  # seconds
-        self.MIN_GAME_DURATION = 3       # minimum seconds before crash
-        self.MAX_GAME_DURATION = 120     # maximum seconds before forced crash
+        self._wakeup = threading.Event()
         
         # Database session for background thread
         self.db_session = None
+
+        self.rooms: Dict[str, SpacecrashRoom] = {}
+        self.configure_rooms(room_configs or DEFAULT_ROOM_CONFIGS)
+
+    def configure_rooms(self, room_configs: Dict[str, Dict[str, Any]]):
+        """Replace the room set; rooms start with empty snapshots"""
+        if self.running:
+            raise RuntimeError("Cannot reconfigure SpaceCrash rooms while the game loop is running")
+        self.rooms = {name: SpacecrashRoom(name, **config) for name, config in room_configs.items()}
+
+    def get_room(self, name: str) -> Optional[SpacecrashRoom]:
+        return self.rooms.get(name)
         
     def start(self):
         """Start the game loop in a background thread"""
@@ -46,13 +227,21 @@ class SpacecrashGameLoop:
             return
             
         self.running = True
+        self._wakeup.clear()
+        for room in self.rooms.values():
+            room.state_cache.clear()
+            room.state_cache.live = True
+            room.history_loaded = False
         self.loop_thread = threading.Thread(target=self._run_loop, daemon=True)
         self.loop_thread.start()
-        logger.info("SpaceCrash game loop started")
+        logger.info(f"SpaceCrash game loop started with rooms: {', '.join(self.rooms)}")
         
     def stop(self):
         """Stop the game loop"""
         self.running = False
+        self._wakeup.set()
+        for room in self.rooms.values():
+            room.state_cache.live = False
         if self.loop_thread:
             self.loop_thread.join(timeout=5)
         logger.info("SpaceCrash game loop stopped")
@@ -67,54 +256,92 @@ class SpacecrashGameLoop:
                 self.db_session = Session()
                 
     def _run_loop(self):
-        """Main game loop - runs in background thread"""
+        """Scheduler - runs in background thread, ticking whichever room is due next"""
         with self.app.app_context():
             self._setup_db_session()
+
+            now = time.monotonic()
+            schedule = [(now, order, name) for order, name in enumerate(self.rooms)]
+            heapq.heapify(schedule)
             
             try:
-                while self.running:
-                    try:
-                        self._process_game_cycle()
-                        time.sleep(1)  # Check every second
-                    except Exception as e:
-                        logger.error(f"Error in game loop: {e}", exc_info=True)
-                        time.sleep(5)  # Wait longer on error
+                while self.running and schedule:
+                    due, order, name = schedule[0]
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        self._wakeup.wait(delay)  # Set by stop()
+                        continue
+
+                    next_due = self._tick_room(self.rooms[name], due)
+                    heapq.heapreplace(schedule, (next_due, order, name))
                         
             finally:
                 if self.db_session:
                     self.db_session.close()
+
+    def _tick_room(self, room: SpacecrashRoom, due: float) -> float:
+        """Run one cycle for a room and return its next deadline"""
+        try:
+            self._process_game_cycle(room)
+            next_due = due + room.tick_interval  # Fixed rate: a slow tick doesn't push later ones back
+        except Exception as e:
+            logger.error(f"Error in game loop for room {room.name}: {e}", exc_info=True)
+            self.db_session.rollback()  # The session is shared by every room
+            next_due = time.monotonic() + 5  # Wait longer on error
+
+        # Behind schedule: run as soon as other due rooms have had their turn, without a burst of catch-up ticks
+        return max(next_due, time.monotonic())
                     
-    def _process_game_cycle(self):
-        """Process one cycle of the game state machine"""
-        current_game = self._get_current_game()
+    def _process_game_cycle(self, room: SpacecrashRoom):
+        """Process one cycle of a room's game state machine"""
+        if not room.history_loaded:
+            self._load_history(room)
+
+        current_game = self._get_current_game(room)
         
         if not current_game:
             # No game exists, create new one and start betting
-            current_game = self._create_and_start_betting()
+            current_game = self._create_and_start_betting(room)
             
         elif current_game.status == 'pending':
             # Move to betting phase
-            self._start_betting_phase(current_game)
+            self._start_betting_phase(room, current_game)
             
         elif current_game.status == 'betting':
             # Check if betting phase should end
-            self._check_betting_phase_end(current_game)
+            self._check_betting_phase_end(room, current_game)
+            if current_game.status == 'betting':
+                # No transition this tick; keep the polled snapshot's countdown current
+                self._publish_game_state(room, current_game, broadcast=False)
             
         elif current_game.status == 'in_progress':
             # Update current multiplier and check for crash
-            self._update_game_progress(current_game)
+            self._update_game_progress(room, current_game)
             
         elif current_game.status == 'completed':
             # Start new game after a short delay
-            self._handle_completed_game(current_game)
+            self._handle_completed_game(room, current_game)
+
+        self._flush_bet_events(room)
             
-    def _get_current_game(self) -> Optional[SpacecrashGame]:
-        """Get the current active game"""
+    def _load_history(self, room: SpacecrashRoom):
+        """Seed a room's history ring buffer from the database once per loop start"""
+        recent_games = self.db_session.scalars(
+            select(SpacecrashGame).filter_by(status='completed', room=room.name)
+            .order_by(SpacecrashGame.game_end_time.desc())
+            .limit(room.state_cache.history.maxlen)
+        ).all()
+        room.state_cache.set_history(SpacecrashGameHistorySchema(many=True).dump(recent_games))
+        room.history_loaded = True
+
+    def _get_current_game(self, room: SpacecrashRoom) -> Optional[SpacecrashGame]:
+        """Get the room's current active game"""
         return self.db_session.scalar(select(SpacecrashGame).filter(
+            SpacecrashGame.room == room.name,
             SpacecrashGame.status.in_(['pending', 'betting', 'in_progress'])
         ).order_by(SpacecrashGame.created_at.desc()))
         
-    def _create_and_start_betting(self) -> SpacecrashGame:
+    def _create_and_start_betting(self, room: SpacecrashRoom) -> SpacecrashGame:
         """Create new game and start betting phase"""
         # Create new game using the game loop's session instead of spacecrash_handler
         server_seed = spacecrash_handler.generate_server_seed()
@@ -125,6 +352,7 @@ class SpacecrashGameLoop:
             public_seed=public_seed,
             nonce=0,
             status='pending',
+            room=room.name,
         )
         self.db_session.add(new_game)
         self.db_session.commit()
@@ -134,29 +362,29 @@ class SpacecrashGameLoop:
         new_game.betting_start_time = datetime.now(timezone.utc)
         self.db_session.commit()
         
-        self.current_game_id = new_game.id
-        self._broadcast_game_update(new_game)
+        room.current_game_id = new_game.id
+        self._publish_game_state(room, new_game)
         
-        logger.info(f"Started new betting phase for game {new_game.id}")
+        logger.info(f"Started new betting phase for game {new_game.id} in room {room.name}")
         return new_game
         
-    def _start_betting_phase(self, game: SpacecrashGame):
+    def _start_betting_phase(self, room: SpacecrashRoom, game: SpacecrashGame):
         """Start betting phase for existing pending game"""
         spacecrash_handler.start_betting_phase(game)
         game.betting_start_time = datetime.now(timezone.utc)
         self.db_session.commit()
         
-        self._broadcast_game_update(game)
-        logger.info(f"Started betting phase for game {game.id}")
+        self._publish_game_state(room, game)
+        logger.info(f"Started betting phase for game {game.id} in room {room.name}")
         
-    def _check_betting_phase_end(self, game: SpacecrashGame):
+    def _check_betting_phase_end(self, room: SpacecrashRoom, game: SpacecrashGame):
         """Check if betting phase should end and start game"""
         if not game.betting_start_time:
             return
             
-        betting_elapsed = (datetime.now(timezone.utc) - game.betting_start_time).total_seconds()
+        betting_elapsed = (datetime.now(timezone.utc) - spacecrash_handler.ensure_utc(game.betting_start_time)).total_seconds()
         
-        if betting_elapsed >= self.BETTING_PHASE_DURATION:
+        if betting_elapsed >= room.betting_phase_duration:
             # Check if there are any bets
             bet_count = self.db_session.scalar(select(func.count(SpacecrashBet.id)).filter_by(
                 game_id=game.id, status='placed'
@@ -164,52 +392,56 @@ class SpacecrashGameLoop:
             
             if bet_count > 0:
                 # Start the game
-                self._start_game_round(game)
+                self._start_game_round(room, game)
             else:
                 # No bets, extend betting period or start new game
                 logger.info(f"No bets for game {game.id}, extending betting period")
                 game.betting_start_time = datetime.now(timezone.utc)
                 self.db_session.commit()
                 
-    def _start_game_round(self, game: SpacecrashGame):
+    def _start_game_round(self, room: SpacecrashRoom, game: SpacecrashGame):
         """Start the actual game round"""
         client_seed = f"client_seed_{int(time.time())}"  # Simple client seed
         nonce = 1
         
-        success = spacecrash_handler.start_game_round(game, client_seed, nonce)
+        success = spacecrash_handler.start_game_round(game, client_seed, nonce, house_edge=room.house_edge)
         if success:
             self.db_session.commit()
-            self._broadcast_game_update(game)
-            logger.info(f"Started game round {game.id} - crash point: {game.crash_point}")
+            self._publish_game_state(room, game)
+            logger.info(f"Started game round {game.id} in room {room.name} - crash point: {game.crash_point}")
         else:
             logger.error(f"Failed to start game round {game.id}")
             
-    def _update_game_progress(self, game: SpacecrashGame):
+    def _update_game_progress(self, room: SpacecrashRoom, game: SpacecrashGame):
         """Update game progress and check for crash"""
         if not game.game_start_time:
             return
             
-        elapsed_seconds = (datetime.now(timezone.utc) - game.game_start_time).total_seconds()
+        elapsed_seconds = (datetime.now(timezone.utc) - spacecrash_handler.ensure_utc(game.game_start_time)).total_seconds()
         current_multiplier = spacecrash_handler.get_current_multiplier(game)
         
         # Check if game should crash
         should_crash = (
             current_multiplier >= game.crash_point or
-            elapsed_seconds >= self.MAX_GAME_DURATION
+            elapsed_seconds >= room.max_game_duration
         )
         
         if should_crash:
-            # End the game
-            spacecrash_handler.end_game_round(game)
-            self.db_session.commit()
-            
-            self._broadcast_game_update(game)
-            logger.info(f"Game {game.id} crashed at {game.crash_point}x after {elapsed_seconds:.2f}s")
+            self._settle_game(game)
+
+            room.state_cache.push_history(SpacecrashGameHistorySchema().dump(game))
+            self._publish_game_state(room, game)
+            logger.info(f"Game {game.id} in room {room.name} crashed at {game.crash_point}x after {elapsed_seconds:.2f}s")
         else:
-            # Broadcast current state every second during active game
-            self._broadcast_game_update(game, include_current_multiplier=True)
+            # Broadcast current state every tick during active game
+            self._publish_game_state(room, game)
             
-    def _handle_completed_game(self, game: SpacecrashGame):
+    def _settle_game(self, game: SpacecrashGame):
+        """End the round and settle every open bet in the loop's own session"""
+        spacecrash_handler.end_game_round(game, session=self.db_session)
+        self.db_session.commit()
+
+    def _handle_completed_game(self, room: SpacecrashRoom, game: SpacecrashGame):
         """Handle completed game, wait a bit then start new one"""
         # Wait 3 seconds after game completion before starting new betting
         if not hasattr(game, '_completion_wait_start'):
@@ -219,40 +451,31 @@ class SpacecrashGameLoop:
         wait_elapsed = (datetime.now(timezone.utc) - game._completion_wait_start).total_seconds()
         if wait_elapsed >= 3:
             # Ready to start new game
-            self.current_game_id = None
+            room.current_game_id = None
             
-    def _broadcast_game_update(self, game: SpacecrashGame, include_current_multiplier: bool = False):
-        """Broadcast game state update via WebSocket"""
-        if not self.websocket_manager:
+    def _flush_bet_events(self, room: SpacecrashRoom):
+        """Broadcast this tick's buffered bet/eject events as one compact batch"""
+        game_id, events = room.bet_events.drain()
+        if not events or not self.websocket_manager:
             return
-            
+
         try:
-            # Prepare game data
-            game_data = SpacecrashGameSchema().dump(game)
-            
-            # Add current multiplier if game is in progress
-            if include_current_multiplier and game.status == 'in_progress':
-                game_data['current_multiplier'] = spacecrash_handler.get_current_multiplier(game)
-            elif game.status == 'betting':
-                game_data['current_multiplier'] = 1.0
-            elif game.status == 'completed':
-                game_data['current_multiplier'] = game.crash_point
-                
-            # Add current bets
-            bets_query = self.db_session.scalars(select(SpacecrashBet).filter_by(game_id=game.id)).all()
-            game_data['player_bets'] = SpacecrashPlayerBetSchema(many=True).dump(bets_query)
-            
-            # Calculate betting time remaining
-            if game.status == 'betting' and game.betting_start_time:
-                betting_elapsed = (datetime.now(timezone.utc) - game.betting_start_time).total_seconds()
-                time_remaining = max(0, self.BETTING_PHASE_DURATION - betting_elapsed)
-                game_data['betting_time_remaining'] = time_remaining
-                
-            # Broadcast to all connected users
-            self.websocket_manager.broadcast_spacecrash_update(game_data)
-            
+            self.websocket_manager.broadcast_spacecrash_bets(game_id, events, room=room.channel)
+        except Exception as e:
+            logger.error(f"Error broadcasting bet events for game {game_id}: {e}", exc_info=True)
+
+    def _publish_game_state(self, room: SpacecrashRoom, game: SpacecrashGame, broadcast: bool = True):
+        """Refresh the room's polled snapshot and, unless told otherwise, broadcast it via WebSocket"""
+        try:
+            bets = self.db_session.scalars(select(SpacecrashBet).filter_by(game_id=game.id)).all()
+            game_data = build_game_state(game, bets, room.betting_phase_duration)
+            room.state_cache.put(SpacecrashStateCache.CURRENT_GAME, {'status': True, 'game': game_data})
+
+            if broadcast and self.websocket_manager:
+                self.websocket_manager.broadcast_spacecrash_update(game_data, room=room.channel)
+
         except Exception as e:
-            logger.error(f"Error broadcasting game update: {e}", exc_info=True)
+            logger.error(f"Error publishing game update: {e}", exc_info=True)
 
 # Global instance
 spacecrash_game_loop = SpacecrashGameLoop()
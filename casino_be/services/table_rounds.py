@@ -0,0 +1,570 @@
+"""
+Table Rounds
+Shared betting rounds for baccarat and roulette tables: one outcome per round for every player at the table
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select, update
+
+from casino_be.models import db, BaccaratHand, BaccaratTable, GameRound, GameSession, RouletteGame, Transaction, User
+from casino_be.services.baccarat_shoe import get_baccarat_shoes
+from casino_be.utils import baccarat_helper, roulette_helper
+
+logger = logging.getLogger(__name__)
+
+BETTING_WINDOW = 15.0   # Seconds a table takes bets after the first bet of a round
+HISTORY_SIZE = 20       # Settled rounds kept per table for GET .../round
+
+# Built-in roulette tables; override with app.config['ROULETTE_TABLES'] using the same shape.
+# Keys missing from a table's dict fall back to ROULETTE_TABLE_DEFAULTS.
+ROULETTE_TABLE_DEFAULTS = {'min_bet': 1, 'max_bet': 100_000_000}
+DEFAULT_ROULETTE_TABLES = {
+    1: {},
+}
+
+
+class TableRound:
+    """An open betting window at one table: each player's bets, held in memory until it closes"""
+
+    def __init__(self, table_id: int, limits: Dict[str, Any], closes_at: float):
+        self.table_id = table_id
+        self.limits = limits        # The table as loaded when the round opened
+        self.closes_at = closes_at  # time.monotonic()
+        self.opened_at = datetime.now(timezone.utc)
+        self.bets: Dict[int, Any] = {}      # user_id -> that player's bet, in the game's shape
+        self.stakes: Dict[int, int] = {}    # user_id -> sats staked in this round
+
+    def to_dict(self, user_id: Optional[int] = None) -> Dict[str, Any]:
+        data = {
+            'table_id': self.table_id,
+            'opened_at': self.opened_at.isoformat(),
+            'closes_in': max(0.0, self.closes_at - time.monotonic()),
+            'players': len(self.bets),
+            'total_staked': sum(self.stakes.values()),
+        }
+        if user_id is not None and user_id in self.bets:
+            data['your_bet'] = self.bets[user_id]
+            data['your_stake'] = self.stakes[user_id]
+        return data
+
+
+class RoundTables(ABC):
+    """
+    The open rounds of one game. A table's round opens with its first bet and takes bets for
+    the engine's betting window; players may add to their bet until it closes. Nothing touches
+    the database while bets come in - stakes are reserved against each player's balance in
+    memory. Closing draws one outcome and settles every bet in a single transaction (see
+    RoundEngine). Subclasses give the game's table limits, bet shape, draw, settlement and rows.
+    """
+
+    game = None
+
+    def __init__(self, engine: 'RoundEngine'):
+        self.engine = engine
+        self._rounds: Dict[int, TableRound] = {}
+        self._limits: Dict[int, Dict[str, Any]] = {}
+        self._history: Dict[int, deque] = {}
+
+    # --- Hooks ---
+
+    @abstractmethod
+    def load_limits(self, table_id: int) -> Optional[Dict[str, Any]]:
+        """The table's limits and rates, or None if it is not open for play"""
+
+    @abstractmethod
+    def parse_bet(self, data: Dict[str, Any]) -> Any:
+        """The bet in the game's shape; ValueError if it is malformed"""
+
+    @abstractmethod
+    def merge(self, existing: Any, bet: Any) -> Any:
+        """A player's round bet after adding another bet to it"""
+
+    @abstractmethod
+    def stake(self, bet: Any) -> int:
+        """Sats a player's round bet puts at risk"""
+
+    @abstractmethod
+    def check_limits(self, limits: Dict[str, Any], bet: Any) -> Optional[str]:
+        """Why a player's round bet breaks the table limits, if it does"""
+
+    @abstractmethod
+    def draw(self, session, table_round: TableRound) -> Dict[str, Any]:
+        """The round's outcome, as stored on GameRound.outcome"""
+
+    @abstractmethod
+    def settle_bets(self, table_round: TableRound, bets: Dict[int, Any], outcome: Dict[str, Any]) -> Dict[int, Tuple[int, Dict[str, Any]]]:
+        """Each player's sats paid back (stakes included) on the outcome, and any details to keep with them"""
+
+    @abstractmethod
+    def write_rows(self, session, table_round: TableRound, game_round: GameRound, outcome: Dict[str, Any],
+                   settled: Dict[int, Tuple[int, Dict[str, Any]]], now: datetime):
+        """Bulk insert the round's per-player game rows and transactions"""
+
+    # --- Betting ---
+
+    def place_bet(self, table_id: int, user, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a bet to the table's open round, opening one if needed; an "error" and "code" if refused"""
+        try:
+            bet = self.parse_bet(data)
+        except (TypeError, ValueError) as e:
+            return {"error": str(e), "code": "invalid_bet"}
+
+        limits = self._table_limits(table_id)
+        if limits is None:
+            return {"error": f"{self.game.capitalize()} table {table_id} not found or not active.", "code": "not_found"}
+
+        engine = self.engine
+        with engine.lock:
+            table_round = self._rounds.get(table_id)
+            existing = table_round.bets.get(user.id) if table_round is not None else None
+            merged = self.merge(existing, bet)
+            error = self.check_limits(table_round.limits if table_round is not None else limits, merged)
+            if error:
+                return {"error": error, "code": "invalid_bet"}
+
+            stake = self.stake(merged)
+            added = stake - (table_round.stakes.get(user.id, 0) if table_round is not None else 0)
+            available = user.balance - engine.reserved.get(user.id, 0)
+            if added > available:
+                return {"error": "Insufficient balance.", "code": "insufficient_balance"}
+
+            if table_round is None:
+                table_round = TableRound(table_id, limits, time.monotonic() + engine.betting_window)
+                self._rounds[table_id] = table_round
+                engine.clock.schedule((self.game, table_id), table_round.closes_at)
+            table_round.bets[user.id] = merged
+            table_round.stakes[user.id] = stake
+            engine.reserved[user.id] = engine.reserved.get(user.id, 0) + added
+            return {'round': table_round.to_dict(user.id), 'available_balance': available - added}
+
+    def round_state(self, table_id: int, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """The table's open round, if any, and its recently settled rounds"""
+        with self.engine.lock:
+            table_round = self._rounds.get(table_id)
+            current = table_round.to_dict(user_id) if table_round is not None else None
+            recent = list(self._history.get(table_id, ()))
+        return {
+            'game': self.game,
+            'table_id': table_id,
+            'round': current,
+            'recent': [_for_player(result, user_id) for result in recent],
+        }
+
+    # --- Settlement ---
+
+    def close(self, table_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Draw the table's round and settle it, in the caller's app context; None if there was no
+        round to close or it could not be settled (its bets are then released unpaid and unstaked).
+        """
+        engine = self.engine
+        with engine.lock:
+            table_round = self._rounds.pop(table_id, None)
+            self._limits.pop(table_id, None)  # Re-read the table when the next round opens
+            engine.clock.cancel((self.game, table_id))
+        if table_round is None or not table_round.bets:
+            return None
+
+        result = None
+        try:
+            result = self._settle(table_round)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"{self.game.capitalize()} table {table_id}: round could not be settled, bets void: {e}", exc_info=True)
+        finally:
+            with engine.lock:
+                for user_id, stake in table_round.stakes.items():
+                    left = engine.reserved.get(user_id, 0) - stake
+                    if left > 0:
+                        engine.reserved[user_id] = left
+                    else:
+                        engine.reserved.pop(user_id, None)
+
+        if result is not None:
+            with engine.lock:
+                self._history.setdefault(table_id, deque(maxlen=HISTORY_SIZE)).appendleft(result)
+            engine.broadcast(self.game, table_id, result)
+        return result
+
+    def _settle(self, table_round: TableRound) -> Dict[str, Any]:
+        """
+        One transaction for the whole round: read every bettor's balance in one query, draw,
+        insert the round and its rows in bulk, and apply each player's net with a single
+        executemany UPDATE relative to their current balance.
+        """
+        session = db.session
+        now = datetime.now(timezone.utc)
+        balances = dict(session.execute(
+            select(User.id, User.balance).filter(User.id.in_(list(table_round.bets))).with_for_update()
+        ).all())
+        # A balance spent elsewhere since the bet was reserved voids that player's bet
+        void = [user_id for user_id, stake in table_round.stakes.items() if balances.get(user_id, 0) < stake]
+        for user_id in void:
+            logger.info(f"{self.game.capitalize()} table {table_round.table_id}: bet by user {user_id} void, balance no longer covers it")
+
+        outcome = self.draw(session, table_round)
+        settled = self.settle_bets(table_round, {user_id: bet for user_id, bet in table_round.bets.items()
+                                                 if user_id not in void}, outcome)
+        total_wagered = sum(table_round.stakes[user_id] for user_id in settled)
+        total_returned = sum(returned for returned, _ in settled.values())
+
+        game_round = GameRound(
+            game_type=self.game, table_id=table_round.table_id, outcome=outcome, bet_count=len(settled),
+            total_wagered=total_wagered, total_returned=total_returned, opened_at=table_round.opened_at, settled_at=now,
+        )
+        session.add(game_round)
+        session.flush()
+
+        if settled:
+            self.write_rows(session, table_round, game_round, outcome, settled, now)
+            users = User.__table__
+            session.execute(
+                update(users).where(users.c.id == bindparam('user_id')).values(balance=users.c.balance + bindparam('delta')),
+                [{'user_id': user_id, 'delta': returned - table_round.stakes[user_id]}
+                 for user_id, (returned, _) in settled.items()],
+            )
+        session.commit()
+
+        logger.info(f"{self.game.capitalize()} table {table_round.table_id}: round {game_round.id} settled "
+                    f"{len(settled)} bet(s), wagered {total_wagered}, returned {total_returned}")
+        return {
+            'round_id': game_round.id,
+            'game': self.game,
+            'table_id': table_round.table_id,
+            'outcome': outcome,
+            'settled_at': now.isoformat(),
+            'bets': [{'user_id': user_id, 'stake': table_round.stakes[user_id], 'returned': returned}
+                     for user_id, (returned, _) in settled.items()],
+            'void': void,
+        }
+
+    def _table_limits(self, table_id: int) -> Optional[Dict[str, Any]]:
+        limits = self._limits.get(table_id)
+        if limits is None:
+            limits = self.load_limits(table_id)
+            if limits is not None:
+                self._limits[table_id] = limits
+        return limits
+
+    def clear(self):
+        self._rounds.clear()
+        self._limits.clear()
+        self._history.clear()
+
+
+class BaccaratRounds(RoundTables):
+    """Baccarat rounds: one hand from the table's shoe, every player's player/banker/tie bets settled on it"""
+
+    game = 'baccarat'
+
+    def load_limits(self, table_id):
+        table = db.session.get(BaccaratTable, table_id)
+        if table is None or not table.is_active:
+            return None
+        return {'min_bet': table.min_bet, 'max_bet': table.max_bet, 'max_tie_bet': table.max_tie_bet,
+                'commission_rate': table.commission_rate}
+
+    def parse_bet(self, data):
+        bet = {spot: int(data.get(f'bet_on_{spot}', 0) or 0) for spot in ('player', 'banker', 'tie')}
+        if any(amount < 0 for amount in bet.values()) or not any(bet.values()):
+            raise ValueError("Total bet amount must be positive.")
+        return bet
+
+    def merge(self, existing, bet):
+        if existing is None:
+            return dict(bet)
+        return {spot: existing[spot] + amount for spot, amount in bet.items()}
+
+    def stake(self, bet):
+        return sum(bet.values())
+
+    def check_limits(self, limits, bet):
+        total = self.stake(bet)
+        if not (limits['min_bet'] <= total <= limits['max_bet']):
+            return f"Total bet amount out of table limits ({limits['min_bet']}-{limits['max_bet']})."
+        if bet['tie'] > limits['max_tie_bet']:
+            return f"Tie bet amount exceeds table max tie bet ({limits['max_tie_bet']})."
+        return None
+
+    def draw(self, session, table_round):
+        table = session.get(BaccaratTable, table_round.table_id)
+        shoes = get_baccarat_shoes()
+        shoe = shoes.start_hand(table)
+        with shoe.dealing():
+            hand = baccarat_helper.play_baccarat_hand(Decimal(0), Decimal(0), Decimal(0), shoe=shoe)
+        shoes.save(table, shoe)  # Shoe snapshot commits with the round
+        if "error" in hand:
+            raise RuntimeError(hand["error"])
+        return {
+            'player_cards': hand['player_cards'], 'banker_cards': hand['banker_cards'],
+            'player_score': hand['player_score'], 'banker_score': hand['banker_score'],
+            'outcome': hand['outcome'], 'player_drew_third': hand['details']['player_drew_third'],
+            'banker_drew_third': hand['details']['banker_drew_third'], 'shoe': shoe.number,
+        }
+
+    def settle_bets(self, table_round, bets, outcome):
+        return {user_id: self.returned(table_round, bet, outcome) for user_id, bet in bets.items()}
+
+    def returned(self, table_round, bet, outcome):
+        """Sats paid back on one player's bet (stake included) and the commission taken"""
+        payout_player, payout_banker, payout_tie, commission = baccarat_helper._calculate_payouts(
+            outcome['outcome'], Decimal(bet['player']), Decimal(bet['banker']), Decimal(bet['tie']),
+            commission_rate=Decimal(str(table_round.limits['commission_rate'])),
+        )
+        return int(payout_player + payout_banker + payout_tie), {'commission_paid': int(commission)}
+
+    def write_rows(self, session, table_round, game_round, outcome, settled, now):
+        table_id = table_round.table_id
+        user_ids = list(settled)
+        stakes = table_round.stakes
+
+        # Each player's open session at this table, opening the missing ones in one INSERT
+        sessions = dict(session.execute(
+            select(GameSession.user_id, GameSession.id).filter(
+                GameSession.user_id.in_(user_ids), GameSession.game_type == 'baccarat',
+                GameSession.baccarat_table_id == table_id, GameSession.session_end.is_(None))
+        ).all())
+        missing = [user_id for user_id in user_ids if user_id not in sessions]
+        if missing:
+            sessions.update(session.execute(
+                insert(GameSession).returning(GameSession.user_id, GameSession.id, sort_by_parameter_order=True),
+                [{'user_id': user_id, 'game_type': 'baccarat', 'baccarat_table_id': table_id, 'session_start': now}
+                 for user_id in missing],
+            ).all())
+        sessions_table = GameSession.__table__
+        session.execute(
+            update(sessions_table).where(sessions_table.c.id == bindparam('session_id')).values(
+                amount_wagered=sessions_table.c.amount_wagered + bindparam('wagered'),
+                amount_won=sessions_table.c.amount_won + bindparam('won')),
+            [{'session_id': sessions[user_id], 'wagered': stakes[user_id], 'won': returned - stakes[user_id]}
+             for user_id, (returned, _) in settled.items()],
+        )
+
+        hand_ids = dict(session.execute(
+            insert(BaccaratHand).returning(BaccaratHand.user_id, BaccaratHand.id, sort_by_parameter_order=True),
+            [{
+                'user_id': user_id, 'table_id': table_id, 'game_session_id': sessions[user_id], 'round_id': game_round.id,
+                'initial_bet_player': table_round.bets[user_id]['player'],
+                'initial_bet_banker': table_round.bets[user_id]['banker'],
+                'initial_bet_tie': table_round.bets[user_id]['tie'],
+                'total_bet_amount': stakes[user_id], 'win_amount': returned - stakes[user_id],
+                'player_cards': outcome['player_cards'], 'banker_cards': outcome['banker_cards'],
+                'player_score': outcome['player_score'], 'banker_score': outcome['banker_score'],
+                'outcome': outcome['outcome'], 'commission_paid': details['commission_paid'], 'status': 'completed',
+                'details': {'round_id': game_round.id, 'shoe': outcome['shoe'],
+                            'commission_rate': str(table_round.limits['commission_rate'])},
+                'created_at': now, 'updated_at': now, 'completed_at': now,
+            } for user_id, (returned, details) in settled.items()],
+        ).all())
+
+        transactions = []
+        for user_id, (returned, _) in settled.items():
+            bet = table_round.bets[user_id]
+            transactions.append({
+                'user_id': user_id, 'amount': -stakes[user_id], 'transaction_type': 'baccarat_wager', 'status': 'completed',
+                'baccarat_hand_id': hand_ids[user_id],
+                'details': {'table_id': table_id, 'round_id': game_round.id, 'player_bet': bet['player'],
+                            'banker_bet': bet['banker'], 'tie_bet': bet['tie']},
+            })
+            if returned > 0:
+                transactions.append({
+                    'user_id': user_id, 'amount': returned, 'transaction_type': 'baccarat_win', 'status': 'completed',
+                    'baccarat_hand_id': hand_ids[user_id],
+                    'details': {'outcome': outcome['outcome'], 'round_id': game_round.id, 'gross_win': returned,
+                                'net_profit': returned - stakes[user_id]},
+                })
+        session.execute(insert(Transaction), transactions)
+
+
+class RouletteRounds(RoundTables):
+    """Roulette rounds: one spin, with a bet slip of inside and outside bets per player settled on it"""
+
+    game = 'roulette'
+
+    def load_limits(self, table_id):
+        config = self.engine.roulette_tables.get(table_id)
+        if config is None:
+            return None
+        return {**ROULETTE_TABLE_DEFAULTS, **config}
+
+    def parse_bet(self, data):
+        return roulette_helper.compile_slip(data['bets'] if 'bets' in data else [data])
+
+    def merge(self, existing, bet):
+        return (existing or []) + bet
+
+    def stake(self, bet):
+        return sum(item['amount'] for item in bet)
+
+    def check_limits(self, limits, bet):
+        total = self.stake(bet)
+        if not (limits['min_bet'] <= total <= limits['max_bet']):
+            return f"Total bet amount out of table limits ({limits['min_bet']}-{limits['max_bet']})."
+        if len(bet) > roulette_helper.MAX_SLIP_BETS:
+            return f"At most {roulette_helper.MAX_SLIP_BETS} bets per player per round."
+        return None
+
+    def draw(self, session, table_round):
+        return {'winning_number': roulette_helper.spin_wheel()}
+
+    def settle_bets(self, table_round, bets, outcome):
+        """Every chip at the table against the spin in one settle_bets call, then split back per player"""
+        chips = [(user_id, item) for user_id, bet in bets.items() for item in bet]
+        paid = roulette_helper.settle_bets([item['mask'] for _, item in chips], [item['amount'] for _, item in chips],
+                                           [item['multiplier'] for _, item in chips], outcome['winning_number'])
+        settled = {user_id: (0, {'paid': []}) for user_id in bets}
+        for (user_id, _), returned in zip(chips, paid):
+            total, details = settled[user_id]
+            details['paid'].append(returned)
+            settled[user_id] = (total + returned, details)
+        return settled
+
+    def write_rows(self, session, table_round, game_round, outcome, settled, now):
+        number = outcome['winning_number']
+        rows, owners = [], []
+        for user_id, (_, details) in settled.items():
+            for item, paid in zip(table_round.bets[user_id], details['paid']):
+                rows.append({'user_id': user_id, 'round_id': game_round.id, 'bet_amount': item['amount'],
+                             'bet_type': item['bet_type'], 'winning_number': number, 'payout': paid, 'timestamp': now})
+                owners.append(user_id)
+        game_ids = session.scalars(
+            insert(RouletteGame).returning(RouletteGame.id, sort_by_parameter_order=True), rows
+        ).all()
+        games_by_user: Dict[int, List[int]] = {}
+        for user_id, game_id in zip(owners, game_ids):
+            games_by_user.setdefault(user_id, []).append(game_id)
+
+        transactions = []
+        for user_id, (returned, _) in settled.items():
+            stake = table_round.stakes[user_id]
+            details = {'round_id': game_round.id, 'table_id': table_round.table_id, 'roulette_game_ids': games_by_user[user_id]}
+            transactions.append({'user_id': user_id, 'amount': -stake, 'transaction_type': 'roulette_wager',
+                                 'status': 'completed', 'details': details})
+            if returned > 0:
+                transactions.append({'user_id': user_id, 'amount': returned, 'transaction_type': 'roulette_win',
+                                     'status': 'completed', 'details': {**details, 'winning_number': number}})
+        session.execute(insert(Transaction), transactions)
+
+
+def _for_player(result: Dict[str, Any], user_id: Optional[int]) -> Dict[str, Any]:
+    """A settled round as shown to one player: the outcome and totals, plus their own bet"""
+    view = {key: result[key] for key in ('round_id', 'outcome', 'settled_at')}
+    view['players'] = len(result['bets'])
+    mine = next((bet for bet in result['bets'] if bet['user_id'] == user_id), None)
+    if mine is not None:
+        view['your_stake'] = mine['stake']
+        view['your_return'] = mine['returned']
+    elif user_id in result['void']:
+        view['your_bet_void'] = True
+    return view
+
+
+class RoundClock:
+    """One thread closing every table's round when its betting window ends"""
+
+    def __init__(self, close: Callable[[Hashable], None]):
+        self.close = close
+        self._due: Dict[Hashable, float] = {}  # (game, table_id) -> monotonic close time
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, key: Hashable, due: float):
+        with self._condition:
+            self._due[key] = due
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='table-rounds', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, key: Hashable):
+        with self._condition:
+            self._due.pop(key, None)
+
+    def clear(self):
+        with self._condition:
+            self._due.clear()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    next_due = min(self._due.values(), default=None)
+                    if next_due is not None and next_due <= now:
+                        break
+                    self._condition.wait(next_due - now if next_due is not None else None)
+                due = [key for key, at in self._due.items() if at <= now]
+                for key in due:
+                    del self._due[key]
+
+            for key in due:
+                try:
+                    self.close(key)
+                except Exception as e:
+                    logger.error(f"Table rounds: failed to close round {key}: {e}", exc_info=True)
+
+
+class RoundEngine:
+    """
+    Round-based play for the baccarat and roulette tables of this process. Stakes are reserved
+    per player across every open round here, so one balance cannot back more bets than it
+    covers; settlement re-checks each balance in the round's transaction.
+    """
+
+    def __init__(self, betting_window: float = BETTING_WINDOW):
+        self.betting_window = betting_window
+        self.roulette_tables: Dict[int, Dict[str, Any]] = dict(DEFAULT_ROULETTE_TABLES)
+        self.app = None
+        self.websocket_manager = None
+        self.lock = threading.RLock()
+        self.reserved: Dict[int, int] = {}  # user_id -> sats staked in open rounds
+        self.clock = RoundClock(self._dispatch_close)
+        self.games: Dict[str, RoundTables] = {rounds.game: rounds for rounds in (BaccaratRounds(self), RouletteRounds(self))}
+
+    def configure(self, app, websocket_manager=None):
+        """Bind to an app; rounds opened under a previous app are dropped unsettled"""
+        with self.lock:
+            self.clock.clear()
+            for rounds in self.games.values():
+                rounds.clear()
+            self.reserved.clear()
+        self.app = app
+        self.websocket_manager = websocket_manager
+        self.betting_window = app.config.get('ROUND_BETTING_WINDOW', BETTING_WINDOW)
+        self.roulette_tables = {int(table_id): config for table_id, config in
+                                app.config.get('ROULETTE_TABLES', DEFAULT_ROULETTE_TABLES).items()}
+
+    def get(self, game: str) -> RoundTables:
+        return self.games[game]
+
+    def broadcast(self, game: str, table_id: int, result: Dict[str, Any]):
+        if not self.websocket_manager:
+            return
+        try:
+            self.websocket_manager.broadcast_round_result(game, table_id, result)
+        except Exception as e:
+            logger.error(f"Error broadcasting {game} round result for table {table_id}: {e}", exc_info=True)
+
+    def _dispatch_close(self, key):
+        game, table_id = key
+        with self.app.app_context():
+            try:
+                self.games[game].close(table_id)
+            finally:
+                db.session.remove()
+
+
+# Global instance
+table_rounds = RoundEngine()
+
+def get_table_rounds():
+    """Get the global round engine"""
+    return table_rounds
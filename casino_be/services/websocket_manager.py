@@ -35,6 +35,8 @@ class WebSocketManager:
         self.socketio.on_event('leave_spacecrash', self.handle_leave_spacecrash_legacy)
         self.socketio.on_event('join_poker_table', self.handle_join_poker_table)
         self.socketio.on_event('leave_poker_table', self.handle_leave_poker_table)
+        self.socketio.on_event('poker_resync', self.handle_poker_resync)
+        self.socketio.on_event('garden_resync', self.handle_garden_resync)
     
     def authenticate_user(self, auth_token=None):
         """Authenticate user from JWT token or cookies"""
@@ -106,7 +108,7 @@ class WebSocketManager:
             # Remove from all game rooms
             user_data = self.connected_users[user_id]
             for room in user_data['rooms']:
-                if room == 'spacecrash':
+                if self._is_spacecrash_room(room):
                     self.game_rooms['spacecrash'].discard(user_id)
                 elif room.startswith('poker_'):
                     table_id = int(room.split('_')[1])
@@ -132,7 +134,7 @@ class WebSocketManager:
         join_room(room_name)
         
         # Update our tracking
-        if room_name == 'spacecrash':
+        if self._is_spacecrash_room(room_name):
             self.game_rooms['spacecrash'].add(user_id)
         elif room_name.startswith('poker_'):
             table_id = room_name.split('_')[1]
@@ -149,6 +151,10 @@ class WebSocketManager:
         
         logger.info(f"User {user_id} joined room: {room_name}")
         emit('room_joined', {'room': room_name, 'success': True})
+
+        # Diffs only make sense on top of a snapshot
+        if room_name.startswith('poker_'):
+            self._emit_poker_snapshot(table_id, user_id)
         
     def handle_leave_room(self, data=None):
         """Handle leaving a game room"""
@@ -175,7 +181,7 @@ class WebSocketManager:
             
     def _remove_user_from_room(self, user_id, room_name):
         """Remove user from room tracking"""
-        if room_name == 'spacecrash':
+        if self._is_spacecrash_room(room_name):
             self.game_rooms['spacecrash'].discard(user_id)
         elif room_name.startswith('poker_'):
             table_id = room_name.split('_')[1]
@@ -226,6 +232,71 @@ class WebSocketManager:
         # Use new room handler  
         self.handle_leave_room({'room': f'poker_{table_id}'})
     
+    def handle_poker_resync(self, data):
+        """Client saw a gap in poker_diff sequence numbers: send a fresh snapshot"""
+        user_id = self._get_authenticated_user()
+        if not user_id:
+            emit('error', {'message': 'Authentication required'})
+            return
+
+        try:
+            table_id = int((data or {}).get('table_id'))
+        except (TypeError, ValueError):
+            emit('error', {'message': 'table_id is required'})
+            return
+        self._emit_poker_snapshot(table_id, user_id)
+
+    def _emit_poker_snapshot(self, table_id, user_id):
+        """Full table view for this user (own hole cards only), tagged with the diff seq it includes"""
+        from casino_be.services.poker_table_actor import poker_table_actors
+
+        try:
+            actor = poker_table_actors.get(table_id)
+            if not actor:
+                emit('error', {'message': f'Poker table {table_id} not found'})
+                return
+            emit('poker_snapshot', {
+                'type': 'poker_snapshot',
+                'table_id': table_id,
+                'game_state': actor.table_state(user_id),
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            })
+        except Exception as e:
+            logger.warning(f"Failed to send poker snapshot for table {table_id} to user {user_id}: {e}")
+            emit('error', {'message': 'Could not load poker table state'})
+
+    def handle_garden_resync(self, data=None):
+        """Client saw a gap in garden_diff sequence numbers: send its garden or codex afresh"""
+        from casino_be.services.garden_views import garden_views, KINDS
+
+        user_id = self._get_authenticated_user()
+        if not user_id:
+            emit('error', {'message': 'Authentication required'})
+            return
+
+        kind = (data or {}).get('kind', 'garden')
+        if kind not in KINDS:
+            emit('error', {'message': f"kind must be one of {', '.join(KINDS)}"})
+            return
+        try:
+            view = garden_views.get(kind, user_id)
+            emit('garden_snapshot', {
+                'type': 'garden_snapshot',
+                'kind': kind,
+                'seq': view.seq,
+                'etag': view.etag,
+                'state': view.state(),
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            })
+        except Exception as e:
+            logger.warning(f"Failed to send {kind} snapshot to user {user_id}: {e}")
+            emit('error', {'message': 'Could not load garden state'})
+
+    @staticmethod
+    def _is_spacecrash_room(room_name):
+        """'spacecrash' is the default crash room; other crash rooms are 'spacecrash_<room>'"""
+        return room_name == 'spacecrash' or room_name.startswith('spacecrash_')
+
     def _get_authenticated_user(self):
         """Get authenticated user ID for current request"""
         socket_id = request.sid
@@ -235,8 +306,8 @@ class WebSocketManager:
         return None
     
     # Event Broadcasting Methods
-    def broadcast_spacecrash_update(self, game_data):
-        """Broadcast Spacecrash game state update to all connected users"""
+    def broadcast_spacecrash_update(self, game_data, room='spacecrash'):
+        """Broadcast Spacecrash game state update to all users in a crash room"""
         if not self.socketio:
             return
         
@@ -247,9 +318,26 @@ class WebSocketManager:
                 'game': game_data,
                 'timestamp': datetime.now(timezone.utc).isoformat()
             },
-            room='spacecrash'
+            room=room
+        )
+        logger.debug(f"Broadcasted Spacecrash update to room {room}")
+    
+    def broadcast_spacecrash_bets(self, game_id, bet_events, room='spacecrash'):
+        """Broadcast a batch of bet/eject deltas for the current Spacecrash round"""
+        if not self.socketio:
+            return
+
+        self.socketio.emit(
+            'spacecrash_bets',
+            {
+                'type': 'spacecrash_bets',
+                'game_id': game_id,
+                'bets': bet_events,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            },
+            room=room
         )
-        logger.debug(f"Broadcasted Spacecrash update to {len(self.game_rooms['spacecrash'])} users")
+        logger.debug(f"Broadcasted {len(bet_events)} Spacecrash bet events for game {game_id}")
     
     def broadcast_poker_update(self, table_id, game_data):
         """Broadcast Poker game state update to all users at a table"""
@@ -272,6 +360,61 @@ class WebSocketManager:
         connected_count = len(self.game_rooms['poker'].get(table_id, set()))
         logger.debug(f"Broadcasted Poker table {table_id} update to {connected_count} users")
     
+    def broadcast_poker_diff(self, table_id, diff):
+        """Broadcast the fields changed by one poker table update; diff carries seq, changes and events"""
+        if not self.socketio:
+            return
+
+        # Sent on the namespace the poker rooms are joined on
+        self.socketio.emit(
+            'poker_diff',
+            {
+                'type': 'poker_diff',
+                'table_id': table_id,
+                **diff,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            },
+            room=f'poker_{table_id}'
+        )
+        logger.debug(f"Broadcasted Poker table {table_id} diff {diff.get('seq')}")
+
+    def send_poker_private(self, user_id, table_id, payload):
+        """Send one player their own hidden state (hole cards) on their socket only"""
+        if not self.socketio:
+            return
+
+        connection = self.connected_users.get(user_id)
+        if not connection:
+            return
+        self.socketio.emit(
+            'poker_private',
+            {
+                'type': 'poker_private',
+                'table_id': table_id,
+                **payload,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            },
+            to=connection['socket_id']
+        )
+
+    def send_garden_diff(self, user_id, payload):
+        """Push a change to a player's Crystal Garden or codex to their socket"""
+        if not self.socketio:
+            return
+
+        connection = self.connected_users.get(user_id)
+        if not connection:
+            return
+        self.socketio.emit(
+            'garden_diff',
+            {
+                'type': 'garden_diff',
+                **payload,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            },
+            to=connection['socket_id']
+        )
+
     def broadcast_poker_action(self, table_id, action_data):
         """Broadcast player action to all users at a poker table"""
         if not self.socketio:
@@ -326,6 +469,25 @@ class WebSocketManager:
             namespace='/poker'
         )
     
+    def broadcast_round_result(self, game, table_id, result):
+        """Broadcast a settled baccarat or roulette round once to everyone at the table"""
+        if not self.socketio:
+            return
+
+        room_name = f'{game}_{table_id}'
+        self.socketio.emit(
+            'round_result',
+            {
+                'type': 'round_result',
+                'game': game,
+                'table_id': table_id,
+                'result': result,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            },
+            room=room_name
+        )
+        logger.debug(f"Broadcasted {game} table {table_id} round {result.get('round_id')} to room {room_name}")
+
     def get_connected_users_count(self):
         """Get total number of connected users"""
         return len(self.connected_users)
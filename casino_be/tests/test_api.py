@@ -14,7 +14,7 @@ from casino_be.config import Config, TestingConfig # Import TestingConfig
 from casino_be.app import create_app # Import create_app factory
 from casino_be.error_codes import ErrorCodes # Import ErrorCodes
 from datetime import timedelta
-from casino_be.utils.plinko_helper import PAYOUT_MULTIPLIERS
+from casino_be.utils import plinko_helper
 # StaticPool is not needed for file-based DB strategy per test
 # from sqlalchemy.pool import StaticPool
 
@@ -1159,20 +1159,25 @@ class PlinkoApiTests(BaseTestCase):
 
         stake_amount_units = 1.0 # e.g. 1 BTC
         chosen_stake_label = 'Low' # Must match STAKE_CONFIG in plinko_helper
-        slot_landed_label = '2x'    # Must match PAYOUT_MULTIPLIERS
+        # The server drops the ball; fix its entropy so it goes right at every row of the default board
+        board = plinko_helper.get_board(plinko_helper.DEFAULT_ROWS, chosen_stake_label)
+        slot_landed_label = board.labels[-1]
 
         payload = {
             "stake_amount": stake_amount_units,
             "chosen_stake_label": chosen_stake_label,
-            "slot_landed_label": slot_landed_label
         }
-        response = self.client.post('/api/plinko/play', headers=headers, json=payload)
+        with patch('casino_be.routes.plinko.drop_balls',
+                   side_effect=lambda board, count: plinko_helper.drop_balls(board, count, entropy=b'\xff\xff' * count)):
+            response = self.client.post('/api/plinko/play', headers=headers, json=payload)
         data = json.loads(response.data.decode())
 
         self.assertEqual(response.status_code, 200, data.get('error') or data.get('message'))
         self.assertTrue(data['success'])
+        self.assertEqual(data['slot_landed_label'], slot_landed_label)
+        self.assertEqual(data['path'], [1] * board.rows)
         
-        expected_winnings_units = stake_amount_units * PAYOUT_MULTIPLIERS[slot_landed_label]
+        expected_winnings_units = stake_amount_units * board.multipliers[-1] / 100
         self.assertAlmostEqual(data['winnings'], expected_winnings_units)
         
         expected_new_balance_units = initial_balance_units - stake_amount_units + expected_winnings_units
@@ -1188,7 +1193,8 @@ class PlinkoApiTests(BaseTestCase):
             self.assertEqual(plinko_log.stake_amount, int(stake_amount_units * self.SATOSHIS_PER_UNIT))
             self.assertEqual(plinko_log.chosen_stake_label, chosen_stake_label)
             self.assertEqual(plinko_log.slot_landed_label, slot_landed_label)
-            self.assertEqual(plinko_log.multiplier_applied, PAYOUT_MULTIPLIERS[slot_landed_label])
+            self.assertEqual(plinko_log.multiplier_applied, board.multipliers[-1] / 100)
+            self.assertEqual((plinko_log.rows, plinko_log.path), (board.rows, (1 << board.rows) - 1))
             self.assertEqual(plinko_log.winnings_amount, int(expected_winnings_units * self.SATOSHIS_PER_UNIT))
 
             transactions = Transaction.query.filter_by(user_id=user_id, plinko_drop_id=plinko_log.id).order_by(Transaction.id).all()
@@ -1217,7 +1223,6 @@ class PlinkoApiTests(BaseTestCase):
         payload = {
             "stake_amount": 1.0, # Trying to bet 1 unit
             "chosen_stake_label": 'Low',
-            "slot_landed_label": '0.5x'
         }
         response = self.client.post('/api/plinko/play', headers=headers, json=payload)
         data = response.get_json() # Assuming plinko also uses the new error structure
@@ -1238,13 +1243,12 @@ class PlinkoApiTests(BaseTestCase):
 
         test_cases = [
             # Marshmallow validation errors (missing fields) - will be caught by global ValidationError handler
-            ({"chosen_stake_label": "Low", "slot_landed_label": "2x"}, "stake_amount", 422, ErrorCodes.VALIDATION_ERROR, "Missing data for required field."),
-            ({"stake_amount": 1.0, "slot_landed_label": "2x"}, "chosen_stake_label", 422, ErrorCodes.VALIDATION_ERROR, "Missing data for required field."),
-            ({"stake_amount": 1.0, "chosen_stake_label": "Low"}, "slot_landed_label", 422, ErrorCodes.VALIDATION_ERROR, "Missing data for required field."),
+            ({"chosen_stake_label": "Low"}, "stake_amount", 422, ErrorCodes.VALIDATION_ERROR, "Missing data for required field."),
+            ({"stake_amount": 1.0}, "chosen_stake_label", 422, ErrorCodes.VALIDATION_ERROR, "Missing data for required field."),
             # Custom validation errors from route logic (now raising ValidationException)
-            ({"stake_amount": 1.0, "chosen_stake_label": "InvalidTier", "slot_landed_label": "2x"}, "chosen_stake_label", 422, ErrorCodes.VALIDATION_ERROR, "Must be one of: Low, Medium, High."),
-            ({"stake_amount": 0.05, "chosen_stake_label": "Low", "slot_landed_label": "2x"}, None, 422, ErrorCodes.INVALID_AMOUNT, "Stake amount 0.05 out of range for Low tier"),
-            ({"stake_amount": 1.0, "chosen_stake_label": "Low", "slot_landed_label": "100x"}, "slot_landed_label", 422, ErrorCodes.VALIDATION_ERROR, "Must be one of: 0.5x, 2x, 5x."),
+            ({"stake_amount": 1.0, "chosen_stake_label": "InvalidTier"}, "chosen_stake_label", 422, ErrorCodes.VALIDATION_ERROR, "Must be one of: Low, Medium, High."),
+            ({"stake_amount": 0.05, "chosen_stake_label": "Low"}, None, 422, ErrorCodes.INVALID_AMOUNT, "Stake amount 0.05 out of range for Low tier"),
+            ({"stake_amount": 1.0, "chosen_stake_label": "Low", "rows": 20}, "rows", 422, ErrorCodes.VALIDATION_ERROR, "Must be greater than or equal to 8"),
         ]
 
         for payload, error_field_in_details, expected_status, expected_error_code, expected_message_part in test_cases:
@@ -1268,7 +1272,6 @@ class PlinkoApiTests(BaseTestCase):
         payload = {
             "stake_amount": 1.0,
             "chosen_stake_label": "Low",
-            "slot_landed_label": "2x"
         }
         response = self.client.post('/api/plinko/play', json=payload)
         data = response.get_json()
@@ -3,48 +3,16 @@ from unittest.mock import patch, MagicMock
 from decimal import Decimal
 
 # Assuming baccarat_helper.py is in casino_be.utils
-from casino_be.utils import baccarat_helper
+from casino_be.utils import baccarat_helper, cards
 
 class TestBaccaratHelper(unittest.TestCase):
 
-    def test_create_deck(self):
-        deck = baccarat_helper._create_deck(num_decks=1)
-        self.assertEqual(len(deck), 52)
-        self.assertIn("HA", deck) # Heart Ace
-        self.assertIn("SK", deck) # Spade King
-        self.assertIn("D2", deck) # Diamond 2
-        self.assertIn("C9", deck) # Club 9
-
-        deck_6 = baccarat_helper._create_deck(num_decks=6)
-        self.assertEqual(len(deck_6), 52 * 6)
-        # Check if a specific card appears 6 times
-        self.assertEqual(deck_6.count("HA"), 6)
-
-    def test_shuffle_deck(self):
-        deck1 = baccarat_helper._create_deck(num_decks=1)
-        deck2 = list(deck1) # Create a copy
-        baccarat_helper._shuffle_deck(deck2)
-        # Check if the deck is shuffled (not identical to original, high probability)
-        # This is a probabilistic test, could fail rarely but good enough for this.
-        self.assertNotEqual(deck1, deck2, "Deck should be shuffled and not identical to the original.")
-        self.assertEqual(len(deck1), len(deck2), "Shuffled deck should have the same length.")
-        for card in deck1: # Ensure all original cards are still present
-            self.assertIn(card, deck2)
-
     def test_deal_card(self):
-        deck = ["HA", "SK", "D2"]
-        card1 = baccarat_helper._deal_card(deck)
-        self.assertEqual(card1, "HA")
-        self.assertEqual(len(deck), 2)
-        self.assertNotIn("HA", deck)
-
-        card2 = baccarat_helper._deal_card(deck)
-        self.assertEqual(card2, "SK")
-        self.assertEqual(len(deck), 1)
-
-        card3 = baccarat_helper._deal_card(deck)
-        self.assertEqual(card3, "D2")
-        self.assertEqual(len(deck), 0)
+        deck = cards.Deck(cards.to_codes(["HA", "SK", "D2"]))
+        self.assertEqual(baccarat_helper._deal_card(deck), "HA")
+        self.assertEqual(baccarat_helper._deal_card(deck), "SK")
+        self.assertEqual(baccarat_helper._deal_card(deck), "D2")
+        self.assertEqual(deck.remaining, 0)
 
         with self.assertRaises(ValueError, msg="Dealing from an empty deck should raise ValueError."):
             baccarat_helper._deal_card(deck)
@@ -0,0 +1,105 @@
+import random
+import unittest
+from decimal import Decimal
+
+from casino_be.models import db, BaccaratTable
+from casino_be.services.baccarat_shoe import BaccaratShoe, baccarat_shoes
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils import baccarat_odds as odds
+from casino_be.utils import cards
+from casino_be.utils.baccarat_helper import _get_card_baccarat_value, play_baccarat_hand
+
+
+class TestBaccaratOdds(unittest.TestCase):
+
+    def test_outcome_table_matches_play_baccarat_hand(self):
+        rng = random.Random(5)
+        table = odds.outcome_table()
+        for _ in range(3000):
+            codes = rng.sample(range(52), odds.HAND_CARDS)
+            result = play_baccarat_hand(Decimal(1), Decimal(0), Decimal(0), shoe=cards.Deck(bytearray(codes)))
+            values = tuple(odds.RANK_VALUES[cards.rank_index(code)] for code in codes)
+            self.assertEqual(odds.OUTCOMES[table[values]], result['outcome'], msg=str(values))
+
+    def test_eight_deck_odds(self):
+        report = odds.odds_report(odds.composition(8))
+        self.assertAlmostEqual(report['probabilities']['banker_win'], 0.458597, places=6)
+        self.assertAlmostEqual(report['probabilities']['player_win'], 0.446247, places=6)
+        self.assertAlmostEqual(report['probabilities']['tie'], 0.095156, places=6)
+        self.assertAlmostEqual(report['house_edge']['banker'], 0.010579, places=6)
+        self.assertAlmostEqual(report['house_edge']['player'], 0.012351, places=6)
+        self.assertAlmostEqual(report['house_edge']['tie'], 0.143596, places=6)
+
+    def test_depleted_shoe(self):
+        # Only sixes and sevens left, fewer of each than a hand could use
+        counts = [0] * 10
+        counts[6], counts[7] = 3, 3
+        probabilities = odds.outcome_probabilities(counts)
+        self.assertAlmostEqual(sum(probabilities.values()), 1.0)
+        with self.assertRaises(ValueError):
+            odds.outcome_probabilities([1] * 5 + [0] * 5)
+
+    def test_simulation_agrees_with_exact_odds(self):
+        counts = odds.composition(1)
+        report = odds.odds_report(counts)
+        tally = odds.simulate(counts, 300_000, seed=2)
+        self.assertEqual(sum(tally.values()), 300_000)
+        for row in odds.compare(report, tally):
+            self.assertLess(abs(row['z']), 4.5, msg=row['check'])
+
+
+class TestBaccaratShoe(unittest.TestCase):
+
+    def test_new_shoe_burns_and_places_the_cut_card(self):
+        for _ in range(20):
+            shoe = BaccaratShoe.shuffled(6, penetration=0.95)
+            first = shoe.burned[0]
+            self.assertEqual(len(shoe.burned), 1 + (_get_card_baccarat_value(first) or 10))
+            self.assertEqual(shoe.remaining, 312 - len(shoe.burned))
+            self.assertEqual(shoe.cut, shoe.remaining - int(shoe.remaining * 0.95))
+            self.assertGreaterEqual(shoe.cut, 14)
+
+    def test_hands_deal_on_through_the_shoe(self):
+        shoe = BaccaratShoe.shuffled(6)
+        expected = cards.Deck(bytearray(shoe.deck.cards), shoe.deck.cursor)
+        for _ in range(10):
+            result = play_baccarat_hand(Decimal(1), Decimal(0), Decimal(0), shoe=shoe)
+            dealt = len(result['player_cards']) + len(result['banker_cards'])
+            self.assertEqual(sorted(result['player_cards'] + result['banker_cards']), sorted(expected.deal_strs(dealt)))
+            self.assertEqual(result['details']['shoe'], 1)
+        self.assertEqual(BaccaratShoe.from_snapshot(shoe.snapshot()).deal_strs(5), expected.deal_strs(5))
+
+
+class TestBaccaratOddsEndpoint(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['SERVICE_API_TOKEN'] = 'test_baccarat_odds_token'
+        self.headers = {'X-Service-Token': 'test_baccarat_odds_token'}
+        baccarat_shoes.clear()
+
+    def tearDown(self):
+        baccarat_shoes.clear()
+        super().tearDown()
+
+    def test_odds_for_the_tables_current_shoe(self):
+        table = BaccaratTable(name="Odds", min_bet=100, max_bet=10000, max_tie_bet=1000, commission_rate=Decimal("0.05"))
+        db.session.add(table)
+        db.session.commit()
+
+        shoe = baccarat_shoes.start_hand(table)
+        shoe.deal_strs(100)
+        response = self.client.get(f'/api/internal/baccarat/tables/{table.id}/odds', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['cards_left'], shoe.remaining)
+        self.assertEqual(data['composition'], odds.deck_composition(shoe.deck))
+        self.assertAlmostEqual(sum(data['probabilities'].values()), 1.0)
+        self.assertEqual(set(data['house_edge']), {'player', 'banker', 'tie'})
+
+        self.assertEqual(self.client.get('/api/internal/baccarat/tables/999/odds', headers=self.headers).status_code, 404)
+        self.assertEqual(self.client.get(f'/api/internal/baccarat/tables/{table.id}/odds').status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+
+from sqlalchemy import event
+
+from casino_be.models import db, BlackjackAction, BlackjackHand, BlackjackTable, GameSession, Transaction, User
+from casino_be.services.blackjack_shoe import BlackjackShoe, blackjack_shoes
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils import cards
+from casino_be.utils.blackjack_helper import DEALER_INDEX, _events_from_views, replay_hand
+
+
+class TestReplayHand(unittest.TestCase):
+
+    def test_split_double_and_dealer_replay(self):
+        events = [('deal', 0, 'S8'), ('deal', 0, 'H8'), ('deal', DEALER_INDEX, 'ST'), ('deal', DEALER_INDEX, 'C7'),
+                  ('split', 0, 'D3'), ('deal', 1, 'C2'), ('double', 0, 'DK'), ('hit', 1, 'H9'), ('stand', 1, None)]
+        hands, dealer = replay_hand(events, 100)
+        self.assertEqual([hand['cards'] for hand in hands], [['S8', 'D3', 'DK'], ['H8', 'C2', 'H9']])
+        self.assertEqual([(hand['total'], hand['is_standing'], hand['is_doubled'], hand['bet_multiplier']) for hand in hands],
+                         [(21, True, True, 2.0), (19, True, False, 1.0)])
+        self.assertEqual((dealer['cards'], dealer['total']), (['ST', 'C7'], 17))
+
+        # Splitting the second of three hands puts the new hand after it
+        hands, _ = replay_hand([('deal', 0, 'H2'), ('deal', 0, 'H3'), ('deal', 1, 'D9'), ('deal', 1, 'C9'),
+                                ('deal', 2, 'S4'), ('deal', 2, 'S5'), ('split', 1, 'HT'), ('deal', 2, 'DA')], 10)
+        self.assertEqual([hand['cards'] for hand in hands], [['H2', 'H3'], ['D9', 'HT'], ['C9', 'DA'], ['S4', 'S5']])
+
+    def test_stored_hands_convert_to_a_log(self):
+        stored, dealer = replay_hand([('deal', 0, 'S8'), ('deal', 0, 'H8'), ('deal', DEALER_INDEX, 'ST'), ('deal', DEALER_INDEX, 'C7'),
+                                      ('split', 0, 'D3'), ('deal', 1, 'C2'), ('double', 0, 'DK')], 100)
+        self.assertEqual(replay_hand(_events_from_views(stored, dealer), 100), (stored, dealer))
+
+
+class TestBlackjackHandLog(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        blackjack_shoes.clear()
+        _, self.user_id = self._login_and_get_token()
+        user = db.session.get(User, self.user_id)
+        user.balance = 10_000
+        self.table = BlackjackTable(name="Log", min_bet=10, max_bet=1000, deck_count=1, rules={})
+        db.session.add(self.table)
+        db.session.commit()
+
+    def tearDown(self):
+        blackjack_shoes.clear()
+        super().tearDown()
+
+    def _stack_shoe(self, dealt):
+        """Put the table's shoe in with these cards on top"""
+        rest = [card for card in cards.CARD_STRS if card not in dealt]
+        self.table.shoe_state = BlackjackShoe(cards.Deck(cards.to_codes(dealt + rest)), 1, cut=10).snapshot()
+        db.session.commit()
+
+    def _act(self, hand_id, action_type, hand_index):
+        response = self.client.post('/api/blackjack/action',
+                                    json={'hand_id': hand_id, 'action_type': action_type, 'hand_index': hand_index})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()['action_result']
+
+    def test_actions_append_to_the_log_and_update_the_state_row(self):
+        self._stack_shoe(['S8', 'H8', 'ST', 'C7', 'D3', 'C2', 'DK', 'H9'])
+        joined = self.client.post('/api/blackjack/join', json={'table_id': self.table.id, 'bet_amount': 100})
+        self.assertEqual(joined.status_code, 201, joined.get_json())
+        hand_id = joined.get_json()['hand']['id']
+        self.assertEqual(joined.get_json()['hand']['dealer_hand']['cards'], ['ST', 'FACE_DOWN'])
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            split = self._act(hand_id, 'split', 0)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual([hand['cards'] for hand in split['player_hands']], [['S8', 'D3'], ['H8', 'C2']])
+        writes = [s for s in statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE'))]
+        self.assertTrue(any('INTO blackjack_action' in s for s in writes))
+        self.assertFalse(any('player_hands' in s or 'dealer_hand' in s for s in writes), writes)
+
+        self._act(hand_id, 'double', 0)
+        self._act(hand_id, 'hit', 1)
+        result = self._act(hand_id, 'stand', 1)
+        self.assertEqual((result['status'], result['results_summary'], result['win_amount']), ('completed', ['win', 'win'], 300))
+        self.assertEqual(result['dealer_hand']['cards'], ['ST', 'C7'])
+
+        db.session.expire_all()
+        hand = db.session.get(BlackjackHand, hand_id)
+        self.assertEqual((hand.event_count, hand.hand_count, hand.active_hand_index, hand.total_bet), (9, 2, -1, 300))
+        self.assertIsNone(hand.player_hands)
+        log = BlackjackAction.query.filter_by(hand_id=hand_id).order_by(BlackjackAction.seq).all()
+        self.assertEqual([(a.action_type, a.hand_index, a.card_dealt, a.hand_total) for a in log[4:]],
+                         [('split', 0, 'D3', 11), ('deal', 1, 'C2', 10), ('double', 0, 'DK', 21),
+                          ('hit', 1, 'H9', 19), ('stand', 1, None, 19)])
+        self.assertEqual(db.session.get(User, self.user_id).balance, 10_300)
+
+        history = self.client.get(f'/api/blackjack/hands/{hand_id}').get_json()['hand']
+        self.assertEqual([h['result'] for h in history['player_hands']], ['win', 'win'])
+        self.assertEqual((history['player_cards'], history['dealer_cards']), (['S8', 'H8'], ['ST', 'C7']))
+
+    def test_a_natural_settles_when_dealt(self):
+        self._stack_shoe(['SA', 'HK', 'S9', 'C8'])
+        joined = self.client.post('/api/blackjack/join', json={'table_id': self.table.id, 'bet_amount': 100}).get_json()['hand']
+        self.assertEqual((joined['status'], joined['results_summary'], joined['win_amount']), ('completed', ['blackjack_win'], 150))
+        self.assertEqual(db.session.get(User, self.user_id).balance, 10_150)
+
+    def test_hand_stored_as_json_continues_from_a_log(self):
+        session = GameSession(user_id=self.user_id, table_id=self.table.id, game_type='blackjack', amount_wagered=100, amount_won=0)
+        db.session.add(session)
+        db.session.flush()
+        legacy, dealer = replay_hand([('deal', 0, 'S9'), ('deal', 0, 'H9'), ('deal', DEALER_INDEX, 'ST'), ('deal', DEALER_INDEX, 'C8')], 100)
+        hand = BlackjackHand(user_id=self.user_id, table_id=self.table.id, session_id=session.id, initial_bet=100, total_bet=100,
+                             player_cards=['S9', 'H9'], dealer_cards=['ST', 'C8'], player_hands=legacy, dealer_hand=dealer,
+                             details={'shoe': 1, 'current_hand_index': 0, 'all_player_hands_played': False})
+        db.session.add(hand)
+        db.session.commit()
+
+        result = self._act(hand.id, 'stand', 0)
+        self.assertEqual((result['status'], result['results_summary']), ('completed', ['push']))
+        self.assertEqual(BlackjackAction.query.filter_by(hand_id=hand.id).count(), 5)
+        self.assertEqual(Transaction.query.filter_by(blackjack_hand_id=hand.id, transaction_type='win').count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
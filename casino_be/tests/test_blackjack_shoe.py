@@ -0,0 +1,149 @@
+import unittest
+from collections import Counter
+
+from casino_be.models import db, BlackjackHand, BlackjackTable
+from casino_be.services.blackjack_shoe import BlackjackShoe, BlackjackShoeRegistry, blackjack_shoes
+from casino_be.services.card_shoe import cut_position
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils import cards
+from casino_be.utils.blackjack_helper import handle_blackjack_action, handle_join_blackjack, hand_view
+
+
+class TestBlackjackShoe(unittest.TestCase):
+
+    def test_shoe_deals_to_the_cut_card_then_reshuffles(self):
+        shoe = BlackjackShoe.shuffled(2, penetration=0.75)
+        self.assertEqual(shoe.cut, 26)
+        self.assertFalse(shoe.begin_hand())
+
+        dealt = shoe.deal_strs(77)
+        self.assertEqual(Counter(dealt).most_common(1)[0][1], 2)  # Nothing repeats beyond the two decks
+        self.assertFalse(shoe.past_cut)
+        shoe.deal_str()
+        self.assertTrue(shoe.past_cut)
+
+        self.assertTrue(shoe.begin_hand(0.5))
+        self.assertEqual((shoe.number, shoe.remaining, shoe.cut), (2, 104, 52))
+
+    def test_a_hand_that_runs_the_shoe_out_continues_from_a_new_one(self):
+        shoe = BlackjackShoe(cards.Deck(cards.to_codes(["HA", "SK"])), 1, cut=13)
+        self.assertEqual(shoe.deal_strs(2), ["HA", "SK"])
+        shoe.deal_str()
+        self.assertEqual((shoe.number, shoe.remaining), (2, 51))
+
+    def test_snapshot_round_trip(self):
+        shoe = BlackjackShoe.shuffled(6)
+        shoe.deal_strs(40)
+        snapshot = shoe.snapshot()
+        self.assertLess(len(snapshot['deck']), 420)
+        restored = BlackjackShoe.from_snapshot(snapshot)
+        self.assertEqual((restored.remaining, restored.cut, restored.number), (272, shoe.cut, 1))
+        self.assertEqual(restored.deal_strs(20), shoe.deal_strs(20))
+
+    def test_cut_position_leaves_room_for_a_round(self):
+        self.assertEqual(cut_position(312, 0.75), 78)
+        self.assertEqual(cut_position(52, 0.95), 10)
+        self.assertEqual(cut_position(5, 0.5), 5)
+
+    def test_next_shoe_is_shuffled_in_the_background(self):
+        registry = BlackjackShoeRegistry(penetration=0.5)
+        table = BlackjackTable(id=7, deck_count=1, rules={})
+        shoe = registry.start_hand(table)
+        self.assertIsNone(shoe.next_shoe)
+        shoe.deal_strs(30)
+        registry.save(table, shoe)
+        upcoming = shoe.next_shoe.result(timeout=5)
+
+        self.assertIs(registry.start_hand(table), shoe)
+        self.assertIs(shoe.deck, upcoming)
+        self.assertEqual((shoe.number, shoe.remaining), (2, 52))
+
+
+class TestBlackjackShoeTables(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        blackjack_shoes.clear()
+        self.table = BlackjackTable(name="Shoe", min_bet=10, max_bet=1000, deck_count=2, rules={'penetration': 0.5})
+        db.session.add(self.table)
+        self.users = []
+        for i in range(3):
+            user = self._create_user(username=f"shoe{i}", email=f"shoe{i}@example.com")
+            user.balance = 10_000
+            self.users.append(user)
+        db.session.commit()
+
+    def tearDown(self):
+        blackjack_shoes.clear()
+        super().tearDown()
+
+    def test_hands_at_a_table_share_its_shoe(self):
+        handle_join_blackjack(self.users[0], self.table, 100)
+        db.session.commit()
+        shoe = blackjack_shoes.get(self.table)
+        self.assertEqual(self.table.shoe_state['deck'], shoe.snapshot()['deck'])
+        deck = cards.Deck.from_state(self.table.shoe_state['deck'])
+        left, upcoming = deck.remaining, deck.deal_strs(4)
+
+        # A restarted process picks the shoe up from the table's snapshot
+        blackjack_shoes.forget(self.table.id)
+        result = handle_join_blackjack(self.users[1], self.table, 100)
+        db.session.commit()
+        hand = db.session.get(BlackjackHand, result["id"])
+        self.assertEqual(result["deck_remaining_estimate"], left - hand.event_count)  # Four, and the dealer's draws after a natural
+        view = hand_view(hand)
+        self.assertEqual(view['player_cards'] + view['dealer_cards'], upcoming)
+        self.assertEqual(hand.details['shoe'], 1)
+        self.assertNotIn('deck', hand.details)
+        self.assertEqual(self.table.shoe_state['shoe'], 1)
+
+        shoe = blackjack_shoes.get(self.table)
+        shoe.deal_strs(shoe.remaining - 51)  # Past the cut card, 51 left
+        result = handle_join_blackjack(self.users[2], self.table, 100)
+        self.assertEqual(result["deck_remaining_estimate"], 104 - db.session.get(BlackjackHand, result["id"]).event_count)
+        self.assertEqual(self.table.shoe_state['shoe'], 2)
+
+    def test_shoe_dealt_by_another_process_is_reloaded(self):
+        handle_join_blackjack(self.users[0], self.table, 100)
+        db.session.commit()
+        shoe = blackjack_shoes.get(self.table)
+
+        # Another process deals ten cards from the stored shoe and commits its snapshot
+        elsewhere = BlackjackShoe.from_snapshot(self.table.shoe_state)
+        elsewhere.deal_strs(10)
+        self.table.shoe_state = elsewhere.snapshot()
+        db.session.commit()
+        upcoming = BlackjackShoe.from_snapshot(self.table.shoe_state).deal_strs(4)
+
+        result = handle_join_blackjack(self.users[1], self.table, 100)
+        db.session.commit()
+        reloaded = blackjack_shoes.get(self.table)
+        self.assertIsNot(reloaded, shoe)
+        self.assertEqual(hand_view(db.session.get(BlackjackHand, result["id"]))['player_cards'], upcoming[:2])
+        self.assertEqual(self.table.shoe_state['dealt'], reloaded.dealt)
+
+        # This process's own deals are ahead of the stored snapshot until they commit, and stay in play
+        reloaded.deal_strs(3)
+        self.assertIs(blackjack_shoes.start_hand(self.table), reloaded)
+
+    def test_a_hit_that_leaves_the_hand_open_does_not_settle_it(self):
+        dealt = ['S2', 'H3', 'ST', 'C7', 'D4']
+        rest = cards.CARD_STRS * 2
+        for card in dealt:
+            rest.remove(card)
+        self.table.shoe_state = BlackjackShoe(cards.Deck(cards.to_codes(dealt + rest)), 2, cut=20).snapshot()
+        db.session.commit()
+        hand_id = handle_join_blackjack(self.users[0], self.table, 100)["id"]
+        db.session.commit()
+
+        result = handle_blackjack_action(self.users[0], hand_id, 'hit', 0)
+        db.session.commit()
+        self.assertEqual((result['status'], result['win_amount']), ('active', 0))
+        self.assertEqual(result['player_hands'][0]['cards'], ['S2', 'H3', 'D4'])
+        self.assertEqual(db.session.get(BlackjackHand, hand_id).status, 'active')
+        self.assertEqual(self.users[0].balance, 10_000 - 100)  # Only the wager, nothing credited yet
+        self.assertEqual(self.table.shoe_state['dealt'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
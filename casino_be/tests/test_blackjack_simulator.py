@@ -0,0 +1,134 @@
+import random
+import unittest
+
+import numpy as np
+
+from casino_be.utils import blackjack_simulator as sim
+from casino_be.utils.blackjack_helper import (
+    _calculate_hand_value, _create_player_hand_obj, _determine_winner_for_hand, _play_dealer_turn,
+)
+
+
+class _StackedDeck:
+    def __init__(self, ranks):
+        self.cards = iter(f"H{sim.RANKS[rank]}" for rank in ranks)
+
+    def deal_str(self):
+        return next(self.cards)
+
+
+def reference_round(ranks, rules):
+    """One round played card by card through blackjack_helper, drawing in the simulator's order"""
+    rules = sim.table_rules(rules)
+    deck = _StackedDeck(ranks)
+    first, up, second, hole = (deck.deal_str() for _ in range(4))
+    hands = [_create_player_hand_obj([first, second], bet_sats=100)]
+    dealer = _create_player_hand_obj([up, hole])
+    column = min(_calculate_hand_value([up])[0], 11) - 2
+
+    index = 0
+    while index < len(hands):
+        hand = hands[index]
+        while not (hand['is_blackjack'] or hand['is_busted'] or hand['is_standing']):
+            total, is_soft = _calculate_hand_value(hand['cards'])
+            action = sim.BASIC_STRATEGY['soft' if is_soft else 'hard'][str(total)][column]
+            two = len(hand['cards']) == 2
+            rank = hand['cards'][0][1]
+            if two and rank == hand['cards'][1][1] and len(hands) < rules['max_split_hands'] \
+                    and not (rank == 'A' and len(hands) > 1 and not rules['allow_resplit_aces']):
+                pair_action = sim.BASIC_STRATEGY['pairs']['T' if rank in 'JQK' else rank][column]
+                if pair_action == 'P' or (pair_action == 'Q' and rules['allow_double_after_split']):
+                    action = 'P'
+                elif pair_action != 'Q':
+                    action = pair_action
+            can_double = two and (len(hands) == 1 or rules['allow_double_after_split'])
+            if action in 'DX':
+                action = 'D' if can_double else ('H' if action == 'D' else 'S')
+            action = 'H' if action == 'Q' else action
+
+            if action == 'S':
+                hand['is_standing'] = True
+            elif action == 'P':
+                split_card = hand['cards'][0]
+                hands[index] = hand = _create_player_hand_obj([split_card, deck.deal_str()], bet_sats=100)
+                hands.append(_create_player_hand_obj([split_card, deck.deal_str()], bet_sats=100))
+                if split_card[1] == 'A' and rules['one_card_after_split_ace']:
+                    hand['is_standing'] = hands[-1]['is_standing'] = True
+            else:
+                hand['cards'].append(deck.deal_str())
+                hand['total'], hand['is_soft'] = _calculate_hand_value(hand['cards'])
+                hand['is_busted'] = hand['total'] > 21
+                if action == 'D':
+                    hand['bet_multiplier'] = 2.0
+                    hand['is_standing'] = True
+        index += 1
+
+    _play_dealer_turn(dealer, deck, rules)
+    net = 0
+    for hand in hands:
+        returned, _ = _determine_winner_for_hand(hand, dealer, rules)
+        net += returned - hand['bet_sats'] * hand['bet_multiplier']
+    return net / 100
+
+
+class TestBlackjackSimulator(unittest.TestCase):
+
+    def play(self, rows, rules=None):
+        stacked = np.array([row + [0] * (40 - len(row)) for row in rows], dtype=np.int8)
+        net, wagered = sim.play_batch(None, len(rows), 6, rules, sim.strategy_tables(), stacked)
+        return list(net), list(wagered)
+
+    def test_rounds_match_blackjack_helper(self):
+        rng = random.Random(7)
+        shoe = [rank for rank in range(13) for _ in range(24)]
+        for rules in ({}, {'dealer_stands_on': 'hard17', 'allow_double_after_split': False, 'max_split_hands': 2},
+                      {'allow_resplit_aces': True, 'one_card_after_split_ace': False, 'blackjack_payout': 1.2}):
+            rows = [rng.sample(shoe, 40) for _ in range(3000)]
+            # Pairs are rare in random deals; start a third of the rounds with one
+            for row in rows[::3]:
+                row[2] = row[0]
+            net, _ = self.play(rows, rules)
+            for row, result in zip(rows, net):
+                self.assertAlmostEqual(result, reference_round(row, rules), msg=f"{rules} {row[:12]}")
+
+    def test_known_rounds(self):
+        # Ranks by index: 0 is a deuce, 8 a ten, 12 an ace. Cards go player, up-card, player, hole, then hits
+        rows = [
+            [12, 5, 8, 9],          # Natural against 7 + J
+            [7, 8, 0, 12, 2],       # 11 against a ten hits to 15; the dealer turns over an ace
+            [6, 3, 6, 8, 8, 8, 8],  # Eights against a 5 split to two 18s; dealer 15 draws a ten
+            [12, 4, 12, 8, 8, 7, 8],  # Aces split one card each, 21 and 20; dealer 16 draws a ten
+        ]
+        net, wagered = self.play(rows)
+        self.assertEqual(net[0], 1.5)
+        self.assertEqual((net[1], wagered[1]), (-1.0, 1.0))  # No peek, but nothing was doubled
+        self.assertEqual((net[2], wagered[2]), (2.0, 2.0))
+        self.assertEqual(net[3], 1.5 + 1.0)                  # Two cards to 21 after a split pay as a blackjack
+
+    def test_house_edge_and_rule_deltas(self):
+        base = sim.simulate({}, 6, rounds=200_000, seed=11)
+        self.assertEqual(base['rounds'], 200_000)
+        self.assertLess(abs(base['house_edge']), 0.015)
+        self.assertAlmostEqual(base['std_dev'], 1.14, delta=0.05)
+        low, high = base['house_edge_ci95']
+        self.assertLess(low, base['house_edge'])
+        self.assertGreater(high, base['house_edge'])
+
+        deltas = {row['change']: row for row in
+                  sim.rule_deltas({}, 6, rounds=200_000, seed=11, base=base)}
+        self.assertEqual(len(deltas), 7)
+        six_to_five = deltas['blackjack_payout=1.2']
+        self.assertGreater(six_to_five['delta_ci95'][0], 0.005)  # 6:5 costs players well over a percent
+        self.assertLess(deltas['decks=1']['delta'], 0)
+
+    def test_strategy_overrides_are_validated(self):
+        hard, _, _ = sim.strategy_tables({'hard': {'16': 'HHHHHHHHHH'}})
+        self.assertEqual(hard[16, 0], sim.HIT)
+        with self.assertRaises(ValueError):
+            sim.strategy_tables({'hard': {'16': 'HHH'}})
+        with self.assertRaises(ValueError):
+            sim.strategy_tables({'surrender': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
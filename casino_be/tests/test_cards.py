@@ -0,0 +1,62 @@
+import unittest
+from collections import Counter
+
+from casino_be.utils import cards
+
+
+class TestCards(unittest.TestCase):
+
+    def test_codes_and_strings(self):
+        self.assertEqual(len(cards.CARD_STRS), 52)
+        self.assertEqual(cards.card_str(0), "H2")
+        self.assertEqual(cards.card_str(51), "SA")
+        self.assertEqual(cards.rank_index(cards.card_code("DT")), 8)
+        self.assertEqual(cards.to_strs(cards.to_codes(["HA", "SK", "D2", "C9"])), ["HA", "SK", "D2", "C9"])
+        with self.assertRaises(ValueError):
+            cards.card_code("AS")  # Rank first is not a card
+
+        shoe = cards.new_deck(6)
+        self.assertEqual(len(shoe), 312)
+        self.assertEqual(Counter(shoe), {code: 6 for code in range(52)})
+
+    def test_shuffle_is_a_permutation_and_reproducible(self):
+        deck = cards.new_deck(6)
+        shuffled = cards.shuffle(bytearray(deck))
+        self.assertNotEqual(shuffled, deck)
+        self.assertEqual(sorted(shuffled), sorted(deck))
+
+        entropy = bytes(range(256)) * 10
+        self.assertEqual(cards.shuffle(cards.new_deck(), entropy), cards.shuffle(cards.new_deck(), entropy))
+        with self.assertRaises(ValueError):
+            cards.shuffle(cards.new_deck(), b"short")
+
+    def test_shuffle_is_uniform(self):
+        # All 24 orders of four cards should turn up about equally often
+        counts = Counter(bytes(cards.shuffle(bytearray(range(4)))) for _ in range(24_000))
+        self.assertEqual(len(counts), 24)
+        for order, seen in counts.items():
+            self.assertLess(abs(seen - 1000), 160, order)
+
+    def test_deck_deals_by_cursor_and_round_trips_its_state(self):
+        deck = cards.Deck(cards.to_codes(["HA", "SK", "D2", "C9", "ST"]))
+        self.assertEqual(deck.deal_str(), "HA")
+        self.assertEqual(deck.deal_strs(2), ["SK", "D2"])
+        self.assertEqual(deck.remaining, 2)
+
+        state = deck.to_state()
+        self.assertTrue(state.startswith(cards.STATE_PREFIX))
+        restored = cards.Deck.from_state(state)
+        self.assertEqual(restored.deal_strs(2), ["C9", "ST"])
+        with self.assertRaises(ValueError):
+            restored.deal()
+        with self.assertRaises(ValueError):
+            deck.deal_many(3)
+
+        # Hands dealt before the byte format stored a JSON list of card strings
+        self.assertEqual(cards.Deck.from_state(["D4", "HK"]).deal_strs(2), ["D4", "HK"])
+        self.assertEqual(cards.Deck.from_state(None).remaining, 0)
+        self.assertLess(len(cards.Deck.shuffled(6).to_state()), 430)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,7 +11,11 @@ from casino_be.services.crystal_garden_service import (
     APPRAISAL_COST, # Import from service
     POWER_UP_COSTS # Import from service
 )
-from datetime import datetime, timezone
+from casino_be.services.crystal_garden_cycles import GrowthCycles
+from casino_be.utils import crystal_growth
+from casino_be.utils.crystal_growth import compile_outcomes, flower_uniforms, roll_bloom_attributes
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 # Pytest fixtures for app and db session
 @pytest.fixture(scope='function')
@@ -295,3 +299,159 @@ def test_sell_crystal_not_appraised(app, db_session, service):
     # flower.appraised_value is None
     with pytest.raises(InvalidActionError):
         service.sell_crystal(user.id, flower.id)
+
+
+# --- Growth cycles for every garden ---
+
+def _gardens_with_flowers(db_session, service, seed, count):
+    gardens = []
+    for index in range(count):
+        user = create_user(db_session, id_val=10 + index)
+        garden = service.get_or_create_player_garden(user.id)
+        create_flower(db_session, user, garden, seed, x=0, stage='seeded')
+        create_flower(db_session, user, garden, seed, x=1, stage='sprouting')
+        create_flower(db_session, user, garden, seed, x=2, stage='blooming')
+        gardens.append(garden)
+    return gardens
+
+def test_growth_cycles_advance_every_due_garden(app, db_session, service):
+    seed = create_seed(db_session)
+    gardens = _gardens_with_flowers(db_session, service, seed, 5)
+    now = datetime.now(timezone.utc)
+    gardens[2].last_cycle_time = now - timedelta(minutes=5) # Cycled recently, not due
+    db_session.session.commit()
+
+    cycles = GrowthCycles(interval=3600, chunk_size=2)
+    progress = cycles.run(now=now)
+    assert (progress['state'], progress['due'], progress['gardens'], progress['chunks']) == ('finished', 4, 4, 2)
+    assert (progress['sprouted'], progress['bloomed']) == (4, 4)
+    assert progress['last_garden_id'] == gardens[-1].id
+
+    db_session.session.expire_all()
+    for garden in gardens:
+        stages = sorted(flower.growth_stage for flower in garden.flowers)
+        expected = ['blooming', 'seeded', 'sprouting'] if garden is gardens[2] else ['blooming', 'blooming', 'sprouting']
+        assert stages == expected
+    bloomed = CrystalFlower.query.filter_by(position_x=1, growth_stage='blooming').all()
+    assert len(bloomed) == 4
+    for flower in bloomed:
+        assert flower.color in ('blue', 'red', 'green')
+        assert 1.0 <= flower.size <= 5.0 and 0.1 <= flower.clarity <= 1.0
+        assert flower.special_type in ('common', 'rare_sparkle')
+
+    # Each garden is due again an interval after its own last cycle
+    assert cycles.run(now=now + timedelta(minutes=56))['gardens'] == 1
+    assert cycles.run(now=now + timedelta(minutes=57))['gardens'] == 0
+
+def test_growth_cycles_resume_after_a_failed_chunk(app, db_session, service):
+    seed = create_seed(db_session)
+    gardens = _gardens_with_flowers(db_session, service, seed, 4)
+    cycles = GrowthCycles(chunk_size=2)
+    advance = cycles.advance
+    calls = []
+    def failing_second_chunk(garden_ids, now, tables=None):
+        calls.append(garden_ids)
+        if len(calls) == 2:
+            raise RuntimeError("database went away")
+        return advance(garden_ids, now, tables)
+    with patch.object(cycles, 'advance', side_effect=failing_second_chunk):
+        progress = cycles.run()
+    assert (progress['state'], progress['gardens'], progress['last_garden_id']) == ('failed', 2, gardens[1].id)
+    assert 'database went away' in progress['error']
+    db_session.session.expire_all()
+    assert [g.last_cycle_time is not None for g in PlayerGarden.query.order_by(PlayerGarden.id)] == [True, True, False, False]
+
+    # The next pass picks up only the gardens the failed one did not commit
+    with patch.object(cycles, 'advance', side_effect=failing_second_chunk):
+        resumed = cycles.run()
+    assert (resumed['state'], resumed['gardens']) == ('finished', 2)
+    assert calls[-1] == [gardens[2].id, gardens[3].id]
+
+def test_roll_key_is_derived_when_not_configured(monkeypatch):
+    from config_validator import ConfigValidator
+    monkeypatch.delenv('CRYSTAL_GARDEN_ROLL_KEY', raising=False)
+    validator = ConfigValidator(is_production=False)
+    derived = validator.validate_crystal_garden_config('j' * 40)
+    assert len(derived) == 64 and derived == validator.validate_crystal_garden_config('j' * 40)
+    assert derived != validator.validate_crystal_garden_config('k' * 40)
+    monkeypatch.setenv('CRYSTAL_GARDEN_ROLL_KEY', 'configured')
+    assert validator.validate_crystal_garden_config('j' * 40) == 'configured'
+
+def test_roll_bloom_attributes_follows_the_outcome_tables():
+    tables = compile_outcomes({
+        "colors": {"blue": 3, "red": 1, "green": 0},
+        "sizes": {"min": 2.0, "max": 3.0, "distribution": "uniform"},
+    })
+    assert tables['color'] == ('weighted', ['blue', 'red', 'green'], [0.75, 1.0, 1.0])
+    uniforms = flower_uniforms(range(4000), [datetime(2026, 1, 1, tzinfo=timezone.utc)] * 4000)
+    assert flower_uniforms([7], [datetime(2026, 1, 1)]) == [uniforms[7]] # Naive datetimes are UTC
+    assert flower_uniforms([7], [datetime(2026, 1, 1)], secret='key') != [uniforms[7]]
+    results = []
+    for numpy_available in (True, False):
+        with patch.object(crystal_growth, 'NUMPY_AVAILABLE', numpy_available):
+            rolled = roll_bloom_attributes(tables, uniforms)
+        results.append(rolled)
+        assert 0.70 < rolled['color'].count('blue') / 4000 < 0.80
+        assert 'green' not in rolled['color']
+        assert all(2.0 <= size <= 3.0 and size == round(size, 2) for size in rolled['size'])
+        # Left out of the seed's outcomes
+        assert set(rolled['clarity']) == {0.1} and set(rolled['special_type']) == {None}
+    assert results[0] == results[1]
+    assert compile_outcomes(None) == compile_outcomes(crystal_growth.FALLBACK_OUTCOMES)
+
+
+# --- Growth derived from time ---
+
+def _expected_bloom(seed, flower):
+    rolled = roll_bloom_attributes(compile_outcomes(seed.potential_outcomes),
+                                   flower_uniforms([flower.id], [flower.planted_at]), [flower.active_power_ups])
+    return {attribute: values[0] for attribute, values in rolled.items()}
+
+def test_flowers_grow_with_time_and_are_stored_when_viewed(app, db_session, service):
+    user = create_user(db_session)
+    seed = create_seed(db_session)
+    garden = service.get_or_create_player_garden(user.id)
+    now = datetime.now(timezone.utc)
+    ages = [0.5, 1.2, 2.5, 0.95] # In cycles of an hour
+    flowers = [create_flower(db_session, user, garden, seed, x=x, stage='seeded') for x in range(len(ages))]
+    for flower, age in zip(flowers, ages):
+        flower.planted_at = now - timedelta(hours=age)
+    flowers[3].active_power_ups = ['fertilizer'] # 0.95 cycles at 1.1x speed is past the first
+    db_session.session.commit()
+    ids = [flower.id for flower in flowers]
+
+    state = service.get_garden_state(user.id)
+    by_id = {flower['id']: flower for flower in state['flowers']}
+    assert [by_id[i]['growth_stage'] for i in ids] == ['seeded', 'sprouting', 'blooming', 'sprouting']
+    grows_at = datetime.fromisoformat(by_id[ids[0]]['next_stage_at'])
+    assert abs((grows_at - (now + timedelta(hours=0.5))).total_seconds()) < 1
+    assert by_id[ids[2]]['next_stage_at'] is None
+
+    db_session.session.expire_all()
+    stored = [db_session.session.get(CrystalFlower, i) for i in ids]
+    assert [flower.growth_stage for flower in stored] == ['seeded', 'sprouting', 'blooming', 'sprouting']
+    expected = _expected_bloom(seed, stored[2])
+    assert {attribute: getattr(stored[2], attribute) for attribute in expected} == expected
+    assert by_id[ids[2]]['color'] == expected['color']
+
+def test_blooms_roll_the_same_lazily_or_by_cycle(app, db_session, service):
+    user = create_user(db_session, balance=100)
+    seed = create_seed(db_session)
+    garden = service.get_or_create_player_garden(user.id)
+    cycled = service.plant_seed(user.id, seed.id, 0, 0)
+    service.apply_power_up(user.id, cycled.id, 'moon_glow')
+    service.process_growth_cycle(garden.id)
+    service.process_growth_cycle(garden.id)
+    db_session.session.refresh(cycled)
+    assert cycled.growth_stage == 'blooming'
+    assert {attribute: getattr(cycled, attribute) for attribute in ('color', 'size', 'clarity', 'special_type')} \
+        == _expected_bloom(seed, cycled)
+
+    # Stored as seeded, but old enough to have bloomed: appraisal sees it bloomed
+    lazy = create_flower(db_session, user, garden, seed, x=1, stage='seeded')
+    lazy.planted_at = datetime.now(timezone.utc) - timedelta(hours=3)
+    db_session.session.commit()
+    appraised = service.appraise_crystal(user.id, lazy.id)
+    assert appraised.growth_stage == 'blooming'
+    assert appraised.color == _expected_bloom(seed, appraised)['color']
+    assert appraised.appraised_value is not None
@@ -0,0 +1,128 @@
+import unittest
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from casino_be.models import db, CrystalFlower, CrystalSeed, User
+from casino_be.services.crystal_garden_service import CrystalGardenService
+from casino_be.services.garden_views import garden_views, view_diff
+from casino_be.tests.test_api import BaseTestCase
+
+
+class FakeSockets:
+    """Stands in for the websocket manager: every user is connected and diffs are recorded"""
+
+    def __init__(self, user_ids):
+        self.connected_users = {user_id: {'socket_id': f'sid-{user_id}'} for user_id in user_ids}
+        self.diffs = []
+
+    def send_garden_diff(self, user_id, payload):
+        self.diffs.append((user_id, payload))
+
+
+class TestGardenViewDiff(unittest.TestCase):
+
+    def test_diff_keeps_only_what_changed(self):
+        previous = {'garden_id': 1, 'last_cycle_time': None,
+                    'flowers': [{'id': 1, 'growth_stage': 'seeded'}, {'id': 2, 'growth_stage': 'seeded'}]}
+        current = {'garden_id': 1, 'last_cycle_time': 'now',
+                   'flowers': [{'id': 1, 'growth_stage': 'sprouting'}, {'id': 3, 'growth_stage': 'seeded'}]}
+        self.assertEqual(view_diff('garden', previous, current), {
+            'garden': {'last_cycle_time': 'now'},
+            'flowers': {1: {'growth_stage': 'sprouting'}, 3: {'id': 3, 'growth_stage': 'seeded'}, 2: None},
+        })
+        self.assertEqual(view_diff('garden', current, current), {})
+        self.assertEqual(view_diff('codex', [], [{'id': 5, 'crystal_name': 'x'}]), {'entries': {5: {'id': 5, 'crystal_name': 'x'}}})
+
+
+class TestGardenViewsAPI(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        _, self.user_id = self._login_and_get_token()
+        self.seed = CrystalSeed(name='View Seed', cost=10, potential_outcomes=None)
+        db.session.add(self.seed)
+        db.session.commit()
+        self.seed_id = self.seed.id
+
+    def tearDown(self):
+        garden_views.websocket_manager = None
+        garden_views.ttl = self.app.config['GARDEN_VIEW_TTL']
+        garden_views.clear()
+        super().tearDown()
+
+    def test_garden_state_is_cached_until_the_garden_changes(self):
+        first = self.client.get('/api/crystal-garden/garden-state')
+        self.assertEqual(first.status_code, 200, first.get_json())
+        etag = first.headers['ETag'].strip('"')
+        self.assertEqual(first.get_json()['flowers'], [])
+
+        with patch('casino_be.services.garden_views._build', side_effect=AssertionError('rebuilt')):
+            again = self.client.get('/api/crystal-garden/garden-state', headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(again.status_code, 304)
+
+        planted = self.client.post('/api/crystal-garden/plant-seed',
+                                   json={'seed_id': self.seed_id, 'position_x': 1, 'position_y': 2})
+        self.assertEqual(planted.status_code, 201, planted.get_json())
+        after = self.client.get('/api/crystal-garden/garden-state', headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after.headers['ETag'].strip('"'), etag)
+        flower = after.get_json()['flowers'][0]
+        self.assertEqual((flower['position_x'], flower['position_y'], flower['growth_stage']), (1, 2, 'seeded'))
+
+        codex = self.client.get('/api/crystal-garden/codex')
+        self.assertEqual((codex.status_code, codex.get_json()), (200, []))
+        self.assertEqual(self.client.get('/api/crystal-garden/codex', headers={'If-None-Match': codex.headers['ETag']}).status_code, 304)
+
+    def test_view_expires_when_a_flower_grows_by_time(self):
+        service = CrystalGardenService()
+        service.plant_seed(self.user_id, self.seed_id, 0, 0)
+        garden_views.ttl = 7200  # Longer than the flower takes to sprout
+        view = garden_views.get('garden', self.user_id)
+        flower_id = view.state()['flowers'][0]['id']
+        self.assertEqual(view.expires_at, datetime.fromisoformat(view.state()['flowers'][0]['next_stage_at']))
+
+        # An hour and a half on the flower has sprouted, so the cached view is stale
+        flower = db.session.get(CrystalFlower, flower_id)
+        flower.planted_at = datetime.now(timezone.utc) - timedelta(minutes=90)
+        db.session.commit()
+        self.assertIs(garden_views.get('garden', self.user_id), view)
+        garden_views._views[('garden', self.user_id)] = replace(view, expires_at=datetime.now(timezone.utc))
+
+        grown = garden_views.get('garden', self.user_id)
+        self.assertEqual(grown.state()['flowers'][0]['growth_stage'], 'sprouting')
+        self.assertEqual(grown.seq, view.seq + 1)
+
+    def test_every_view_expires_after_the_ttl(self):
+        # Another replica's change never calls changed() here; the TTL bounds how stale the view gets
+        codex = garden_views.get('codex', self.user_id)
+        garden = garden_views.get('garden', self.user_id)
+        ttl = timedelta(seconds=self.app.config['GARDEN_VIEW_TTL'])
+        for view in (codex, garden):
+            self.assertLessEqual(view.expires_at, datetime.now(timezone.utc) + ttl)
+        garden_views._views[('codex', self.user_id)] = replace(codex, expires_at=datetime.now(timezone.utc))
+        self.assertIsNot(garden_views.get('codex', self.user_id), codex)
+        self.assertIs(garden_views.get('garden', self.user_id), garden)
+
+    def test_changes_are_pushed_to_connected_players(self):
+        db.session.get(User, self.user_id).balance = 1000
+        db.session.commit()
+        sockets = garden_views.websocket_manager = FakeSockets([self.user_id])
+        service = CrystalGardenService()
+        before = garden_views.get('garden', self.user_id)
+
+        flower = service.plant_seed(self.user_id, self.seed_id, 3, 3)
+        service.apply_power_up(self.user_id, flower.id, 'fertilizer')
+        service.buy_seed(self.user_id, self.seed_id)  # Spends balance only: nothing to push
+
+        self.assertEqual([user_id for user_id, _ in sockets.diffs], [self.user_id, self.user_id])
+        planted, powered = (payload for _, payload in sockets.diffs)
+        self.assertEqual((planted['kind'], planted['seq'], powered['seq']), ('garden', before.seq + 1, before.seq + 2))
+        self.assertEqual(planted['changes']['flowers'][flower.id]['growth_stage'], 'seeded')
+        self.assertEqual(set(powered['changes']['flowers'][flower.id]), {'active_power_ups', 'next_stage_at'})
+        # The push left the new view cached for the next poll
+        self.assertEqual(garden_views.get('garden', self.user_id).etag, powered['etag'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,7 @@
+import random
 import unittest
+from unittest.mock import patch
+from casino_be.utils import plinko_helper
 from casino_be.utils.plinko_helper import (
     validate_plinko_params,
     calculate_winnings,
@@ -7,6 +10,8 @@ from casino_be.utils.plinko_helper import (
     PAYOUT_MULTIPLIERS
 )
 from casino_be.app import app # Add this import
+from casino_be.models import db, User, PlinkoDropLog, Transaction
+from casino_be.tests.test_api import BaseTestCase
 
 class TestPlinkoHelper(unittest.TestCase):
 
@@ -107,5 +112,76 @@ class TestPlinkoHelper(unittest.TestCase):
         self.assertEqual(calculate_winnings("abc", '2x'), 0)
 
 
+class TestPlinkoBoards(unittest.TestCase):
+
+    def test_every_board_is_symmetric_and_under_target_rtp(self):
+        for (rows, risk), board in plinko_helper.BOARDS.items():
+            with self.subTest(rows=rows, risk=risk):
+                self.assertEqual(len(board.multipliers), rows + 1)
+                self.assertAlmostEqual(sum(board.probabilities), 1.0)
+                self.assertEqual(board.multipliers, board.multipliers[::-1])
+                self.assertLess(board.multipliers[rows // 2], 100) # The centre slot loses
+                self.assertTrue(0.96 < board.rtp <= plinko_helper.TARGET_RTP)
+        low, high = plinko_helper.get_board(16, 'Low'), plinko_helper.get_board(16, 'High')
+        self.assertGreater(high.multipliers[0], low.multipliers[0])
+        with self.assertRaises(ValueError):
+            plinko_helper.get_board(7, 'Low')
+
+    def test_drops_follow_the_bits(self):
+        board = plinko_helper.get_board(8, 'Medium')
+        entropy = bytes(random.Random(4).getrandbits(8) for _ in range(2 * 500))
+        paths, slots = plinko_helper.drop_balls(board, 500, entropy=entropy)
+        self.assertTrue(all(path < 256 for path in paths))
+        self.assertEqual(slots, [sum(plinko_helper.path_steps(path, 8)) for path in paths])
+        with patch.object(plinko_helper, 'NUMPY_AVAILABLE', False):
+            self.assertEqual(plinko_helper.drop_balls(board, 500, entropy=entropy), (paths, slots))
+        self.assertEqual(plinko_helper.settle_drops(board, 1001, [0, 4]),
+                         [1001 * board.multipliers[0] // 100, 1001 * board.multipliers[4] // 100])
+
+    def test_sampled_slots_are_binomial(self):
+        board = plinko_helper.get_board(12, 'High')
+        balls = 60_000
+        _, slots = plinko_helper.drop_balls(board, balls)
+        for slot, p in enumerate(board.probabilities):
+            expected = balls * p
+            z = (slots.count(slot) - expected) / (expected * (1 - p)) ** 0.5
+            self.assertLess(abs(z), 5, msg=f"slot {slot}")
+
+
+class TestPlinkoDropsAPI(BaseTestCase):
+
+    def test_batch_settles_every_ball_in_one_commit(self):
+        _, user_id = self._login_and_get_token()
+        user = db.session.get(User, user_id)
+        user.balance = 10 * plinko_helper.SATOSHIS_PER_UNIT
+        db.session.commit()
+
+        payload = {"stake_amount": 0.5, "chosen_stake_label": "Low", "rows": 8, "balls": 12}
+        response = self.client.post('/api/plinko/drops', json=payload)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        data = response.get_json()
+        board = plinko_helper.get_board(8, 'Low')
+        self.assertEqual(len(data['balls']), 12)
+        for ball in data['balls']:
+            self.assertEqual(sum(ball['path']), ball['slot'])
+            self.assertEqual(ball['slot_landed_label'], board.labels[ball['slot']])
+            self.assertAlmostEqual(ball['winnings'], 0.5 * board.multipliers[ball['slot']] / 100)
+        self.assertAlmostEqual(data['total_staked'], 6.0)
+
+        db.session.expire_all()
+        won = sum(log.winnings_amount for log in PlinkoDropLog.query.filter_by(user_id=user_id))
+        self.assertEqual(PlinkoDropLog.query.filter_by(user_id=user_id, rows=8).count(), 12)
+        self.assertEqual(db.session.get(User, user_id).balance, 4 * plinko_helper.SATOSHIS_PER_UNIT + won)
+        self.assertAlmostEqual(data['new_balance'], 4 + won / plinko_helper.SATOSHIS_PER_UNIT)
+        bet = Transaction.query.filter_by(user_id=user_id, transaction_type='plinko_bet').one()
+        self.assertEqual(bet.amount, -6 * plinko_helper.SATOSHIS_PER_UNIT)
+        self.assertEqual(sorted(bet.details['plinko_drop_ids']), [ball['id'] for ball in data['balls']])
+
+        too_many = self.client.post('/api/plinko/drops', json={**payload, "balls": plinko_helper.MAX_BALLS + 1})
+        self.assertEqual(too_many.status_code, 422)
+        broke = self.client.post('/api/plinko/drops', json={**payload, "balls": 100})
+        self.assertEqual(broke.status_code, 400)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+import threading
+import time
+import unittest
+
+from casino_be.services.poker_auto_dealer import PokerAutoDealer
+
+
+class TestPokerAutoDealer(unittest.TestCase):
+
+    def setUp(self):
+        self.dealt = []
+        self.done = threading.Event()
+        self.dealer = PokerAutoDealer(self.deal, delay=0.1)
+
+    def deal(self, table_id, hand_id):
+        self.dealt.append((table_id, hand_id, time.monotonic()))
+        if len(self.dealt) == 2:
+            self.done.set()
+
+    def test_ready_tables_are_dealt_after_the_delay(self):
+        start = time.monotonic()
+        self.dealer.observe(1, 3, 40, False)
+        time.sleep(0.05)
+        self.dealer.observe(2, 2, None, False)
+        self.dealer.observe(1, 3, 40, False)  # Reporting again does not push the deal back
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual([(t, hand_id) for t, hand_id, _ in self.dealt], [(1, 40), (2, None)])
+        self.assertLess(self.dealt[0][2] - start, 0.15)
+        self.assertGreaterEqual(self.dealt[1][2] - self.dealt[0][2], 0.03)
+        self.assertIsNone(self.dealer.pending(1))
+
+    def test_tables_without_two_ready_players_or_with_a_live_hand_wait(self):
+        self.dealer.observe(1, 1, None, False)
+        self.dealer.observe(2, 4, 7, True)
+        self.dealer.observe(3, 2, 8, False)
+        self.dealer.observe(3, 2, 9, True)  # Someone started the hand before the dealer did
+        self.dealer.seed({4: (2, None, False), 5: (0, None, False)})
+        self.dealer.forget(4)
+        self.dealer.observe(2, 4, 7, False)  # Table 2's hand ends
+        time.sleep(0.3)
+        self.assertEqual([(t, hand_id) for t, hand_id, _ in self.dealt], [(2, 7)])
+
+        self.dealer.retry(2)
+        self.assertIsNotNone(self.dealer.pending(2))
+        self.assertTrue(self.done.wait(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from casino_be.utils.poker_bot_swarm import PokerBotSwarm, check_completed_hand, check_turn_order, parse_mix
+
+
+class TestPokerBotSwarm(unittest.TestCase):
+
+    def test_invariant_checks(self):
+        def player(uid, seat, stack, invested, active=True, last_action=None):
+            return {"user_id": uid, "seat_id": seat, "stack_sats": stack, "total_invested_this_hand": invested,
+                    "is_active_in_hand": active, "last_action": last_action}
+
+        # Player 3 went all-in for 100 against 300 each, yet collected the whole 700 pot
+        before = {1: 1000, 2: 1000, 3: 100}
+        view = {"players": [player(1, 1, 700, 300), player(2, 2, 700, 300, active=False), player(3, 3, 700, 100)],
+                "current_hand": {"pot_size_sats": 700}}
+        problems = check_completed_hand(before, view, 0, 0, 0, True)
+        self.assertTrue(any("more than their side-pot cap 300" in p for p in problems))
+        view["players"] = [player(1, 1, 1100, 300), player(2, 2, 700, 300, active=False), player(3, 3, 300, 100)]
+        self.assertEqual(check_completed_hand(before, view, 0, 0, 0, True), [])
+        # With a 5% rake the same result is short by exactly the rake
+        view["players"][0]["stack_sats"] = 1065
+        self.assertEqual(check_completed_hand(before, view, 35, 0.05, 0, True), [])
+
+        # Flop: seat 2 checked, so seat 3 (not seat 1) must be next
+        hand = {"current_turn_user_id": 1, "current_bet_to_match": 0, "player_street_investments": {}}
+        players = [player(1, 1, 500, 0), player(2, 2, 500, 0, last_action="check"), player(3, 3, 500, 0)]
+        self.assertIn("expected user 3", check_turn_order({"players": players, "current_hand": hand}, 2))
+        hand["current_turn_user_id"] = 3
+        self.assertIsNone(check_turn_order({"players": players, "current_hand": hand}, 2))
+
+    def test_swarm_plays_clean_hands(self):
+        journal_dir = tempfile.mkdtemp()
+        swarm = PokerBotSwarm(f"sqlite:///{os.path.join(journal_dir, 'swarm.db')}", num_tables=2, players_per_table=3,
+                              num_hands=12, hands_per_second=0, mix=parse_mix("random,allin"), via="actor", seed=7)
+        swarm.setup()
+        try:
+            swarm.run(max_duration=60)
+            swarm.verify_replays()
+            swarm.verify_money()
+        finally:
+            swarm.teardown()
+            shutil.rmtree(journal_dir, ignore_errors=True)
+        self.assertEqual(swarm.violations, [])
+        self.assertEqual(swarm.counters["hands_completed"], 12)
+        self.assertEqual(len(swarm.completed), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import itertools
+import json
+import unittest
+
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils import poker_equity, poker_evaluator
+
+
+def brute_force_equity(hands, board):
+    """Reference: enumerate every run-out with the scalar evaluator"""
+    hands = [poker_evaluator.cards_from_strs(hand) for hand in hands]
+    board = poker_evaluator.cards_from_strs(board)
+    used = set(board) | {card for hand in hands for card in hand}
+    deck = [card for card in range(52) if card not in used]
+    shares = [0.0] * len(hands)
+    runouts = 0
+    for runout in itertools.combinations(deck, 5 - len(board)):
+        scores = [poker_evaluator.evaluate(hand + board + list(runout)) for hand in hands]
+        winners = [i for i, score in enumerate(scores) if score == min(scores)]
+        for i in winners:
+            shares[i] += 1 / len(winners)
+        runouts += 1
+    return [share / runouts for share in shares], runouts
+
+
+class TestPokerEquity(unittest.TestCase):
+
+    def setUp(self):
+        poker_equity.equity_cache.clear()
+
+    def test_exact_enumeration_matches_brute_force(self):
+        hands = [["HA", "HK"], ["S8", "D8"], ["C5", "C6"]]
+        board = ["H2", "H7", "CJ"]
+        result = poker_equity.calculate_equity(hands, board, use_cache=False)
+        expected, runouts = brute_force_equity(hands, board)
+
+        self.assertTrue(result['exact'])
+        self.assertEqual(result['runouts'], runouts)
+        for player, equity in zip(result['players'], expected):
+            self.assertAlmostEqual(player['equity'], equity, places=9)
+        self.assertAlmostEqual(sum(p['equity'] for p in result['players']), 1.0, places=9)
+
+    def test_split_pots_share_equity(self):
+        # Broadway on board: every run-out is a chop
+        result = poker_equity.calculate_equity([["H2", "D3"], ["S2", "C3"]], ["HT", "SJ", "DQ", "CK", "HA"])
+        self.assertEqual(result['runouts'], 1)
+        for player in result['players']:
+            self.assertEqual((player['win'], player['tie'], player['equity']), (0.0, 1.0, 0.5))
+
+    def test_monte_carlo_is_close_to_exact(self):
+        hands = [["HA", "DA"], ["SK", "CK"]]
+        board = ["H2", "D7", "CJ"]
+        exact = poker_equity.calculate_equity(hands, board, use_cache=False)
+        sampled = poker_equity.calculate_equity(hands, board, iterations=20_000, exact_limit=0, seed=5, use_cache=False)
+        self.assertFalse(sampled['exact'])
+        self.assertEqual(sampled['runouts'], 20_000)
+        self.assertAlmostEqual(sampled['players'][0]['equity'], exact['players'][0]['equity'], delta=0.01)
+
+        repeat = poker_equity.calculate_equity(hands, board, iterations=20_000, exact_limit=0, seed=5, use_cache=False)
+        self.assertEqual(repeat['players'], sampled['players'])
+
+    def test_suit_isomorphic_situations_share_a_cache_entry(self):
+        first = poker_equity.calculate_equity([["HA", "DA"], ["SK", "CK"]], ["H2", "D7", "SJ"])
+        # Suits relabelled (H->C, D->S, S->H, C->D) and players swapped
+        second = poker_equity.calculate_equity([["HK", "DK"], ["CA", "SA"]], ["C2", "S7", "HJ"])
+
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(poker_equity.equity_cache.hits, 1)
+        self.assertEqual(second['players'][0]['hand'], ["HK", "DK"])
+        self.assertEqual(second['players'][0]['equity'], first['players'][1]['equity'])
+        self.assertEqual(second['players'][1]['equity'], first['players'][0]['equity'])
+
+    def test_split_across_workers_gives_identical_counts(self):
+        key, _ = poker_equity.canonicalize(*poker_equity.parse_situation([["HA", "HK"], ["S8", "D8"]], ["H2", "H7", "CJ"]))
+        single, _ = poker_equity._compute_counts(*key, 1000, 10_000, 1, None)
+        tasks_total = poker_equity._empty_counts(2)
+        used = {c for hand in key[0] for c in hand} | set(key[1])
+        deck = [card for card in range(52) if card not in used]
+        for start, stop in ((0, 400), (400, 990)):
+            poker_equity._merge_counts(tasks_total, poker_equity.equity_chunk((key[0], key[1], deck, 2, 'exact', (start, stop))))
+        self.assertEqual(tasks_total['wins'], single['wins'])
+        self.assertEqual(tasks_total['runouts'], single['runouts'])
+
+    def test_invalid_situations(self):
+        with self.assertRaises(ValueError):
+            poker_equity.calculate_equity([["HA", "DA"]])
+        with self.assertRaises(ValueError):
+            poker_equity.calculate_equity([["HA", "DA"], ["HA", "CK"]])
+        with self.assertRaises(ValueError):
+            poker_equity.calculate_equity([["HA", "DA"], ["SK", "CK"]], ["H2"])
+        with self.assertRaises(ValueError):
+            poker_equity.calculate_equity([["HA", "XX"], ["SK", "CK"]])
+
+
+class TestPokerEquityAPI(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['SERVICE_API_TOKEN'] = 'test_equity_service_token'
+        self.headers = {'X-Service-Token': 'test_equity_service_token', 'Content-Type': 'application/json'}
+
+    def test_equity_endpoint(self):
+        payload = {'hands': [['HA', 'DA'], ['SK', 'CK']], 'board': ['H2', 'D7', 'CJ', 'S3']}
+        response = self.client.post('/api/internal/poker/equity', data=json.dumps(payload), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['status'])
+        self.assertTrue(data['exact'])
+        self.assertEqual(data['runouts'], 44)
+        self.assertAlmostEqual(data['players'][1]['equity'], 2 / 44)
+
+        response = self.client.post('/api/internal/poker/equity', data=json.dumps({'hands': [['HA', 'DA']]}), headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/internal/poker/equity', data=json.dumps(payload), headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
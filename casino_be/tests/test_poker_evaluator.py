@@ -0,0 +1,134 @@
+import itertools
+import random
+import unittest
+
+from flask import Flask
+from treys import Card, Evaluator
+
+from casino_be.utils import poker_evaluator
+from casino_be.utils.poker_helper import _determine_winning_hand
+
+
+def to_treys(card):
+    return Card.new(poker_evaluator.RANKS[card >> 2] + poker_evaluator.SUITS[card & 3].lower())
+
+
+class TestPokerEvaluator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.treys = Evaluator()
+
+    def assert_matches_treys(self, cards):
+        expected = self.treys.evaluate([to_treys(c) for c in cards[:2]], [to_treys(c) for c in cards[2:]])
+        score = poker_evaluator.evaluate(cards)
+        self.assertEqual(score, expected, [poker_evaluator.card_to_str(c) for c in cards])
+        self.assertEqual(poker_evaluator.class_name(score), self.treys.class_to_string(self.treys.get_rank_class(expected)))
+
+    def test_random_hands_match_treys(self):
+        rng = random.Random(31)
+        for size in (5, 6, 7):
+            for _ in range(3000):
+                self.assert_matches_treys(rng.sample(range(52), size))
+
+    def test_every_five_card_rank_pattern_matches_treys(self):
+        # Every multiset of five ranks, dealt offsuit and (where possible) suited
+        for ranks in itertools.combinations_with_replacement(range(13), 5):
+            if max(ranks.count(rank) for rank in ranks) > 4:
+                continue
+            seen = {}
+            cards = []
+            for rank in ranks:
+                suit = seen.get(rank, 0)
+                seen[rank] = suit + 1
+                cards.append(rank * 4 + suit)
+            self.assert_matches_treys(cards)
+            if len(set(ranks)) == 5:
+                self.assert_matches_treys([rank * 4 + 3 for rank in ranks])
+
+    def test_evaluate_many_matches_evaluate(self):
+        rng = random.Random(7)
+        board = rng.sample(range(52), 5)
+        rest = [card for card in range(52) if card not in board]
+        hands = [rest[i:i + 2] for i in range(0, 20, 2)]
+        boards = [board] * len(hands)
+        self.assertEqual(poker_evaluator.evaluate_many(boards, hands), [poker_evaluator.evaluate(board + hand) for hand in hands])
+
+        # Distinct board objects per row, including a turn-only board
+        mixed_boards = [board, board[:4], list(board)]
+        mixed_hands = [hands[0], hands[1], hands[2]]
+        self.assertEqual(
+            poker_evaluator.evaluate_many(mixed_boards, mixed_hands),
+            [poker_evaluator.evaluate(b + h) for b, h in zip(mixed_boards, mixed_hands)],
+        )
+
+    @unittest.skipUnless(poker_evaluator.NUMPY_AVAILABLE, "numpy is required for evaluate_array")
+    def test_evaluate_array_matches_evaluate(self):
+        import numpy as np
+
+        rng = random.Random(11)
+        for size in (5, 6, 7):
+            rows = [rng.sample(range(52), size) for _ in range(2000)]
+            expected = [poker_evaluator.evaluate(row) for row in rows]
+            self.assertEqual(poker_evaluator.evaluate_array(np.array(rows)).tolist(), expected)
+
+    def test_best_five_returns_the_scoring_cards(self):
+        cards = poker_evaluator.cards_from_strs(["HA", "HK", "HQ", "HJ", "HT", "S2", "C2"])
+        score, best = poker_evaluator.best_five(cards)
+        self.assertEqual(score, 1)
+        self.assertEqual(sorted(poker_evaluator.card_to_str(c) for c in best), ["HA", "HJ", "HK", "HQ", "HT"])
+
+        rng = random.Random(3)
+        for _ in range(200):
+            cards = rng.sample(range(52), 7)
+            score, best = poker_evaluator.best_five(cards)
+            self.assertEqual(len(best), 5)
+            self.assertTrue(set(best) <= set(cards))
+            self.assertEqual(poker_evaluator.evaluate(best), score)
+            self.assertEqual(poker_evaluator.evaluate(cards), score)
+
+    def test_invalid_card_string(self):
+        with self.assertRaises(ValueError):
+            poker_evaluator.card_from_str("X9")
+        with self.assertRaises(ValueError):
+            poker_evaluator.card_from_str("h2")
+
+
+class TestDetermineWinningHand(unittest.TestCase):
+
+    def setUp(self):
+        self.app_context = Flask(__name__).app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_single_winner_gets_exact_best_five(self):
+        winners = _determine_winning_hand(
+            {1: ["HA", "DA"], 2: ["SK", "CQ"]},
+            ["CA", "S7", "D7", "H2", "C3"],
+        )
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(winners[0]["user_id"], 1)
+        self.assertEqual(winners[0]["winning_hand"], "Full House")
+        self.assertEqual(sorted(winners[0]["best_five_cards"]), sorted(["HA", "DA", "CA", "S7", "D7"]))
+
+    def test_board_plays_splits_the_pot(self):
+        winners = _determine_winning_hand(
+            {1: ["H2", "D3"], 2: ["S2", "C3"]},
+            ["HT", "SJ", "DQ", "CK", "HA"],
+        )
+        self.assertEqual([w["user_id"] for w in winners], [1, 2])
+        self.assertTrue(all(w["winning_hand"] == "Straight" for w in winners))
+        self.assertEqual(sorted(winners[0]["best_five_cards"]), sorted(["HT", "SJ", "DQ", "CK", "HA"]))
+
+    def test_invalid_cards_are_skipped(self):
+        board = ["HT", "SJ", "DQ", "C4", "H5"]
+        self.assertEqual(_determine_winning_hand({1: ["ZZ", "D3"]}, board), [])
+        winners = _determine_winning_hand({1: ["ZZ", "D3"], 2: ["S2", "C3"], 3: ["S9"]}, board)
+        self.assertEqual([w["user_id"] for w in winners], [2])
+        self.assertEqual(_determine_winning_hand({2: ["S2", "C3"]}, ["HT", "bad", "DQ"]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
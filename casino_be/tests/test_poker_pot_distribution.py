@@ -1,235 +1,190 @@
+import random
 import unittest
-from unittest.mock import patch, MagicMock, ANY
 from decimal import Decimal
 
-from casino_be.utils.poker_helper import _distribute_pot
-from casino_be.models import User, PokerTable, PokerHand, PokerPlayerState, Transaction, db
+from casino_be.utils import poker_helper
+from casino_be.utils.poker_table_state import HandState, SeatState, TableState, _rake, settle_showdown
 from casino_be.app import app # Added app import
 
-# Helper to create a mock session (can be shared or defined per test file)
-def create_mock_session():
-    mock_session = MagicMock(spec=db.session)
-    mock_session.query.return_value.filter_by.return_value.first.return_value = None
-    mock_session.query.return_value.get.return_value = None
-    mock_session.add = MagicMock()
-    mock_session.commit = MagicMock()
-    mock_session.rollback = MagicMock()
-    return mock_session
 
-class TestDistributePot(unittest.TestCase):
+class TestSettleShowdown(unittest.TestCase):
+
+    def _table(self, players, board, rake_percentage=Decimal("0.00"), max_rake_sats=0):
+        """players: (user_id, username, stack, total_invested, hole_cards, in_hand)"""
+        seats = {uid: SeatState(100 + uid, uid, username, uid, stack, is_active_in_hand=in_hand, hole_cards=hole_cards,
+                                total_invested_this_hand=invested)
+                 for uid, username, stack, invested, hole_cards, in_hand in players}
+        state = TableState(1, "Showdown", "texas_holdem", "no_limit", 10, 20, 9, True, rake_percentage, max_rake_sats,
+                           None, seats)
+        state.hand = HandState(1, 'river', board_cards=board,
+                               pot_size_sats=sum(invested for _, _, _, invested, _, _ in players))
+        return state
+
+    def test_single_winner_main_pot_no_rake_cap_hit(self):
+        state = self._table([(1, "Alice", 1000, 200, ["H7", "H8"], True), (2, "Bob", 1000, 200, ["CQ", "CJ"], True)],
+                            ["D2", "D3", "D4", "S5", "S6"], Decimal("0.10"), 500)
+
+        # Player1's 8-high straight beats the 6-high straight on the board
+        result = settle_showdown(state)
+
+        self.assertEqual(result["rake_taken"], 40)
+        self.assertEqual(state.seats[1].stack_sats, 1000 + 360)
+        self.assertEqual(state.seats[2].stack_sats, 1000) # Bob lost
+        [winner] = state.hand.winners
+        self.assertEqual((winner["user_id"], winner["username"], winner["amount_won"]), (1, "Alice", 360))
+        self.assertEqual(winner["best_five_cards"], ["H7", "H8", "D4", "S5", "S6"])
+        [transaction] = state.pending_transactions
+        self.assertEqual((transaction["user_id"], transaction["amount"], transaction["transaction_type"]),
+                         (1, 360, 'poker_win'))
+        self.assertEqual(state.hand.status, 'completed')
+
+    def test_split_pot_two_winners_main_pot(self):
+        state = self._table([(1, "Alice", 1000, 200, ["HA", "HK"], True), (2, "Bob", 1000, 200, ["DA", "DK"], True)],
+                            ["S2", "H3", "C4", "S5", "D6"])
+
+        # Both players play the board's straight: split pot
+        settle_showdown(state)
+
+        self.assertEqual(state.hand.rake_sats, 0)
+        self.assertEqual([state.seats[1].stack_sats, state.seats[2].stack_sats], [1200, 1200])
+        self.assertEqual([t["amount"] for t in state.pending_transactions], [200, 200])
+
+    def test_one_main_pot_one_side_pot(self):
+        # P1 is all-in for 100, P2 and P3 put in 200 each: 500 in the pot, rake capped at 10
+        state = self._table([(1, "P1_AllIn", 0, 100, ["SA", "SK"], True),
+                             (2, "P2_Cover", 1000, 200, ["SQ", "SJ"], True),
+                             (3, "P3_Cover", 1000, 200, ["ST", "S9"], True)],
+                            ["H2", "H3", "H4", "D5", "D7"], Decimal("0.10"), 10)
+
+        # P1's wheel straight wins the 300 main pot; P2's queen high wins what is left of the side pot
+        settle_showdown(state)
+
+        self.assertEqual(state.hand.rake_sats, 10)
+        self.assertEqual([state.seats[uid].stack_sats for uid in (1, 2, 3)], [300, 1190, 1000])
+        self.assertEqual([(w["user_id"], w["amount_won"], w["pot_description"]) for w in state.hand.winners],
+                         [(1, 300, "Main Pot"), (2, 190, "Side Pot 1")])
+
+    def test_folded_contributions_are_paid_out(self):
+        state = self._table([(1, "Folder", 900, 100, ["C2", "D7"], False),
+                             (2, "B", 800, 200, ["SA", "SK"], True),
+                             (3, "C", 800, 200, ["ST", "S9"], True)],
+                            ["H2", "H3", "H4", "D5", "CJ"])
+
+        settle_showdown(state)
+
+        # A's 100 sits in the main pot with B's and C's; nothing is left unpaid
+        self.assertEqual(state.seats[2].stack_sats, 800 + 500)
+        self.assertEqual(sum(w['amount_won'] for w in state.hand.winners), 500)
+        self.assertEqual(state.seats[1].stack_sats, 900)
+
+
+# --- Layered reference implementation ---
+# The per-level, per-pot algorithm settle_showdown used before pots were built in one sorted sweep
+# and scored in one evaluator call. Randomised hands must pay out exactly as it did.
+
+def _layered_pots(contributions, eligible_user_ids):
+    pots = []
+    previous_level = 0
+    for level in sorted(set(contributions.values())):
+        if level <= previous_level:
+            continue
+        amount = sum(min(invested, level) - min(invested, previous_level) for invested in contributions.values())
+        eligible = [uid for uid, invested in contributions.items() if invested >= level and uid in eligible_user_ids]
+        if eligible and pots and pots[-1][1] == eligible:
+            pots[-1] = (pots[-1][0] + amount, eligible)
+        elif eligible:
+            pots.append((amount, eligible))
+        elif pots:
+            pots[-1] = (pots[-1][0] + amount, pots[-1][1])
+        previous_level = level
+    return pots
+
+
+def _layered_payouts(contributions, hole_cards_clockwise, board, distributable):
+    """[(pot description, user_id, amount won, hand class)] with odd chips to the first winner clockwise"""
+    clockwise = list(hole_cards_clockwise)
+    payouts = []
+    for index, (layer_amount, eligible) in enumerate(_layered_pots(contributions, set(hole_cards_clockwise))):
+        pot_amount = min(layer_amount, distributable)
+        distributable -= pot_amount
+        if pot_amount <= 0:
+            continue
+        winners = poker_helper._determine_winning_hand({uid: hole_cards_clockwise[uid] for uid in eligible}, board)
+        winners.sort(key=lambda w: clockwise.index(w["user_id"]))
+        share, odd = divmod(pot_amount, len(winners))
+        for position, winner in enumerate(winners):
+            payouts.append(("Main Pot" if index == 0 else f"Side Pot {index}", winner["user_id"],
+                            share + (odd if position == 0 else 0), winner["winning_hand"]))
+    return payouts
+
+
+def _random_showdown(rng, max_seats=9):
+    """A river showdown at a 9-max table: random seats, cards, all-in levels (with ties) and folds"""
+    deck = [suit + rank for suit in poker_helper.SUITS for rank in poker_helper.RANKS]
+    rng.shuffle(deck)
+    seat_ids = sorted(rng.sample(range(1, max_seats + 1), rng.randint(2, max_seats)))
+    levels = [rng.choice([20, 50, 50, 100, 175, 300]) + rng.choice([0, 0, 1, 7]) for _ in seat_ids]
+    players = []
+    for uid, (seat_id, invested) in enumerate(zip(seat_ids, levels), start=1):
+        folded = rng.random() < 0.25
+        players.append({"user_id": uid, "seat_id": seat_id, "invested": invested, "folded": folded,
+                        "hole_cards": [deck.pop(), deck.pop()]})
+    if all(p["folded"] for p in players):
+        players[0]["folded"] = False
+    board = [deck.pop() for _ in range(5)]
+    if rng.random() < 0.3: # A board that plays makes split pots and odd chips common
+        board = ["SA", "SK", "SQ", "SJ", "ST"] if rng.random() < 0.5 else ["H2", "D2", "C2", "S2", "HA"]
+        for p in players:
+            p["hole_cards"] = [card for card in deck if card not in board][:2]
+            deck = [card for card in deck if card not in p["hole_cards"]]
+    rake = rng.choice([(Decimal("0.00"), 0), (Decimal("0.05"), 30), (Decimal("0.10"), 0), (Decimal("0.03"), 7)])
+    return players, board, rng.choice(seat_ids), rake
+
+
+def _clockwise(players, dealer_seat_id, max_seats=9):
+    return sorted(players, key=lambda p: (p["seat_id"] - dealer_seat_id - 1) % max_seats)
+
+
+class TestSidePotProperties(unittest.TestCase):
 
     def setUp(self):
-        self.app = app
-        self.app_context = self.app.app_context()
+        self.app_context = app.app_context()
         self.app_context.push()
-        # db.create_all() # If needed for non-mocked DB interactions
-        self._configure_mocks()
-
-    def _configure_mocks(self): # Renamed original setUp
-        self.mock_db_session = create_mock_session()
-        self.db_session_patch = patch('casino_be.utils.poker_helper.db.session', self.mock_db_session)
-        self.mock_db_session_instance = self.db_session_patch.start()
-
-        self.table_id = 1
-        self.hand_id = 1
-
-        self.mock_poker_table = PokerTable(
-            id=self.table_id,
-            rake_percentage=Decimal("0.05"), # 5% rake
-            max_rake_sats=300 # Max rake of 300 satoshis
-        )
-
-        # Configure query to return specific mocks for PokerTable and User
-        def query_side_effect(model_class):
-            query_mock = MagicMock()
-            if model_class == PokerTable:
-                def get_poker_table(table_id_arg):
-                    if table_id_arg == self.table_id:
-                        return self.mock_poker_table
-                    return None # Should not happen in these tests if table_id is consistent
-                query_mock.get.side_effect = get_poker_table
-            elif model_class == User:
-                query_mock.get.side_effect = self.mock_query_user_get
-            else:
-                # Fallback for other models to behave as per create_mock_session's defaults
-                query_mock.get.return_value = None
-                query_mock.filter_by.return_value.first.return_value = None
-            return query_mock
-
-        self.mock_db_session.query.side_effect = query_side_effect
-
-        self.mock_users = {}
 
     def tearDown(self):
-        self.db_session_patch.stop()
-        if self.app_context:
-            self.app_context.pop()
-        # db.drop_all() # If db.create_all() was used
-
-    def _setup_player(self, user_id, username, stack, total_invested, hole_cards):
-        user = User(id=user_id, username=username)
-        self.mock_users[user_id] = user # Store for later retrieval by mock_query_user_get
-
-        player_state = PokerPlayerState(
-            user_id=user_id,
-            table_id=self.table_id,
-            stack_sats=stack,
-            total_invested_this_hand=total_invested,
-            hole_cards=hole_cards,
-            is_active_in_hand=True, # Assumed for showdown players
-            user=user # Associate user object
-        )
-        return player_state
-
-    def mock_query_user_get(self, user_id_key):
-        return self.mock_users.get(user_id_key)
-
-
-    @patch('casino_be.utils.poker_helper._determine_winning_hand')
-    @patch('casino_be.utils.poker_helper.Transaction')
-    def test_single_winner_main_pot_no_rake_cap_hit(self, MockTransaction, mock_determine_winning_hand):
-        self.mock_poker_table.rake_percentage = Decimal("0.10") # 10%
-        self.mock_poker_table.max_rake_sats = 500
-
-        player1 = self._setup_player(user_id=1, username="Alice", stack=1000, total_invested=200, hole_cards=["AH", "KH"])
-        player2 = self._setup_player(user_id=2, username="Bob", stack=1000, total_invested=200, hole_cards=["QC", "JC"])
-
-        showdown_players = [player1, player2]
-        poker_hand = PokerHand(
-            id=self.hand_id, table_id=self.table_id, pot_size_sats=400, board_cards=["2D", "3D", "4D", "5S", "6S"],
-            player_street_investments={}, winners=[] # Ensure winners is empty list initially
-        )
-        poker_hand.table = self.mock_poker_table # Explicitly set the table relationship
-
-        # Mocking User query within _distribute_pot if winner_user_obj is fetched again.
-        # It's better if player_state_obj.user is already loaded.
-        self.mock_db_session.query(User).get.side_effect = self.mock_query_user_get
-
-        # Player1 wins the only pot
-        mock_determine_winning_hand.return_value = [
-            {"user_id": 1, "winning_hand": "Straight", "best_five_cards": ["AH", "KH", "2D", "3D", "4D"]}
-        ]
-
-        _distribute_pot(poker_hand, showdown_players)
-
-        expected_rake = 400 * 0.10 # 40
-        self.assertEqual(poker_hand.rake_sats, expected_rake)
-        expected_pot_distributed = 400 - expected_rake # 360
-
-        self.assertEqual(player1.stack_sats, 1000 + expected_pot_distributed)
-        self.assertEqual(player2.stack_sats, 1000) # Bob lost
-
-        self.assertEqual(len(poker_hand.winners), 1)
-        self.assertEqual(poker_hand.winners[0]['user_id'], 1)
-        self.assertEqual(poker_hand.winners[0]['amount_won'], expected_pot_distributed)
-
-        MockTransaction.assert_called_once()
-        call_args = MockTransaction.call_args[1]
-        self.assertEqual(call_args['user_id'], 1)
-        self.assertEqual(call_args['amount'], expected_pot_distributed)
-        self.assertEqual(call_args['transaction_type'], 'poker_win')
-
-        self.mock_db_session.commit.assert_called_once()
-        self.assertEqual(poker_hand.status, 'completed')
-
-    @patch('casino_be.utils.poker_helper._determine_winning_hand')
-    @patch('casino_be.utils.poker_helper.Transaction')
-    def test_split_pot_two_winners_main_pot(self, MockTransaction, mock_determine_winning_hand):
-        self.mock_poker_table.rake_percentage = Decimal("0.00") # No rake for simplicity
-
-        player1 = self._setup_player(user_id=1, username="Alice", stack=1000, total_invested=200, hole_cards=["AH", "KH"])
-        player2 = self._setup_player(user_id=2, username="Bob", stack=1000, total_invested=200, hole_cards=["AD", "KD"])
-        showdown_players = [player1, player2]
-        poker_hand = PokerHand(id=self.hand_id, table_id=self.table_id, pot_size_sats=400, board_cards=["2S", "3H", "4C", "5S", "6D"], winners=[])
-        poker_hand.table = self.mock_poker_table # Explicitly set the table relationship
-
-        self.mock_db_session.query(User).get.side_effect = self.mock_query_user_get
-
-        mock_determine_winning_hand.return_value = [
-            {"user_id": 1, "winning_hand": "Straight", "best_five_cards": []},
-            {"user_id": 2, "winning_hand": "Straight", "best_five_cards": []}
-        ] # Split pot
-
-        _distribute_pot(poker_hand, showdown_players)
-
-        self.assertEqual(poker_hand.rake_sats, 0)
-        pot_per_winner = 400 // 2 # 200
-
-        self.assertEqual(player1.stack_sats, 1000 + pot_per_winner)
-        self.assertEqual(player2.stack_sats, 1000 + pot_per_winner)
-
-        self.assertEqual(len(poker_hand.winners), 2)
-        self.assertEqual(MockTransaction.call_count, 2)
-        # Could add more assertions for transaction details if needed
-
-        self.mock_db_session.commit.assert_called_once()
-
-    @patch('casino_be.utils.poker_helper._determine_winning_hand')
-    @patch('casino_be.utils.poker_helper.Transaction')
-    def test_one_main_pot_one_side_pot(self, MockTransaction, mock_determine_winning_hand):
-        self.mock_poker_table.rake_percentage = Decimal("0.10") # 10% rake
-        self.mock_poker_table.max_rake_sats = 10 # Max rake 10
-
-        # P1 all-in for 100. P2 calls 100 and has more. P3 calls 100 and has more.
-        # Total pot = 300. Rake = 10. Distributable = 290.
-        # Main pot for P1, P2, P3: P1 puts in 100. P2 matches 100. P3 matches 100. Total 300.
-        # This setup is for _distribute_pot. Assume pot_size_sats is already calculated.
-        # Let's say:
-        # P1 invested 100 (all-in)
-        # P2 invested 200
-        # P3 invested 200
-        # Total pot_size_sats on PokerHand = 100 + 200 + 200 = 500
-        # Rake = 10. Distributable = 490.
-
-        player1 = self._setup_player(user_id=1, username="P1_AllIn", stack=0, total_invested=100, hole_cards=["AS", "KS"]) # All-in
-        player2 = self._setup_player(user_id=2, username="P2_Cover", stack=1000, total_invested=200, hole_cards=["QS", "JS"])
-        player3 = self._setup_player(user_id=3, username="P3_Cover", stack=1000, total_invested=200, hole_cards=["TS", "9S"])
-        showdown_players = [player1, player2, player3]
-
-        poker_hand = PokerHand(id=self.hand_id, table_id=self.table_id, pot_size_sats=500, board_cards=["2H", "3H", "4H", "5D", "7D"], winners=[])
-        poker_hand.table = self.mock_poker_table # Explicitly set the table relationship
-        self.mock_db_session.query(User).get.side_effect = self.mock_query_user_get
-
-        # P1 wins main pot. P2 wins side pot against P3.
-        def side_effect_determine_winner(*args, **kwargs):
-            player_map = args[0]
-            if 1 in player_map and 2 in player_map and 3 in player_map: # Main pot
-                return [{"user_id": 1, "winning_hand": "Flush", "best_five_cards": []}]
-            elif 2 in player_map and 3 in player_map: # Side pot P2 vs P3
-                return [{"user_id": 2, "winning_hand": "Pair of 7s", "best_five_cards": []}]
-            return []
-        mock_determine_winning_hand.side_effect = side_effect_determine_winner
-
-        _distribute_pot(poker_hand, showdown_players)
-
-        self.assertEqual(poker_hand.rake_sats, 10) # Max rake
-        distributable_overall = 500 - 10 # 490
-
-        # Expected pots:
-        # Main Pot (cap 100): P1, P2, P3 contribute 100 each. Value = 300. Eligible: {1,2,3}. Winner P1.
-        # Side Pot 1 (cap 200, layer is 100-200): P2, P3 contribute 100 each. Value = 200. Eligible: {2,3}. Winner P2.
-        # Total value from investments = 300 + 200 = 500.
-        # This should be scaled/deducted from distributable_overall (490) by the logic.
-        # The current logic in _distribute_pot:
-        # Layer 1 (cap 100): value_of_this_pot_layer = 100 * 3 = 300. amount_for_this_pot = min(300, 490) = 300. P1 wins 300.
-        # Remaining distributable = 490 - 300 = 190.
-        # Layer 2 (cap 200, processed_investment_level=100): contribution_this_layer = 100.
-        #   P2 adds min(100, 200-100)=100. P3 adds min(100, 200-100)=100.
-        #   value_of_this_pot_layer = 100 * 2 = 200. amount_for_this_pot = min(200, 190) = 190. P2 wins 190.
-
-        self.assertEqual(player1.stack_sats, 0 + 300) # P1 was all-in, won main pot
-        self.assertEqual(player2.stack_sats, 1000 + 190) # P2 won side pot
-        self.assertEqual(player3.stack_sats, 1000) # P3 lost both
-
-        self.assertEqual(len(poker_hand.winners), 2)
-        self.assertEqual(MockTransaction.call_count, 2)
-
-        winner_p1 = next(w for w in poker_hand.winners if w['user_id'] == 1)
-        winner_p2 = next(w for w in poker_hand.winners if w['user_id'] == 2)
-        self.assertEqual(winner_p1['amount_won'], 300)
-        self.assertEqual(winner_p2['amount_won'], 190)
-
-        self.mock_db_session.commit.assert_called_once()
+        self.app_context.pop()
+
+    def test_side_pots_match_layered_pots(self):
+        rng = random.Random(38)
+        for _ in range(500):
+            contributions = {uid: rng.choice([0, 10, 10, 25, 60, 61, 200]) for uid in range(1, rng.randint(2, 9) + 1)}
+            eligible = {uid for uid in contributions if rng.random() < 0.7}
+            expected = [(amount, set(uids)) for amount, uids in _layered_pots(contributions, eligible)]
+            actual = [(amount, set(uids)) for amount, uids in poker_helper._build_side_pots(contributions, eligible)]
+            self.assertEqual(actual, expected, contributions)
+
+    def test_settle_showdown_pays_out_as_layered_settlement(self):
+        rng = random.Random(2038)
+        for _ in range(300):
+            players, board, dealer_seat_id, (rake_pct, max_rake) = _random_showdown(rng)
+            seats = {p["user_id"]: SeatState(100 + p["user_id"], p["user_id"], f"player{p['user_id']}", p["seat_id"],
+                                             1000, is_active_in_hand=not p["folded"], hole_cards=p["hole_cards"],
+                                             total_invested_this_hand=p["invested"]) for p in players}
+            state = TableState(1, "Props", "texas_holdem", "no_limit", 10, 20, 9, True, rake_pct, max_rake,
+                               dealer_seat_id, seats)
+            state.hand = HandState(50, 'river', board_cards=board, pot_size_sats=sum(p["invested"] for p in players))
+
+            contenders = [p for p in _clockwise(players, dealer_seat_id) if not p["folded"]]
+            expected = _layered_payouts({p["user_id"]: p["invested"] for p in players},
+                                        {p["user_id"]: p["hole_cards"] for p in contenders}, board,
+                                        state.hand.pot_size_sats - _rake(state, state.hand.pot_size_sats))
+
+            result = settle_showdown(state)
+            actual = [(w["pot_description"], w["user_id"], w["amount_won"], w["winning_hand"]) for w in result["winners"]]
+            self.assertEqual(actual, expected, (players, board, dealer_seat_id))
+            self.assertEqual([t["amount"] for t in state.pending_transactions], [won for _, _, won, _ in expected])
+            self.assertEqual(sum(seat.stack_sats - 1000 for seat in state.seats.values()) + result["rake_taken"],
+                             state.hand.pot_size_sats)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,503 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import event, update
+
+from casino_be.models import db, PokerTable, PokerHand, PokerHandEvent, PokerPlayerState, Transaction
+from casino_be.services.poker_table_actor import PokerTableActor, TableOwnedElsewhere, poker_table_actors, replay_hand
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils import poker_helper
+from casino_be.utils.poker_table_state import (
+    HandState, SeatState, TableState, apply_action, expire_turn, remove_from_hand, table_view, time_out,
+)
+
+
+def make_state(stacks, hole_cards, deck, dealer_seat=1, rake=Decimal("0.00"), max_rake=0):
+    """Three-handed (or more) preflop state after blinds: seat 2 posts SB 10, seat 3 posts BB 20"""
+    seats = {}
+    for i, (stack, cards) in enumerate(zip(stacks, hole_cards), start=1):
+        seats[i] = SeatState(100 + i, i, f"player{i}", i, stack, is_active_in_hand=True, hole_cards=cards,
+                             last_action="prehand_reset")
+    table = TableState(1, "Test", "texas_holdem", "no_limit", 10, 20, 6, True, rake, max_rake, dealer_seat, seats)
+    seats[2].stack_sats -= 10
+    seats[2].total_invested_this_hand = 10
+    seats[2].last_action = "posts_sb_10"
+    seats[3].stack_sats -= 20
+    seats[3].total_invested_this_hand = 20
+    seats[3].last_action = "posts_bb_20"
+    first = 1 if len(stacks) == 3 else 4
+    table.hand = HandState(50, 'preflop', deck_state=deck, pot_size_sats=30, current_bet_to_match=20,
+                           min_next_raise_amount=20, player_street_investments={"2": 10, "3": 20},
+                           current_turn_user_id=first)
+    seats[first].time_to_act_ends = datetime.now(timezone.utc) + timedelta(seconds=60)
+    return table
+
+
+def chips_on_table(state):
+    return sum(seat.stack_sats for seat in state.seats.values()) + state.hand.pot_size_sats
+
+
+class TestPokerTableState(unittest.TestCase):
+
+    def setUp(self):
+        self.app_context = Flask(__name__).app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def test_full_hand_to_showdown(self):
+        # Player 1 flops a set of aces
+        state = make_state([1000, 1000, 1000], [["HA", "DA"], ["S2", "C7"], ["HK", "DQ"]],
+                           ["CA", "S9", "D4", "H6", "C3"])
+        self.assertIn("error", apply_action(state, 2, "call"))  # Not player 2's turn
+        self.assertEqual(apply_action(state, 1, "call")["game_flow"]["next_to_act_user_id"], 2)
+        self.assertIn("error", apply_action(state, 2, "check"))  # Facing 10 more
+        apply_action(state, 2, "call")
+        # Big blind still has the option
+        self.assertEqual(state.hand.current_turn_user_id, 3)
+        flow = apply_action(state, 3, "check")["game_flow"]
+        self.assertEqual(flow["status"], "round_completed_advancing_street")
+        self.assertEqual(state.hand.status, "flop")
+        self.assertEqual(state.hand.board_cards, ["CA", "S9", "D4"])
+        self.assertEqual(flow["next_to_act_user_id"], 2)  # First active seat after the button
+
+        apply_action(state, 2, "check")
+        apply_action(state, 3, "bet", 40)
+        self.assertIn("error", apply_action(state, 1, "raise", 50))  # Less than a full raise
+        apply_action(state, 1, "raise", 120)
+        apply_action(state, 2, "fold")
+        apply_action(state, 3, "call")
+        self.assertEqual(state.hand.status, "turn")
+        for street in ("turn", "river"):
+            self.assertEqual(state.hand.status, street)
+            apply_action(state, 3, "check")
+            apply_action(state, 1, "check")
+
+        self.assertEqual(state.hand.status, "completed")
+        # Both hands still in at the river are shown to everyone; the folded one is not
+        cards = {p["user_id"]: p["hole_cards"] for p in table_view(state, viewer_user_id=2)["players"]}
+        self.assertEqual((cards[1], cards[3]), (["HA", "DA"], ["HK", "DQ"]))
+        self.assertTrue(HandState(50, 'completed', hand_history=state.hand.hand_history).went_to_showdown)
+        self.assertEqual(state.hand.pot_size_sats, 20 * 3 + 120 * 2)
+        self.assertEqual(state.hand.winners[0]["user_id"], 1)
+        self.assertEqual(state.hand.winners[0]["winning_hand"], "Three of a Kind")
+        self.assertEqual(state.seats[1].stack_sats, 1000 - 140 + 300)
+        self.assertEqual(sum(s.stack_sats for s in state.seats.values()), 3000)
+        tx_types = [tx["transaction_type"] for tx in state.pending_transactions]
+        self.assertEqual(tx_types.count("poker_win"), 1)
+        self.assertEqual(sum(tx["amount"] for tx in state.pending_transactions), 30)  # Blinds were paid at start
+
+    def test_fold_win_and_turn_expiry(self):
+        state = make_state([1000, 1000, 1000], [["HA", "DA"], ["S2", "C7"], ["HK", "DQ"]], ["CA", "S9", "D4", "H6", "C3"])
+        later = datetime.now(timezone.utc) + timedelta(seconds=61)
+        self.assertIsNone(expire_turn(state))
+        flow = expire_turn(state, later)
+        self.assertEqual(flow["next_to_act_user_id"], 2)
+        self.assertEqual(state.hand.hand_history[-1]["reason"], "timeout")
+
+        flow = apply_action(state, 2, "fold")["game_flow"]
+        self.assertEqual(flow, {"status": "hand_completed_by_folds", "winner_user_id": 3, "hand_id": 50})
+        self.assertEqual(state.seats[3].stack_sats, 1010)
+
+    def test_fold_win_shows_no_hole_cards(self):
+        state = make_state([1000, 1000, 1000], [["HA", "DA"], ["S2", "C7"], ["HK", "DQ"]], ["CA", "S9", "D4", "H6", "C3"])
+        apply_action(state, 1, "fold")
+        apply_action(state, 2, "fold")
+        self.assertEqual(state.hand.status, "completed")
+        self.assertFalse(state.hand.went_to_showdown)
+        for viewer in (None, 1, 2):
+            cards = {p["user_id"]: p["hole_cards"] for p in table_view(state, viewer_user_id=viewer)["players"]}
+            self.assertEqual(cards[3], ["X", "X"])
+        self.assertEqual({p["user_id"]: p["hole_cards"] for p in table_view(state, viewer_user_id=3)["players"]}[3], ["HK", "DQ"])
+
+    def test_time_out_checks_when_nothing_is_owed(self):
+        state = make_state([1000, 1000, 1000], [["HA", "DA"], ["S2", "C7"], ["HK", "DQ"]], ["CA", "S9", "D4", "H6", "C3"])
+        apply_action(state, 1, "call")
+        apply_action(state, 2, "call")
+        self.assertIsNone(time_out(state, 1))  # Not player 1's turn
+        flow = time_out(state, 3)
+        self.assertEqual(state.seats[3].last_action, None)  # Reset for the flop it closed
+        self.assertTrue(state.seats[3].is_active_in_hand)
+        self.assertEqual(flow["next_street_status"], "flop")
+        self.assertEqual(state.hand.hand_history[-3]["action"], "check")
+
+    def test_all_in_side_pots_include_dead_money(self):
+        # Player 2 is short and all-in with the best hand; player 1 folds after putting money in
+        state = make_state([1000, 100, 1000, 1000], [["H4", "D5"], ["SA", "CA"], ["HK", "DK"], ["SQ", "CQ"]],
+                           ["C2", "S7", "D9", "HJ", "C3"], rake=Decimal("0.05"), max_rake=30)
+        total = chips_on_table(state)
+        apply_action(state, 4, "raise", 200)
+        apply_action(state, 1, "call")
+        apply_action(state, 2, "call")  # All-in for 100
+        self.assertEqual(state.seats[2].last_action, "call_all_in_90")
+        apply_action(state, 3, "call")
+        self.assertEqual(state.hand.status, "flop")
+        apply_action(state, 3, "bet", 300)
+        apply_action(state, 4, "call")
+        apply_action(state, 1, "fold")
+        apply_action(state, 3, "check")
+        apply_action(state, 4, "check")
+        apply_action(state, 3, "check")
+        apply_action(state, 4, "check")
+
+        hand = state.hand
+        self.assertEqual(hand.status, "completed")
+        self.assertEqual(hand.rake_sats, 30)
+        won = {w["user_id"]: 0 for w in hand.winners}
+        for w in hand.winners:
+            won[w["user_id"]] += w["amount_won"]
+        # Main pot: 4 x 100 including player 1's dead money; side pots: the rest less the rake, to the kings
+        self.assertEqual(won[2], 400)
+        self.assertEqual(won[3], 1300 - 400 - 30)
+        self.assertEqual(sum(s.stack_sats for s in state.seats.values()) + hand.rake_sats, total)
+
+    def test_stand_up_out_of_turn_and_view_redaction(self):
+        state = make_state([1000, 1000, 1000], [["HA", "DA"], ["S2", "C7"], ["HK", "DQ"]], ["CA", "S9", "D4", "H6", "C3"])
+        flow = remove_from_hand(state, 3, "stood_up")
+        self.assertEqual(flow["next_to_act_user_id"], 1)
+        view = table_view(state, viewer_user_id=1)
+        cards = {p["user_id"]: p["hole_cards"] for p in view["players"]}
+        self.assertEqual(cards, {1: ["HA", "DA"], 2: ["X", "X"], 3: ["X", "X"]})
+        self.assertTrue(all(p["hole_cards"] == ["X", "X"] for p in table_view(state)["players"]))
+
+
+class RecordingWebSocketManager:
+    def __init__(self):
+        self.diffs = []
+        self.private = []
+
+    def broadcast_poker_diff(self, table_id, diff):
+        self.diffs.append(diff)
+
+    def send_poker_private(self, user_id, table_id, payload):
+        self.private.append((user_id, payload))
+
+
+def apply_diff(view, diff):
+    """What a client does with a poker_diff"""
+    for section in ('table', 'current_hand'):
+        view[section].update(diff['changes'].get(section, {}))
+    players = {p['user_id']: p for p in view['players']}
+    for user_id, changed in diff['changes'].get('players', {}).items():
+        if changed is None:
+            players.pop(user_id)
+        else:
+            players.setdefault(user_id, {}).update(changed)
+    view['players'] = sorted(players.values(), key=lambda p: p['seat_id'])
+    view['seq'] = diff['seq']
+
+
+class TestPokerTableActor(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.journal_dir = tempfile.mkdtemp()
+        self.app.config['POKER_ACTOR_JOURNAL_DIR'] = self.journal_dir
+        self.app.config['POKER_ACTOR_FLUSH_INTERVAL'] = 60  # Only checkpoints flush during the test
+        table = PokerTable(name="Actor Table", small_blind=10, big_blind=20, min_buy_in=200, max_buy_in=5000, max_seats=6)
+        db.session.add(table)
+        users = [self._create_user(f"actor{i}", f"actor{i}@example.com") for i in range(3)]
+        for user in users:
+            user.balance = 10_000
+        db.session.commit()
+        self.table_id = table.id
+        self.user_ids = [user.id for user in users]
+        for seat, user_id in enumerate(self.user_ids, start=1):
+            self.assertNotIn("error", poker_helper.handle_sit_down(user_id, self.table_id, seat, 1000))
+        db.session.remove()
+
+    def tearDown(self):
+        poker_table_actors.auto_dealer.clear()
+        poker_table_actors.stop_all()
+        poker_table_actors.websocket_manager = None
+        shutil.rmtree(self.journal_dir, ignore_errors=True)
+        super().tearDown()
+
+    def count_statements(self):
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        return statements
+
+    def test_actions_are_applied_in_memory_and_written_behind(self):
+        actor = poker_table_actors.get(self.table_id)
+        started = actor.start_hand(self.user_ids[0])
+        self.assertNotIn("error", started)
+        hand_id = started["hand_id"]
+
+        state = actor.table_state(self.user_ids[0])
+        turn = state["current_hand"]["current_turn_user_id"]
+        not_turn = next(u for u in self.user_ids if u != turn)
+        self.assertEqual(actor.act(not_turn, hand_id, "check"), {"error": "It's not your turn."})
+        self.assertEqual(actor.act(turn, hand_id + 1, "call"), {"error": f"Poker hand {hand_id + 1} not found."})
+
+        statements = self.count_statements()
+        flushes = actor.flush_count
+        first = actor.act(turn, hand_id, "call")
+        self.assertNotIn("error", first)
+        self.assertEqual(statements, [])  # Mid-street actions never touch the database
+        self.assertEqual(actor.flush_count, flushes)
+
+        # Small blind completes, big blind checks its option
+        for action in ("call", "check"):
+            turn = actor.table_state()["current_hand"]["current_turn_user_id"]
+            result = actor.act(turn, hand_id, action)
+        self.assertEqual(result["game_flow"]["next_street_status"], "flop")
+        actor.table_state()  # Commands are serial: the checkpoint after the last action has run
+        self.assertEqual(actor.flush_count, flushes + 1)  # Street change checkpoints
+
+        hand = db.session.get(PokerHand, hand_id)
+        self.assertEqual(hand.status, "flop")
+        self.assertEqual(len(hand.board_cards), 3)
+        self.assertEqual(hand.pot_size_sats, 60)
+        self.assertEqual(hand.action_seq, 3)
+        stacks = {ps.user_id: ps.stack_sats for ps in PokerPlayerState.query.filter_by(table_id=self.table_id)}
+        self.assertEqual(sorted(stacks.values()), [980, 980, 980])
+        self.assertTrue(all(len(ps.hole_cards) == 2 for ps in PokerPlayerState.query.filter_by(table_id=self.table_id)))
+        self.assertEqual(Transaction.query.filter_by(poker_hand_id=hand_id, transaction_type='poker_action_call').count(), 2)
+        self.assertEqual(os.path.getsize(actor.journal.path), 0)
+
+    def test_crash_recovery_replays_the_journal(self):
+        actor = poker_table_actors.get(self.table_id)
+        hand_id = actor.start_hand(self.user_ids[0])["hand_id"]
+        turn = actor.table_state()["current_hand"]["current_turn_user_id"]
+        actor.act(turn, hand_id, "raise", 60)
+        expected = actor.table_state()
+
+        # Simulate a crash: the actor dies without flushing
+        with patch.object(actor, '_flush'):
+            actor.stop()
+        self.assertEqual(db.session.get(PokerHand, hand_id).pot_size_sats, 30)
+
+        recovered = PokerTableActor(self.app, self.table_id, self.journal_dir)
+        recovered.start()
+        try:
+            state = recovered.table_state()
+            self.assertEqual(state["current_hand"], expected["current_hand"])
+            self.assertEqual(state["players"], expected["players"])
+            db.session.expire_all()
+            self.assertEqual(db.session.get(PokerHand, hand_id).pot_size_sats, 90)
+        finally:
+            recovered.stop()
+
+    def test_event_log_is_appended_and_replays_the_hand(self):
+        actor = poker_table_actors.get(self.table_id)
+        hand_id = actor.start_hand(self.user_ids[0])["hand_id"]
+        turn = actor.table_state()["current_hand"]["current_turn_user_id"]
+        actor.act(turn, hand_id, "call")
+
+        statements = self.count_statements()
+        actor.flush()  # Mid-street flush: one insert, the hand row is left alone
+        self.assertEqual(len(statements), 1)
+        self.assertIn("INSERT INTO poker_hand_event", statements[0])
+        logged = PokerHandEvent.query.filter_by(hand_id=hand_id).order_by(PokerHandEvent.seq).all()
+        self.assertEqual([(e.seq, e.event_type) for e in logged], [(0, "start"), (1, "call")])
+        hand = db.session.get(PokerHand, hand_id)
+        self.assertEqual((hand.action_seq, hand.pot_size_sats), (0, 30))
+        self.assertEqual(os.path.getsize(actor.journal.path), 0)
+
+        turn = actor.table_state()["current_hand"]["current_turn_user_id"]
+        actor.act(turn, hand_id, "raise", 100)  # Journaled only
+        expected = actor.table_state()
+        with patch.object(actor, '_flush'):
+            actor.stop()
+
+        # Recovery: projection, then the logged call, then the journaled raise
+        recovered = PokerTableActor(self.app, self.table_id, self.journal_dir)
+        recovered.start()
+        try:
+            state = recovered.table_state()
+            self.assertEqual(state["current_hand"], expected["current_hand"])
+            self.assertEqual(state["players"], expected["players"])
+        finally:
+            recovered.stop()
+        db.session.expire_all()
+        self.assertEqual(PokerHandEvent.query.filter_by(hand_id=hand_id).count(), 3)
+        self.assertEqual(db.session.get(PokerHand, hand_id).action_seq, 2)
+
+        replayed = table_view(replay_hand(hand_id))
+        self.assertEqual(replayed["current_hand"], expected["current_hand"])
+        self.assertEqual(replayed["players"], expected["players"])
+
+    def test_turn_timer_acts_for_absent_players(self):
+        websocket_manager = RecordingWebSocketManager()
+        poker_table_actors.websocket_manager = websocket_manager
+        with patch.object(poker_helper, 'POKER_ACTION_TIMEOUT_SECONDS', 0.2):
+            actor = poker_table_actors.get(self.table_id)
+            hand_id = actor.start_hand(self.user_ids[0])["hand_id"]
+            # Nobody acts: under the gun and the small blind are folded, the big blind wins
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and actor.table_state()["current_hand"]["status"] != "completed":
+                time.sleep(0.05)
+
+        state = actor.table_state()
+        self.assertEqual(state["current_hand"]["status"], "completed")
+        timeouts = [e for d in websocket_manager.diffs for e in d["events"] if e.get("reason") == "timeout"]
+        self.assertEqual([e["action"] for e in timeouts], ["fold", "fold"])
+        self.assertEqual(sorted(p["stack_sats"] for p in state["players"]), [990, 1000, 1010])
+        actor.table_state()
+        self.assertEqual(db.session.get(PokerHand, hand_id).status, "completed")
+
+    def test_watchers_get_sequenced_diffs_and_private_hole_cards(self):
+        websocket_manager = RecordingWebSocketManager()
+        poker_table_actors.websocket_manager = websocket_manager
+        actor = poker_table_actors.get(self.table_id)
+        spectator_view = actor.table_state()  # Snapshot before anything happens
+        self.assertEqual(spectator_view["seq"], 0)
+
+        hand_id = actor.start_hand(self.user_ids[0])["hand_id"]
+        for _ in range(3):
+            hand = actor.table_state()["current_hand"]
+            owed = hand["player_street_investments"].get(str(hand["current_turn_user_id"]), 0) < hand["current_bet_to_match"]
+            actor.act(hand["current_turn_user_id"], hand_id, "call" if owed else "check")
+
+        diffs = websocket_manager.diffs
+        self.assertEqual([d["seq"] for d in diffs], list(range(1, len(diffs) + 1)))
+        self.assertEqual(len(diffs), 4)  # New hand, then one per action
+        # A call changes a handful of fields, not the whole table
+        call_diff = diffs[1]["changes"]
+        self.assertNotIn("table", call_diff)
+        self.assertEqual(len(call_diff["players"]), 2)  # The caller, and the next player's clock
+        self.assertEqual([e["action"] for e in diffs[1]["events"]], ["call"])
+        self.assertEqual([e["action"] for e in diffs[3]["events"]], ["check", "deal_flop", "set_next_to_act"])
+
+        for diff in diffs:
+            apply_diff(spectator_view, diff)
+        expected = actor.table_state()
+        for key in ("table", "players", "seq"):
+            self.assertEqual(spectator_view[key], expected[key])
+        expected["current_hand"].pop("hand_history_preview")
+        spectator_view["current_hand"].pop("hand_history_preview")
+        self.assertEqual(spectator_view["current_hand"], expected["current_hand"])
+
+        # Nobody's hole cards are in public diffs; each player got their own once
+        self.assertTrue(all(p["hole_cards"] in (None, ["X", "X"]) for p in spectator_view["players"]))
+        self.assertEqual(sorted(user_id for user_id, _ in websocket_manager.private), sorted(self.user_ids))
+        own = dict(websocket_manager.private)[self.user_ids[0]]["hole_cards"]
+        self.assertEqual(next(p for p in actor.table_state(self.user_ids[0])["players"] if p["user_id"] == self.user_ids[0])["hole_cards"], own)
+
+    def test_stand_up_through_actor(self):
+        actor = poker_table_actors.get(self.table_id)
+        hand_id = actor.start_hand(self.user_ids[0])["hand_id"]
+        turn = actor.table_state()["current_hand"]["current_turn_user_id"]
+        leaver = next(u for u in self.user_ids if u != turn)
+        self.assertNotIn("error", actor.stand_up(leaver))
+
+        state = actor.table_state()
+        self.assertNotIn(leaver, [p["user_id"] for p in state["players"]])
+        self.assertEqual(state["current_hand"]["current_turn_user_id"], turn)
+        self.assertIsNone(PokerPlayerState.query.filter_by(user_id=leaver).first())
+        self.assertEqual(db.session.get(PokerHand, hand_id).hand_history[-1]["reason"], "stood_up")
+
+    def test_join_and_leave_answer_503_when_the_actor_is_unavailable(self):
+        self._login_and_get_token()
+        actor = poker_table_actors.get(self.table_id)
+        with patch.object(actor, "run_db_operation", side_effect=TimeoutError()):
+            joined = self.client.post(f"/api/poker/tables/{self.table_id}/join", json={"table_id": self.table_id, "buy_in_amount": 500, "seat_id": 4})
+        self.assertEqual(joined.status_code, 503)
+        self.assertIn(str(self.table_id), joined.get_json()["status_message"])
+
+        actor.stop()
+        with patch.object(poker_table_actors, "get", return_value=actor):
+            left = self.client.post(f"/api/poker/tables/{self.table_id}/leave")
+        self.assertEqual((left.status_code, left.get_json()["status_message"]), (503, f"Poker table actor {self.table_id} has stopped."))
+
+    def test_table_leased_to_another_process_is_not_run_here(self):
+        table = db.session.get(PokerTable, self.table_id)
+        table.actor_owner = "other-host:1"
+        table.actor_lease_until = datetime.now(timezone.utc) + timedelta(seconds=30)
+        db.session.commit()
+        actor = poker_table_actors.get(self.table_id)
+        with self.assertRaises(TableOwnedElsewhere):
+            actor.table_state()
+        self.assertIsNone(actor.state)
+        with patch.dict(self.app.config, {"POKER_AUTO_DEAL": True}):
+            self.assertEqual(poker_table_actors.seed_auto_dealer(), 0)
+
+        # Once the other process's lease lapses this one takes the table, and gives it back on exit
+        table.actor_lease_until = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.session.commit()
+        actor = poker_table_actors.get(self.table_id)
+        self.assertNotIn("error", actor.table_state())
+        db.session.expire_all()
+        self.assertEqual(db.session.get(PokerTable, self.table_id).actor_owner, poker_table_actors.owner)
+        actor.stop()
+        db.session.expire_all()
+        self.assertIsNone(db.session.get(PokerTable, self.table_id).actor_owner)
+
+    def test_actor_stops_without_flushing_when_its_lease_is_taken_over(self):
+        actor = poker_table_actors.get(self.table_id)
+        hand_id = actor.start_hand(self.user_ids[0])["hand_id"]
+        db.session.execute(update(PokerTable).filter_by(id=self.table_id).values(actor_owner="other-host:1"))
+        db.session.commit()
+        actor._renew_lease_at = 0
+        turn = actor.table_state()["current_hand"]["current_turn_user_id"]  # Answered before the loop renews
+        with self.assertRaises(TableOwnedElsewhere):
+            actor.act(turn, hand_id, "fold")
+        self.assertFalse(actor.running)
+        self.assertEqual(PokerHandEvent.query.filter_by(hand_id=hand_id, event_type="fold").count(), 0)
+
+    def test_busted_player_is_left_out_of_the_next_hand(self):
+        # Seat 3 lost an all-in last hand: no chips, but still flagged in with cards and an investment
+        busted = PokerPlayerState.query.filter_by(user_id=self.user_ids[2]).first()
+        busted.stack_sats, busted.is_active_in_hand, busted.hole_cards, busted.total_invested_this_hand = 0, True, ["HA", "DA"], 1000
+        db.session.commit()
+        db.session.remove()
+
+        actor = poker_table_actors.get(self.table_id)
+        hand_id = actor.start_hand(self.user_ids[0])["hand_id"]
+        state = actor.table_state()
+        ghost = next(p for p in state["players"] if p["user_id"] == self.user_ids[2])
+        self.assertFalse(ghost["is_active_in_hand"])
+        self.assertEqual((ghost["hole_cards"], ghost["total_invested_this_hand"]), (None, 0))
+
+        # Heads-up: a fold ends the hand instead of running out a board against the busted seat
+        result = actor.act(state["current_hand"]["current_turn_user_id"], hand_id, "fold")
+        self.assertEqual(result["game_flow"]["status"], "hand_completed_by_folds")
+
+    def wait_for_hand(self, actor, after_hand_id=None, timeout=3):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            hand = actor.table_state()["current_hand"]
+            if hand["hand_id"] not in (None, after_hand_id) and hand["status"] == "preflop":
+                return hand
+            time.sleep(0.02)
+        self.fail("The auto dealer did not start a hand")
+
+    def test_auto_dealer_deals_each_hand_once(self):
+        self.app.config['POKER_AUTO_DEAL'] = True
+        poker_table_actors.auto_dealer.delay = 0.1
+        self.assertEqual(poker_table_actors.seed_auto_dealer(), 1)  # Three ready players, no hand
+        self.assertIsNotNone(poker_table_actors.auto_dealer.pending(self.table_id))
+        deadline = time.monotonic() + 3
+        while poker_table_actors.peek(self.table_id) is None and time.monotonic() < deadline:
+            time.sleep(0.02)  # The dealer starts the table's actor to deal
+        actor = poker_table_actors.peek(self.table_id)
+        first = self.wait_for_hand(actor)
+        self.assertEqual(actor.start_hand(self.user_ids[0])["code"], "hand_in_progress")
+
+        for _ in range(2):
+            turn = actor.table_state()["current_hand"]["current_turn_user_id"]
+            result = actor.act(turn, first["hand_id"], "fold")
+        self.assertEqual(result["game_flow"]["status"], "hand_completed_by_folds")
+        ended = time.monotonic()
+
+        second = self.wait_for_hand(actor, after_hand_id=first["hand_id"])
+        self.assertGreaterEqual(time.monotonic() - ended, 0.1)
+        time.sleep(0.3)
+        self.assertEqual(PokerHand.query.filter_by(table_id=self.table_id).count(), 2)
+
+        # A deal for a table that has moved on since it was armed is ignored
+        self.assertIsNone(actor.deal_next_hand(first["hand_id"]).result(timeout=5))
+        self.assertEqual(actor.table_state()["current_hand"]["hand_id"], second["hand_id"])
+
+
+if __name__ == '__main__':
+    unittest.main()
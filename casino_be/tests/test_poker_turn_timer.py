@@ -0,0 +1,47 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timezone, timedelta
+
+from casino_be.services.poker_turn_timer import PokerTurnTimer
+
+
+class TestPokerTurnTimer(unittest.TestCase):
+
+    def setUp(self):
+        self.fired = []
+        self.done = threading.Event()
+        self.timer = PokerTurnTimer(self.dispatch)
+
+    def dispatch(self, table_id, token):
+        self.fired.append((table_id, token, time.time()))
+        if len(self.fired) == 2:
+            self.done.set()
+
+    def in_ms(self, ms):
+        return datetime.now(timezone.utc) + timedelta(milliseconds=ms)
+
+    def test_deadlines_fire_in_order_and_never_early(self):
+        first, second = self.in_ms(150), self.in_ms(60)
+        self.timer.schedule(1, first, 'a')
+        self.timer.schedule(2, second, 'b')
+        self.assertTrue(self.done.wait(2))
+        self.assertEqual([(t, token) for t, token, _ in self.fired], [(2, 'b'), (1, 'a')])
+        # How late a deadline fires depends on the scheduler, so only the lower bound is checked
+        for (_, _, at), deadline in zip(self.fired, (second, first)):
+            self.assertGreaterEqual(at, deadline.timestamp())
+
+    def test_rescheduling_and_cancelling_replace_the_live_deadline(self):
+        self.timer.schedule(1, self.in_ms(50), 'stale')
+        self.timer.schedule(1, self.in_ms(120), 'current')
+        self.timer.schedule(2, self.in_ms(60), 'cancelled')
+        self.timer.schedule(2, None)
+        self.timer.schedule(3, self.in_ms(150), 'last')
+        self.assertTrue(self.done.wait(2))
+        time.sleep(0.05)
+        self.assertEqual([(t, token) for t, token, _ in self.fired], [(1, 'current'), (3, 'last')])
+        self.assertIsNone(self.timer.pending(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
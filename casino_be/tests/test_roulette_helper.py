@@ -0,0 +1,93 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from casino_be.models import db, RouletteGame, Transaction, User
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils import roulette_helper as roulette
+
+
+def covered(mask):
+    return {n for n in roulette.ROULETTE_NUMBERS if mask >> n & 1}
+
+
+class TestRouletteMasks(unittest.TestCase):
+
+    def test_masks_cover_the_layout(self):
+        self.assertEqual(covered(roulette.compile_bet("straight_up", 0)[0]), {0})
+        self.assertEqual(covered(roulette.OUTSIDE_MASKS["red"]), roulette.RED_NUMBERS)
+        self.assertNotIn(0, covered(roulette.OUTSIDE_MASKS["even"]))
+        self.assertEqual(covered(roulette.compile_bet("dozen", 2)[0]), set(range(13, 25)))
+        self.assertEqual(roulette.compile_bet("column_3"), roulette.compile_bet("column", 3))
+        self.assertEqual(covered(roulette.COLUMN_MASKS[3]), set(range(3, 37, 3)))
+        self.assertEqual(roulette.compile_bet("six_line", [31, 32, 33, 34, 35, 36]), (roulette._mask(range(31, 37)), 5))
+        # Count of each inside bet on a single-zero layout
+        self.assertEqual({k: len(v) for k, v in roulette.INSIDE_MASKS.items()},
+                         {"split": 60, "street": 14, "corner": 23, "six_line": 11})
+
+    def test_inside_bets_must_be_on_the_layout(self):
+        self.assertEqual(roulette.compile_bet("split", [17, 20]), (roulette._mask([17, 20]), 17))
+        self.assertEqual(roulette.compile_bet("corner", [0, 1, 2, 3])[1], 8)
+        for bet_type, bet_value in [("split", [3, 4]), ("split", [1, 1]), ("street", [2, 3, 4]),
+                                    ("corner", [3, 4, 6, 7]), ("six_line", [1, 2, 3, 7, 8, 9]),
+                                    ("straight_up", 37), ("dozen", 4), ("split", "1,2"), ("basket", None)]:
+            with self.assertRaises(ValueError, msg=f"{bet_type} {bet_value}"):
+                roulette.compile_bet(bet_type, bet_value)
+
+    def test_settle_bets_matches_the_masks(self):
+        rng = random.Random(3)
+        bets = [("straight_up", rng.randrange(37)) for _ in range(50)] + [
+            ("red", None), ("odd", None), ("high", None), ("dozen", 1), ("column_2", None),
+            ("split", [0, 2]), ("street", [13, 14, 15]), ("corner", [25, 26, 28, 29]), ("six_line", [4, 5, 6, 7, 8, 9]),
+        ]
+        compiled = [roulette.compile_bet(bet_type, value) for bet_type, value in bets]
+        amounts = [rng.randrange(1, 1000) for _ in bets]
+        for number in roulette.ROULETTE_NUMBERS:
+            paid = roulette.settle_bets([m for m, _ in compiled], amounts, [x for _, x in compiled], number)
+            expected = [a * (x + 1) if number in covered(m) else 0 for (m, x), a in zip(compiled, amounts)]
+            self.assertEqual(paid, expected)
+
+    def test_compile_slip_names_the_bad_chip(self):
+        slip = roulette.compile_slip([{"bet_type": "red", "bet_amount": 10},
+                                      {"bet_type": "straight_up", "bet_value": 7, "bet_amount": 5}])
+        self.assertEqual([(bet["bet_type"], bet["amount"], bet["multiplier"]) for bet in slip],
+                         [("red", 10, 1), ("straight_up_7", 5, 35)])
+        with self.assertRaisesRegex(ValueError, "Bet 2"):
+            roulette.compile_slip([{"bet_type": "red", "bet_amount": 10}, {"bet_type": "red", "bet_amount": 0}])
+        with self.assertRaises(ValueError):
+            roulette.compile_slip([{"bet_type": "red", "bet_amount": 1}] * (roulette.MAX_SLIP_BETS + 1))
+
+
+class TestRouletteSlipAPI(BaseTestCase):
+
+    def test_slip_settles_every_chip_on_one_spin(self):
+        _, user_id = self._login_and_get_token()
+        user = db.session.get(User, user_id)
+        user.balance = 1000
+        db.session.commit()
+
+        bets = [{"bet_type": "straight_up", "bet_value": 7, "bet_amount": 10},
+                {"bet_type": "red", "bet_amount": 100},
+                {"bet_type": "split", "bet_value": [7, 8], "bet_amount": 20},
+                {"bet_type": "dozen", "bet_value": 3, "bet_amount": 50}]
+        with patch('casino_be.utils.roulette_helper.spin_wheel', return_value=7):
+            response = self.client.post('/api/roulette/slip', json={"bets": bets})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        data = response.get_json()
+        self.assertEqual([bet["payout"] for bet in data["bets"]], [360, 200, 360, 0])
+        self.assertEqual((data["total_staked"], data["total_returned"]), (180, 920))
+        self.assertEqual(data["new_balance"], 1740)
+
+        db.session.expire_all()
+        self.assertEqual(db.session.get(User, user_id).balance, 1740)
+        self.assertEqual(RouletteGame.query.filter_by(user_id=user_id).count(), 4)
+        self.assertEqual(Transaction.query.filter_by(user_id=user_id, transaction_type='roulette_win').one().amount, 920)
+
+        bad = self.client.post('/api/roulette/slip', json={"bets": [{"bet_type": "split", "bet_value": [7, 9], "bet_amount": 5}]})
+        self.assertEqual(bad.status_code, 400)
+        broke = self.client.post('/api/roulette/slip', json={"bets": [{"bet_type": "red", "bet_amount": 5000}]})
+        self.assertEqual(broke.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,366 @@
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from sqlalchemy.orm import Session
+
+from casino_be.app import db
+from casino_be.models import SpacecrashGame, SpacecrashBet, User
+from casino_be.services.spacecrash_game_loop import (
+    SpacecrashStateCache, SpacecrashBetEventBuffer, SpacecrashGameLoop, DEFAULT_ROOM
+)
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils import spacecrash_handler
+from casino_be.utils.spacecrash_load_tester import percentile, evaluate_thresholds
+
+
+class TestSpacecrashStateCache(unittest.TestCase):
+
+    def test_builder_runs_once_for_concurrent_readers(self):
+        cache = SpacecrashStateCache(max_age=60)
+        calls = []
+
+        def slow_builder():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'status': True, 'value': 1}, 200
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get(SpacecrashStateCache.CURRENT_GAME, slow_builder)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(set(results)), 1)
+        body, status_code = results[0]
+        self.assertEqual(status_code, 200)
+        self.assertEqual(json.loads(body), {'status': True, 'value': 1})
+
+    def test_expired_entry_is_rebuilt_when_not_live(self):
+        cache = SpacecrashStateCache(max_age=0)
+        counter = iter(range(10))
+        builder = lambda: ({'n': next(counter)}, 200)
+
+        first, _ = cache.get(SpacecrashStateCache.CURRENT_GAME, builder)
+        second, _ = cache.get(SpacecrashStateCache.CURRENT_GAME, builder)
+        self.assertNotEqual(first, second)
+
+    def test_live_entries_do_not_expire(self):
+        cache = SpacecrashStateCache(max_age=0)
+        cache.live = True
+        cache.put(SpacecrashStateCache.CURRENT_GAME, {'from': 'loop'})
+
+        body, _ = cache.get(SpacecrashStateCache.CURRENT_GAME, lambda: self.fail("builder should not run"))
+        self.assertEqual(json.loads(body), {'from': 'loop'})
+
+    def test_history_ring_buffer_keeps_newest_first(self):
+        cache = SpacecrashStateCache(history_size=3)
+        cache.set_history([{'id': 2}, {'id': 1}])
+        for game_id in (3, 4):
+            cache.push_history({'id': game_id})
+
+        body, _ = cache.get(SpacecrashStateCache.HISTORY, lambda: self.fail("builder should not run"))
+        self.assertEqual([g['id'] for g in json.loads(body)['history']], [4, 3, 2])
+
+
+class TestSpacecrashBetEventBuffer(unittest.TestCase):
+
+    def test_keeps_latest_event_per_player(self):
+        buffer = SpacecrashBetEventBuffer()
+        buffer.push(7, {'user_id': 1, 'event': 'bet', 'status': 'placed'})
+        buffer.push(7, {'user_id': 2, 'event': 'bet', 'status': 'placed'})
+        buffer.push(7, {'user_id': 1, 'event': 'eject', 'status': 'ejected'})
+
+        game_id, events = buffer.drain()
+        self.assertEqual(game_id, 7)
+        self.assertEqual([(e['user_id'], e['event']) for e in events], [(1, 'eject'), (2, 'bet')])
+        self.assertEqual(buffer.drain()[1], [])
+
+    def test_new_round_discards_previous_round_events(self):
+        buffer = SpacecrashBetEventBuffer()
+        buffer.push(7, {'user_id': 1, 'event': 'bet'})
+        buffer.push(8, {'user_id': 2, 'event': 'bet'})
+
+        game_id, events = buffer.drain()
+        self.assertEqual(game_id, 8)
+        self.assertEqual([e['user_id'] for e in events], [2])
+
+    def test_loop_flushes_one_batch_per_tick(self):
+        websocket_manager = MagicMock()
+        game_loop = SpacecrashGameLoop(websocket_manager=websocket_manager)
+        room = game_loop.get_room('turbo')
+        for user_id in range(5):
+            room.bet_events.push(3, {'user_id': user_id, 'event': 'eject'})
+
+        game_loop._flush_bet_events(room)
+        game_loop._flush_bet_events(room)
+
+        websocket_manager.broadcast_spacecrash_bets.assert_called_once()
+        game_id, events = websocket_manager.broadcast_spacecrash_bets.call_args[0]
+        self.assertEqual(game_id, 3)
+        self.assertEqual(len(events), 5)
+        self.assertEqual(websocket_manager.broadcast_spacecrash_bets.call_args[1], {'room': 'spacecrash_turbo'})
+
+
+class TestSpacecrashPollingRoutes(BaseTestCase):
+
+    def _create_game(self, status, crash_point=None, ended_minutes_ago=0, room=DEFAULT_ROOM):
+        now = datetime.now(timezone.utc)
+        game = SpacecrashGame(
+            server_seed='ab' * 32, public_seed='cd' * 32, nonce=1, status=status,
+            crash_point=crash_point, room=room,
+            betting_start_time=now if status == 'betting' else None,
+            game_end_time=now - timedelta(minutes=ended_minutes_ago) if status == 'completed' else None,
+        )
+        db.session.add(game)
+        db.session.commit()
+        return game
+
+    def test_current_game_not_found(self):
+        response = self.client.get('/api/spacecrash/current_game')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.get_json()['status'])
+
+    def test_current_game_prefers_betting_over_completed(self):
+        self._create_game('completed', crash_point=2.5)
+        betting = self._create_game('betting')
+
+        response = self.client.get('/api/spacecrash/current_game')
+        self.assertEqual(response.status_code, 200)
+        game = response.get_json()['game']
+        self.assertEqual(game['id'], betting.id)
+        self.assertEqual(game['current_multiplier'], 1.0)
+        self.assertIn('betting_time_remaining', game)
+        self.assertEqual(game['player_bets'], [])
+
+    def test_history_served_from_loop_buffer_while_live(self):
+        self._create_game('completed', crash_point=1.5)
+        state_cache = self.app.spacecrash_game_loop.get_room(DEFAULT_ROOM).state_cache
+        state_cache.live = True
+        try:
+            state_cache.set_history([{'id': 999, 'crash_point': 3.0}])
+            response = self.client.get('/api/spacecrash/history')
+        finally:
+            state_cache.live = False
+            state_cache.clear()
+
+        self.assertEqual(response.get_json()['history'], [{'id': 999, 'crash_point': 3.0}])
+
+    def test_history_queries_database_without_loop(self):
+        older = self._create_game('completed', crash_point=1.5, ended_minutes_ago=5)
+        newer = self._create_game('completed', crash_point=4.2, ended_minutes_ago=1)
+
+        response = self.client.get('/api/spacecrash/history')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([g['id'] for g in response.get_json()['history']], [newer.id, older.id])
+
+    def test_rooms_keep_separate_current_game_and_history(self):
+        classic = self._create_game('completed', crash_point=1.5)
+        turbo = self._create_game('completed', crash_point=7.0, room='turbo')
+        turbo_betting = self._create_game('betting', room='turbo')
+
+        history = self.client.get('/api/spacecrash/history?room=turbo').get_json()['history']
+        self.assertEqual([(g['id'], g['room']) for g in history], [(turbo.id, 'turbo')])
+        history = self.client.get('/api/spacecrash/history').get_json()['history']
+        self.assertEqual([g['id'] for g in history], [classic.id])
+
+        game = self.client.get('/api/spacecrash/current_game?room=turbo').get_json()['game']
+        self.assertEqual(game['id'], turbo_betting.id)
+        self.assertAlmostEqual(game['betting_time_remaining'], 5, delta=1)
+
+    def test_unknown_room(self):
+        response = self.client.get('/api/spacecrash/current_game?room=nope')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rooms_listing(self):
+        rooms = self.client.get('/api/spacecrash/rooms').get_json()['rooms']
+        by_name = {room['name']: room for room in rooms}
+        self.assertEqual(by_name[DEFAULT_ROOM]['channel'], 'spacecrash')
+        self.assertEqual(by_name['low_edge']['house_edge'], 0.005)
+
+
+class TestSpacecrashBetRoutes(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        _, self.user_id = self._login_and_get_token(username_prefix="crash_user")
+        user = User.query.get(self.user_id)
+        user.balance = 10_000
+        db.session.commit()
+        self.bet_events = self.app.spacecrash_game_loop.get_room(DEFAULT_ROOM).bet_events
+        self.bet_events.drain()
+
+    def _create_game(self, status, room=DEFAULT_ROOM):
+        game = SpacecrashGame(
+            server_seed='ab' * 32, public_seed='cd' * 32, nonce=1, status=status, room=room,
+            crash_point=50.0 if status == 'in_progress' else None,
+            game_start_time=datetime.now(timezone.utc) if status == 'in_progress' else None,
+        )
+        db.session.add(game)
+        db.session.commit()
+        return game
+
+    def test_bet_queues_event_instead_of_broadcasting(self):
+        game = self._create_game('betting')
+
+        response = self.client.post('/api/spacecrash/bet', json={'bet_amount': 1000})
+        self.assertEqual(response.status_code, 201, response.get_json())
+
+        game_id, events = self.bet_events.drain()
+        self.assertEqual(game_id, game.id)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['event'], 'bet')
+        self.assertEqual(events[0]['user_id'], self.user_id)
+        self.assertEqual(events[0]['bet_amount'], 1000)
+        self.assertEqual(User.query.get(self.user_id).balance, 9_000)
+
+    def test_eject_credits_wallet_and_queues_event(self):
+        game = self._create_game('betting')
+        self.client.post('/api/spacecrash/bet', json={'bet_amount': 1000})
+        game.status = 'in_progress'
+        game.crash_point = 50.0
+        game.game_start_time = datetime.now(timezone.utc)
+        db.session.commit()
+        self.bet_events.drain()
+
+        response = self.client.post('/api/spacecrash/eject')
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual(data['bet']['status'], 'ejected')
+
+        game_id, events = self.bet_events.drain()
+        self.assertEqual(game_id, game.id)
+        self.assertEqual([(e['event'], e['status']) for e in events], [('eject', 'ejected')])
+        self.assertEqual(User.query.get(self.user_id).balance, 9_000 + data['win_amount'])
+
+    def test_bet_goes_to_requested_room(self):
+        self._create_game('betting')
+        turbo_game = self._create_game('betting', room='turbo')
+
+        response = self.client.post('/api/spacecrash/bet', json={'bet_amount': 1000, 'room': 'turbo'})
+        self.assertEqual(response.status_code, 201, response.get_json())
+        self.assertEqual(SpacecrashBet.query.filter_by(user_id=self.user_id).one().game_id, turbo_game.id)
+        self.assertEqual(self.app.spacecrash_game_loop.get_room('turbo').bet_events.drain()[0], turbo_game.id)
+        self.assertEqual(self.bet_events.drain()[1], [])
+
+    def test_bet_below_room_minimum_rejected(self):
+        self._create_game('betting', room='high_roller')
+        response = self.client.post('/api/spacecrash/bet', json={'bet_amount': 1000, 'room': 'high_roller'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(User.query.get(self.user_id).balance, 10_000)
+
+
+class TestSpacecrashScheduler(BaseTestCase):
+
+    def test_rooms_tick_at_their_own_rate_on_one_thread(self):
+        ticks = []
+
+        class RecordingLoop(SpacecrashGameLoop):
+            def _process_game_cycle(self, room):
+                ticks.append((room.name, threading.get_ident()))
+
+        game_loop = RecordingLoop(app=self.app, room_configs={
+            'fast': {'tick_interval': 0.02},
+            'slow': {'tick_interval': 0.1},
+        })
+        game_loop.start()
+        time.sleep(0.5)
+        game_loop.stop()
+
+        counts = {name: sum(1 for n, _ in ticks if n == name) for name in ('fast', 'slow')}
+        self.assertGreater(counts['fast'], 2 * counts['slow'])
+        self.assertGreaterEqual(counts['slow'], 3)
+        self.assertEqual(len({ident for _, ident in ticks}), 1)
+
+    def test_failing_room_does_not_stall_others(self):
+        ticks = []
+
+        class FlakyLoop(SpacecrashGameLoop):
+            def _process_game_cycle(self, room):
+                if room.name == 'broken':
+                    raise RuntimeError("boom")
+                ticks.append(room.name)
+
+        game_loop = FlakyLoop(app=self.app, room_configs={
+            'broken': {'tick_interval': 0.02},
+            'healthy': {'tick_interval': 0.02},
+        })
+        game_loop.start()
+        time.sleep(0.3)
+        game_loop.stop()
+
+        self.assertGreaterEqual(ticks.count('healthy'), 5)
+
+
+class TestSpacecrashSettlement(BaseTestCase):
+
+    def test_end_game_round_settles_in_given_session(self):
+        _, user_id = self._login_and_get_token(username_prefix="crash_settle")
+        game = SpacecrashGame(
+            server_seed='ab' * 32, public_seed='cd' * 32, nonce=1, status='in_progress',
+            crash_point=2.0, game_start_time=datetime.now(timezone.utc),
+        )
+        db.session.add(game)
+        db.session.flush()
+        db.session.add_all([
+            SpacecrashBet(user_id=user_id, game_id=game.id, bet_amount=100, auto_eject_at=1.5),
+            SpacecrashBet(user_id=user_id, game_id=game.id, bet_amount=100, auto_eject_at=3.0),
+        ])
+        user = User.query.get(user_id)
+        user.balance = 0
+        db.session.commit()
+        game_id = game.id
+
+        # The game loop settles through its own session, not the request-scoped db.session
+        with Session(db.engine) as loop_session:
+            loop_game = loop_session.get(SpacecrashGame, game_id)
+            self.assertTrue(spacecrash_handler.end_game_round(loop_game, session=loop_session))
+            loop_session.commit()
+
+        db.session.expire_all()
+        bets = SpacecrashBet.query.filter_by(game_id=game_id).order_by(SpacecrashBet.auto_eject_at).all()
+        self.assertEqual([b.status for b in bets], ['ejected', 'busted'])
+        self.assertEqual(bets[0].win_amount, 150)
+        self.assertEqual(User.query.get(user_id).balance, 150)
+        self.assertEqual(SpacecrashGame.query.get(game_id).status, 'completed')
+
+
+class TestSpacecrashLoadTesterReport(unittest.TestCase):
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 99), 0.0)
+
+    def test_evaluate_thresholds_flags_breaches(self):
+        empty = {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+        report = {
+            'tick_jitter_ms': dict(empty, p99=40.0),
+            'settlement_ms': dict(empty, p99=900.0),
+            'fanout_ms': empty,
+            'rounds': [
+                {'bets': 10, 'statements_per_bet': 4.0},
+                {'bets': 10, 'statements_per_bet': 6.0},
+                {'bets': 0, 'statements_per_bet': 20.0},  # Idle round: nothing to amortize over
+            ],
+        }
+        verdicts = {name: passed for name, _, _, passed in evaluate_thresholds(report, {
+            'tick_jitter_p99_ms': 100.0,
+            'settlement_p99_ms': 500.0,
+            'fanout_p99_ms': None,
+            'statements_per_bet_max': 5.0,
+        })}
+        self.assertEqual(verdicts, {'tick_jitter_p99_ms': True, 'settlement_p99_ms': False, 'statements_per_bet_max': False})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import hashlib
+import unittest
+
+from casino_be.utils import spacecrash_auditor as auditor
+from casino_be.utils.spacecrash_handler import generate_crash_point, get_multiplier_from_hash
+
+SERVER_SEED = 'ab' * 32
+
+
+@unittest.skipUnless(auditor.NUMPY_AVAILABLE, "numpy is required for the SpaceCrash auditor")
+class TestSpacecrashAuditor(unittest.TestCase):
+
+    def test_vectorised_multipliers_match_scalar_implementation(self):
+        import numpy as np
+
+        for house_edge in (0.01, 0.005, 0.03):
+            digests = auditor.hmac_digests(SERVER_SEED, 'client', 0, 5000)
+            multipliers, _ = auditor.multipliers_from_ints(auditor.digests_to_ints(digests), house_edge)
+            expected = [generate_crash_point(SERVER_SEED, 'client', nonce, house_edge) for nonce in range(5000)]
+            np.testing.assert_array_equal(multipliers, expected)
+
+    def test_edge_hashes_match_scalar_implementation(self):
+        import numpy as np
+
+        edge_ints = [0, 1, 100, 2**52 - 2, 2**52 - 1, 2**51, 12345 * 100, 2**52 - 10_000]
+        multipliers, forced = auditor.multipliers_from_ints(np.array(edge_ints, dtype=np.int64), 0.01)
+        for value, multiplier in zip(edge_ints, multipliers):
+            self.assertEqual(multiplier, get_multiplier_from_hash(f'{value:013x}' + '0' * 51, 0.01))
+        self.assertTrue(forced[0] and forced[2] and forced[6])
+
+    def test_bit_extraction_matches_hex_prefix(self):
+        digests, _ = auditor.chain_digests('00' * 32, 50)
+        ints = auditor.digests_to_ints(digests)
+        for digest, value in zip(digests, ints):
+            self.assertEqual(int(value), int(bytes(digest).hex()[:13], 16))
+
+    def test_chain_follows_sha256_of_previous_hex(self):
+        digests, last = auditor.chain_digests('11' * 32, 3)
+        expected = hashlib.sha256(('11' * 32).encode('ascii')).hexdigest()
+        self.assertEqual(bytes(digests[0]).hex(), expected)
+        self.assertEqual(bytes(digests[-1]).hex(), last)
+
+    def test_chunked_histograms_merge_exactly(self):
+        task = lambda start, count: ('range', {'server_seed': SERVER_SEED, 'client_seed': 'c'}, start, count, 0.01, 9999.0)
+        whole, whole_forced = auditor.audit_chunk(task(0, 4000))
+        first, first_forced = auditor.audit_chunk(task(0, 1500))
+        second, second_forced = auditor.audit_chunk(task(1500, 2500))
+
+        self.assertTrue((whole == first + second).all())
+        self.assertEqual(whole_forced, first_forced + second_forced)
+        self.assertEqual(int(whole.sum()), 4000)
+
+    def test_theory(self):
+        self.assertAlmostEqual(auditor.theoretical_survival(2.0, 0.01), 0.495)
+        self.assertEqual(auditor.theoretical_survival(10_000, 0.01, max_multiplier_cap=9999.0), 0.0)
+        self.assertAlmostEqual(auditor.theoretical_instant_rate(0.01), 0.01 + 0.99 / 101)
+        self.assertEqual(auditor.theoretical_percentile(1.0, 0.01), 1.0)
+        self.assertEqual(auditor.theoretical_percentile(50.0, 0.01), 1.97)
+
+    def test_report_flags_a_skewed_distribution(self):
+        import numpy as np
+
+        histogram = np.zeros(auditor.histogram_size(9999.0), dtype=np.int64)
+        multipliers, forced = auditor.multipliers_from_ints(
+            auditor.digests_to_ints(auditor.random_seed_digests('c', 20_000)), 0.01
+        )
+        auditor.accumulate(histogram, multipliers)
+        report = auditor.build_report(histogram, int(forced.sum()), 0.01, 9999.0, [1.5, 2.0], [50.0])
+        self.assertEqual(auditor.failed_checks(report, max_z=6), [])
+
+        # Audited against a 5% edge, a 1% distribution pays too much at every target
+        report = auditor.build_report(histogram, int(forced.sum()), 0.05, 9999.0, [1.5, 2.0], [50.0])
+        failures = auditor.failed_checks(report, max_z=6)
+        self.assertIn('target 1.5x', failures)
+        self.assertIn('forced instant crash rate', failures)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from casino_be.models import db, BaccaratHand, BaccaratTable, GameRound, GameSession, RouletteGame, Transaction, User
+from casino_be.services.table_rounds import table_rounds
+from casino_be.tests.test_api import BaseTestCase
+from casino_be.utils.baccarat_helper import _calculate_payouts
+
+
+class TestTableRounds(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.app.config['ROUND_BETTING_WINDOW'] = 600  # Rounds are closed explicitly
+        table_rounds.configure(self.app)
+        self.users = []
+        for index in range(3):
+            user = self._create_user(username=f"rounds{index}", email=f"rounds{index}@example.com")
+            user.balance = 10_000
+            self.users.append(user)
+        db.session.commit()
+
+    def tearDown(self):
+        table_rounds.configure(self.app)
+        super().tearDown()
+
+    def _baccarat_table(self, **kwargs):
+        table = BaccaratTable(name="Rounds", min_bet=100, max_bet=5000, max_tie_bet=500,
+                              commission_rate=Decimal("0.05"), **kwargs)
+        db.session.add(table)
+        db.session.commit()
+        return table
+
+    def test_baccarat_round_settles_every_player_on_one_hand(self):
+        table = self._baccarat_table()
+        baccarat = table_rounds.get('baccarat')
+        bets = [{'bet_on_player': 1000}, {'bet_on_banker': 2000, 'bet_on_tie': 100}, {'bet_on_tie': 500}]
+        for user, bet in zip(self.users, bets):
+            self.assertNotIn("error", baccarat.place_bet(table.id, user, bet))
+        # Adding to a bet in the same round
+        added = baccarat.place_bet(table.id, self.users[0], {'bet_on_player': 500})
+        self.assertEqual(added['round']['your_stake'], 1500)
+        self.assertEqual(added['available_balance'], 8500)
+
+        result = baccarat.close(table.id)
+        db.session.expire_all()
+
+        game_round = db.session.get(GameRound, result['round_id'])
+        self.assertEqual((game_round.game_type, game_round.bet_count, game_round.total_wagered), ('baccarat', 3, 4100))
+        hands = BaccaratHand.query.filter_by(round_id=game_round.id).order_by(BaccaratHand.user_id).all()
+        self.assertEqual(len(hands), 3)
+        self.assertEqual({(tuple(h.player_cards), tuple(h.banker_cards), h.outcome) for h in hands},
+                         {(tuple(result['outcome']['player_cards']), tuple(result['outcome']['banker_cards']),
+                           result['outcome']['outcome'])})
+
+        outcome = result['outcome']['outcome']
+        for user, hand, spots in zip(self.users, hands, [(1500, 0, 0), (0, 2000, 100), (0, 0, 500)]):
+            paid = sum(_calculate_payouts(outcome, *map(Decimal, spots), commission_rate=Decimal("0.05"))[:3])
+            self.assertEqual(hand.total_bet_amount, sum(spots))
+            self.assertEqual(hand.win_amount, int(paid) - sum(spots))
+            self.assertEqual(db.session.get(User, user.id).balance, 10_000 + hand.win_amount)
+            session = db.session.get(GameSession, hand.game_session_id)
+            self.assertEqual((session.amount_wagered, session.amount_won), (sum(spots), hand.win_amount))
+        wagers = Transaction.query.filter_by(transaction_type='baccarat_wager').count()
+        self.assertEqual(wagers, 3)
+        self.assertEqual(db.session.get(BaccaratTable, table.id).shoe_state['shoe'], 1)
+
+        state = baccarat.round_state(table.id, self.users[1].id)
+        self.assertIsNone(state['round'])
+        self.assertEqual(state['recent'][0]['your_stake'], 2100)
+        self.assertEqual(table_rounds.reserved, {})
+
+    def test_stakes_are_reserved_across_rounds_and_rechecked_at_settlement(self):
+        table = self._baccarat_table()
+        baccarat, roulette = table_rounds.get('baccarat'), table_rounds.get('roulette')
+        user, other = self.users[0], self.users[1]
+        self.assertNotIn("error", baccarat.place_bet(table.id, user, {'bet_on_banker': 5000}))
+        self.assertNotIn("error", roulette.place_bet(1, user, {'bet_type': 'red', 'bet_amount': 4000}))
+        refused = roulette.place_bet(1, user, {'bet_type': 'black', 'bet_amount': 1001})
+        self.assertEqual(refused['code'], 'insufficient_balance')
+        self.assertEqual(baccarat.place_bet(table.id, other, {'bet_on_tie': 600})['code'], 'invalid_bet')
+        self.assertEqual(baccarat.place_bet(999, other, {'bet_on_tie': 100})['code'], 'not_found')
+        self.assertNotIn("error", baccarat.place_bet(table.id, other, {'bet_on_player': 100}))
+
+        # Spent elsewhere before the round closed
+        user.balance = 3000
+        db.session.commit()
+        result = baccarat.close(table.id)
+        self.assertEqual(result['void'], [user.id])
+        self.assertEqual([bet['user_id'] for bet in result['bets']], [other.id])
+        self.assertEqual(BaccaratHand.query.filter_by(user_id=user.id).count(), 0)
+        self.assertEqual(table_rounds.reserved, {user.id: 4000})
+
+    def test_roulette_round_through_the_api(self):
+        self._login_and_get_token()
+        player = User.query.order_by(User.id.desc()).first()
+        player.balance = 1000
+        db.session.commit()
+
+        response = self.client.post('/api/roulette/tables/1/round/bets', json={'bets': [
+            {'bet_type': 'straight_up', 'bet_value': 17, 'bet_amount': 10},
+            {'bet_type': 'red', 'bet_amount': 100},
+            {'bet_type': 'corner', 'bet_value': [16, 17, 19, 20], 'bet_amount': 20},
+        ]})
+        self.assertEqual(response.status_code, 202, response.get_json())
+        self.assertEqual(response.get_json()['available_balance'], 870)
+        self.assertNotIn("error", table_rounds.get('roulette').place_bet(1, self.users[0], {'bet_type': 'odd', 'bet_amount': 50}))
+        bad = self.client.post('/api/roulette/tables/1/round/bets', json={'bet_type': 'dozen', 'bet_value': 7, 'bet_amount': 10})
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(self.client.post('/api/roulette/tables/9/round/bets', json={'bet_type': 'red', 'bet_amount': 10}).status_code, 404)
+
+        with patch('casino_be.utils.roulette_helper.spin_wheel', return_value=17):
+            result = table_rounds.get('roulette').close(1)
+        self.assertEqual(result['outcome'], {'winning_number': 17})
+        db.session.expire_all()
+        # 17 is black: the straight-up pays 36x the stake back, the corner 9x, red loses
+        self.assertEqual(db.session.get(User, player.id).balance, 1000 - 130 + 360 + 180)
+        self.assertEqual(db.session.get(User, self.users[0].id).balance, 10_050)
+        games = RouletteGame.query.filter_by(round_id=result['round_id']).all()
+        self.assertEqual(sorted(game.payout for game in games), [0, 100, 180, 360])
+
+        state = self.client.get('/api/roulette/tables/1/round').get_json()
+        self.assertEqual(state['recent'][0]['your_return'], 540)
+        self.assertEqual(Transaction.query.filter_by(transaction_type='roulette_win').count(), 2)
@@ -1,30 +1,15 @@
-import secrets
 from decimal import Decimal
 
-# Card Constants
-SUITS = ['H', 'D', 'C', 'S']  # Hearts, Diamonds, Clubs, Spades
-RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A'] # Ten, Jack, Queen, King, Ace
+from casino_be.utils import cards
 
-# --- Deck Functions ---
-def _create_deck(num_decks=6):
-    """Creates a list of cards for the specified number of decks."""
-    deck = []
-    for _ in range(num_decks):
-        for suit in SUITS:
-            for rank in RANKS:
-                deck.append(f"{suit}{rank}")
-    return deck
-
-def _shuffle_deck(deck):
-    """Shuffles the deck in place using secrets.SystemRandom()."""
-    rng = secrets.SystemRandom()
-    rng.shuffle(deck)
+# Card Constants (shoes are integer-coded decks from utils.cards, or a table's services.baccarat_shoe)
+SUITS = cards.SUITS  # Hearts, Diamonds, Clubs, Spades
+RANKS = cards.RANKS  # Ten, Jack, Queen, King, Ace
 
-def _deal_card(deck_list):
-    """Removes and returns the top card from the deck."""
-    if not deck_list:
-        raise ValueError("Deck is empty. Cannot deal card.")
-    return deck_list.pop(0)
+# --- Deck Functions ---
+def _deal_card(deck):
+    """Deals the next card of the shoe (a cards.Deck or BaccaratShoe) as a card string."""
+    return deck.deal_str()
 
 # --- Card Value Calculation ---
 def _get_card_baccarat_value(card_str):
@@ -123,12 +108,12 @@ def _calculate_payouts(outcome, player_bet, banker_bet, tie_bet, commission_rate
 
 
 # --- Main Game Flow Function ---
-def play_baccarat_hand(player_bet_amount, banker_bet_amount, tie_bet_amount, num_decks=6, commission_rate=Decimal("0.05"), tie_payout_rate=8):
+def play_baccarat_hand(player_bet_amount, banker_bet_amount, tie_bet_amount, num_decks=6, commission_rate=Decimal("0.05"), tie_payout_rate=8, shoe=None):
     """
     Simulates a single hand of Baccarat.
+    Deals from `shoe` (the table's BaccaratShoe) when given, otherwise from a fresh num_decks shoe.
     """
-    deck = _create_deck(num_decks)
-    _shuffle_deck(deck)
+    deck = shoe if shoe is not None else cards.Deck.shuffled(num_decks)
 
     player_cards = []
     banker_cards = []
@@ -271,7 +256,8 @@ def play_baccarat_hand(player_bet_amount, banker_bet_amount, tie_bet_amount, num
             "commission_rate": commission_rate,
             "tie_payout_rate": tie_payout_rate,
             "player_drew_third": player_drew_third,
-            "banker_drew_third": banker_drew_third # Added for more detailed logging
+            "banker_drew_third": banker_drew_third, # Added for more detailed logging
+            "shoe": getattr(shoe, 'number', None) # Which of the table's shoes dealt the hand
         }
     }
 
@@ -0,0 +1,262 @@
+"""
+Exact baccarat odds for any shoe composition, and a batch simulator to check them.
+
+outcome_probabilities() enumerates every way the next six cards can fall (10**6 sequences of
+card values, weighted by drawing without replacement from the shoe) through the third-card
+rules of baccarat_helper.play_baccarat_hand, so P(player), P(banker) and P(tie) are exact for
+the cards actually left in a shoe. Cards a hand does not use sum out of the weights. The house
+edge of each bet is then priced with baccarat_helper._calculate_payouts, the function that pays
+live hands, at the table's commission and tie payout.
+
+shoe_odds() does this for a table's current shoe so the live edge can be watched as the shoe
+is dealt (see /api/internal/baccarat/tables/<id>/odds).
+
+    python -m casino_be.utils.baccarat_odds --decks 8
+    python -m casino_be.utils.baccarat_odds --decks 6 --simulate 1000000000 --workers 8
+
+--simulate deals that many hands from fresh shoes in numpy batches across a process pool and
+compares the realised outcome rates and per-bet returns with the exact figures. Exit status is
+1 when any of them is more than --max-z standard errors away.
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from functools import lru_cache
+
+from casino_be.utils import cards
+from casino_be.utils.baccarat_helper import _calculate_payouts
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+OUTCOMES = ('player_win', 'banker_win', 'tie')
+BETS = ('player', 'banker', 'tie')
+DEFAULT_COMMISSION = Decimal("0.05")
+DEFAULT_TIE_PAYOUT = 8
+BATCH_SIZE = 200_000
+HAND_CARDS = 6  # Most cards one hand can use
+
+RANK_VALUES = [2, 3, 4, 5, 6, 7, 8, 9, 0, 0, 0, 0, 1]  # Baccarat value of each cards.RANKS entry
+
+
+def composition(num_decks=6):
+    """Cards of each baccarat value 0..9 in a full shoe"""
+    counts = [0] * 10
+    for value in RANK_VALUES:
+        counts[value] += 4 * num_decks
+    return counts
+
+
+def deck_composition(deck):
+    """Cards of each value 0..9 left in a cards.Deck (or a shoe's deck)"""
+    counts = [0] * 10
+    for code in deck.cards[deck.cursor:]:
+        counts[RANK_VALUES[cards.rank_index(code)]] += 1
+    return counts
+
+
+@lru_cache(maxsize=1)
+def outcome_table():
+    """
+    Outcome index (0 player, 1 banker, 2 tie) of every sequence of six card values, dealt
+    player, banker, player, banker, then third cards: the player's fifth card if they draw,
+    the banker's next. Same rules as play_baccarat_hand.
+    """
+    d = np.indices((10,) * HAND_CARDS, dtype=np.int8)
+    player = (d[0] + d[2]) % 10
+    banker = (d[1] + d[3]) % 10
+    natural = (player >= 8) | (banker >= 8)
+    player_draws = ~natural & (player <= 5)
+    third = d[4]  # The player's third card, when they draw
+    banker_rule = np.select(
+        [banker <= 2, banker == 3, banker == 4, banker == 5, banker == 6],
+        [True, third != 8, (third >= 2) & (third <= 7), (third >= 4) & (third <= 7), (third >= 6) & (third <= 7)],
+        default=False,
+    )
+    banker_draws = ~natural & np.where(player_draws, banker_rule, banker <= 5)
+    player_final = np.where(player_draws, (player + d[4]) % 10, player)
+    banker_card = np.where(player_draws, d[5], d[4])
+    banker_final = np.where(banker_draws, (banker + banker_card) % 10, banker)
+    table = np.where(player_final > banker_final, 0, np.where(player_final < banker_final, 1, 2)).astype(np.int8)
+    table.setflags(write=False)
+    return table
+
+
+def _sequence_weights(counts):
+    """P(next six card values) for every sequence, drawing without replacement from counts"""
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total < HAND_CARDS:
+        raise ValueError(f"A shoe needs at least {HAND_CARDS} cards to deal a hand, it has {int(total)}.")
+    values = np.arange(10)
+    weights = np.ones((1,) * HAND_CARDS)
+    for position in range(HAND_CARDS):
+        shape = [1] * HAND_CARDS
+        shape[position] = 10
+        drawn = values.reshape(shape)
+        # Cards of this value already taken by the earlier positions of the sequence
+        taken = np.zeros(shape, dtype=np.float64)
+        for earlier in range(position):
+            earlier_shape = [1] * HAND_CARDS
+            earlier_shape[earlier] = 10
+            taken = taken + (values.reshape(earlier_shape) == drawn)
+        left = np.maximum(counts[drawn] - taken, 0.0)
+        weights = weights * (left / (total - position))
+    return weights
+
+
+def outcome_probabilities(counts):
+    """Exact {'player_win', 'banker_win', 'tie'} probabilities for the next hand from a shoe of `counts`"""
+    by_outcome = np.bincount(outcome_table().ravel(), weights=_sequence_weights(counts).ravel(), minlength=3)
+    return dict(zip(OUTCOMES, (float(p) for p in by_outcome)))
+
+
+def bet_returns(commission_rate=DEFAULT_COMMISSION, tie_payout_rate=DEFAULT_TIE_PAYOUT):
+    """Net return of a unit bet on each of player, banker and tie, for each outcome, from _calculate_payouts"""
+    returns = {}
+    for bet in BETS:
+        stakes = {name: Decimal(1 if name == bet else 0) for name in BETS}
+        returns[bet] = {}
+        for outcome in OUTCOMES:
+            paid = _calculate_payouts(outcome, stakes['player'], stakes['banker'], stakes['tie'],
+                                      commission_rate=Decimal(str(commission_rate)), tie_payout_rate=int(tie_payout_rate))
+            returns[bet][outcome] = float(sum(paid[:3]) - 1)
+    return returns
+
+
+def house_edges(probabilities, commission_rate=DEFAULT_COMMISSION, tie_payout_rate=DEFAULT_TIE_PAYOUT):
+    """House edge per unit bet on player, banker and tie"""
+    returns = bet_returns(commission_rate, tie_payout_rate)
+    return {bet: -sum(probabilities[outcome] * returns[bet][outcome] for outcome in OUTCOMES) for bet in BETS}
+
+
+def odds_report(counts, commission_rate=DEFAULT_COMMISSION, tie_payout_rate=DEFAULT_TIE_PAYOUT):
+    probabilities = outcome_probabilities(counts)
+    return {
+        'cards_left': int(sum(counts)),
+        'composition': list(counts),
+        'probabilities': probabilities,
+        'house_edge': house_edges(probabilities, commission_rate, tie_payout_rate),
+        'commission_rate': float(commission_rate),
+        'tie_payout_rate': int(tie_payout_rate),
+    }
+
+
+def shoe_odds(shoe, commission_rate=DEFAULT_COMMISSION, tie_payout_rate=DEFAULT_TIE_PAYOUT):
+    """Exact odds of the next hand from a table's shoe, tagged with the shoe number"""
+    with shoe.dealing():
+        counts = deck_composition(shoe.deck)
+        number = shoe.number
+    report = odds_report(counts, commission_rate, tie_payout_rate)
+    report['shoe'] = number
+    return report
+
+
+def simulate_chunk(task):
+    """(counts, hands, seed) -> hands per outcome, each dealt from a fresh shoe of `counts`"""
+    counts, hands, seed = task
+    rng = np.random.default_rng(seed)
+    table = outcome_table()
+    start = np.asarray(counts, dtype=np.int32)
+    tally = np.zeros(3, dtype=np.int64)
+    done = 0
+    while done < hands:
+        batch = min(BATCH_SIZE, hands - done)
+        left = np.tile(start, (batch, 1))
+        size = np.full(batch, start.sum())
+        drawn = np.empty((HAND_CARDS, batch), dtype=np.intp)
+        rows = np.arange(batch)
+        for position in range(HAND_CARDS):
+            pick = (rng.random(batch) * size).astype(np.int32)
+            values = (np.cumsum(left, axis=1) <= pick[:, None]).sum(axis=1)
+            left[rows, values] -= 1
+            size -= 1
+            drawn[position] = values
+        tally += np.bincount(table[tuple(drawn)], minlength=3)
+        done += batch
+    return tally
+
+
+def simulate(counts, hands, workers=1, seed=None):
+    """Hands per outcome over `hands` simulated hands, split across worker processes"""
+    seeds = np.random.SeedSequence(seed)
+    per_task = max(BATCH_SIZE, math.ceil(hands / (workers * 4)))
+    tasks = [(list(counts), min(per_task, hands - start), child)
+             for start, child in zip(range(0, hands, per_task), seeds.spawn(math.ceil(hands / per_task)))]
+    tally = np.zeros(3, dtype=np.int64)
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for task_tally in executor.map(simulate_chunk, tasks):
+                tally += task_tally
+    else:
+        for task in tasks:
+            tally += simulate_chunk(task)
+    return dict(zip(OUTCOMES, (int(n) for n in tally)))
+
+
+def compare(report, tally):
+    """z-scores of simulated outcome rates and per-bet returns against the exact report"""
+    hands = sum(tally.values())
+    rows = []
+    for outcome in OUTCOMES:
+        p = report['probabilities'][outcome]
+        rate = tally[outcome] / hands
+        stderr = math.sqrt(p * (1 - p) / hands)
+        rows.append({'check': outcome, 'observed': rate, 'exact': p, 'z': (rate - p) / stderr if stderr else 0.0})
+    returns = bet_returns(report['commission_rate'], report['tie_payout_rate'])
+    for bet in BETS:
+        expected = -report['house_edge'][bet]
+        variance = sum(report['probabilities'][o] * returns[bet][o] ** 2 for o in OUTCOMES) - expected ** 2
+        observed = sum(tally[o] * returns[bet][o] for o in OUTCOMES) / hands
+        stderr = math.sqrt(variance / hands)
+        rows.append({'check': f'{bet} return', 'observed': observed, 'exact': expected,
+                     'z': (observed - expected) / stderr if stderr else 0.0})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baccarat odds - exact outcome probabilities and house edge per bet.")
+    parser.add_argument("--decks", type=int, default=6, help="Decks in a full shoe.")
+    parser.add_argument("--commission", type=str, default=str(DEFAULT_COMMISSION), help="Banker commission rate.")
+    parser.add_argument("--tie-payout", type=int, default=DEFAULT_TIE_PAYOUT, help="Tie pays this to 1.")
+    parser.add_argument("--simulate", type=int, default=0, help="Also deal this many hands and compare.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes for --simulate.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for --simulate.")
+    parser.add_argument("--max-z", type=float, default=4.0, help="Fail when a simulated figure is this many standard errors out.")
+
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        parser.error("numpy is required for the baccarat odds calculator.")
+
+    counts = composition(args.decks)
+    report = odds_report(counts, Decimal(args.commission), args.tie_payout)
+    print(f"\n--- Baccarat, {args.decks} deck(s), {args.commission} commission, tie pays {args.tie_payout} to 1 ---")
+    for outcome in OUTCOMES:
+        print(f"P({outcome}): {report['probabilities'][outcome]:.8f}")
+    for bet in BETS:
+        print(f"House edge on {bet}: {report['house_edge'][bet]:+.6%}")
+
+    if args.simulate:
+        started = time.perf_counter()
+        tally = simulate(counts, args.simulate, args.workers, args.seed)
+        elapsed = time.perf_counter() - started
+        rows = compare(report, tally)
+        print(f"\nSimulated {args.simulate:,} hands in {elapsed:.1f}s ({args.simulate / elapsed:,.0f} hands/s)")
+        print("Check               observed        exact           z")
+        for row in rows:
+            print(f"{row['check']:<18} {row['observed']:>+.8f}  {row['exact']:>+.8f}  {row['z']:>+6.2f}")
+        failures = [row['check'] for row in rows if abs(row['z']) > args.max_z]
+        print(f"\nChecks (|z| <= {args.max_z}): {'PASS' if not failures else 'FAIL - ' + ', '.join(failures)}")
+        if failures:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
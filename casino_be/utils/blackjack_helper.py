@@ -1,36 +1,19 @@
+from collections import Counter
 from datetime import datetime, timezone
 import random
-import secrets # Added import
 # import json # Not strictly needed if BlackjackHand.details is handled by SQLAlchemy's JSON type directly
 from casino_be.models import db, User, GameSession, BlackjackHand, BlackjackAction, BlackjackTable, Transaction, UserBonus # Absolute import
+from casino_be.services.blackjack_shoe import get_blackjack_shoes
+from sqlalchemy import insert, select
+from casino_be.utils import cards
 
 # --- Card Constants ---
-SUITS = ['H', 'D', 'C', 'S']  # Hearts, Diamonds, Clubs, Spades
-RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A'] # T for Ten
+# Each table deals from a persistent shoe (services.blackjack_shoe); cards become strings as they are dealt into hands
+SUITS = cards.SUITS  # Hearts, Diamonds, Clubs, Spades
+RANKS = cards.RANKS  # T for Ten
 
 # --- Core Helper Functions ---
 
-def _create_deck(num_decks=1):
-    """Creates a list of cards, e.g., ["H2", "SA", ...]."""
-    deck = []
-    for _ in range(num_decks):
-        for suit in SUITS:
-            for rank in RANKS:
-                deck.append(suit + rank)
-    return deck
-
-def _shuffle_deck(deck):
-    """Shuffles the deck in place using a cryptographically secure RNG."""
-    secure_random = secrets.SystemRandom()
-    secure_random.shuffle(deck)
-
-def _deal_card(deck_list):
-    """Deals a card from the deck_list. Modifies the deck_list."""
-    if not deck_list:
-        # This should ideally not happen if deck management is correct per game round
-        raise ValueError("Deck is empty. Cannot deal card.")
-    return deck_list.pop()
-
 def _get_card_value(card_str):
     """
     Determines the Blackjack value of a card string.
@@ -140,6 +123,132 @@ def _update_wagering_progress(user: User, bet_amount_sats_for_wagering: int, db_
             # print(f"User {user.id} completed wagering for UserBonus {active_bonus.id}.") # Logging placeholder
         # db_session.add(active_bonus) # Not needed if fetched from session
 
+# --- Action Log ---
+# A hand is stored as its ordered actions (BlackjackAction rows): every card dealt and every
+# decision, with hand_index -1 for the dealer. Its hands, totals and active hand are replayed
+# from them, so an action only appends a row or two and updates the hand's state columns.
+
+DEALER_INDEX = -1
+
+def replay_hand(events, bet_sats):
+    """
+    The player hands and dealer's hand built by a hand's ordered (action_type, hand_index, card)
+    actions, as _create_player_hand_obj objects. A hand is standing once stood on, doubled or
+    at 21 or more. Results are left 'pending'.
+    """
+    hands = []  # [cards, stood, doubled] per player hand
+    dealer_cards = []
+    for action_type, index, card in events:
+        if index == DEALER_INDEX:
+            dealer_cards.append(card)
+        elif action_type == 'deal' and index == len(hands):
+            hands.append([[card], False, False])
+        elif action_type in ('deal', 'hit'):
+            hands[index][0].append(card)
+        elif action_type == 'double':
+            hands[index][0].append(card)
+            hands[index][1] = hands[index][2] = True
+        elif action_type == 'stand':
+            hands[index][1] = True
+        elif action_type == 'split':
+            # The hand keeps its first card and is dealt this one; its second card starts the next hand
+            first, second = hands[index][0]
+            hands[index][0] = [first, card]
+            hands.insert(index + 1, [[second], False, False])
+        else:
+            raise ValueError(f"Unknown blackjack action in hand log: {action_type}")
+
+    player_hands = []
+    for cards_list, stood, doubled in hands:
+        hand = _create_player_hand_obj(cards_list, bet_sats=bet_sats, bet_multiplier=2.0 if doubled else 1.0)
+        hand['is_doubled'] = doubled
+        hand['is_standing'] = stood or hand['total'] >= 21
+        player_hands.append(hand)
+    return player_hands, _create_player_hand_obj(dealer_cards)
+
+def _active_hand_index(player_hands):
+    """The first player hand still to act, or None once they are all done"""
+    for index, hand in enumerate(player_hands):
+        if not (hand['is_standing'] or hand['is_busted'] or hand['is_blackjack']):
+            return index
+    return None
+
+def _events_from_views(player_hands, dealer_hand):
+    """Actions that replay to the stored hands of a hand dealt before the action log"""
+    events = []
+    for index, hand in enumerate(player_hands):
+        doubled = hand.get('is_doubled', False)
+        events.extend(('deal', index, card) for card in (hand['cards'][:-1] if doubled else hand['cards']))
+        if doubled:
+            events.append(('double', index, hand['cards'][-1]))
+        elif hand.get('is_standing'):
+            events.append(('stand', index, None))
+    events.extend(('deal', DEALER_INDEX, card) for card in dealer_hand['cards'])
+    return events
+
+def _load_events(bj_hand):
+    """The hand's logged actions in order, or, for a hand dealt before the log, ones rebuilt from its stored hands"""
+    events = [tuple(row) for row in db.session.execute(
+        select(BlackjackAction.action_type, BlackjackAction.hand_index, BlackjackAction.card_dealt)
+        .where(BlackjackAction.hand_id == bj_hand.id)
+        .order_by(BlackjackAction.seq)
+    )]
+    if not events and bj_hand.player_hands is not None:
+        events = _events_from_views(bj_hand.player_hands, bj_hand.dealer_hand)
+    return events
+
+def _log_actions(bj_hand, events, player_hands, dealer_hand_obj):
+    """
+    Append actions to the hand's log in one insert, numbered on from its event_count. Each row
+    carries its hand's total just after it.
+    """
+    if not events:
+        return
+    # Cards dealt in this batch are the last ones in their hands
+    undealt = Counter(index for _, index, card in events if card is not None)
+    rows = []
+    for seq, (action_type, index, card) in enumerate(events, start=bj_hand.event_count):
+        hand_cards = (dealer_hand_obj if index == DEALER_INDEX else player_hands[index])['cards']
+        if card is not None:
+            undealt[index] -= 1
+        rows.append({
+            'hand_id': bj_hand.id, 'seq': seq, 'action_type': action_type, 'hand_index': index,
+            'card_dealt': card, 'hand_total': _calculate_hand_value(hand_cards[:len(hand_cards) - undealt[index]])[0],
+        })
+    db.session.execute(insert(BlackjackAction), rows)
+    bj_hand.event_count += len(events)
+
+def hand_view(bj_hand, reveal=True):
+    """
+    A hand's cards and hands as JSON, replayed from its action log for history and admin.
+    Completed hands carry each player hand's result; reveal=False hides the dealer's hole card
+    while the hand is active.
+    """
+    events = _load_events(bj_hand)
+    player_hands, dealer_hand_obj = replay_hand(events, bj_hand.initial_bet)
+    if bj_hand.status == 'completed':
+        rules = (bj_hand.table.rules if bj_hand.table else None) or {}
+        for hand in player_hands:
+            hand['result'] = _determine_winner_for_hand(hand, dealer_hand_obj, rules)[1]
+    if not reveal and bj_hand.status == 'active':
+        dealer_hand_obj = _hidden_dealer_hand(dealer_hand_obj)
+    dealt = [(index, card) for action_type, index, card in events if action_type == 'deal']
+    return {
+        "player_cards": [card for index, card in dealt if index == 0][:2],
+        "dealer_cards": dealer_hand_obj['cards'][:2],
+        "player_hands": player_hands,
+        "dealer_hand": dealer_hand_obj,
+    }
+
+def _hidden_dealer_hand(dealer_hand_obj):
+    """The dealer's hand as the player sees it before the dealer plays: the up-card only"""
+    up_card = dealer_hand_obj['cards'][0]
+    return {
+        "cards": [up_card, "FACE_DOWN"],
+        "total": _calculate_hand_value([up_card])[0],
+        "is_soft": _get_card_value(up_card) == 11,
+    }
+
 # --- Main Game Functions ---
 
 def handle_join_blackjack(user, table, bet_amount_sats):
@@ -168,10 +277,9 @@ def handle_join_blackjack(user, table, bet_amount_sats):
     # --- Initialization ---
     current_time = datetime.now(timezone.utc)
     
-    # Create and shuffle deck(s)
-    # Use table.deck_count which should be an attribute of the BlackjackTable model
-    deck = _create_deck(getattr(table, 'deck_count', 1)) # Default to 1 if not set
-    _shuffle_deck(deck)
+    # The table's shoe, reshuffled first if the cut card came out during the last hand
+    shoes = get_blackjack_shoes()
+    shoe = shoes.start_hand(table)
     
     # Create GameSession
     game_session = GameSession(
@@ -183,43 +291,33 @@ def handle_join_blackjack(user, table, bet_amount_sats):
         amount_won=0
     )
     db.session.add(game_session)
-    # It's often better to flush related objects together or after all adds if IDs are interdependent
-    # However, session_id is needed for BlackjackHand.
-
-    # Deal initial cards
-    player_initial_cards = [_deal_card(deck), _deal_card(deck)]
-    dealer_initial_cards = [_deal_card(deck), _deal_card(deck)]
 
-    # Player's first hand
-    # bet_sats in player_hand_obj is the bet for THIS specific hand.
-    player_hand_obj = _create_player_hand_obj(cards_list=player_initial_cards, bet_sats=bet_amount_sats, bet_multiplier=1.0)
+    # Deal initial cards: two to the player's first hand, then two to the dealer
+    player_initial_cards = [shoe.deal_str(), shoe.deal_str()]
+    dealer_initial_cards = [shoe.deal_str(), shoe.deal_str()]
+    events = [('deal', 0, card) for card in player_initial_cards] + \
+             [('deal', DEALER_INDEX, card) for card in dealer_initial_cards]
+    player_hands, dealer_hand_obj = replay_hand(events, bet_amount_sats)
     
-    # Dealer's hand
-    dealer_hand_obj = _create_player_hand_obj(cards_list=dealer_initial_cards) # No bet for dealer hand
-    
-    db.session.flush() # Flush game_session to get its ID if not already available.
+    db.session.flush() # Flush game_session to get its ID for BlackjackHand.
 
-    # Create BlackjackHand record
+    # Create BlackjackHand record; its cards live in the action log
     new_blackjack_hand = BlackjackHand(
         user_id=user.id,
         table_id=table.id,
-        session_id=game_session.id, # Ensure game_session.id is available
+        session_id=game_session.id,
         initial_bet=bet_amount_sats, # The bet for the first hand
         total_bet=bet_amount_sats,   # Overall total bet for the round, can increase with splits/doubles
-        player_hands=[player_hand_obj],
-        dealer_hand=dealer_hand_obj,
         status='active',
-        details={
-            'deck': deck,
-            'current_hand_index': 0,
-            'all_player_hands_played': False,
-            'dealer_up_card': dealer_initial_cards[0]
-        },
+        active_hand_index=0,
+        hand_count=1,
+        event_count=0,
+        details={'shoe': shoe.number}, # Which of the table's shoes the hand is dealt from
         created_at=current_time,
         updated_at=current_time
     )
     db.session.add(new_blackjack_hand)
-    db.session.flush() # Flush new_blackjack_hand to get its ID for the transaction.
+    db.session.flush() # Flush new_blackjack_hand to get its ID for the log and transaction.
 
     # Deduct bet from user balance
     user.balance -= bet_amount_sats
@@ -233,80 +331,34 @@ def handle_join_blackjack(user, table, bet_amount_sats):
         amount=-bet_amount_sats, # Negative for wager
         transaction_type='wager',
         details={'hand_id': new_blackjack_hand.id, 'table_id': table.id, 'session_id': game_session.id},
-        game_session_id=game_session.id, # Retaining for now
         blackjack_hand_id=new_blackjack_hand.id
     )
     db.session.add(wager_tx)
 
     # Update GameSession wagered amount
     game_session.amount_wagered += bet_amount_sats
-    
-    # db.session.commit() is handled by the route
 
-    # --- Prepare Return Value ---
-    # Frontend needs player's hand, dealer's UP-CARD, and possible actions
-    
-    # Check for initial Blackjack for player or dealer
-    player_blackjack = player_hand_obj['is_blackjack']
-    
-    # Only dealer's up-card is visible for dealer's initial total for player
-    visible_dealer_total, _ = _calculate_hand_value([dealer_initial_cards[0]])
-
-    # If player has BJ, they auto-stand. `all_player_hands_played` might become true.
-    if player_blackjack:
-        player_hand_obj['is_standing'] = True # Player stands on their Blackjack
-        new_blackjack_hand.details['all_player_hands_played'] = True # Since only one hand initially
-        # The game doesn't end immediately; dealer must check their hand.
-        # This state will be picked up by handle_blackjack_action if any action is attempted,
-        # or if a separate function to proceed game state is called.
-        # For now, the responsibility to proceed to dealer turn is after player 'stands' (implicitly here).
-
-    # Determine initial possible actions for the player for the *first hand*
-    can_double = (user.balance >= player_hand_obj['bet_sats']) and \
-                 len(player_hand_obj['cards']) == 2 and \
-                 not player_blackjack # Cannot double on a natural blackjack
-
-    can_split = False
-    if len(player_hand_obj['cards']) == 2 and \
-       (user.balance >= player_hand_obj['bet_sats']) and \
-       not player_blackjack: # Cannot split a natural blackjack
-        # Check if cards have same rank (e.g. '8' == '8')
-        # Card representation is "SR" (SuitRank, e.g. "HA", "D8")
-        if player_hand_obj['cards'][0][1] == player_hand_obj['cards'][1][1]:
-             can_split = True
-        # Optional: Add table rule for splitting any two 10-value cards
-        # elif _get_card_value(player_hand_obj['cards'][0]) == 10 and \
-        #      _get_card_value(player_hand_obj['cards'][1]) == 10 and \
-        #      table.rules.get('split_any_ten_value_card', False):
-        #    can_split = True
+    # A natural blackjack stands, and the dealer plays out straight away
+    active_hand_idx = _active_hand_index(player_hands)
+    if active_hand_idx is None:
+        events += _finish_hand(new_blackjack_hand, user, table, game_session, player_hands, dealer_hand_obj, shoe, current_time)
 
+    _log_actions(new_blackjack_hand, events, player_hands, dealer_hand_obj)
+    _update_hand_state(new_blackjack_hand, player_hands, active_hand_idx, current_time)
+    shoes.save(table, shoe) # Shoe snapshot commits with the hand
 
-    return {
-        "id": new_blackjack_hand.id,
-        "player_hands": [player_hand_obj], # List of hand objects
-        "dealer_hand": { # Only show dealer's up-card initially
-            "cards": [dealer_initial_cards[0], "FACE_DOWN"], # "FACE_DOWN" or similar placeholder
-            "total": visible_dealer_total, # Total of up-card only
-            "is_soft": _get_card_value(dealer_initial_cards[0]) == 11,
-        },
-        "status": new_blackjack_hand.status,
-        "total_bet": new_blackjack_hand.total_bet,
-        "can_hit": not player_blackjack, # Cannot hit if blackjack
-        "can_stand": True,
-        "can_double": can_double and not player_blackjack,
-        "can_split": can_split and not player_blackjack,
-        "is_player_turn": not player_blackjack, # If player has BJ, turn might be over for them
-        "active_hand_index": 0,
-        "deck_remaining_estimate": len(deck), # For UI, not for game logic decisions strictly
-        "user_balance_sats": user.balance,
-        "initial_bet_sats": bet_amount_sats # For reference
-    }
+    # db.session.commit() is handled by the route
+    response = _hand_response(new_blackjack_hand, player_hands, dealer_hand_obj, active_hand_idx, user, table, shoe)
+    response["initial_bet_sats"] = bet_amount_sats # For reference
+    return response
 
 
 def handle_blackjack_action(user, hand_id, action_type, hand_index_requested=0): # Default to 0 for non-split scenarios
-    """Handle a blackjack action (hit, stand, double, split)"""
     """
     Handles a player's action (hit, stand, double, split) for a given hand.
+
+    The hand is replayed from its action log; the action appends its actions (and the dealer's
+    draws once every player hand is done) and updates the hand's current state columns.
     """
     # --- Load State ---
     bj_hand = BlackjackHand.query.filter_by(id=hand_id, user_id=user.id).first()
@@ -315,58 +367,41 @@ def handle_blackjack_action(user, hand_id, action_type, hand_index_requested=0):
     if bj_hand.status != 'active':
         raise ValueError(f"Hand is not active. Current status: {bj_hand.status}")
 
-    table = BlackjackTable.query.get(bj_hand.table_id) # For table rules, although not heavily used yet
+    table = BlackjackTable.query.get(bj_hand.table_id)
     if not table:
         raise ValueError(f"Table with ID {bj_hand.table_id} not found.") # Should not happen
+    rules = table.rules or {}
 
     game_session = GameSession.query.get(bj_hand.session_id)
     if not game_session or game_session.session_end is not None:
          raise ValueError(f"Active GameSession not found for hand {hand_id}.")
 
+    # Hands dealt before tables had shoes carry their own deck
+    details = bj_hand.details or {}
+    legacy_deck = details.get('deck')
+    current_deck = cards.Deck.from_state(legacy_deck) if legacy_deck is not None else get_blackjack_shoes().get(table)
 
-    # --- Retrieve mutable state from details ---
-    # Make sure to work with copies if directly modifying lists/dicts from JSON field
-    # and then assign them back to trigger SQLAlchemy's change detection.
-    current_deck = list(bj_hand.details.get('deck', [])) # Get a mutable copy
-    active_hand_idx = bj_hand.details.get('current_hand_index', 0)
-    all_hands_played = bj_hand.details.get('all_player_hands_played', False)
+    events = _load_events(bj_hand)
+    logged = bj_hand.event_count # Actions before this are in the log already
+    player_hands, dealer_hand_obj = replay_hand(events, bj_hand.initial_bet)
+    active_hand_idx = _active_hand_index(player_hands)
 
-    # player_hands_list is a list of dictionaries (our hand objects)
-    player_hands_list = [dict(h) for h in bj_hand.player_hands] # Deep copy for modification
-    dealer_hand_obj = dict(bj_hand.dealer_hand) # Copy for modification
-
-    if all_hands_played:
+    if active_hand_idx is None:
         raise ValueError("Player has already played all hands. Dealer's turn or game ended.")
 
     if hand_index_requested != active_hand_idx:
         raise ValueError(f"Action requested for hand {hand_index_requested}, but current active hand is {active_hand_idx}.")
 
-    current_player_hand = player_hands_list[active_hand_idx]
-
-    if current_player_hand['is_standing'] or current_player_hand['is_busted'] or current_player_hand['is_blackjack']:
-        # This specific hand might be done, but current_hand_index might not have advanced.
-        # This check is more about preventing action on an already concluded hand.
-        raise ValueError(f"Hand {active_hand_idx} is already concluded (stood, busted, or blackjack).")
+    current_player_hand = player_hands[active_hand_idx]
         
     # --- Player Actions ---
-    action_taken_successfully = False
     current_time = datetime.now(timezone.utc)
 
     if action_type == 'hit':
-        new_card = _deal_card(current_deck)
-        current_player_hand['cards'].append(new_card)
-        total, is_soft = _calculate_hand_value(current_player_hand['cards'])
-        current_player_hand['total'] = total
-        current_player_hand['is_soft'] = is_soft
-        current_player_hand['is_busted'] = total > 21
-        
-        if total >= 21: # Auto-stand if 21 or busted
-            current_player_hand['is_standing'] = True
-        action_taken_successfully = True
+        events.append(('hit', active_hand_idx, current_deck.deal_str()))
 
     elif action_type == 'stand':
-        current_player_hand['is_standing'] = True
-        action_taken_successfully = True
+        events.append(('stand', active_hand_idx, None))
 
     elif action_type == 'double':
         # Validation for double:
@@ -375,289 +410,166 @@ def handle_blackjack_action(user, hand_id, action_type, hand_index_requested=0):
         if user.balance < current_player_hand['bet_sats']: # Bet for this hand, not initial_bet of whole game
             raise ValueError(f"Insufficient balance to double. Need {current_player_hand['bet_sats']} more.")
 
-        # Perform double:
-        additional_bet_for_double = current_player_hand['bet_sats'] # The amount for double is same as original hand bet
-        user.balance -= additional_bet_for_double
-        bj_hand.total_bet += additional_bet_for_double
-        game_session.amount_wagered += additional_bet_for_double
+        # Perform double: the amount for double is same as original hand bet
+        _place_extra_bet(user, bj_hand, table, game_session, current_player_hand['bet_sats'],
+                         {'reason': 'double_down', 'hand_index': active_hand_idx})
 
-        # Update wagering progress for the doubled portion of the bet
-        _update_wagering_progress(user, additional_bet_for_double, db.session)
-        
-        current_player_hand['bet_multiplier'] = 2.0
-        current_player_hand['is_doubled'] = True # Mark as doubled
-
-        # Create additional wager transaction
-        double_tx = Transaction(
-            user_id=user.id,
-            amount=-current_player_hand['bet_sats'],
-            transaction_type='wager',
-            details={
-                'reason': 'double_down',
-                'hand_id': bj_hand.id,
-                'hand_index': active_hand_idx,
-                'table_id': table.id,
-                'session_id': game_session.id
-            },
-            game_session_id=game_session.id, # Retaining for now
-            blackjack_hand_id=bj_hand.id
-        )
-        db.session.add(double_tx)
-
-        # Deal one more card
-        new_card = _deal_card(current_deck)
-        current_player_hand['cards'].append(new_card)
-        total, is_soft = _calculate_hand_value(current_player_hand['cards'])
-        current_player_hand['total'] = total
-        current_player_hand['is_soft'] = is_soft
-        current_player_hand['is_busted'] = total > 21
-        current_player_hand['is_standing'] = True # Player stands after doubling
-        action_taken_successfully = True
+        # Deal one more card; the player stands after doubling
+        events.append(('double', active_hand_idx, current_deck.deal_str()))
 
     elif action_type == 'split':
         # Validation for split:
         if len(current_player_hand['cards']) != 2:
             raise ValueError("Split is only allowed on the first two cards of a hand.")
         
-        card1_rank = current_player_hand['cards'][0][1]
-        card2_rank = current_player_hand['cards'][1][1]
         # Standard rule: cards must be of the same rank (e.g. 88, AA, KK). Some allow any 10-value cards.
-        # For simplicity, only same rank for now. _get_card_value could be used for 10-value check.
-        if card1_rank != card2_rank:
+        if current_player_hand['cards'][0][1] != current_player_hand['cards'][1][1]:
             raise ValueError("Split is only allowed with two cards of the same rank.")
         if user.balance < current_player_hand['bet_sats']:
             raise ValueError(f"Insufficient balance to split. Need {current_player_hand['bet_sats']} for the new hand.")
 
-        # Perform split:
-        bet_for_new_split_hand = current_player_hand['bet_sats'] # Bet for the new hand is same as original
-        user.balance -= bet_for_new_split_hand
-        bj_hand.total_bet += bet_for_new_split_hand
-        game_session.amount_wagered += bet_for_new_split_hand
-
-        # Update wagering progress for the bet on the new split hand
-        _update_wagering_progress(user, bet_for_new_split_hand, db.session)
-
-        # Create additional wager transaction for the new hand's bet
-        split_tx = Transaction(
-            user_id=user.id,
-            amount=-current_player_hand['bet_sats'],
-            transaction_type='wager',
-            details={
-                'reason': 'split',
-                'hand_id': bj_hand.id,
-                'new_hand_index': len(player_hands_list),
-                'table_id': table.id,
-                'session_id': game_session.id
-            },
-            game_session_id=game_session.id, # Retaining for now
-            blackjack_hand_id=bj_hand.id
-        )
-        db.session.add(split_tx)
-
-        # Original hand keeps first card, new hand gets second card
-        original_hand_first_card = current_player_hand['cards'][0]
-        new_hand_first_card = current_player_hand['cards'][1]
-
-        # Re-initialize current hand (it was split)
-        current_player_hand['cards'] = [original_hand_first_card]
-        # Deal one new card to it
-        current_player_hand['cards'].append(_deal_card(current_deck))
-        total, is_soft = _calculate_hand_value(current_player_hand['cards'])
-        current_player_hand['total'] = total
-        current_player_hand['is_soft'] = is_soft
-        current_player_hand['is_busted'] = total > 21
-        current_player_hand['is_blackjack'] = (total == 21 and len(current_player_hand['cards']) == 2)
-        current_player_hand['is_standing'] = current_player_hand['is_blackjack'] # Auto-stand on BJ after split (if not Ace split rule)
-        # Bet multiplier remains 1.0 for the split hands initially. is_doubled is False.
-
-        # Table Rule: one_card_after_split_ace = table.rules.get('one_card_after_split_ace', True)
-        # For this task, assume the rule is always True.
-        is_ace_split = original_hand_first_card[1] == 'A'
-        if is_ace_split and table.rules.get('one_card_after_split_ace', True):
-            current_player_hand['is_standing'] = True
-            # is_blackjack would have been set above if applicable (Ace + 10-value card)
-
-        # Create the new hand object for the list
-        new_player_split_hand_cards = [new_hand_first_card, _deal_card(current_deck)]
-        new_player_split_hand = _create_player_hand_obj(
-            cards_list=new_player_split_hand_cards,
-            bet_sats=current_player_hand['bet_sats'] # Same bet amount as the hand it split from
-        )
-        # is_blackjack for new split hand is calculated by _create_player_hand_obj
-        if new_player_split_hand['is_blackjack']:
-             new_player_split_hand['is_standing'] = True # Auto-stand on BJ
-
-        if is_ace_split and table.rules.get('one_card_after_split_ace', True):
-            new_player_split_hand['is_standing'] = True
-            # is_blackjack would have been set by _create_player_hand_obj if applicable
-
-        # Note: The check for no re-splitting Aces will be handled in the can_split_flag logic later.
-
-        player_hands_list.insert(active_hand_idx + 1, new_player_split_hand)
-        action_taken_successfully = True
-        # current_hand_index does not advance yet, player plays the first of the split hands.
-    
+        # Perform split: bet for the new hand is same as original
+        _place_extra_bet(user, bj_hand, table, game_session, current_player_hand['bet_sats'],
+                         {'reason': 'split', 'new_hand_index': len(player_hands)})
+
+        # Each hand is dealt a second card; a blackjack stands (replay_hand), as do split aces
+        # when the table deals them one card only
+        events.append(('split', active_hand_idx, current_deck.deal_str()))
+        events.append(('deal', active_hand_idx + 1, current_deck.deal_str()))
+        if current_player_hand['cards'][0][1] == 'A' and rules.get('one_card_after_split_ace', True):
+            events.extend([('stand', active_hand_idx, None), ('stand', active_hand_idx + 1, None)])
+        # The player plays the first of the split hands next.
+
     else:
         raise ValueError(f"Invalid action type: {action_type}")
 
     # --- Update State & Check for Next Step ---
-    new_action_record = None
-    if action_taken_successfully:
-        # Record the BlackjackAction
-        action_details_for_log = {
-            "hand_cards": current_player_hand['cards'],
-            "hand_total": current_player_hand['total'],
-            "is_busted": current_player_hand['is_busted'],
-            "is_standing": current_player_hand['is_standing']
-        }
-        if action_type in ['hit', 'double']:
-            action_details_for_log['card_dealt'] = current_player_hand['cards'][-1] # Last card added
-
-        new_action_record = BlackjackAction(
-            blackjack_hand_id=bj_hand.id,
-            action_type=action_type,
-            hand_index=active_hand_idx, # The hand index on which action was performed
-            # card_dealt field can be tricky if multiple cards (split) or no cards (stand)
-            # For simplicity, storing details in JSON might be better if card_dealt is specific
-            action_details=action_details_for_log
-            # Or, if BlackjackAction has specific fields like 'card_dealt_str' and 'resulting_total_int':
-            # card_dealt_str = action_details_for_log.get('card_dealt'),
-            # resulting_total_int = current_player_hand['total']
-        )
-        db.session.add(new_action_record)
-
-    # Advance to next hand if current hand is stood, busted, or blackjack (unless it was a split, then play current hand index first)
-    if current_player_hand['is_standing'] or current_player_hand['is_busted'] or current_player_hand['is_blackjack']:
-        if active_hand_idx < len(player_hands_list) - 1:
-            active_hand_idx += 1
-        else:
-            all_hands_played = True # All player hands have been played
+    player_hands, dealer_hand_obj = replay_hand(events, bj_hand.initial_bet)
+    active_hand_idx = _active_hand_index(player_hands)
+
+    # --- Dealer's Turn & Outcome Determination ---
+    if active_hand_idx is None:
+        events += _finish_hand(bj_hand, user, table, game_session, player_hands, dealer_hand_obj, current_deck, current_time)
 
     # --- Update DB ---
-    bj_hand.player_hands = player_hands_list # Assign back the modified list
-    # dealer_hand_obj might not have changed yet, but assign if it could in future
-    # bj_hand.dealer_hand = dealer_hand_obj
+    _log_actions(bj_hand, events[logged:], player_hands, dealer_hand_obj)
+    _update_hand_state(bj_hand, player_hands, active_hand_idx, current_time)
+    if legacy_deck is not None:
+        bj_hand.details = {**details, 'deck': current_deck.to_state()}
+    else:
+        get_blackjack_shoes().save(table, current_deck)
 
-    bj_hand.details['deck'] = current_deck
-    bj_hand.details['current_hand_index'] = active_hand_idx
-    bj_hand.details['all_player_hands_played'] = all_hands_played
-    bj_hand.updated_at = current_time
+    # db.session.commit() # Handled by route
+    return _hand_response(bj_hand, player_hands, dealer_hand_obj, active_hand_idx, user, table, current_deck)
 
-    # --- Dealer's Turn & Outcome Determination ---
-    if all_hands_played:
-        # Dealer reveals face down card and plays according to rules
-        _play_dealer_turn(dealer_hand_obj, current_deck, table.rules) # Modifies dealer_hand_obj
-        bj_hand.dealer_hand = dealer_hand_obj # Update dealer hand in DB object
-
-        # Determine winner for each player hand
-        total_amount_returned_to_player = 0
-        for p_hand in player_hands_list:
-            amount_returned_for_hand, result_str = _determine_winner_for_hand(p_hand, dealer_hand_obj, table.rules)
-            p_hand['result'] = result_str
-            total_amount_returned_to_player += amount_returned_for_hand
-        
-        # total_bet was the amount deducted from user's balance throughout the hand (initial + doubles/splits)
-        # profit_sats is the net change to user's balance from this game's outcome.
-        profit_sats = total_amount_returned_to_player - bj_hand.total_bet
-        
-        bj_hand.win_amount = profit_sats # Store the net profit/loss for the hand summary
-        bj_hand.status = 'completed'
-        bj_hand.completed_at = current_time
-
-        if total_amount_returned_to_player > 0: # If player gets any money back (win or push)
-            user.balance += total_amount_returned_to_player # Add the full amount they get back
-
-            # The 'win' transaction should reflect the actual amount credited back to balance if positive.
-            # Or, it could represent net profit. Conventionally, for wins, it's the amount won excluding stake.
-            # However, since stake was already taken, returning the full amount won (including stake part of it)
-            # in the transaction record makes sense if it's seen as "money in".
-            # Let's make the 'win' transaction the actual profit. If it's a push, profit is 0.
-            # If only losses, no positive win transaction.
-
-            # If profit_sats > 0, it's a net win.
-            # If profit_sats == 0 (and total_amount_returned_to_player > 0), it's a push, money returned.
-            # If profit_sats < 0, it's a net loss (already accounted for by bets).
-
-            # Create a 'win' transaction for the net profit, if any.
-            # If total_amount_returned_to_player > bj_hand.total_bet (i.e. profit_sats > 0)
-            if profit_sats > 0:
-                 win_tx = Transaction(
-                    user_id=user.id,
-                    amount=profit_sats, # Net profit
-                    transaction_type='win',
-                    details={
-                        'hand_id': bj_hand.id,
-                        'table_id': table.id,
-                        'session_id': game_session.id,
-                        'player_final_hands': player_hands_list, # Store final state for audit
-                        'dealer_final_hand': dealer_hand_obj
-                    },
-                    game_session_id=game_session.id, # Retaining for now
-                    blackjack_hand_id=bj_hand.id
-                )
-                 db.session.add(win_tx)
-                 game_session.amount_won += profit_sats # Session tracks net profit from wins
-
-            # If it was a PUSH overall (profit_sats == 0 but money was returned),
-            # some systems might log a "push" transaction or similar.
-            # For now, only explicit profit is logged as a "win" transaction.
-            # The user.balance is correctly updated with the total amount returned.
-        
-        game_session.session_end = current_time # End session as game is complete
-        game_session.updated_at = current_time # Update session timestamp
 
-    # db.session.commit() # Handled by route
-    bj_hand.updated_at = current_time # Ensure parent hand timestamp is also updated.
+def _place_extra_bet(user, bj_hand, table, game_session, amount, tx_details):
+    """Take a double or split bet from the player, with its wager transaction"""
+    user.balance -= amount
+    bj_hand.total_bet += amount
+    game_session.amount_wagered += amount
 
-    # --- Prepare Return Value ---
-    # Similar to join, but reflects current state
-    # Need to determine can_double, can_split for the *new* active_hand_idx if game is ongoing
-    
-    # Dealer's up-card for UI display if game is ongoing
-    dealer_up_card_display = bj_hand.details.get('dealer_up_card', dealer_hand_obj['cards'][0] if dealer_hand_obj['cards'] else "UNKNOWN")
-    visible_dealer_total_display, _ = _calculate_hand_value([dealer_up_card_display]) if dealer_up_card_display != "UNKNOWN" else (0, False)
-
-    response_dealer_hand = {
-        "cards": [dealer_up_card_display, "FACE_DOWN"] if not all_hands_played else dealer_hand_obj['cards'],
-        "total": visible_dealer_total_display if not all_hands_played else dealer_hand_obj['total'],
-        "is_soft": (_get_card_value(dealer_up_card_display) == 11) if not all_hands_played else dealer_hand_obj['is_soft'],
-    }
-    if all_hands_played: # If dealer played, show full dealer hand info from dealer_hand_obj
-        response_dealer_hand.update(dealer_hand_obj)
+    # Update wagering progress for the extra bet
+    _update_wagering_progress(user, amount, db.session)
+
+    db.session.add(Transaction(
+        user_id=user.id,
+        amount=-amount,
+        transaction_type='wager',
+        details={**tx_details, 'hand_id': bj_hand.id, 'table_id': table.id, 'session_id': game_session.id},
+        blackjack_hand_id=bj_hand.id
+    ))
 
 
+def _finish_hand(bj_hand, user, table, game_session, player_hands, dealer_hand_obj, deck, current_time):
+    """
+    Once every player hand is done: the dealer plays out, each player hand is settled and the
+    winnings are paid. Returns the dealer's draws as actions for the log.
+    """
+    # Dealer reveals face down card and plays according to rules
+    dealt = len(dealer_hand_obj['cards'])
+    _play_dealer_turn(dealer_hand_obj, deck, table.rules) # Modifies dealer_hand_obj
+
+    # Determine winner for each player hand
+    total_amount_returned_to_player = 0
+    for p_hand in player_hands:
+        amount_returned_for_hand, result_str = _determine_winner_for_hand(p_hand, dealer_hand_obj, table.rules)
+        p_hand['result'] = result_str
+        total_amount_returned_to_player += amount_returned_for_hand
+
+    # total_bet was the amount deducted from user's balance throughout the hand (initial + doubles/splits)
+    # profit_sats is the net change to user's balance from this game's outcome.
+    profit_sats = total_amount_returned_to_player - bj_hand.total_bet
+
+    bj_hand.win_amount = profit_sats # Store the net profit/loss for the hand summary
+    bj_hand.status = 'completed'
+    bj_hand.completed_at = current_time
+
+    if total_amount_returned_to_player > 0: # If player gets any money back (win or push)
+        user.balance += total_amount_returned_to_player # Add the full amount they get back
+
+        # A 'win' transaction records the net profit, if any. A push returns the stake
+        # without one; the final hands can be replayed from the hand's action log.
+        if profit_sats > 0:
+            db.session.add(Transaction(
+                user_id=user.id,
+                amount=profit_sats, # Net profit
+                transaction_type='win',
+                details={
+                    'hand_id': bj_hand.id,
+                    'table_id': table.id,
+                    'session_id': game_session.id,
+                    'results': [hand['result'] for hand in player_hands]
+                },
+                blackjack_hand_id=bj_hand.id
+            ))
+            game_session.amount_won += profit_sats # Session tracks net profit from wins
+
+    game_session.session_end = current_time # End session as game is complete
+    game_session.updated_at = current_time # Update session timestamp
+    return [('deal', DEALER_INDEX, card) for card in dealer_hand_obj['cards'][dealt:]]
+
+
+def _update_hand_state(bj_hand, player_hands, active_hand_idx, current_time):
+    """The hand's fixed-width current state; -1 as the active hand once the player is done"""
+    bj_hand.active_hand_index = active_hand_idx if active_hand_idx is not None else -1
+    bj_hand.hand_count = len(player_hands)
+    bj_hand.updated_at = current_time
+
+
+def _hand_response(bj_hand, player_hands, dealer_hand_obj, active_hand_idx, user, table, deck):
+    """The hand as the player sees it, with the actions open to them on the active hand"""
+    all_hands_played = active_hand_idx is None
+    rules = table.rules or {}
+
+    # Only the dealer's up-card shows until the dealer has played
+    response_dealer_hand = dict(dealer_hand_obj) if all_hands_played else _hidden_dealer_hand(dealer_hand_obj)
+
     # UI flags for the current active hand
-    current_active_p_hand = player_hands_list[active_hand_idx] if not all_hands_played else player_hands_list[0] # fallback for completed game display
-    
-    can_hit_flag = not (all_hands_played or current_active_p_hand['is_standing'] or current_active_p_hand['is_busted'] or current_active_p_hand['is_blackjack'])
-    can_stand_flag = not (all_hands_played or current_active_p_hand['is_standing'] or current_active_p_hand['is_busted'] or current_active_p_hand['is_blackjack'])
+    current_active_p_hand = player_hands[active_hand_idx] if not all_hands_played else player_hands[0] # fallback for completed game display
+    hand_in_play = not (all_hands_played or current_active_p_hand['is_standing'] or current_active_p_hand['is_busted'] or current_active_p_hand['is_blackjack'])
     
     can_double_flag = False
-    if not all_hands_played and len(current_active_p_hand['cards']) == 2 and \
-       user.balance >= current_active_p_hand['bet_sats'] and \
-       not (current_active_p_hand['is_standing'] or current_active_p_hand['is_busted'] or current_active_p_hand['is_blackjack']):
+    if hand_in_play and len(current_active_p_hand['cards']) == 2 and \
+       user.balance >= current_active_p_hand['bet_sats']:
 
         # Table Rule: allow_double_after_split = table.rules.get('allow_double_after_split', True)
-        allow_double_after_split = table.rules.get('allow_double_after_split', True)
-        if len(player_hands_list) > 1: # Indicates a split has occurred
-            if allow_double_after_split:
-                can_double_flag = True
-            # If !allow_double_after_split, can_double_flag remains False
+        if len(player_hands) > 1: # Indicates a split has occurred
+            can_double_flag = rules.get('allow_double_after_split', True)
         else: # Not a split hand, can double is generally allowed
             can_double_flag = True
 
     can_split_flag = False
     # Table Rule: max_split_hands = table.rules.get("max_split_hands", 4)
-    max_split_hands = table.rules.get("max_split_hands", 4)
+    max_split_hands = rules.get("max_split_hands", 4)
     # Table Rule: allow_resplit_aces = table.rules.get('allow_resplit_aces', False)
-    allow_resplit_aces = table.rules.get('allow_resplit_aces', False)
+    allow_resplit_aces = rules.get('allow_resplit_aces', False)
 
-    if not all_hands_played and len(current_active_p_hand['cards']) == 2 and \
+    if hand_in_play and len(current_active_p_hand['cards']) == 2 and \
        user.balance >= current_active_p_hand['bet_sats'] and \
-       current_active_p_hand['cards'][0][1] == current_active_p_hand['cards'][1][1] and \
-       not (current_active_p_hand['is_standing'] or current_active_p_hand['is_busted'] or current_active_p_hand['is_blackjack']):
+       current_active_p_hand['cards'][0][1] == current_active_p_hand['cards'][1][1]:
 
-        if len(player_hands_list) >= max_split_hands:
+        if len(player_hands) >= max_split_hands:
             can_split_flag = False # Reached max split hands
         elif current_active_p_hand['cards'][0][1] == 'A' and not allow_resplit_aces:
             # This condition checks if the *first card of the current hand* is an Ace.
@@ -667,32 +579,31 @@ def handle_blackjack_action(user, hand_id, action_type, hand_index_requested=0):
         else:
             can_split_flag = True
 
-
     return {
         "id": bj_hand.id,
-        "player_hands": player_hands_list,
+        "player_hands": player_hands,
         "dealer_hand": response_dealer_hand,
         "status": bj_hand.status,
         "total_bet": bj_hand.total_bet,
         "win_amount": bj_hand.win_amount if bj_hand.status == 'completed' else 0,
-        "can_hit": can_hit_flag,
-        "can_stand": can_stand_flag,
+        "can_hit": hand_in_play,
+        "can_stand": hand_in_play,
         "can_double": can_double_flag,
         "can_split": can_split_flag,
         "is_player_turn": not all_hands_played,
         "active_hand_index": active_hand_idx if not all_hands_played else -1, # -1 if game over
-        "deck_remaining_estimate": len(current_deck),
+        "deck_remaining_estimate": deck.remaining, # For UI, not for game logic decisions strictly
         "user_balance_sats": user.balance,
          # Include results if completed
-        "results_summary": [h.get('result') for h in player_hands_list] if all_hands_played else []
+        "results_summary": [h.get('result') for h in player_hands] if all_hands_played else []
     }
 
 
 # Helper for dealer's turn
-def _play_dealer_turn(dealer_hand_obj, deck_list, table_rules):
+def _play_dealer_turn(dealer_hand_obj, deck, table_rules):
     """
     Dealer plays their hand according to table rules.
-    Modifies dealer_hand_obj and deck_list in place.
+    Modifies dealer_hand_obj in place and deals from deck (the table's BlackjackShoe, or a legacy hand's cards.Deck).
     # `table_rules` is a dict, e.g., {'dealer_stands_on': 'soft17' or 'hard17', 'blackjack_payout': 1.5}
     """
     # Dealer reveals second card implicitly by calculating full hand value
@@ -721,10 +632,10 @@ def _play_dealer_turn(dealer_hand_obj, deck_list, table_rules):
             break # Dealer busted, stop hitting.
 
         if current_total < 17:
-            dealer_hand_obj['cards'].append(_deal_card(deck_list))
+            dealer_hand_obj['cards'].append(deck.deal_str())
         elif current_total == 17:
             if current_is_soft and not dealer_stands_on_soft17: # Dealer hits on soft 17
-                dealer_hand_obj['cards'].append(_deal_card(deck_list))
+                dealer_hand_obj['cards'].append(deck.deal_str())
             else: # Stands on hard 17, or soft 17 if rule is to stand on soft 17
                 break
         else: # current_total > 17
@@ -0,0 +1,474 @@
+"""
+Blackjack rules simulator and house-edge calculator.
+
+Plays basic strategy (or a strategy table loaded from JSON) against the rules of a
+BlackjackTable row and reports the house edge, the variance per round and the change in
+house edge from flipping each rule, all with 95% confidence intervals. Use it to price any
+change to BlackjackTable.rules or deck_count before it goes live.
+
+    python -m casino_be.utils.blackjack_simulator --table-id 3 --rounds 100000000 --workers 8
+    python -m casino_be.utils.blackjack_simulator --decks 6 --rules '{"dealer_stands_on": "hard17"}' --deltas
+
+Hands follow blackjack_helper exactly: _calculate_hand_value totals, _play_dealer_turn
+(dealer_stands_on 'soft17' stands on all 17s, 'hard17' hits soft 17), and
+_determine_winner_for_hand payouts. In particular the dealer does not peek, so a dealer
+blackjack also takes doubles and splits, and two cards totalling 21 after a split are paid as a
+blackjack. The default strategy is multi-deck basic strategy adjusted for no peek. Splits follow
+the limits the game offers: max_split_hands, allow_resplit_aces, one_card_after_split_ace and
+allow_double_after_split.
+
+Every round is dealt from a freshly shuffled deck_count shoe. Each array row is one round, and
+cards are drawn without replacement from that row's rank counts. Player decisions, splits and the
+dealer's draw are applied to all rounds still needing them in one numpy step. Results are
+payouts in units of the initial bet, before satoshi rounding. Workers return exact sums, so a
+multi-process run merges to the same statistics as a single process over the same rounds.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_RULES = {
+    'dealer_stands_on': 'soft17',
+    'blackjack_payout': 1.5,
+    'allow_double_after_split': True,
+    'max_split_hands': 4,
+    'allow_resplit_aces': False,
+    'one_card_after_split_ace': True,
+}
+DEFAULT_DECKS = 6
+BATCH_SIZE = 100_000
+Z_95 = 1.96
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+ACE = 12
+RANK_VALUES = [2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11]
+
+# Strategy cells, one letter per dealer up-card 2..9, ten, ace
+HIT, STAND, DOUBLE, DOUBLE_OR_STAND, SPLIT, SPLIT_IF_DAS = range(6)
+ACTION_CODES = {'H': HIT, 'S': STAND, 'D': DOUBLE, 'X': DOUBLE_OR_STAND, 'P': SPLIT, 'Q': SPLIT_IF_DAS}
+
+# H hit, S stand, D double (else hit), X double (else stand), P split, Q split if doubling after split is allowed (else hit)
+BASIC_STRATEGY = {
+    'hard': {
+        **{str(total): 'HHHHHHHHHH' for total in range(4, 9)},
+        '9': 'HDDDDHHHHH',
+        '10': 'DDDDDDDDHH',
+        '11': 'DDDDDDDDHH',
+        '12': 'HHSSSHHHHH',
+        **{str(total): 'SSSSSHHHHH' for total in range(13, 17)},
+        **{str(total): 'SSSSSSSSSS' for total in range(17, 22)},
+    },
+    'soft': {
+        '12': 'HHHHHHHHHH',  # Two aces that cannot be split again
+        '13': 'HHHDDHHHHH',
+        '14': 'HHHDDHHHHH',
+        '15': 'HHDDDHHHHH',
+        '16': 'HHDDDHHHHH',
+        '17': 'HDDDDHHHHH',
+        '18': 'SXXXXSSHHH',
+        **{str(total): 'SSSSSSSSSS' for total in range(19, 22)},
+    },
+    'pairs': {
+        '2': 'QQPPPPHHHH',
+        '3': 'QQPPPPHHHH',
+        '4': 'HHHQQHHHHH',
+        '5': 'DDDDDDDDHH',
+        '6': 'QPPPPHHHHH',
+        '7': 'PPPPPPHHHH',
+        '8': 'PPPPPPPPHH',
+        '9': 'PPPPPSPPSS',
+        'T': 'SSSSSSSSSS',
+        'A': 'PPPPPPPPPH',
+    },
+}
+
+
+def table_rules(rules=None):
+    """BlackjackTable.rules with the same defaults blackjack_helper applies"""
+    merged = dict(DEFAULT_RULES)
+    merged.update({key: value for key, value in (rules or {}).items() if key in DEFAULT_RULES})
+    return merged
+
+
+def strategy_tables(strategy=None):
+    """
+    Strategy dict -> (hard[22, 10], soft[22, 10], pairs[13, 10]) action codes. Entries in
+    `strategy` override the basic strategy; pairs of J, Q or K fall back to the 'T' row.
+    """
+    hard = np.full((22, 10), STAND, dtype=np.int8)
+    soft = np.full((22, 10), STAND, dtype=np.int8)
+    pairs = np.full((13, 10), STAND, dtype=np.int8)
+    tables = {section: dict(rows) for section, rows in BASIC_STRATEGY.items()}
+    for section, rows in (strategy or {}).items():
+        if section not in tables:
+            raise ValueError(f"Unknown strategy section {section!r}; expected hard, soft or pairs.")
+        tables[section].update({str(key): value for key, value in rows.items()})
+
+    def row(key, cells):
+        if len(cells) != 10 or any(cell not in ACTION_CODES for cell in cells):
+            raise ValueError(f"Strategy row {key!r} must be 10 of {''.join(ACTION_CODES)}: {cells!r}")
+        return [ACTION_CODES[cell] for cell in cells]
+
+    for key, cells in tables['hard'].items():
+        hard[int(key)] = row(key, cells)
+    for key, cells in tables['soft'].items():
+        soft[int(key)] = row(key, cells)
+    for rank_index, rank in enumerate(RANKS):
+        key = rank if rank in tables['pairs'] else ('T' if RANK_VALUES[rank_index] == 10 else None)
+        if key is not None:
+            pairs[rank_index] = row(rank, tables['pairs'][key])
+    return hard, soft, pairs
+
+
+class _Rounds:
+    """Card counts and hand state for a batch of rounds, one row per round"""
+
+    def __init__(self, rng, count, decks, rules, tables, stacked=None):
+        self.rng = rng
+        self.n = count
+        self.rules = rules
+        self.hard, self.soft, self.pairs = tables
+        self.max_hands = max(1, int(rules['max_split_hands']))
+        self.values = np.array(RANK_VALUES, dtype=np.int16)
+        self.counts = np.full((count, 13), 4 * decks, dtype=np.int16)
+        self.left = np.full(count, 52 * decks, dtype=np.int32)
+        self.stacked = stacked  # (count, k) ranks to deal in order instead of shuffling, for tests
+        self.dealt = np.zeros(count, dtype=np.int32)
+
+        shape = (count, self.max_hands)
+        self.total = np.zeros(shape, dtype=np.int16)
+        self.soft_aces = np.zeros(shape, dtype=np.int8)   # Aces still counted as 11
+        self.ncards = np.zeros(shape, dtype=np.int8)
+        self.first = np.zeros(shape, dtype=np.int8)       # Rank of the first and second cards, for splits
+        self.second = np.zeros(shape, dtype=np.int8)
+        self.bet = np.ones(shape, dtype=np.int8)
+        self.done = np.zeros(shape, dtype=bool)
+        self.blackjack = np.zeros(shape, dtype=bool)
+        self.hands = np.ones(count, dtype=np.int8)
+
+    def draw(self, rows):
+        """One card (rank index) for each round in rows, without replacement from that round's shoe"""
+        if self.stacked is not None:
+            ranks = self.stacked[rows, self.dealt[rows]]
+            self.dealt[rows] += 1
+            return ranks
+        pick = (self.rng.random(len(rows)) * self.left[rows]).astype(np.int32)
+        ranks = (np.cumsum(self.counts[rows], axis=1) <= pick[:, None]).sum(axis=1)
+        self.counts[rows, ranks] -= 1
+        self.left[rows] -= 1
+        return ranks
+
+    def add_card(self, rows, hand, ranks):
+        total = self.total[rows, hand] + self.values[ranks]
+        aces = self.soft_aces[rows, hand] + (ranks == ACE)
+        for _ in range(2):  # One new card can turn at most two aces back into 1s
+            soften = (total > 21) & (aces > 0)
+            total = total - 10 * soften
+            aces = aces - soften
+        self.total[rows, hand] = total
+        self.soft_aces[rows, hand] = aces
+        self.ncards[rows, hand] += 1
+        return total
+
+    def start_hand(self, rows, hand, first, second):
+        """A two-card player hand; a natural (or 21 after a split) stands at once, as the game does"""
+        self.total[rows, hand] = 0
+        self.soft_aces[rows, hand] = 0
+        self.ncards[rows, hand] = 0
+        self.add_card(rows, hand, first)
+        total = self.add_card(rows, hand, second)
+        self.first[rows, hand] = first
+        self.second[rows, hand] = second
+        self.blackjack[rows, hand] = total == 21
+        self.done[rows, hand] = total == 21
+
+
+def play_batch(rng, count, decks, rules, tables, stacked=None):
+    """
+    Play `count` rounds; returns (net result per round, amount wagered per round), both in
+    units of the initial bet
+    """
+    rules = table_rules(rules)
+    r = _Rounds(rng, count, decks, rules, tables, stacked)
+    everyone = np.arange(count)
+    player_first = r.draw(everyone)
+    dealer_up = r.draw(everyone)
+    player_second = r.draw(everyone)
+    dealer_hole = r.draw(everyone)
+    r.start_hand(everyone, 0, player_first, player_second)
+    up = np.minimum(r.values[dealer_up], 11) - 2  # Strategy column: 2..10 -> 0..8, ace -> 9
+
+    das = bool(rules['allow_double_after_split'])
+    resplit_aces = bool(rules['allow_resplit_aces'])
+    one_card_aces = bool(rules['one_card_after_split_ace'])
+
+    for hand in range(r.max_hands):
+        while True:
+            rows = np.flatnonzero((r.hands > hand) & ~r.done[:, hand])
+            if not len(rows):
+                break
+            total = r.total[rows, hand]
+            two_cards = r.ncards[rows, hand] == 2
+            first = r.first[rows, hand]
+            pair = two_cards & (first == r.second[rows, hand])
+            action = np.where(r.soft_aces[rows, hand] > 0, r.soft[total, up[rows]], r.hard[total, up[rows]])
+
+            can_split = pair & (r.hands[rows] < r.max_hands)
+            if not resplit_aces:
+                can_split &= ~((first == ACE) & (r.hands[rows] > 1))
+            pair_action = r.pairs[first, up[rows]]
+            split = can_split & ((pair_action == SPLIT) | ((pair_action == SPLIT_IF_DAS) & das))
+            action = np.where(can_split & (pair_action != SPLIT) & (pair_action != SPLIT_IF_DAS), pair_action, action)
+            action = np.where(split, SPLIT, action)
+
+            can_double = two_cards & ((r.hands[rows] == 1) | das)
+            action = np.where(action == DOUBLE, np.where(can_double, DOUBLE, HIT), action)
+            action = np.where(action == DOUBLE_OR_STAND, np.where(can_double, DOUBLE, STAND), action)
+            action = np.where(action == SPLIT_IF_DAS, HIT, action)
+
+            r.done[rows[action == STAND], hand] = True
+
+            hitting = rows[(action == HIT) | (action == DOUBLE)]
+            if len(hitting):
+                new_total = r.add_card(hitting, hand, r.draw(hitting))
+                doubled = hitting[action[(action == HIT) | (action == DOUBLE)] == DOUBLE]
+                r.bet[doubled, hand] = 2
+                r.done[doubled, hand] = True
+                r.done[hitting[new_total > 21], hand] = True
+
+            splitting = rows[action == SPLIT]
+            if len(splitting):
+                # The new hand goes last rather than next; cards are exchangeable, so the result is the same
+                new_hand = r.hands[splitting].astype(np.intp)
+                ranks = r.first[splitting, hand]
+                r.start_hand(splitting, hand, ranks, r.draw(splitting))
+                r.start_hand(splitting, new_hand, ranks, r.draw(splitting))
+                r.hands[splitting] += 1
+                if one_card_aces:
+                    aces = splitting[ranks == ACE]
+                    r.done[aces, hand] = True
+                    r.done[aces, new_hand[ranks == ACE]] = True
+
+    # Dealer plays out every round, as _play_dealer_turn does
+    dealer_total = np.zeros(count, dtype=np.int16)
+    dealer_aces = np.zeros(count, dtype=np.int8)
+
+    def dealer_card(rows, ranks):
+        total = dealer_total[rows] + r.values[ranks]
+        aces = dealer_aces[rows] + (ranks == ACE)
+        for _ in range(2):
+            soften = (total > 21) & (aces > 0)
+            total = total - 10 * soften
+            aces = aces - soften
+        dealer_total[rows] = total
+        dealer_aces[rows] = aces
+
+    dealer_card(everyone, dealer_up)
+    dealer_card(everyone, dealer_hole)
+    dealer_blackjack = dealer_total == 21
+    hits_soft_17 = rules['dealer_stands_on'] != 'soft17'
+    while True:
+        drawing = (dealer_total < 17) | ((dealer_total == 17) & (dealer_aces > 0) & hits_soft_17)
+        rows = np.flatnonzero(drawing)
+        if not len(rows):
+            break
+        dealer_card(rows, r.draw(rows))
+
+    # Settle each hand as _determine_winner_for_hand does
+    exists = np.arange(r.max_hands)[None, :] < r.hands[:, None]
+    bet = r.bet.astype(np.float64) * exists
+    total = r.total
+    dealer = dealer_total[:, None]
+    dealer_bj = dealer_blackjack[:, None]
+    busted = total > 21
+    net = np.select(
+        [busted, r.blackjack & dealer_bj, r.blackjack, dealer_bj, dealer > 21, total > dealer, total < dealer],
+        [-bet, 0.0, bet * float(rules['blackjack_payout']), -bet, bet, bet, -bet],
+        default=0.0,
+    )
+    return (net * exists).sum(axis=1), bet.sum(axis=1)
+
+
+def simulate_chunk(task):
+    """(rules, decks, rounds, seed, strategy) -> exact sums for merging across workers"""
+    rules, decks, rounds, seed, strategy = task
+    rng = np.random.default_rng(seed)
+    tables = strategy_tables(strategy)
+    sums = {'rounds': 0, 'net': 0.0, 'net_sq': 0.0, 'wagered': 0.0}
+    done = 0
+    while done < rounds:
+        batch = min(BATCH_SIZE, rounds - done)
+        net, wagered = play_batch(rng, batch, decks, rules, tables)
+        sums['rounds'] += batch
+        sums['net'] += float(net.sum())
+        sums['net_sq'] += float(np.square(net).sum())
+        sums['wagered'] += float(wagered.sum())
+        done += batch
+    return sums
+
+
+def _merge(total, sums):
+    for key, value in sums.items():
+        total[key] = total.get(key, 0) + value
+    return total
+
+
+def simulate(rules=None, decks=DEFAULT_DECKS, rounds=1_000_000, workers=1, seed=None, strategy=None):
+    """House edge, variance and 95% confidence interval for one rule set"""
+    rules = table_rules(rules)
+    seeds = np.random.SeedSequence(seed)
+    per_task = max(BATCH_SIZE, math.ceil(rounds / (workers * 4)))  # A few tasks per worker evens out stragglers
+    tasks = []
+    for start, child in zip(range(0, rounds, per_task), seeds.spawn(math.ceil(rounds / per_task))):
+        tasks.append((rules, decks, min(per_task, rounds - start), child, strategy))
+
+    sums = {}
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for task_sums in executor.map(simulate_chunk, tasks):
+                _merge(sums, task_sums)
+    else:
+        for task in tasks:
+            _merge(sums, simulate_chunk(task))
+    return summarize(sums, rules, decks)
+
+
+def summarize(sums, rules, decks):
+    n = sums['rounds']
+    mean = sums['net'] / n
+    variance = max(sums['net_sq'] / n - mean * mean, 0.0) * n / max(n - 1, 1)
+    stderr = math.sqrt(variance / n)
+    return {
+        'rules': rules,
+        'decks': decks,
+        'rounds': n,
+        'house_edge': -mean,  # Per initial bet
+        'house_edge_ci95': [-mean - Z_95 * stderr, -mean + Z_95 * stderr],
+        'stderr': stderr,
+        'variance': variance,
+        'std_dev': math.sqrt(variance),
+        'average_wager': sums['wagered'] / n,
+        'house_edge_per_wager': -sums['net'] / sums['wagered'],
+    }
+
+
+def rule_variations(rules, decks):
+    """(label, rules, decks) for each single-rule change from the given rules"""
+    rules = table_rules(rules)
+    flips = [
+        ('dealer_stands_on', 'hard17' if rules['dealer_stands_on'] == 'soft17' else 'soft17'),
+        ('blackjack_payout', 1.2 if rules['blackjack_payout'] != 1.2 else 1.5),
+        ('allow_double_after_split', not rules['allow_double_after_split']),
+        ('max_split_hands', 2 if rules['max_split_hands'] != 2 else 4),
+        ('allow_resplit_aces', not rules['allow_resplit_aces']),
+        ('one_card_after_split_ace', not rules['one_card_after_split_ace']),
+    ]
+    variations = [(f"{key}={value}", {**rules, key: value}, decks) for key, value in flips]
+    variations.append((f"decks={1 if decks != 1 else DEFAULT_DECKS}", rules, 1 if decks != 1 else DEFAULT_DECKS))
+    return variations
+
+
+def rule_deltas(rules=None, decks=DEFAULT_DECKS, rounds=1_000_000, workers=1, seed=None, strategy=None, base=None):
+    """
+    House edge change from each single-rule variation. Each variation replays the base run's
+    seed; the confidence interval treats the runs as independent, which is conservative.
+    """
+    seed = seed if seed is not None else int.from_bytes(os.urandom(8), 'big')
+    base = base or simulate(rules, decks, rounds, workers, seed, strategy)
+    deltas = []
+    for label, variant_rules, variant_decks in rule_variations(rules, decks):
+        result = simulate(variant_rules, variant_decks, rounds, workers, seed, strategy)
+        delta = result['house_edge'] - base['house_edge']
+        stderr = math.sqrt(result['stderr'] ** 2 + base['stderr'] ** 2)
+        deltas.append({'change': label, 'house_edge': result['house_edge'], 'delta': delta,
+                       'delta_ci95': [delta - Z_95 * stderr, delta + Z_95 * stderr]})
+    return deltas
+
+
+def load_table(table_id):
+    """(rules, deck_count) of a BlackjackTable row"""
+    from casino_be.app import create_app
+    from casino_be.models import db, BlackjackTable
+
+    app, _ = create_app()
+    with app.app_context():
+        table = db.session.get(BlackjackTable, table_id)
+        if table is None:
+            raise ValueError(f"Blackjack table {table_id} not found.")
+        return dict(table.rules or {}), table.deck_count
+
+
+def print_report(report, deltas):
+    print("\n--- Blackjack House Edge ---")
+    print(f"Decks: {report['decks']}  Rules: {json.dumps(report['rules'], sort_keys=True)}")
+    low, high = report['house_edge_ci95']
+    print(f"Rounds: {report['rounds']:,}")
+    print(f"House edge: {report['house_edge']:+.4%} of the initial bet (95% CI {low:+.4%} .. {high:+.4%})")
+    print(f"Per unit wagered: {report['house_edge_per_wager']:+.4%}  Average wager: {report['average_wager']:.4f}")
+    print(f"Variance per round: {report['variance']:.4f}  Std dev: {report['std_dev']:.4f}")
+    if deltas:
+        print("\nRule change                          house edge      delta      95% CI")
+        for row in deltas:
+            low, high = row['delta_ci95']
+            print(f"{row['change']:<35} {row['house_edge']:>+10.4%}  {row['delta']:>+9.4%}  {low:+.4%} .. {high:+.4%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blackjack simulator - house edge of a table's rules under basic strategy.")
+    parser.add_argument("--table-id", type=int, default=None, help="Read rules and deck_count from this BlackjackTable row.")
+    parser.add_argument("--rules", type=str, default=None, help="Rules as JSON; applied on top of the table's rules.")
+    parser.add_argument("--decks", type=int, default=None, help=f"Deck count (default: the table's, or {DEFAULT_DECKS}).")
+    parser.add_argument("--strategy", type=str, default=None, help="JSON file of strategy rows overriding basic strategy.")
+    parser.add_argument("--rounds", type=int, default=10_000_000, help="Rounds to play.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible run.")
+    parser.add_argument("--deltas", action='store_true', help="Also price each single-rule change.")
+    parser.add_argument("--report", type=str, default=None, help="Write the JSON report to this path.")
+
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        parser.error("numpy is required for the blackjack simulator.")
+
+    rules, decks = {}, DEFAULT_DECKS
+    if args.table_id is not None:
+        rules, decks = load_table(args.table_id)
+    if args.rules:
+        rules.update(json.loads(args.rules))
+    if args.decks:
+        decks = args.decks
+    strategy = None
+    if args.strategy:
+        with open(args.strategy) as f:
+            strategy = json.load(f)
+    seed = args.seed if args.seed is not None else int.from_bytes(os.urandom(8), 'big')
+
+    print(f"--- Simulating {args.rounds:,} blackjack rounds with {args.workers} worker(s), seed {seed} ---")
+    started = time.perf_counter()
+    report = simulate(rules, decks, args.rounds, args.workers, seed, strategy)
+    deltas = rule_deltas(rules, decks, args.rounds, args.workers, seed, strategy, base=report) if args.deltas else []
+    elapsed = time.perf_counter() - started
+
+    report['seed'] = seed
+    report['deltas'] = deltas
+    report['seconds'] = round(elapsed, 2)
+    print_report(report, deltas)
+    rounds_played = args.rounds * (1 + len(deltas))
+    print(f"Computed in {elapsed:.1f}s ({rounds_played / elapsed:,.0f} rounds/s)")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
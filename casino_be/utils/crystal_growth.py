@@ -0,0 +1,133 @@
+"""
+Crystal Garden growth, derived from time.
+
+A flower's stage follows from when it was planted, the cycle length and the fertilizers
+applied to it. Its bloom attributes follow from a keyed hash of its id and planting time.
+Neither has to be written as the flower grows; the service stores them when a player looks
+at the flower, appraises it or sells it.
+"""
+
+import hashlib
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CYCLE_INTERVAL = 3600.0  # Seconds per growth cycle
+STAGES = ('seeded', 'sprouting', 'blooming')  # One cycle per step
+FERTILIZER_BOOST = 0.1  # Growth speed added by each fertilizer
+MOON_GLOW_BOOST = 0.05  # Clarity multiplier added by each moon glow
+
+# Bloom attributes for seeds without potential_outcomes
+FALLBACK_OUTCOMES = {
+    "colors": {"blue": 1, "red": 1, "green": 1},
+    "sizes": {"min": 1.0, "max": 5.0, "distribution": "uniform"},
+    "clarities": {"min": 0.1, "max": 1.0, "distribution": "uniform"},
+    "special_types": {"none": 1},
+}
+# Attribute, its potential_outcomes key, and its value when the seed leaves it out
+BLOOM_ATTRIBUTES = (("color", "colors", None), ("size", "sizes", 1.0),
+                    ("clarity", "clarities", 0.1), ("special_type", "special_types", None))
+
+
+def _utc(moment: datetime) -> datetime:
+    """Stored datetimes come back naive from SQLite; they are UTC"""
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def growth_speed(power_ups: Optional[Sequence[str]]) -> float:
+    return 1.0 + FERTILIZER_BOOST * list(power_ups or []).count('fertilizer')
+
+
+def growth_stage(stored_stage: str, planted_at: datetime, now: datetime, cycle_seconds: float = CYCLE_INTERVAL,
+                 power_ups: Optional[Sequence[str]] = None) -> str:
+    """
+    The stage a flower has reached by now: one step per cycle since planting, sped up by its
+    fertilizers, and never behind its stored stage. Stages outside STAGES (e.g. 'withered')
+    are kept as stored.
+    """
+    if stored_stage not in STAGES:
+        return stored_stage
+    cycles = (_utc(now) - _utc(planted_at)).total_seconds() / cycle_seconds * growth_speed(power_ups)
+    grown = min(max(int(cycles), 0), len(STAGES) - 1)
+    return STAGES[max(grown, STAGES.index(stored_stage))]
+
+
+def next_stage_at(stage: str, planted_at: datetime, cycle_seconds: float = CYCLE_INTERVAL,
+                  power_ups: Optional[Sequence[str]] = None) -> Optional[datetime]:
+    """When a flower at stage reaches the next one by time alone; None once it is blooming"""
+    if stage not in STAGES[:-1]:
+        return None
+    seconds = (STAGES.index(stage) + 1) * cycle_seconds / growth_speed(power_ups)
+    return _utc(planted_at) + timedelta(seconds=seconds)
+
+
+def flower_uniforms(flower_ids: Iterable[int], planted_ats: Iterable[datetime], secret: str = '') -> List[tuple]:
+    """
+    Four numbers in [0, 1) per flower, one per bloom attribute, from a BLAKE2b hash of its id
+    and planting time keyed by secret. The same flower always rolls the same crystal.
+    """
+    key = hashlib.sha256(secret.encode()).digest() if secret else b''
+    uniforms = []
+    for flower_id, planted_at in zip(flower_ids, planted_ats):
+        digest = hashlib.blake2b(f"{flower_id}:{_utc(planted_at).isoformat()}".encode(), digest_size=32, key=key).digest()
+        uniforms.append(tuple(int.from_bytes(digest[i:i + 8], 'little') / 2 ** 64 for i in range(0, 32, 8)))
+    return uniforms
+
+
+def compile_outcomes(potential_outcomes) -> Dict[str, tuple]:
+    """
+    A seed's potential_outcomes as sampling tables: ('uniform', min, max) for a range with
+    "distribution": "uniform", ('weighted', choices, cumulative probabilities) for a
+    {choice: weight} map. Attributes the seed leaves out, or gives no weight, are left out.
+    """
+    outcomes = potential_outcomes if isinstance(potential_outcomes, dict) and potential_outcomes else FALLBACK_OUTCOMES
+    tables = {}
+    for attribute, key, _ in BLOOM_ATTRIBUTES:
+        config = outcomes.get(key)
+        if not config or not isinstance(config, dict):
+            continue
+        if config.get("distribution") == "uniform":
+            tables[attribute] = ('uniform', float(config.get("min", 0)), float(config.get("max", 1)))
+            continue
+        weights = [float(w) for w in config.values()]
+        total = sum(weights)
+        if total > 0:
+            tables[attribute] = ('weighted', list(config.keys()), [w / total for w in accumulate(weights)])
+    return tables
+
+
+def roll_bloom_attributes(tables: Dict[str, tuple], uniforms: Sequence[tuple],
+                          power_ups: Optional[Sequence[Sequence[str]]] = None) -> Dict[str, list]:
+    """
+    Bloom attributes for a batch of flowers of one seed, mapping each flower's uniforms through
+    the seed's compiled tables for every flower at once. power_ups, per flower, boosts clarity.
+    """
+    count = len(uniforms)
+    rolled = {}
+    for column, (attribute, _, default) in enumerate(BLOOM_ATTRIBUTES):
+        table = tables.get(attribute)
+        if table is None:
+            rolled[attribute] = [default] * count
+        elif NUMPY_AVAILABLE:
+            draws = np.asarray(uniforms, dtype=np.float64).reshape(count, len(BLOOM_ATTRIBUTES))[:, column]
+            if table[0] == 'uniform':
+                rolled[attribute] = np.round(table[1] + draws * (table[2] - table[1]), 2).tolist()
+            else:
+                picks = np.minimum(np.searchsorted(table[2], draws, side='right'), len(table[1]) - 1)
+                rolled[attribute] = [table[1][i] for i in picks]
+        elif table[0] == 'uniform':
+            rolled[attribute] = [round(table[1] + u[column] * (table[2] - table[1]), 2) for u in uniforms]
+        else:
+            rolled[attribute] = [table[1][min(bisect_right(table[2], u[column]), len(table[1]) - 1)] for u in uniforms]
+
+    if power_ups is not None and tables.get('clarity') is not None:
+        rolled['clarity'] = [round(clarity * (1 + MOON_GLOW_BOOST * list(ups or []).count('moon_glow')), 2)
+                             for clarity, ups in zip(rolled['clarity'], power_ups)]
+    return rolled
@@ -1,6 +1,16 @@
 # casino_be/utils/plinko_helper.py
 
+import os
+from math import comb
+from typing import NamedTuple
+
 from flask import current_app
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 # (No model imports needed for this subtask, use comments for DB interaction points)
 
 # --- Constants ---
@@ -18,6 +28,14 @@ STAKE_CONFIG = {
     'High': {'min_bet': 5.01, 'max_bet': 20.00, 'color': 'red'}
 }
 
+# Boards the server drops on: a row count and a risk tier (the stake tier labels above)
+PLINKO_ROWS = range(8, 17)
+DEFAULT_ROWS = 12
+MAX_BALLS = 100  # Balls settled by one /drops request
+TARGET_RTP = 0.98
+# Growth of the multiplier per slot away from the centre; steeper means rarer, bigger edges
+RISK_CURVES = {'Low': 1.25, 'Medium': 1.6, 'High': 2.1}
+
 # --- Functions ---
 def get_stake_options():
     """
@@ -25,9 +43,10 @@ def get_stake_options():
     """
     return {label: {'color': STAKE_CONFIG[label]['color']} for label in STAKE_CONFIG}
 
-def validate_plinko_params(stake_amount, chosen_stake_label, slot_landed_label):
+def validate_plinko_params(stake_amount, chosen_stake_label, slot_landed_label=None):
     """
     Validates Plinko game parameters using global STAKE_CONFIG and PAYOUT_MULTIPLIERS.
+    slot_landed_label is only checked when given; the server picks the slot for real drops.
     Returns a dictionary {'success': True} or {'success': False, 'error': 'message'}.
     """
     if chosen_stake_label not in STAKE_CONFIG:
@@ -43,7 +62,7 @@ def validate_plinko_params(stake_amount, chosen_stake_label, slot_landed_label):
     if not (tier_config['min_bet'] <= current_stake_amount <= tier_config['max_bet']):
         return {'success': False, 'error': f"Stake amount {current_stake_amount} out of range for {chosen_stake_label} tier ({tier_config['min_bet']}-{tier_config['max_bet']})."}
 
-    if slot_landed_label not in PAYOUT_MULTIPLIERS:
+    if slot_landed_label is not None and slot_landed_label not in PAYOUT_MULTIPLIERS:
         return {'success': False, 'error': f"Invalid slot landed label '{slot_landed_label}'. Valid labels are: {list(PAYOUT_MULTIPLIERS.keys())}"}
     
     return {'success': True}
@@ -77,6 +96,76 @@ def calculate_winnings(stake_amount_sats, slot_landed_label):
     return int(current_stake_sats * multiplier)
 
 
+
+# --- Boards ---
+# A ball on an n-row board goes right at each row with probability 1/2, so it lands in slot k
+# (the number of rights) with probability C(n, k) / 2^n. Each board's distribution and payout
+# table is built once at import; a drop is then n fair bits and a popcount.
+
+class PlinkoBoard(NamedTuple):
+    rows: int
+    risk: str
+    probabilities: tuple  # Landing probability of each of the rows + 1 slots
+    multipliers: tuple    # Payout of each slot in hundredths of the stake, so winnings stay integer sats
+    labels: tuple         # e.g. '0.44x', as stored in PlinkoDropLog.slot_landed_label
+    rtp: float
+
+
+def _board(rows: int, risk: str) -> PlinkoBoard:
+    """Multipliers grow geometrically from the centre, scaled to TARGET_RTP and rounded down to hundredths"""
+    probabilities = tuple(comb(rows, k) / 2 ** rows for k in range(rows + 1))
+    weights = [RISK_CURVES[risk] ** (abs(2 * k - rows) / 2) for k in range(rows + 1)]
+    scale = TARGET_RTP / sum(p * w for p, w in zip(probabilities, weights))
+    multipliers = tuple(int(w * scale * 100) for w in weights)
+    return PlinkoBoard(
+        rows=rows,
+        risk=risk,
+        probabilities=probabilities,
+        multipliers=multipliers,
+        labels=tuple(f"{m / 100:g}x" for m in multipliers),
+        rtp=sum(p * m for p, m in zip(probabilities, multipliers)) / 100,
+    )
+
+BOARDS = {(rows, risk): _board(rows, risk) for rows in PLINKO_ROWS for risk in RISK_CURVES}
+
+
+def get_board(rows, risk) -> PlinkoBoard:
+    """The board for a row count and risk tier. ValueError for one we don't offer."""
+    board = BOARDS.get((rows, risk))
+    if board is None:
+        raise ValueError(f"No Plinko board with {rows!r} rows at risk '{risk}'. "
+                         f"Rows run {PLINKO_ROWS.start}-{PLINKO_ROWS.stop - 1}; risk is one of {list(RISK_CURVES)}.")
+    return board
+
+
+def drop_balls(board: PlinkoBoard, count: int, entropy: bytes = None):
+    """
+    Drop count balls. Each ball's path is two bytes of one os.urandom buffer, masked to the
+    board's rows: bit i set means it went right at row i. Returns (paths, slots), where a
+    ball's slot is the number of rights. entropy replaces the buffer (2 bytes per ball).
+    """
+    buffer = os.urandom(2 * count) if entropy is None else entropy
+    if len(buffer) != 2 * count:
+        raise ValueError(f"Need {2 * count} bytes of entropy for {count} balls, got {len(buffer)}.")
+    row_mask = (1 << board.rows) - 1
+    if NUMPY_AVAILABLE:
+        paths = np.frombuffer(buffer, dtype='<u2') & np.uint16(row_mask)
+        slots = np.unpackbits(paths.astype('<u2').view(np.uint8)).reshape(count, 16).sum(axis=1)
+        return paths.tolist(), slots.tolist()
+    paths = [int.from_bytes(buffer[i:i + 2], 'little') & row_mask for i in range(0, 2 * count, 2)]
+    return paths, [bin(path).count('1') for path in paths]
+
+
+def path_steps(path: int, rows: int) -> list:
+    """A stored path as its row-by-row steps, 0 for left and 1 for right"""
+    return [path >> row & 1 for row in range(rows)]
+
+
+def settle_drops(board: PlinkoBoard, stake_sats: int, slots) -> list:
+    """Winnings in sats for a stake on each landed slot, rounded down"""
+    return [stake_sats * board.multipliers[slot] // 100 for slot in slots]
+
+
 # Example Usage (can be commented out or removed for production)
 if __name__ == '__main__':
     print("--- Stake Options ---")
@@ -0,0 +1,742 @@
+"""
+Headless poker bot swarm: load and correctness testing for the poker subsystem.
+
+Seats bot populations (random, tight, aggressive, all-in heavy) at many tables and plays
+hands through either the real HTTP routes (--via http, default) or straight into the table
+actors (--via actor), paced to a target rate of hand starts across all tables. Every hand
+is checked against the game's invariants:
+
+  - chip conservation: stacks + pot never change mid-hand, and a completed hand removes
+    exactly the rake the table's rake rule allows (none when it ends by folds)
+  - pots: the pot equals everything invested, winnings + rake equal the pot, and nobody
+    wins more than their side-pot eligibility (sum of min(their, other) investments)
+  - turn order: the player to act is always the first seat clockwise still owing action
+  - event log: each hand replayed from poker_hand_event ends with the stacks observed
+  - money: balances + stacks + rake at the end equal the money seeded at the start
+
+It reports latency per action type, DB statements per hand and the violations found, and
+exits non-zero when a threshold is exceeded.
+
+    python -m casino_be.utils.poker_bot_swarm --tables 20 --hands 500
+    python -m casino_be.utils.poker_bot_swarm --via actor --tables 100 --hands-per-second 50
+    python -m casino_be.utils.poker_bot_swarm --mix tight=3,aggressive=2,allin=1 --rake 0.05 --max-rake 500
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from types import SimpleNamespace
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, insert, select
+
+from casino_be.app import create_app
+from casino_be.config import TestingConfig
+from casino_be.models import db, User, PokerTable, PokerPlayerState
+from casino_be.services.poker_table_actor import poker_table_actors, replay_hand
+from casino_be.utils import poker_helper
+from casino_be.utils.spacecrash_load_tester import StatementCounter, summarize
+
+DEFAULT_THRESHOLDS = {
+    'action_p99_ms': 250.0,
+    'statements_per_hand_max': None,  # Per transport, from STATEMENTS_PER_HAND_LIMITS
+    'invariant_violations_max': 0,
+}
+# Every HTTP request also checks the token blocklist and loads the user, which the actor path doesn't
+STATEMENTS_PER_HAND_LIMITS = {'http': 250.0, 'actor': 80.0}
+
+RANK_VALUES = {rank: value for value, rank in enumerate(poker_helper.RANKS, start=2)}
+
+
+# --- Bots ---
+
+def hand_strength(hole_cards):
+    """Crude preflop strength in [0, 1]: pairs and high, suited or connected cards score higher"""
+    if not hole_cards or len(hole_cards) != 2 or 'X' in hole_cards:
+        return 0.0
+    (suit_a, rank_a), (suit_b, rank_b) = [(card[0], card[1:]) for card in hole_cards]
+    high, low = sorted((RANK_VALUES[rank_a], RANK_VALUES[rank_b]), reverse=True)
+    if high == low:
+        return 0.5 + high / 28
+    score = (high + low) / 28 - 0.1
+    if suit_a == suit_b:
+        score += 0.05
+    if high - low == 1:
+        score += 0.03
+    return max(0.0, min(score, 1.0))
+
+
+class Bot:
+    """
+    Chooses an action from the bot's own view of the table (the get_table_state shape).
+    Amounts follow the action handlers: a bet is the chips added, a raise is the street total.
+    """
+
+    style = 'random'
+
+    def __init__(self, user_id, rng):
+        self.user_id = user_id
+        self.rng = rng
+
+    def options(self, view):
+        hand = view['current_hand']
+        me = next(p for p in view['players'] if p['user_id'] == self.user_id)
+        invested = hand['player_street_investments'].get(str(self.user_id), 0)
+        big_blind = view['table']['big_blind']
+        bet = hand['current_bet_to_match']
+        return SimpleNamespace(
+            to_call=max(0, bet - invested), stack=me['stack_sats'], invested=invested, bet=bet,
+            pot=hand['pot_size_sats'], big_blind=big_blind,
+            min_raise_to=bet + max(hand['min_next_raise_amount'] or 0, big_blind),
+            all_in_to=invested + me['stack_sats'], strength=hand_strength(me['hole_cards']),
+        )
+
+    def aggress(self, o, size):
+        """Bet or raise by about size chips (clamped to the legal range), all-in if that's all that's left"""
+        if o.to_call == 0:
+            return 'bet', max(o.big_blind, min(int(size), o.stack))
+        if o.all_in_to <= o.min_raise_to:
+            return ('raise', o.all_in_to) if o.stack > o.to_call else ('call', None)
+        return 'raise', max(o.min_raise_to, min(o.bet + int(size), o.all_in_to))
+
+    def passive(self, o):
+        return ('check', None) if o.to_call == 0 else ('call', None)
+
+    def decide(self, view):
+        o = self.options(view)
+        roll = self.rng.random()
+        if o.to_call and roll < 0.2:
+            return 'fold', None
+        if roll < 0.75:
+            return self.passive(o)
+        return self.aggress(o, self.rng.uniform(o.big_blind, max(o.big_blind, o.stack)))
+
+
+class TightBot(Bot):
+    style = 'tight'
+
+    def decide(self, view):
+        o = self.options(view)
+        if o.strength >= 0.75:
+            return self.aggress(o, max(o.pot, o.big_blind * 3))
+        if o.strength >= 0.45 or o.to_call == 0:
+            return self.passive(o)
+        return 'fold', None
+
+
+class AggressiveBot(Bot):
+    style = 'aggressive'
+
+    def decide(self, view):
+        o = self.options(view)
+        if self.rng.random() < 0.55:
+            return self.aggress(o, o.pot * self.rng.choice((0.5, 0.75, 1.0)) or o.big_blind * 2)
+        if o.to_call and o.strength < 0.3 and self.rng.random() < 0.3:
+            return 'fold', None
+        return self.passive(o)
+
+
+class AllInBot(Bot):
+    style = 'allin'
+
+    def decide(self, view):
+        o = self.options(view)
+        if self.rng.random() < 0.6:
+            return self.aggress(o, o.stack)
+        return self.passive(o)
+
+
+BOT_STYLES = {cls.style: cls for cls in (Bot, TightBot, AggressiveBot, AllInBot)}
+
+
+def parse_mix(text):
+    """'tight=3,allin=1' -> {'tight': 0.75, 'allin': 0.25}"""
+    weights = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in BOT_STYLES:
+            raise ValueError(f"Unknown bot style '{name}' (choose from {', '.join(BOT_STYLES)})")
+        weights[name] = float(weight) if weight else 1.0
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Bot mix weights must add up to more than zero")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+# --- Invariants ---
+
+def expected_rake(pot, rake_percentage, max_rake_sats):
+    """Mirror of the table rake rule (poker_table_state._rake)"""
+    if pot <= 0 or rake_percentage <= 0:
+        return 0
+    rake = int(Decimal(pot) * Decimal(str(rake_percentage)))
+    if max_rake_sats > 0:
+        rake = min(rake, max_rake_sats)
+    return max(0, min(rake, pot))
+
+
+def owes_action(player, hand):
+    """Still to act this street: in the hand, has chips, and hasn't acted or is facing a bet"""
+    if not player['is_active_in_hand'] or player['stack_sats'] <= 0:
+        return False
+    last_action = player['last_action'] or ''
+    acted = bool(last_action) and not last_action.startswith('posts_') and last_action != 'prehand_reset'
+    invested = hand['player_street_investments'].get(str(player['user_id']), 0)
+    return invested < hand['current_bet_to_match'] or not acted
+
+
+def check_turn_order(view, anchor_seat_id):
+    """The player to act must be the first seat clockwise of anchor_seat_id that still owes action"""
+    hand = view['current_hand']
+    turn = hand['current_turn_user_id']
+    ordered = sorted(view['players'], key=lambda p: p['seat_id'])
+    owing = [p for p in ordered if owes_action(p, hand)]
+    if not owing:
+        return f"user {turn} is to act but nobody owes action"
+    after = [p for p in owing if p['seat_id'] > (anchor_seat_id or 0)]
+    expected = (after or owing)[0]['user_id']
+    if turn != expected:
+        return f"user {turn} is to act, expected user {expected} (first owing seat after seat {anchor_seat_id})"
+    return None
+
+
+def check_completed_hand(before, view, rake, rake_percentage, max_rake_sats, went_to_showdown):
+    """Chip and pot checks for a finished hand; before is {user_id: stack} when the hand started"""
+    problems = []
+    players = {p['user_id']: p for p in view['players'] if p['user_id'] in before}
+    invested = {uid: players[uid]['total_invested_this_hand'] if uid in players else 0 for uid in before}
+    pot = view['current_hand']['pot_size_sats']
+
+    if pot != sum(invested.values()):
+        problems.append(f"pot {pot} != total invested {sum(invested.values())}")
+    allowed = expected_rake(pot, rake_percentage, max_rake_sats) if went_to_showdown else 0
+    if rake != allowed:
+        problems.append(f"rake {rake} != {allowed} allowed for pot {pot}")
+    after_total = sum(p['stack_sats'] for p in players.values())
+    if sum(before.values()) - after_total != rake:
+        problems.append(f"stacks went {sum(before.values())} -> {after_total} with rake {rake}")
+
+    won = {uid: players[uid]['stack_sats'] - (before[uid] - invested[uid]) for uid in players}
+    if sum(won.values()) + rake != pot:
+        problems.append(f"winnings {sum(won.values())} + rake {rake} != pot {pot}")
+    for uid, amount in won.items():
+        cap = sum(min(other, invested[uid]) for other in invested.values())
+        if amount < 0:
+            problems.append(f"user {uid} lost {-amount} more than they invested")
+        elif amount > cap:
+            problems.append(f"user {uid} won {amount}, more than their side-pot cap {cap}")
+        elif amount and not players[uid]['is_active_in_hand']:
+            problems.append(f"user {uid} folded but won {amount}")
+    return problems
+
+
+def showdown_rake(view):
+    """Rake recorded by the showdown, from the hand's recent history; None if it ended by folds"""
+    for event in reversed(view['current_hand']['hand_history_preview']):
+        if event.get('action') == 'showdown_settled':
+            return event.get('rake', 0)
+    return None
+
+
+# --- Transports ---
+
+class ActorTransport:
+    """Calls the table actors directly: the engine's ceiling without HTTP and JWT overhead"""
+
+    name = 'actor'
+
+    def _actor(self, table_id):
+        actor = poker_table_actors.get(table_id)
+        if actor is None:
+            raise LookupError(f"Poker table {table_id} not found.")
+        return actor
+
+    def join(self, user_id, table_id, seat_id, buy_in):
+        return self._actor(table_id).run_db_operation(
+            poker_helper.handle_sit_down, user_id=user_id, table_id=table_id, seat_id=seat_id, buy_in_amount=buy_in)
+
+    def leave(self, user_id, table_id):
+        return self._actor(table_id).stand_up(user_id)
+
+    def start_hand(self, user_id, table_id):
+        return self._actor(table_id).start_hand(user_id)
+
+    def state(self, user_id, table_id):
+        return self._actor(table_id).table_state(user_id)
+
+    def act(self, user_id, table_id, hand_id, action, amount):
+        return self._actor(table_id).act(user_id, hand_id, action, amount)
+
+
+class HttpTransport:
+    """Goes through the /api/poker routes with a bearer token per bot, as a client would"""
+
+    name = 'http'
+
+    def __init__(self, app, tokens):
+        self.app = app
+        self.tokens = tokens
+        self._local = threading.local()
+
+    def _request(self, method, user_id, path, payload=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(f'/api/poker{path}', method=method, json=payload,
+                               headers={'Authorization': f'Bearer {self.tokens[user_id]}'})
+        body = response.get_json(silent=True) or {}
+        if response.status_code >= 400 or not body.get('status'):
+            return {'error': body.get('status_message') or f'HTTP {response.status_code}'}
+        return body
+
+    def join(self, user_id, table_id, seat_id, buy_in):
+        return self._request('POST', user_id, f'/tables/{table_id}/join',
+                             {'table_id': table_id, 'seat_id': seat_id, 'buy_in_amount': buy_in})
+
+    def leave(self, user_id, table_id):
+        return self._request('POST', user_id, f'/tables/{table_id}/leave')
+
+    def start_hand(self, user_id, table_id):
+        body = self._request('POST', user_id, f'/tables/{table_id}/start_hand')
+        return body if 'error' in body else body['hand_details']
+
+    def state(self, user_id, table_id):
+        body = self._request('GET', user_id, f'/tables/{table_id}/state')
+        return body if 'error' in body else body['table_state']
+
+    def act(self, user_id, table_id, hand_id, action, amount):
+        return self._request('POST', user_id, f'/tables/{table_id}/hands/{hand_id}/action',
+                             {'table_id': table_id, 'hand_id': hand_id, 'action_type': action, 'amount': amount})
+
+
+# --- Swarm ---
+
+class HandPacer:
+    """Spaces hand starts across all tables to a target rate; a rate of 0 means as fast as possible"""
+
+    def __init__(self, hands_per_second):
+        self.interval = 1.0 / hands_per_second if hands_per_second else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self, stop):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            stop.wait(slot - now)
+
+
+class PokerBotSwarm:
+    def __init__(self, database_url, num_tables, players_per_table, num_hands, hands_per_second, mix,
+                 via='http', buy_in_bb=100, small_blind=10, rake=0.0, max_rake=0, seed=None):
+        self.database_url = database_url
+        self.num_tables = num_tables
+        self.players_per_table = players_per_table
+        self.num_hands = num_hands
+        self.mix = mix
+        self.via = via
+        self.small_blind = small_blind
+        self.big_blind = small_blind * 2
+        self.buy_in = self.big_blind * buy_in_bb
+        self.rake = rake
+        self.max_rake = max_rake
+        self.seed = seed
+        self.pacer = HandPacer(hands_per_second)
+
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.violations = []
+        self.completed = []  # (hand_id, {user_id: final stack}) for the replay check
+        self.rake_total = 0
+        self.money_seeded = 0
+        self.statements = StatementCounter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.app = None
+        self.transport = None
+        self.tables = {}  # table_id -> [Bot]
+
+    # --- Setup ---
+
+    def setup(self):
+        self.app, _ = create_app(self._build_config())
+        poker_table_actors.configure(self.app)
+        rng = random.Random(self.seed)
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            user_ids = self._seed_players()
+            table_ids = self._seed_tables()
+            tokens = {user_id: create_access_token(identity=SimpleNamespace(id=user_id)) for user_id in user_ids}
+            db.session.remove()
+        self.transport = HttpTransport(self.app, tokens) if self.via == 'http' else ActorTransport()
+
+        styles = list(self.mix)
+        weights = [self.mix[style] for style in styles]
+        players = iter(user_ids)
+        with self.app.app_context():
+            for table_id in table_ids:
+                bots = []
+                for seat_id in range(1, self.players_per_table + 1):
+                    style = rng.choices(styles, weights)[0]
+                    bot = BOT_STYLES[style](next(players), random.Random(rng.random()))
+                    result = self.transport.join(bot.user_id, table_id, seat_id, self.buy_in)
+                    if 'error' in result:
+                        raise RuntimeError(f"Bot {bot.user_id} could not sit at table {table_id}: {result['error']}")
+                    bots.append(bot)
+                self.tables[table_id] = bots
+            db.session.remove()
+
+    def _build_config(self):
+        database_url = self.database_url
+        engine_options = {}
+        if database_url.startswith('sqlite'):
+            engine_options = {'connect_args': {'check_same_thread': False, 'timeout': 30}}
+
+        class SwarmConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = database_url
+            SQLALCHEMY_ENGINE_OPTIONS = engine_options
+            JWT_TOKEN_LOCATION = ['headers']  # Bots send bearer tokens
+            JWT_ACCESS_TOKEN_EXPIRES = False
+            POKER_ACTOR_JOURNAL_DIR = tempfile.mkdtemp(prefix='poker_swarm_journal_')
+
+        return SwarmConfig
+
+    def _seed_players(self):
+        count = self.num_tables * self.players_per_table
+        balance = self.buy_in * 1000  # Enough to rebuy after every bust
+        password_hash = User.hash_password('swarm-password')  # Hash once; pbkdf2 per user is too slow
+        db.session.execute(insert(User), [{
+            'username': f'poker_bot_{i}', 'email': f'poker_bot_{i}@example.com', 'password': password_hash,
+            'balance': balance, 'deposit_wallet_address': f'poker_bot_wallet_{i}',
+        } for i in range(count)])
+        db.session.commit()
+        self.money_seeded = count * balance
+        return list(db.session.scalars(select(User.id).order_by(User.id)))
+
+    def _seed_tables(self):
+        db.session.execute(insert(PokerTable), [{
+            'name': f'Swarm {i}', 'small_blind': self.small_blind, 'big_blind': self.big_blind,
+            'min_buy_in': self.big_blind * 20, 'max_buy_in': self.buy_in, 'max_seats': max(self.players_per_table, 2),
+            'rake_percentage': Decimal(str(self.rake)), 'max_rake_sats': self.max_rake,
+        } for i in range(self.num_tables)])
+        db.session.commit()
+        return list(db.session.scalars(select(PokerTable.id).order_by(PokerTable.id)))
+
+    # --- Play ---
+
+    def _timed(self, name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.record(f'{name}_ms', (time.perf_counter() - start) * 1000)
+        return result
+
+    def record(self, name, value):
+        with self._lock:
+            self.samples[name].append(value)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def violation(self, table_id, hand_id, check, detail):
+        with self._lock:
+            self.violations.append({'table_id': table_id, 'hand_id': hand_id, 'check': check, 'detail': detail})
+
+    def _hands_left(self):
+        with self._lock:
+            if self.counters['hands_started'] >= self.num_hands:
+                return False
+            self.counters['hands_started'] += 1
+            return True
+
+    def _run_table(self, table_id):
+        with self.app.app_context():
+            try:
+                while not self._stop.is_set() and self._hands_left():
+                    self.pacer.wait(self._stop)
+                    self._play_hand(table_id)
+            except Exception as e:
+                self.violation(table_id, None, 'crash', repr(e))
+            finally:
+                db.session.remove()
+
+    def _rebuy_busted(self, table_id, view):
+        """
+        Busted bots stand up and buy back in, each with even odds per hand (always if fewer than two
+        players have chips), so hands are also dealt around players sitting with an empty stack.
+        """
+        bots = {bot.user_id: bot for bot in self.tables[table_id]}
+        funded = sum(1 for p in view['players'] if p['stack_sats'] > 0)
+        for player in view['players']:
+            if player['stack_sats'] == 0 and player['user_id'] in bots and (funded < 2 or bots[player['user_id']].rng.random() < 0.5):
+                self.transport.leave(player['user_id'], table_id)
+                result = self.transport.join(player['user_id'], table_id, player['seat_id'], self.buy_in)
+                if 'error' in result:
+                    self.violation(table_id, None, 'rebuy', result['error'])
+                self.increment('rebuys')
+
+    def _play_hand(self, table_id):
+        bots = {bot.user_id: bot for bot in self.tables[table_id]}
+        observer = self.tables[table_id][0].user_id
+        view = self.transport.state(observer, table_id)
+        if sum(1 for p in view['players'] if p['stack_sats'] > 0) < len(bots):
+            self._rebuy_busted(table_id, view)
+            view = self.transport.state(observer, table_id)
+        before = {p['user_id']: p['stack_sats'] for p in view['players']}
+
+        started = self._timed('start_hand', self.transport.start_hand, observer, table_id)
+        if 'error' in started:
+            self.increment('start_hand_rejected')
+            return
+        hand_id = started['hand_id']
+        self.increment('hands_dealt')
+
+        turn = self.transport.state(observer, table_id)['current_hand']['current_turn_user_id']
+        street, anchor_seat_id = 'preflop', started['bb_player_seat']  # Preflop action starts left of the big blind
+        went_to_showdown = False
+        while turn is not None:
+            view = self._timed('state', self.transport.state, turn, table_id)
+            hand = view['current_hand']
+            if hand['hand_id'] != hand_id or hand['status'] not in ('preflop', 'flop', 'turn', 'river'):
+                break
+            if hand['status'] != street:
+                street, anchor_seat_id = hand['status'], view['table']['current_dealer_seat_id']
+            self._check_in_hand(table_id, hand_id, before, view, anchor_seat_id)
+
+            action, amount = bots[turn].decide(view)
+            result = self._timed(f'action_{action}', self.transport.act, turn, table_id, hand_id, action, amount)
+            if 'error' in result:
+                self.increment(f'rejected_{action}')
+                action, amount = ('check', None) if action in ('bet', 'check') else ('call', None)
+                result = self._timed(f'action_{action}', self.transport.act, turn, table_id, hand_id, action, amount)
+                if 'error' in result:
+                    self.violation(table_id, hand_id, 'fallback_action', f"{action} by {turn}: {result['error']}")
+                    return
+            self.increment('actions')
+            anchor_seat_id = next(p['seat_id'] for p in view['players'] if p['user_id'] == turn)
+            flow = result.get('game_flow') or {}
+            went_to_showdown = went_to_showdown or 'winners' in flow
+            turn = flow.get('next_to_act_user_id')
+
+        final = self.transport.state(observer, table_id)
+        if final['current_hand']['hand_id'] != hand_id or final['current_hand']['status'] != 'completed':
+            self.violation(table_id, hand_id, 'completion', f"hand ended in status {final['current_hand']['status']}")
+            return
+        rake = showdown_rake(final) or 0
+        for problem in check_completed_hand(before, final, rake, self.rake, self.max_rake, went_to_showdown):
+            self.violation(table_id, hand_id, 'pots', problem)
+        with self._lock:
+            self.rake_total += rake
+            self.counters['hands_completed'] += 1
+            self.counters['showdowns' if went_to_showdown else 'won_by_folds'] += 1
+            self.completed.append((hand_id, {p['user_id']: p['stack_sats'] for p in final['players']}))
+
+    def _check_in_hand(self, table_id, hand_id, before, view, anchor_seat_id):
+        in_play = sum(p['stack_sats'] for p in view['players'] if p['user_id'] in before)
+        if in_play + view['current_hand']['pot_size_sats'] != sum(before.values()):
+            self.violation(table_id, hand_id, 'conservation',
+                           f"stacks {in_play} + pot {view['current_hand']['pot_size_sats']} != {sum(before.values())}")
+        problem = check_turn_order(view, anchor_seat_id)
+        if problem:
+            self.violation(table_id, hand_id, 'turn_order', problem)
+
+    def run(self, max_duration):
+        threads = [threading.Thread(target=self._run_table, args=(table_id,), name=f'swarm-table-{table_id}', daemon=True)
+                   for table_id in self.tables]
+        self.statements.install()
+        started = time.monotonic()
+        try:
+            for thread in threads:
+                thread.start()
+            deadline = started + max_duration
+            for thread in threads:
+                thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=30)
+            self.statements.remove()
+        return time.monotonic() - started
+
+    # --- After the run ---
+
+    def verify_replays(self):
+        """Every completed hand, rebuilt from its event log alone, must end with the stacks observed"""
+        with self.app.app_context():
+            for hand_id, stacks in self.completed:
+                state = replay_hand(hand_id)
+                if state is None:
+                    self.violation(None, hand_id, 'replay', "no start event in poker_hand_event")
+                    continue
+                replayed = {uid: seat.stack_sats for uid, seat in state.seats.items()}
+                if any(replayed.get(uid, stack) != stack for uid, stack in stacks.items()):
+                    self.violation(None, hand_id, 'replay', f"replayed stacks {replayed} != observed {stacks}")
+            db.session.remove()
+
+    def verify_money(self):
+        """Balances plus chips on the tables plus rake taken must still equal the money seeded"""
+        poker_table_actors.stop_all()  # Write every table's projection back first
+        with self.app.app_context():
+            balances = db.session.scalar(select(func.coalesce(func.sum(User.balance), 0)))
+            stacks = db.session.scalar(select(func.coalesce(func.sum(PokerPlayerState.stack_sats), 0)))
+            db.session.remove()
+        if balances + stacks + self.rake_total != self.money_seeded:
+            self.violation(None, None, 'money', f"balances {balances} + stacks {stacks} + rake {self.rake_total} "
+                                                f"!= seeded {self.money_seeded}")
+
+    def build_report(self, wall_seconds):
+        hands = self.counters['hands_completed']
+        actions = sorted(name for name in self.samples if name.startswith('action_'))
+        all_actions = [value for name in actions for value in self.samples[name]]
+        return {
+            'database': self.database_url.split('@')[-1],
+            'via': self.via,
+            'tables': self.num_tables,
+            'players_per_table': self.players_per_table,
+            'mix': self.mix,
+            'wall_seconds': round(wall_seconds, 2),
+            'hands_completed': hands,
+            'hands_per_second': round(hands / wall_seconds, 2) if wall_seconds else 0.0,
+            'statements': self.statements.count,
+            'statements_per_hand': self.statements.count / hands if hands else 0.0,
+            'rake_total': self.rake_total,
+            'latency_ms': dict({name[:-3]: summarize(self.samples[name]) for name in actions},
+                               all_actions=summarize(all_actions),
+                               state=summarize(self.samples['state_ms']),
+                               start_hand=summarize(self.samples['start_hand_ms'])),
+            'counters': dict(self.counters),
+            'violations': self.violations,
+        }
+
+    def teardown(self):
+        poker_table_actors.stop_all()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+def evaluate_thresholds(report, thresholds):
+    """Compare a report against thresholds; returns a list of (name, observed, limit, passed)"""
+    observed = {
+        'action_p99_ms': report['latency_ms']['all_actions']['p99'],
+        'statements_per_hand_max': report['statements_per_hand'],
+        'invariant_violations_max': len(report['violations']),
+    }
+    return [(name, observed[name], limit, observed[name] <= limit)
+            for name, limit in thresholds.items() if limit is not None]
+
+
+def print_report(report, verdicts):
+    print("\n--- Poker Bot Swarm Report ---")
+    print(f"Database: {report['database']}  Via: {report['via']}")
+    print(f"Tables: {report['tables']} x {report['players_per_table']} bots  "
+          f"Mix: {', '.join(f'{k}={v:.2f}' for k, v in report['mix'].items())}")
+    print(f"Hands: {report['hands_completed']} in {report['wall_seconds']}s ({report['hands_per_second']}/s)  "
+          f"Statements: {report['statements']} ({report['statements_per_hand']:.1f}/hand)  Rake: {report['rake_total']}")
+    for name, s in report['latency_ms'].items():
+        print(f"{name:<16} n={s['count']:<7} p50={s['p50']:.2f} p95={s['p95']:.2f} p99={s['p99']:.2f} max={s['max']:.2f}")
+    print("Counters:")
+    for name, value in sorted(report['counters'].items()):
+        print(f"  {name}: {value}")
+    if report['violations']:
+        print(f"Invariant violations ({len(report['violations'])}, first 20):")
+        for v in report['violations'][:20]:
+            print(f"  table {v['table_id']} hand {v['hand_id']} [{v['check']}]: {v['detail']}")
+    print("Thresholds:")
+    for name, observed, limit, passed in verdicts:
+        print(f"  [{'PASS' if passed else 'FAIL'}] {name}: {observed:.2f} (limit {limit})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poker bot swarm - load and invariant testing for the poker tables.")
+    parser.add_argument("--database-url", type=str, default=None, help="SQLAlchemy URL (default: temporary SQLite file). Use a dedicated database; tables are dropped.")
+    parser.add_argument("--via", choices=("http", "actor"), default="http", help="Drive the tables through the HTTP routes or the table actors directly.")
+    parser.add_argument("--tables", type=int, default=10, help="Number of tables.")
+    parser.add_argument("--players-per-table", type=int, default=6, help="Bots seated at each table (2-10).")
+    parser.add_argument("--hands", type=int, default=200, help="Hands to play across all tables.")
+    parser.add_argument("--hands-per-second", type=float, default=0, help="Target rate of hand starts across all tables (0: unthrottled).")
+    parser.add_argument("--mix", type=str, default="random=1,tight=1,aggressive=1,allin=1", help=f"Bot population weights, from: {', '.join(BOT_STYLES)}.")
+    parser.add_argument("--small-blind", type=int, default=10, help="Small blind in satoshis; the big blind is double.")
+    parser.add_argument("--buy-in-bb", type=int, default=100, help="Buy-in (and rebuy) in big blinds.")
+    parser.add_argument("--rake", type=float, default=0.0, help="Rake fraction taken at showdown, e.g. 0.05.")
+    parser.add_argument("--max-rake", type=int, default=0, help="Rake cap in satoshis (0: uncapped).")
+    parser.add_argument("--max-duration", type=float, default=600, help="Abort the run after this many seconds.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for seating and bot decisions (cards are always CSPRNG-shuffled).")
+    parser.add_argument("--report", type=str, default=None, help="Write the JSON report to this path.")
+    for name, default in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--max-{name.replace('_', '-')}", dest=name, type=float, default=default, help=f"Threshold for {name} (default: {default if default is not None else 'depends on --via'}).")
+
+    args = parser.parse_args()
+    if args.statements_per_hand_max is None:
+        args.statements_per_hand_max = STATEMENTS_PER_HAND_LIMITS[args.via]
+    if not 2 <= args.players_per_table <= 10:
+        parser.error("--players-per-table must be between 2 and 10")
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='poker_swarm_'), 'swarm.db')
+
+    swarm = PokerBotSwarm(
+        database_url=database_url,
+        num_tables=args.tables,
+        players_per_table=args.players_per_table,
+        num_hands=args.hands,
+        hands_per_second=args.hands_per_second,
+        mix=mix,
+        via=args.via,
+        buy_in_bb=args.buy_in_bb,
+        small_blind=args.small_blind,
+        rake=args.rake,
+        max_rake=args.max_rake,
+        seed=args.seed,
+    )
+
+    print(f"--- Initializing poker bot swarm: {args.tables} tables x {args.players_per_table} bots via {args.via} "
+          f"against {database_url.split('@')[-1]} ---")
+    swarm.setup()
+    try:
+        wall_seconds = swarm.run(args.max_duration)
+        swarm.verify_replays()
+        swarm.verify_money()
+        report = swarm.build_report(wall_seconds)
+    finally:
+        swarm.teardown()
+
+    verdicts = evaluate_thresholds(report, {name: getattr(args, name) for name in DEFAULT_THRESHOLDS})
+    if report['hands_completed'] < args.hands:
+        verdicts.append(('hands_completed', report['hands_completed'], args.hands, False))
+    report['thresholds'] = [
+        {'name': name, 'observed': observed, 'limit': limit, 'passed': passed}
+        for name, observed, limit, passed in verdicts
+    ]
+    print_report(report, verdicts)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"INFO: Wrote JSON report to {args.report}")
+
+    passed = all(v[3] for v in verdicts)
+    print(f"--- Poker bot swarm {'PASSED' if passed else 'FAILED'} ---")
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
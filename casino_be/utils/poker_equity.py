@@ -0,0 +1,335 @@
+"""
+Hold'em equity calculator for all-in run-outs, insurance, hand review and collusion analysis.
+
+calculate_equity() takes hands and board in poker_helper's card strings ('HA', 'S7') and
+returns each player's win, tie and equity shares over the remaining run-outs:
+
+- When at most `exact_limit` run-outs remain (any flop or later, most multiway pre-flop spots
+  with dead cards) every run-out is enumerated and the result is exact.
+- Otherwise `iterations` run-outs are sampled (Monte Carlo), with numpy evaluating whole
+  batches through poker_evaluator.evaluate_array() when available.
+- `workers` > 1 splits the run-outs across a process pool; each worker returns exact counts
+  that are summed, so the split never changes an exact answer.
+- Results are cached by the situation's canonical form: the 24 suit relabellings and the
+  player order are normalised away, so AhAd v KsKc and AcAs v KdKh share one entry.
+
+    python -m casino_be.utils.poker_equity HA,DA SK,CK --board H2,D7,CJ --workers 4
+"""
+import argparse
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from math import comb
+
+from casino_be.utils import poker_evaluator
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_ITERATIONS = 100_000
+DEFAULT_EXACT_LIMIT = 250_000  # Run-outs; a flop has at most C(45,2) = 990
+MAX_ITERATIONS = 20_000_000
+BATCH_SIZE = 50_000  # Run-outs per numpy batch
+CACHE_SIZE = 4096
+
+SUIT_PERMUTATIONS = list(itertools.permutations(range(4)))
+
+
+def parse_situation(hands, board=(), dead=()):
+    """Card strings -> int tuples; raises ValueError for anything that isn't a valid hold'em spot"""
+    if not hands or len(hands) < 2:
+        raise ValueError("At least two hands are required.")
+    if len(hands) > 10:
+        raise ValueError("At most ten hands are supported.")
+    parsed_hands = []
+    for hand in hands:
+        if not isinstance(hand, (list, tuple)) or len(hand) != 2:
+            raise ValueError(f"Each hand must have exactly two cards: {hand!r}")
+        parsed_hands.append(tuple(poker_evaluator.cards_from_strs(hand)))
+    parsed_board = tuple(poker_evaluator.cards_from_strs(board or ()))
+    parsed_dead = tuple(poker_evaluator.cards_from_strs(dead or ()))
+    if len(parsed_board) > 5 or len(parsed_board) in (1, 2):
+        raise ValueError(f"Board must have 0, 3, 4 or 5 cards, got {len(parsed_board)}.")
+
+    all_cards = [card for hand in parsed_hands for card in hand] + list(parsed_board) + list(parsed_dead)
+    if len(set(all_cards)) != len(all_cards):
+        raise ValueError("The same card appears more than once.")
+    if 52 - len(all_cards) < 5 - len(parsed_board):
+        raise ValueError("Not enough cards left to complete the board.")
+    return parsed_hands, parsed_board, parsed_dead
+
+
+def canonicalize(hands, board, dead):
+    """
+    Smallest representation of the situation over all suit relabellings, with cards sorted
+    within each hand, board and dead list and hands sorted. Returns (key, player_order) where
+    player_order[i] is the index of original hand i in key's hand tuple.
+    """
+    best_key, best_perm = None, None
+    for perm in SUIT_PERMUTATIONS:
+        relabel = lambda cards: tuple(sorted((card & ~3) | perm[card & 3] for card in cards))
+        key = (tuple(sorted(relabel(hand) for hand in hands)), relabel(board), relabel(dead))
+        if best_key is None or key < best_key:
+            best_key, best_perm = key, perm
+
+    canonical_hands = best_key[0]
+    player_order = [
+        canonical_hands.index(tuple(sorted((card & ~3) | best_perm[card & 3] for card in hand)))
+        for hand in hands
+    ]
+    return best_key, player_order
+
+
+class EquityCache:
+    """Thread-safe LRU of canonical situation -> counts"""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+equity_cache = EquityCache()
+
+
+# --- Counting (runs in worker processes) ---
+
+def _empty_counts(players):
+    return {'runouts': 0, 'wins': [0] * players, 'ties': [0] * players, 'shares': [0.0] * players}
+
+
+def _tally(counts, scores_per_player):
+    """Pure-Python tally of one run-out's scores"""
+    best = min(scores_per_player)
+    winners = [i for i, score in enumerate(scores_per_player) if score == best]
+    counts['runouts'] += 1
+    if len(winners) == 1:
+        counts['wins'][winners[0]] += 1
+    else:
+        for i in winners:
+            counts['ties'][i] += 1
+    for i in winners:
+        counts['shares'][i] += 1 / len(winners)
+
+
+def _tally_array(counts, scores):
+    """Vectorised tally: scores is (players, N)"""
+    winners = scores == scores.min(axis=0)
+    winner_counts = winners.sum(axis=0)
+    counts['runouts'] += scores.shape[1]
+    for i in range(scores.shape[0]):
+        counts['wins'][i] += int((winners[i] & (winner_counts == 1)).sum())
+        counts['ties'][i] += int((winners[i] & (winner_counts > 1)).sum())
+        counts['shares'][i] += float((winners[i] / winner_counts).sum())
+
+
+def _score_runouts(hands, board, runouts):
+    """(players, N) scores for an (N, missing) array of run-outs"""
+    n = runouts.shape[0]
+    fixed_board = np.broadcast_to(np.array(board, dtype=np.intp), (n, len(board)))
+    scores = []
+    for hand in hands:
+        hole = np.broadcast_to(np.array(hand, dtype=np.intp), (n, 2))
+        scores.append(poker_evaluator.evaluate_array(np.hstack((hole, fixed_board, runouts))))
+    return np.vstack(scores)
+
+
+def equity_chunk(task):
+    """
+    Worker: count one slice of run-outs. task is (hands, board, deck, missing, mode, arg) where
+    mode 'exact' takes arg=(start, stop) over the combinations of deck, and mode 'sample'
+    takes arg=(iterations, seed).
+    """
+    hands, board, deck, missing, mode, arg = task
+    counts = _empty_counts(len(hands))
+
+    if mode == 'exact':
+        start, stop = arg
+        runouts = itertools.islice(itertools.combinations(deck, missing), start, stop)
+        if NUMPY_AVAILABLE and missing:
+            while True:
+                batch = list(itertools.islice(runouts, BATCH_SIZE))
+                if not batch:
+                    break
+                _tally_array(counts, _score_runouts(hands, board, np.array(batch, dtype=np.intp)))
+        else:
+            boards = [list(board) + list(runout) for runout in runouts]
+            per_player = [poker_evaluator.evaluate_many(boards, [hand] * len(boards)) for hand in hands]
+            for scores in zip(*per_player):
+                _tally(counts, scores)
+        return counts
+
+    iterations, seed = arg
+    if NUMPY_AVAILABLE:
+        rng = np.random.default_rng(seed)
+        deck_array = np.array(deck, dtype=np.intp)
+        done = 0
+        while done < iterations:
+            n = min(BATCH_SIZE, iterations - done)
+            picks = rng.random((n, len(deck))).argpartition(missing - 1, axis=1)[:, :missing]
+            _tally_array(counts, _score_runouts(hands, board, deck_array[picks]))
+            done += n
+    else:
+        rng = random.Random(seed)
+        board_list = list(board)
+        for _ in range(iterations):
+            full_board = board_list + rng.sample(deck, missing)
+            _tally(counts, poker_evaluator.evaluate_many([full_board] * len(hands), hands))
+    return counts
+
+
+def _merge_counts(total, counts):
+    total['runouts'] += counts['runouts']
+    for field in ('wins', 'ties', 'shares'):
+        total[field] = [a + b for a, b in zip(total[field], counts[field])]
+
+
+def _run_tasks(tasks, workers, players):
+    total = _empty_counts(players)
+    if workers <= 1 or len(tasks) == 1:
+        for task in tasks:
+            _merge_counts(total, equity_chunk(task))
+        return total
+    # Built before the pool starts so forked workers inherit the tables
+    poker_evaluator.build_tables()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for counts in executor.map(equity_chunk, tasks):
+            _merge_counts(total, counts)
+    return total
+
+
+def _compute_counts(hands, board, dead, iterations, exact_limit, workers, seed):
+    used = set(board) | set(dead) | {card for hand in hands for card in hand}
+    deck = [card for card in range(52) if card not in used]
+    missing = 5 - len(board)
+    total_runouts = comb(len(deck), missing)
+    workers = max(1, workers)
+
+    if total_runouts <= exact_limit:
+        step = -(-total_runouts // workers)
+        tasks = [
+            (hands, board, deck, missing, 'exact', (start, min(start + step, total_runouts)))
+            for start in range(0, total_runouts, step)
+        ]
+        return _run_tasks(tasks, workers, len(hands)), True
+
+    if NUMPY_AVAILABLE:
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+    else:
+        base = random.Random(seed)
+        seeds = [base.getrandbits(64) for _ in range(workers)]
+    per_worker = [iterations // workers + (1 if i < iterations % workers else 0) for i in range(workers)]
+    tasks = [
+        (hands, board, deck, missing, 'sample', (count, worker_seed))
+        for count, worker_seed in zip(per_worker, seeds) if count
+    ]
+    return _run_tasks(tasks, workers, len(hands)), False
+
+
+def calculate_equity(hands, board=(), dead=(), iterations=DEFAULT_ITERATIONS, exact_limit=DEFAULT_EXACT_LIMIT,
+                     workers=1, seed=None, use_cache=True):
+    """
+    Equity of each hand, e.g. calculate_equity([["HA", "DA"], ["SK", "CK"]], board=["H2", "D7", "CJ"]).
+
+    Returns {'players': [{'hand', 'win', 'tie', 'equity'}, ...] in input order, 'runouts',
+    'exact', 'cached', 'elapsed_seconds'}. win/tie are fractions of run-outs won outright or
+    shared; equity also credits the player's share of split pots.
+    Raises ValueError for invalid input.
+    """
+    parsed_hands, parsed_board, parsed_dead = parse_situation(hands, board, dead)
+    if not isinstance(iterations, int) or not 0 < iterations <= MAX_ITERATIONS:
+        raise ValueError(f"iterations must be between 1 and {MAX_ITERATIONS}.")
+
+    started = time.perf_counter()
+    key, player_order = canonicalize(parsed_hands, parsed_board, parsed_dead)
+    cache_key = (key, iterations, exact_limit, seed)
+    counts = equity_cache.get(cache_key) if use_cache else None
+    cached = counts is not None
+    if not cached:
+        canonical_hands, canonical_board, canonical_dead = key
+        counts, exact = _compute_counts(canonical_hands, canonical_board, canonical_dead,
+                                        iterations, exact_limit, workers, seed)
+        counts = dict(counts, exact=exact)
+        if use_cache:
+            equity_cache.put(cache_key, counts)
+
+    runouts = counts['runouts']
+    players = []
+    for hand, index in zip(hands, player_order):
+        players.append({
+            'hand': list(hand),
+            'win': counts['wins'][index] / runouts,
+            'tie': counts['ties'][index] / runouts,
+            'equity': counts['shares'][index] / runouts,
+        })
+    return {
+        'players': players,
+        'runouts': runouts,
+        'exact': counts['exact'],
+        'cached': cached,
+        'elapsed_seconds': time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hold'em equity calculator.")
+    parser.add_argument("hands", nargs='+', help="Hands as comma-separated card pairs, e.g. HA,DA SK,CK")
+    parser.add_argument("--board", default="", help="Board cards, e.g. H2,D7,CJ")
+    parser.add_argument("--dead", default="", help="Dead (folded/burned) cards")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Monte Carlo run-outs when not enumerating.")
+    parser.add_argument("--exact-limit", type=int, default=DEFAULT_EXACT_LIMIT, help="Enumerate when at most this many run-outs remain.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for Monte Carlo sampling.")
+    args = parser.parse_args()
+
+    poker_evaluator.build_tables()
+    split = lambda text: [card.strip() for card in text.split(',') if card.strip()]
+    try:
+        result = calculate_equity(
+            [split(hand) for hand in args.hands], split(args.board), split(args.dead),
+            iterations=args.iterations, exact_limit=args.exact_limit, workers=args.workers,
+            seed=args.seed, use_cache=False,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    method = "exact enumeration" if result['exact'] else "Monte Carlo"
+    evaluations = result['runouts'] * len(result['players'])
+    print(f"{result['runouts']:,} run-outs ({method}) in {result['elapsed_seconds']:.2f}s "
+          f"- {evaluations / result['elapsed_seconds'] / 1e6:.2f}M evaluations/s")
+    for player in result['players']:
+        print(f"  {','.join(player['hand']):>6}  equity {player['equity']:7.2%}  win {player['win']:7.2%}  tie {player['tie']:7.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Table-driven poker hand evaluator for 5, 6 and 7 cards.
+
+Cards are integers 0..51 encoded as rank * 4 + suit, with ranks '23456789TJQKA' and suits in
+poker_helper's 'HDCS' order; card_from_str() converts the app's suit-first strings ('HA', 'S2').
+Scores follow the usual convention (the same values treys produces): 1 is a royal flush,
+7462 is 7-5-4-3-2 offsuit, lower is better.
+
+Evaluation is two lookups: a hand either contains five or more cards of one suit, and its score
+comes from a 13-bit flush table indexed by that suit's rank mask, or it doesn't, and its score
+comes from a table keyed by the multiset of ranks. With seven cards a flush can never coexist
+with quads or a full house, so the flush table alone decides suited hands.
+Tables are built once per process on first use (about half a second).
+
+    python -m casino_be.utils.poker_evaluator --validate 200000   # compare with treys
+"""
+import argparse
+import itertools
+import random
+import threading
+import time
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SUITS = 'HDCS'  # Same order as poker_helper.SUITS
+RANKS = '23456789TJQKA'
+
+RANK_CLASS_NAMES = (
+    "Royal Flush", "Straight Flush", "Four of a Kind", "Full House", "Flush",
+    "Straight", "Three of a Kind", "Two Pair", "Pair", "High Card",
+)
+# Worst score in each rank class, in RANK_CLASS_NAMES order
+RANK_CLASS_MAX_SCORES = (1, 10, 166, 322, 1599, 1609, 2467, 3325, 6185, 7462)
+
+CARD_STRS = [SUITS[card & 3] + RANKS[card >> 2] for card in range(52)]
+CARD_FROM_STR = {card_str: card for card, card_str in enumerate(CARD_STRS)}
+
+# Per-card contributions to the two lookup keys
+RANK_BIT = [1 << (card >> 2) for card in range(52)]
+RANK_KEY = [5 ** (card >> 2) for card in range(52)]   # Base-5 digit per rank: counts never exceed 4
+SUIT_KEY = [8 ** (card & 3) for card in range(52)]    # Octal digit per suit: counts never exceed 7
+
+# Hand categories used while ranking hand classes (higher is better)
+_STRAIGHT_FLUSH, _QUADS, _FULL_HOUSE, _FLUSH, _STRAIGHT, _TRIPS, _TWO_PAIR, _PAIR, _HIGH_CARD = 8, 7, 6, 5, 4, 3, 2, 1, 0
+
+
+def card_from_str(card_str: str) -> int:
+    """'HA' -> int card; raises ValueError for anything that isn't a card"""
+    try:
+        return CARD_FROM_STR[card_str]
+    except KeyError:
+        raise ValueError(f"Invalid card string: {card_str!r}")
+
+
+def cards_from_strs(card_strs) -> list[int]:
+    return [card_from_str(card_str) for card_str in card_strs]
+
+
+def card_to_str(card: int) -> str:
+    return CARD_STRS[card]
+
+
+def _straight_high(mask: int) -> int:
+    """Rank of the highest straight's top card within a 13-bit rank mask, or -1"""
+    for high in range(12, 3, -1):
+        window = 0b11111 << (high - 4)
+        if mask & window == window:
+            return high
+    if mask & 0b1000000001111 == 0b1000000001111:  # A-2-3-4-5
+        return 3
+    return -1
+
+
+def _top_ranks(mask: int, count: int) -> tuple:
+    return tuple(rank for rank in range(12, -1, -1) if mask >> rank & 1)[:count]
+
+
+class _Tables:
+    """Score tables; built once per process by _tables()"""
+
+    def __init__(self):
+        self.class_scores = self._rank_hand_classes()
+        self.straight_high = [_straight_high(mask) for mask in range(1 << 13)]
+        self.flush = self._build_flush_table()
+        self.flush_suit = self._build_flush_suit_table()
+        self.ranks = self._build_rank_table()
+        self.arrays = None  # numpy copies for evaluate_array(), see _array_tables()
+
+    @staticmethod
+    def _rank_hand_classes() -> dict:
+        """Map every distinct 5-card hand (category, tiebreak ranks) to its score, 1 = best"""
+        rank_list = range(12, -1, -1)
+        keys = []
+        for high in range(12, 2, -1):
+            keys.append((_STRAIGHT_FLUSH, (high,)))
+            keys.append((_STRAIGHT, (high,)))
+        for a in rank_list:
+            for b in rank_list:
+                if a != b:
+                    keys.append((_QUADS, (a, b)))
+                    keys.append((_FULL_HOUSE, (a, b)))
+        for combo in itertools.combinations(rank_list, 5):
+            mask = sum(1 << rank for rank in combo)
+            if _straight_high(mask) < 0:
+                keys.append((_FLUSH, combo))
+                keys.append((_HIGH_CARD, combo))
+        for trips in rank_list:
+            others = [rank for rank in rank_list if rank != trips]
+            for kickers in itertools.combinations(others, 2):
+                keys.append((_TRIPS, (trips,) + kickers))
+        for high_pair, low_pair in itertools.combinations(rank_list, 2):
+            for kicker in rank_list:
+                if kicker not in (high_pair, low_pair):
+                    keys.append((_TWO_PAIR, (high_pair, low_pair, kicker)))
+        for pair in rank_list:
+            others = [rank for rank in rank_list if rank != pair]
+            for kickers in itertools.combinations(others, 3):
+                keys.append((_PAIR, (pair,) + kickers))
+
+        keys.sort(reverse=True)
+        assert len(keys) == 7462
+        return {key: score for score, key in enumerate(keys, start=1)}
+
+    def _build_flush_table(self) -> list:
+        table = [0] * (1 << 13)
+        for mask in range(1 << 13):
+            if bin(mask).count('1') < 5:
+                continue
+            high = self.straight_high[mask]
+            if high >= 0:
+                table[mask] = self.class_scores[(_STRAIGHT_FLUSH, (high,))]
+            else:
+                table[mask] = self.class_scores[(_FLUSH, _top_ranks(mask, 5))]
+        return table
+
+    @staticmethod
+    def _build_flush_suit_table() -> list:
+        """Suit-key sum -> suit holding five or more cards, or -1"""
+        table = [-1] * (8 ** 4)
+        for suit_key in range(8 ** 4):
+            for suit in range(4):
+                if (suit_key >> (3 * suit)) & 7 >= 5:
+                    table[suit_key] = suit
+        return table
+
+    def _build_rank_table(self) -> dict:
+        """Rank-multiset key -> best non-flush score, for 5, 6 and 7 cards"""
+        table = {}
+        counts = [0] * 13
+
+        def visit(rank, remaining, key, size):
+            if rank < 0:
+                if size >= 5:
+                    table[key] = self._score_rank_counts(counts)
+                return
+            for count in range(min(4, remaining) + 1):
+                counts[rank] = count
+                visit(rank - 1, remaining - count, key + count * 5 ** rank, size + count)
+            counts[rank] = 0
+
+        visit(12, 7, 0, 0)
+        return table
+
+    def _score_rank_counts(self, counts) -> int:
+        by_rank = [rank for rank in range(12, -1, -1) if counts[rank]]
+        quads = [rank for rank in by_rank if counts[rank] == 4]
+        trips = [rank for rank in by_rank if counts[rank] == 3]
+        pairs = [rank for rank in by_rank if counts[rank] == 2]
+
+        if quads:
+            kicker = next(rank for rank in by_rank if rank != quads[0])
+            key = (_QUADS, (quads[0], kicker))
+        elif trips and (len(trips) > 1 or pairs):
+            key = (_FULL_HOUSE, (trips[0], max(trips[1:] + pairs)))
+        elif self.straight_high[sum(1 << rank for rank in by_rank)] >= 0:
+            key = (_STRAIGHT, (self.straight_high[sum(1 << rank for rank in by_rank)],))
+        elif trips:
+            key = (_TRIPS, (trips[0],) + tuple(rank for rank in by_rank if rank != trips[0])[:2])
+        elif len(pairs) > 1:
+            kicker = next(rank for rank in by_rank if rank not in pairs[:2])
+            key = (_TWO_PAIR, (pairs[0], pairs[1], kicker))
+        elif pairs:
+            key = (_PAIR, (pairs[0],) + tuple(rank for rank in by_rank if rank != pairs[0])[:3])
+        else:
+            key = (_HIGH_CARD, tuple(by_rank[:5]))
+        return self.class_scores[key]
+
+
+_tables_instance = None
+_tables_lock = threading.Lock()
+
+
+def _tables() -> _Tables:
+    global _tables_instance
+    if _tables_instance is None:
+        with _tables_lock:
+            if _tables_instance is None:
+                _tables_instance = _Tables()
+    return _tables_instance
+
+
+def build_tables():
+    """Build the lookup tables now (and their numpy copies if numpy is installed) instead of on first use"""
+    _tables()
+    if NUMPY_AVAILABLE:
+        _array_tables()
+
+
+def evaluate(cards) -> int:
+    """Score of the best five-card hand within 5 to 7 int cards"""
+    tables = _tables()
+    rank_key = suit_key = 0
+    for card in cards:
+        rank_key += RANK_KEY[card]
+        suit_key += SUIT_KEY[card]
+
+    suit = tables.flush_suit[suit_key]
+    if suit >= 0:
+        mask = 0
+        for card in cards:
+            if card & 3 == suit:
+                mask |= RANK_BIT[card]
+        return tables.flush[mask]
+    return tables.ranks[rank_key]
+
+
+def evaluate_many(boards, hands) -> list[int]:
+    """
+    Score hands[i] against boards[i] for every i. Boards that are the same object are
+    summarised once, so a showdown passes one board list repeated for every player.
+    """
+    tables = _tables()
+    flush_suit, flush, ranks = tables.flush_suit, tables.flush, tables.ranks
+    board_parts = {}
+    scores = []
+
+    for board, hand in zip(boards, hands):
+        part = board_parts.get(id(board))
+        if part is None:
+            rank_key = suit_key = 0
+            suit_masks = [0, 0, 0, 0]
+            for card in board:
+                rank_key += RANK_KEY[card]
+                suit_key += SUIT_KEY[card]
+                suit_masks[card & 3] |= RANK_BIT[card]
+            part = board_parts[id(board)] = (rank_key, suit_key, suit_masks)
+
+        rank_key, suit_key, suit_masks = part
+        for card in hand:
+            rank_key += RANK_KEY[card]
+            suit_key += SUIT_KEY[card]
+
+        suit = flush_suit[suit_key]
+        if suit >= 0:
+            mask = suit_masks[suit]
+            for card in hand:
+                if card & 3 == suit:
+                    mask |= RANK_BIT[card]
+            scores.append(flush[mask])
+        else:
+            scores.append(ranks[rank_key])
+    return scores
+
+
+def _array_tables() -> dict:
+    tables = _tables()
+    if tables.arrays is None:
+        with _tables_lock:
+            if tables.arrays is None:
+                rank_keys = np.array(sorted(tables.ranks), dtype=np.int64)
+                tables.arrays = {
+                    'rank_keys': rank_keys,
+                    'rank_scores': np.array([tables.ranks[key] for key in rank_keys.tolist()], dtype=np.int16),
+                    'flush': np.array(tables.flush, dtype=np.int16),
+                    'flush_suit': np.array(tables.flush_suit, dtype=np.int8),
+                    'rank_key': np.array(RANK_KEY, dtype=np.int64),
+                    'suit_key': np.array(SUIT_KEY, dtype=np.int16),
+                    'rank_bit': np.array(RANK_BIT, dtype=np.int16),
+                }
+    return tables.arrays
+
+
+def evaluate_array(cards):
+    """
+    Vectorised evaluate(): cards is an (N, 5..7) integer array, one hand per row; returns an
+    int16 array of N scores. The rank-multiset table becomes a sorted key array searched with
+    np.searchsorted. Requires numpy.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy is required for evaluate_array")
+    arrays = _array_tables()
+    cards = np.asarray(cards, dtype=np.intp)
+
+    rank_key = arrays['rank_key'][cards].sum(axis=1)
+    suit_key = arrays['suit_key'][cards].sum(axis=1)
+    flush_suit = arrays['flush_suit'][suit_key]
+    scores = arrays['rank_scores'][np.searchsorted(arrays['rank_keys'], rank_key)]
+
+    flushed = flush_suit >= 0
+    if flushed.any():
+        flush_cards = cards[flushed]
+        in_suit = (flush_cards & 3) == flush_suit[flushed][:, None]
+        masks = np.where(in_suit, arrays['rank_bit'][flush_cards], 0).sum(axis=1)
+        scores[flushed] = arrays['flush'][masks]
+    return scores
+
+
+def best_five(cards) -> tuple[int, list[int]]:
+    """(score, the five cards that make it) for 5 to 7 int cards"""
+    cards = list(cards)
+    if len(cards) == 5:
+        return evaluate(cards), cards
+    best_score, best_cards = None, None
+    for combo in itertools.combinations(cards, 5):
+        score = evaluate(combo)
+        if best_score is None or score < best_score:
+            best_score, best_cards = score, list(combo)
+    return best_score, best_cards
+
+
+def rank_class(score: int) -> int:
+    """Index into RANK_CLASS_NAMES"""
+    for index, max_score in enumerate(RANK_CLASS_MAX_SCORES):
+        if score <= max_score:
+            return index
+    raise ValueError(f"Invalid hand score: {score}")
+
+
+def class_name(score: int) -> str:
+    return RANK_CLASS_NAMES[rank_class(score)]
+
+
+# --- Validation against treys ---
+
+def _treys_card(card: int) -> int:
+    from treys import Card
+    return Card.new(RANKS[card >> 2] + SUITS[card & 3].lower())
+
+
+def validate_against_treys(samples: int, seed: int = 0, exhaustive_five: bool = False) -> int:
+    """Compare scores and class names with treys; returns the number of mismatches"""
+    from treys import Evaluator
+    treys_evaluator = Evaluator()
+    treys_cards = [_treys_card(card) for card in range(52)]
+    mismatches = 0
+
+    def check(cards):
+        nonlocal mismatches
+        expected = treys_evaluator.evaluate([treys_cards[c] for c in cards[:2]], [treys_cards[c] for c in cards[2:]])
+        score = evaluate(cards)
+        if score != expected or class_name(score) != treys_evaluator.class_to_string(treys_evaluator.get_rank_class(expected)):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"MISMATCH {[card_to_str(c) for c in cards]}: {score} != treys {expected}")
+
+    if exhaustive_five:
+        for cards in itertools.combinations(range(52), 5):
+            check(list(cards))
+    rng = random.Random(seed)
+    for _ in range(samples):
+        check(rng.sample(range(52), rng.choice((5, 6, 7))))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poker evaluator - validates against treys and benchmarks evaluation.")
+    parser.add_argument("--validate", type=int, default=100_000, help="Random 5/6/7-card hands to compare with treys.")
+    parser.add_argument("--exhaustive-five", action="store_true", help="Also compare all 2,598,960 five-card hands.")
+    parser.add_argument("--benchmark", type=int, default=200_000, help="Seven-card hands to time through evaluate_many.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for random hands.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    _tables()
+    print(f"Tables built in {time.perf_counter() - started:.2f}s")
+
+    if args.benchmark:
+        rng = random.Random(args.seed)
+        boards, hands = [], []
+        for _ in range(args.benchmark):
+            cards = rng.sample(range(52), 7)
+            boards.append(cards[:5])
+            hands.append(cards[5:])
+        started = time.perf_counter()
+        evaluate_many(boards, hands)
+        elapsed = time.perf_counter() - started
+        print(f"evaluate_many: {args.benchmark:,} seven-card hands in {elapsed:.2f}s ({elapsed / args.benchmark * 1e6:.2f} us/hand)")
+
+    mismatches = validate_against_treys(args.validate, seed=args.seed, exhaustive_five=args.exhaustive_five)
+    print(f"Validation against treys: {'PASS' if not mismatches else f'FAIL ({mismatches} mismatches)'}")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,8 @@
 import random
-import secrets
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal # For precise monetary calculations
 from flask import current_app
 
-# treys library for hand evaluation
-from treys import Card, Evaluator
-
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, desc
 
@@ -14,37 +10,16 @@ from sqlalchemy import func, desc
 # Adjust the import path if your project structure is different.
 # from casino_be.models import db, User, PokerTable, PokerHand, PokerPlayerState, Transaction # if utils is a module inside casino_be
 from casino_be.models import db, User, PokerTable, PokerHand, PokerPlayerState, Transaction # Absolute import
+from casino_be.utils import cards, poker_evaluator
 
-# Card Constants
-SUITS = ['H', 'D', 'C', 'S']  # Hearts, Diamonds, Clubs, Spades
-RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+# Card Constants (cards are dealt from integer-coded decks; see utils.cards)
+SUITS = cards.SUITS  # Hearts, Diamonds, Clubs, Spades
+RANKS = cards.RANKS
 
 POKER_ACTION_TIMEOUT_SECONDS = 60
 
 # --- Game Setup Functions ---
 
-def _create_deck() -> list[str]:
-    """Creates a standard 52-card deck."""
-    return [s + r for s in SUITS for r in RANKS]
-
-def _shuffle_deck(deck: list[str]) -> None:
-    """Shuffles the deck in place using secrets.SystemRandom for better randomness."""
-    # Use cryptographically secure shuffling for real money games
-    # secrets.SystemRandom provides cryptographically secure randomness
-    secure_random = secrets.SystemRandom()
-    secure_random.shuffle(deck)
-
-
-def _deal_card_from_deck_list(deck_list: list[str]) -> str | None:
-    """
-    Removes and returns the top card from a given mutable deck list.
-    Returns None if deck_list is empty.
-    This function MODIFIES the passed deck_list.
-    """
-    if deck_list:
-        return deck_list.pop(0) # Assuming top card is at the start of the list
-    return None
-
 def deal_hole_cards(poker_hand: PokerHand, player_states: list[PokerPlayerState]) -> bool:
     """
     Deals two cards to each player in player_states who is is_active_in_hand,
@@ -56,98 +31,25 @@ def deal_hole_cards(poker_hand: PokerHand, player_states: list[PokerPlayerState]
         current_app.logger.error(f"Hand {poker_hand.id} has no deck_state.")
         return False
 
-    # Work with a mutable copy of the deck_state for this operation
-    current_deck_list = list(poker_hand.deck_state)
+    deck = cards.Deck.from_state(poker_hand.deck_state)
 
-    num_active_players = sum(1 for ps in player_states if ps.is_active_in_hand)
-    if len(current_deck_list) < num_active_players * 2:
-        current_app.logger.error(f"Not enough cards in hand's deck ({len(current_deck_list)}) to deal hole cards to {num_active_players} players.")
+    active_players = [ps for ps in player_states if ps.is_active_in_hand]
+    if deck.remaining < len(active_players) * 2:
+        current_app.logger.error(f"Not enough cards in hand's deck ({deck.remaining}) to deal hole cards to {len(active_players)} players.")
         return False
 
-    for _ in range(2): # Deal one card at a time to each player
-        for player_state in player_states:
-            if player_state.is_active_in_hand:
-                card = _deal_card_from_deck_list(current_deck_list) # Modifies current_deck_list
-                if card:
-                    if player_state.hole_cards is None:
-                        player_state.hole_cards = []
-                    player_state.hole_cards.append(card)
-                else:
-                    # This should not happen if initial check passed
-                    current_app.logger.error("Deck ran out unexpectedly during hole card dealing.")
-                    # poker_hand.deck_state is not updated yet, so no rollback of that needed here
-                    return False
-
-    # Persist the modified deck back to the hand
-    poker_hand.deck_state = current_deck_list
+    # One card at a time to each player: the first pass deals cards 0..n-1, the second n..2n-1
+    dealt = deck.deal_many(len(active_players) * 2)
+    for position, player_state in enumerate(active_players):
+        # Reassign rather than append: the JSON column doesn't track in-place changes
+        player_state.hole_cards = list(player_state.hole_cards or []) + cards.to_strs(dealt[position::len(active_players)])
+
+    # Persist the rest of the deck back to the hand
+    poker_hand.deck_state = deck.to_state()
     db.session.add(poker_hand) # Mark poker_hand as dirty to ensure deck_state update is saved
     return True
 
 
-def deal_community_cards(poker_hand: PokerHand, street: str) -> list[str] | None:
-    """
-    Deals community cards for the given street using poker_hand.deck_state.
-    Updates poker_hand.board_cards and poker_hand.deck_state.
-    Returns the list of newly dealt community cards for this street, or None on error.
-    """
-    if not poker_hand.deck_state:
-        current_app.logger.error(f"Hand {poker_hand.id} has no deck_state for dealing {street}.")
-        return None
-
-    # Work with a mutable copy of the deck_state
-    current_deck_list = list(poker_hand.deck_state)
-
-    # Ensure board_cards is a list
-    if poker_hand.board_cards is None:
-        poker_hand.board_cards = []
-
-
-    cards_to_deal_count = 0
-    if street == 'flop':
-        cards_to_deal_count = 3
-    elif street == 'turn' or street == 'river':
-        cards_to_deal_count = 1
-    else:
-        current_app.logger.error(f"Invalid street name '{street}'.")
-        return None
-
-    if len(current_deck_list) < cards_to_deal_count: # Check against the mutable copy
-        current_app.logger.error(f"Not enough cards in hand's deck to deal {street}.")
-        return None
-
-    # Optional: Burn a card. If burning, ensure deck has enough for burn + deal.
-    # if len(current_deck_list) < cards_to_deal_count + 1: # If burning
-    #     current_app.logger.error(f"Error: Not enough cards to burn and deal {street}.")
-    #     return None
-    # burned_card = _deal_card_from_deck_list(current_deck_list)
-    # if burned_card:
-    #     poker_hand.hand_history.append({"action": "burn_card", "card": burned_card, "street_before": street})
-    # else: # Should not happen if check above is done
-    #     current_app.logger.error(f"Error: Failed to burn card before {street} deal.")
-    #     return None
-
-
-    newly_dealt_street_cards = []
-    for _ in range(cards_to_deal_count):
-        card = _deal_card_from_deck_list(current_deck_list) # Modifies current_deck_list
-        if card:
-            newly_dealt_street_cards.append(card)
-        else:
-            # Should not happen if initial checks passed
-            current_app.logger.error(f"Error: Deck ran out unexpectedly during {street} dealing for hand {poker_hand.id}.")
-            return None # Indicates critical error
-            
-    # Update the hand's board_cards and deck_state
-    # Ensure poker_hand.board_cards is a list that can be extended
-    if not isinstance(poker_hand.board_cards, list): # If it was None or other type
-        poker_hand.board_cards = []
-    poker_hand.board_cards.extend(newly_dealt_street_cards)
-    poker_hand.deck_state = current_deck_list # Persist the deck with cards removed
-
-    db.session.add(poker_hand) # Mark dirty
-    return newly_dealt_street_cards
-
-
 # --- Basic Hand State & Player Management ---
 
 def start_new_hand(table_id: int):
@@ -164,16 +66,16 @@ def start_new_hand(table_id: int):
     - Commits all changes to the database.
     """
     session = db.session
-    poker_table = session.query(PokerTable).options(
-        joinedload(PokerTable.player_states).joinedload(PokerPlayerState.user)
-    ).get(table_id)
+    poker_table = session.get(PokerTable, table_id)
 
     if not poker_table or not poker_table.is_active:
         return {"error": "Table not found or inactive."}
 
     # Filter for players who are present, have a stack, and are not sitting out
+    # (player_states is a dynamic relationship, so the user join goes on its query)
     eligible_players_for_hand = [
-        ps for ps in poker_table.player_states if ps.user and ps.stack_sats > 0 and not ps.is_sitting_out
+        ps for ps in poker_table.player_states.options(joinedload(PokerPlayerState.user))
+        if ps.user and ps.stack_sats > 0 and not ps.is_sitting_out
     ]
 
     if len(eligible_players_for_hand) < 2:
@@ -186,6 +88,15 @@ def start_new_hand(table_id: int):
         ps.is_active_in_hand = True # Mark them as active for this new hand
         ps.total_invested_this_hand = 0 # Reset for the new hand
 
+    # Seated players left out (busted or sitting out) must not carry the last hand into this one,
+    # or they'd count as all-in contenders with their old cards and investment
+    for ps in poker_table.player_states:
+        if ps not in eligible_players_for_hand and (ps.is_active_in_hand or ps.hole_cards or ps.total_invested_this_hand):
+            ps.hole_cards = []
+            ps.last_action = None
+            ps.is_active_in_hand = False
+            ps.total_invested_this_hand = 0
+
     # 2. Determine Dealer Button
     sorted_active_players_by_seat = sorted(eligible_players_for_hand, key=lambda p: p.seat_id)
     num_active_players = len(sorted_active_players_by_seat)
@@ -285,9 +196,7 @@ def start_new_hand(table_id: int):
     bb_tx.poker_hand_id = new_hand.id # Link transaction to hand
 
     # 5. Create and Shuffle Deck for the Hand
-    initial_deck = _create_deck()
-    _shuffle_deck(initial_deck)
-    new_hand.deck_state = initial_deck # Store the shuffled deck with the hand
+    new_hand.deck_state = cards.Deck.shuffled().to_state() # Store the shuffled deck with the hand
     new_hand.status = 'preflop' # <<< SETTING HAND STATUS
     session.add(new_hand) # Ensure status is staged
 
@@ -356,7 +265,7 @@ def handle_sit_down(user_id: int, table_id: int, seat_id: int, buy_in_amount: in
     """
     session = db.session
     user = session.query(User).get(user_id)
-    poker_table = session.query(PokerTable).options(joinedload(PokerTable.player_states)).get(table_id)
+    poker_table = session.get(PokerTable, table_id)
 
     if not user:
         return {"error": "User not found."}
@@ -437,7 +346,8 @@ def handle_stand_up(user_id: int, table_id: int):
     - Adds player's stack from PokerPlayerState back to User.balance.
     - Creates a Transaction.
     - Removes/deactivates the PokerPlayerState.
-    - If active in a hand, folds the player and updates game state.
+    The table actor folds the player out of any live hand (poker_table_state.remove_from_hand)
+    and flushes that fold before calling this.
     """
     session = db.session
     player_state = session.query(PokerPlayerState).filter_by(user_id=user_id, table_id=table_id).first()
@@ -449,48 +359,6 @@ def handle_stand_up(user_id: int, table_id: int):
     if not user: # Should not happen if player_state exists with user_id
         return {"error": "User associated with player state not found."}
 
-    if player_state.is_active_in_hand:
-        player_state.is_active_in_hand = False # Mark as folded first
-        player_state.last_action = "auto_fold_on_stand_up"
-
-        # Find the current active hand for this table
-        current_poker_hand = session.query(PokerHand).filter(
-            PokerHand.table_id == table_id,
-            PokerHand.status.notin_(['completed', 'showdown'])
-        ).order_by(PokerHand.start_time.desc()).first()
-
-        if current_poker_hand:
-            if current_poker_hand.hand_history is None: # Ensure history list exists
-                current_poker_hand.hand_history = []
-
-            current_poker_hand.hand_history.append({
-                "action": "auto_fold", # Consistent with handle_fold action string
-                "user_id": user_id,
-                "seat_id": player_state.seat_id,
-                "reason": "stood_up",
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            })
-
-            # Clear any pending timer for this player on their player_state,
-            # as _check_betting_round_completion will set new timer for next player.
-            player_state.time_to_act_ends = None
-
-            session.add(current_poker_hand) # Add hand to session before calling check
-            session.add(player_state)       # Add player_state to session before calling check
-
-            # Call _check_betting_round_completion to correctly advance game state
-            # user_id here is the one who is folding/standing up.
-            game_flow_result = _check_betting_round_completion(current_poker_hand.id, user_id, session)
-            current_app.logger.info(f"Game flow result after user {user_id} auto-folded due to stand_up: {game_flow_result}")
-            # _check_betting_round_completion may modify current_poker_hand (e.g. status, next turn)
-            # and other player_states (e.g. next player's timer), and adds them to session.
-        else:
-            current_app.logger.info(f"Player {user_id} stood up, was active, but no current poker hand found for table {table_id} to record auto-fold against.")
-
-        # Log that the player was auto-folded. is_active_in_hand is already set to False.
-        current_app.logger.info(f"Player {user_id} (seat {player_state.seat_id}) stood up and was auto-folded from hand {current_poker_hand.id if current_poker_hand else 'N/A'}.")
-        # player_state is already added to session if modified
-
     # Chips in pot from this hand are considered lost/part of the pot.
     # Stack to return is what's left in player_state.stack_sats AFTER any game actions.
     amount_to_return = player_state.stack_sats
@@ -521,595 +389,7 @@ def handle_stand_up(user_id: int, table_id: int):
         return {"error": "Could not process stand up due to a server error."}
 
 
-# --- Betting Logic Stubs ---
-
-def handle_fold(user_id: int, table_id: int, hand_id: int):
-    """
-    Handles a player's fold action.
-    - Fetches PokerPlayerState and PokerHand.
-    - If player state or hand not found, returns an error.
-    - Clears player_state.time_to_act_ends.
-    - If player not active in hand, returns an error.
-    - Sets player_state.is_active_in_hand = False.
-    - Sets player_state.last_action = "fold".
-    - Initializes poker_hand.hand_history to [] if None.
-    - Appends fold action (with user_id, seat_id, action, timestamp) to poker_hand.hand_history.
-    - Adds player_state and poker_hand to session.
-    - Calls game_flow_result = _check_betting_round_completion(hand_id, user_id, db.session).
-    - Commits session.
-    - Returns a success message with game_flow_result or an error from _check_betting_round_completion.
-    """
-    session = db.session
-    player_state = session.query(PokerPlayerState).filter_by(user_id=user_id, table_id=table_id).first()
-    poker_hand = session.query(PokerHand).get(hand_id)
-
-    if not player_state:
-        return {"error": f"Player state for user {user_id} not found at table {table_id}."}
-    if not poker_hand:
-        return {"error": f"Poker hand {hand_id} not found."}
-
-    # Clear player's action timer
-    player_state.time_to_act_ends = None
-
-    if not player_state.is_active_in_hand:
-        session.add(player_state) # Add to session to save time_to_act_ends clearing even if erroring
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing player_state on inactive fold for user {user_id}: {e}")
-        return {"error": f"Player {user_id} is not active in hand {hand_id}."}
-
-    player_state.is_active_in_hand = False
-    player_state.last_action = "fold"
-
-    if poker_hand.hand_history is None:
-        poker_hand.hand_history = []
-
-    poker_hand.hand_history.append({
-        "user_id": user_id,
-        "seat_id": player_state.seat_id,
-        "action": "fold",
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
-
-    session.add(player_state)
-    session.add(poker_hand)
-
-    try:
-        # _check_betting_round_completion is expected to handle session commit internally if it's the final step,
-        # or stage changes if further actions are needed within its scope.
-        # For actions like fold/check/call/bet/raise, the primary responsibility for commit lies with the action handler.
-        game_flow_result = _check_betting_round_completion(hand_id, user_id, session)
-        session.commit() # Commit changes from this function and potentially from _check_betting_round_completion
-        return {
-            "message": f"User {user_id} folded successfully in hand {hand_id}.",
-            "game_flow": game_flow_result
-        }
-    except Exception as e:
-        session.rollback()
-        current_app.logger.error(f"Error during fold action for user {user_id} in hand {hand_id}: {e}")
-        # It's good to return a consistent error structure
-        return {"error": "Could not process fold due to a server error.", "details": str(e)}
-
-
-def handle_check(user_id: int, table_id: int, hand_id: int):
-    """Placeholder for handling a player's check action."""
-    """
-    Handles a player's check action.
-    - Fetches PokerPlayerState and PokerHand.
-    - If player state or hand not found, returns an error.
-    - Clears player_state.time_to_act_ends.
-    - If player not active in hand, returns an error.
-    - Initializes poker_hand.player_street_investments to {} if None.
-    - Calculates player_invested_this_street and current_bet_to_match.
-    - If player_invested_this_street < current_bet_to_match, returns an error "Cannot check, must call...".
-    - Sets player_state.last_action = "check".
-    - Initializes poker_hand.hand_history to [] if None.
-    - Appends check action to poker_hand.hand_history.
-    - Adds player_state and poker_hand to session.
-    - Calls game_flow_result = _check_betting_round_completion(hand_id, user_id, db.session).
-    - Commits session.
-    - Returns a success message with game_flow_result or an error.
-    """
-    session = db.session
-    player_state = session.query(PokerPlayerState).filter_by(user_id=user_id, table_id=table_id).first()
-    poker_hand = session.query(PokerHand).get(hand_id)
-
-    if not player_state:
-        return {"error": f"Player state for user {user_id} not found at table {table_id}."}
-    if not poker_hand:
-        return {"error": f"Poker hand {hand_id} not found."}
-
-    player_state.time_to_act_ends = None
-
-    if not player_state.is_active_in_hand:
-        session.add(player_state) # Save cleared timer
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing player_state on inactive check for user {user_id}: {e}")
-        return {"error": f"Player {user_id} is not active in hand {hand_id}."}
-
-    if poker_hand.player_street_investments is None:
-        poker_hand.player_street_investments = {}
-    
-    player_invested_this_street = poker_hand.player_street_investments.get(str(user_id), 0)
-    current_bet_to_match = poker_hand.current_bet_to_match or 0
-
-    if player_invested_this_street < current_bet_to_match:
-        session.add(player_state) # Save cleared timer
-        session.add(poker_hand) # Save initialized player_street_investments
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing on check legality fail for user {user_id}: {e}")
-        return {"error": f"Cannot check. Player {user_id} needs to call {current_bet_to_match - player_invested_this_street} more to match current bet of {current_bet_to_match}."}
-
-    player_state.last_action = "check"
-
-    if poker_hand.hand_history is None:
-        poker_hand.hand_history = []
-
-    poker_hand.hand_history.append({
-        "user_id": user_id,
-        "seat_id": player_state.seat_id,
-        "action": "check",
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
-
-    session.add(player_state)
-    session.add(poker_hand)
-
-    try:
-        game_flow_result = _check_betting_round_completion(hand_id, user_id, session)
-        session.commit()
-        return {
-            "message": f"User {user_id} checked successfully in hand {hand_id}.",
-            "game_flow": game_flow_result
-        }
-    except Exception as e:
-        session.rollback()
-        current_app.logger.error(f"Error during check action for user {user_id} in hand {hand_id}: {e}")
-        return {"error": "Could not process check due to a server error.", "details": str(e)}
-
-
-def handle_call(user_id: int, table_id: int, hand_id: int):
-    """Placeholder for handling a player's call action."""
-    """
-    Handles a player's call action.
-    - Fetches PokerPlayerState, PokerHand. User can be accessed via player_state.user.
-    - If player state or hand not found, returns an error.
-    - Clears player_state.time_to_act_ends.
-    - If player not active in hand, returns an error.
-    - Initializes poker_hand.player_street_investments to {} if None.
-    - Calculates player_invested_this_street, current_bet_to_match, and amount_to_call_due.
-    - If amount_to_call_due <= 0, returns an error "No pending bet to call...".
-    - Calculates actual_call_amount and is_all_in.
-    - Updates player_state.stack_sats, player_state.total_invested_this_hand.
-    - Updates poker_hand.player_street_investments, poker_hand.pot_size_sats.
-    - Sets action_string and player_state.last_action.
-    - Creates a Transaction.
-    - Initializes poker_hand.hand_history to [] if None and appends call action.
-    - Adds player_state, poker_hand, transaction to session.
-    - Calls _check_betting_round_completion and commits session.
-    - Returns success message or error.
-    """
-    session = db.session
-    # Eagerly load user for transaction details if needed, though not strictly for balance.
-    player_state = session.query(PokerPlayerState).options(joinedload(PokerPlayerState.user)).filter_by(user_id=user_id, table_id=table_id).first()
-    poker_hand = session.query(PokerHand).get(hand_id)
-
-    if not player_state:
-        return {"error": f"Player state for user {user_id} not found at table {table_id}."}
-    if not poker_hand:
-        return {"error": f"Poker hand {hand_id} not found."}
-    # player_state.user is available due to joinedload
-
-    player_state.time_to_act_ends = None
-
-    if not player_state.is_active_in_hand:
-        session.add(player_state) # Save cleared timer
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing player_state on inactive call for user {user_id}: {e}")
-        return {"error": f"Player {user_id} is not active in hand {hand_id}."}
-
-    if poker_hand.player_street_investments is None:
-        poker_hand.player_street_investments = {}
-
-    player_invested_this_street = poker_hand.player_street_investments.get(str(user_id), 0)
-    current_bet_to_match = poker_hand.current_bet_to_match or 0
-    amount_to_call_due = current_bet_to_match - player_invested_this_street
-
-    if amount_to_call_due <= 0:
-        session.add(player_state) # Save cleared timer
-        session.add(poker_hand) # Save initialized investments
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing on call legality fail for user {user_id}: {e}")
-        return {"error": f"No pending bet to call for user {user_id}. Amount due is {amount_to_call_due}. Current bet: {current_bet_to_match}, Player invested: {player_invested_this_street}."}
-
-    actual_call_amount = min(amount_to_call_due, player_state.stack_sats)
-    is_all_in = (actual_call_amount == player_state.stack_sats) and (actual_call_amount < amount_to_call_due)
-
-    player_state.stack_sats -= actual_call_amount
-    player_state.total_invested_this_hand = (player_state.total_invested_this_hand or 0) + actual_call_amount
-
-    poker_hand.player_street_investments[str(user_id)] = player_invested_this_street + actual_call_amount
-    poker_hand.pot_size_sats = (poker_hand.pot_size_sats or 0) + actual_call_amount
-
-    action_string = "call_all_in" if is_all_in else "call"
-    player_state.last_action = f"{action_string}_{actual_call_amount}"
-
-    transaction = Transaction(
-        user_id=user_id,
-        amount=-actual_call_amount,
-        transaction_type='poker_action_call',
-        status='completed',
-        details={
-            "table_id": table_id,
-            "hand_id": hand_id,
-            "action": action_string,
-            "amount": actual_call_amount
-        },
-        poker_hand_id=hand_id
-    )
-
-    if poker_hand.hand_history is None:
-        poker_hand.hand_history = []
-
-    poker_hand.hand_history.append({
-        "user_id": user_id,
-        "seat_id": player_state.seat_id,
-        "action": action_string,
-        "amount": actual_call_amount,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
-
-    session.add(player_state)
-    session.add(poker_hand)
-    session.add(transaction)
-
-    try:
-        game_flow_result = _check_betting_round_completion(hand_id, user_id, session)
-        session.commit()
-        return {
-            "message": f"User {user_id} {action_string}s {actual_call_amount} successfully in hand {hand_id}.",
-            "game_flow": game_flow_result
-        }
-    except Exception as e:
-        session.rollback()
-        current_app.logger.error(f"Error during call action for user {user_id} in hand {hand_id}: {e}")
-        return {"error": "Could not process call due to a server error.", "details": str(e)}
-
-
-def handle_bet(user_id: int, table_id: int, hand_id: int, amount: int):
-    """Placeholder for handling a player's bet action."""
-    """
-    Handles a player's bet action.
-    - Fetches PokerPlayerState, PokerHand, PokerTable.
-    - If any not found, or amount <= 0, returns an error.
-    - Clears player_state.time_to_act_ends.
-    - If player not active, returns an error.
-    - Initializes poker_hand.player_street_investments to {} if None.
-    - Calculates player_invested_this_street and current_bet_to_match_val.
-    - If current_bet_to_match_val > player_invested_this_street, returns error "Cannot bet, must call or raise...".
-    - Validates min_bet_val.
-    - Calculates actual_bet_amount_put_in_pot and is_all_in.
-    - Updates player_state (stack_sats, total_invested_this_hand).
-    - Updates poker_hand (player_street_investments, pot_size_sats, current_bet_to_match, last_raiser_user_id, min_next_raise_amount).
-    - Sets action_string and player_state.last_action.
-    - Creates Transaction.
-    - Initializes and appends to poker_hand.hand_history.
-    - Adds all modified objects to session.
-    - Calls _check_betting_round_completion and commits.
-    - Returns success message or error.
-    """
-    session = db.session
-    player_state = session.query(PokerPlayerState).filter_by(user_id=user_id, table_id=table_id).first()
-    poker_hand = session.query(PokerHand).get(hand_id)
-    poker_table = session.query(PokerTable).get(table_id)
-
-    if not player_state:
-        return {"error": f"Player state for user {user_id} not found at table {table_id}."}
-    if not poker_hand:
-        return {"error": f"Poker hand {hand_id} not found."}
-    if not poker_table:
-        return {"error": f"Poker table {table_id} not found."}
-    if amount <= 0:
-        return {"error": "Bet amount must be positive."}
-
-    player_state.time_to_act_ends = None
-
-    if not player_state.is_active_in_hand:
-        session.add(player_state) # Save cleared timer
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing player_state on inactive bet for user {user_id}: {e}")
-        return {"error": f"Player {user_id} is not active in hand {hand_id}."}
-
-    if poker_hand.player_street_investments is None:
-        poker_hand.player_street_investments = {}
-
-    player_invested_this_street = poker_hand.player_street_investments.get(str(user_id), 0)
-    current_bet_to_match_on_table = poker_hand.current_bet_to_match or 0
-
-    # For a "bet" action, it's generally expected that either:
-    # 1. The current_bet_to_match_on_table is 0 (no prior bets this street).
-    # 2. The player has already matched the current_bet_to_match_on_table (e.g. BB checking option, then deciding to bet).
-    #    This means player_invested_this_street == current_bet_to_match.
-    # If current_bet_to_match_on_table > player_invested_this_street, it implies an outstanding bet the player must call or raise.
-    if current_bet_to_match_on_table > player_invested_this_street:
-        # session.add(player_state) # Save cleared timer - commit will be handled before return
-        # session.add(poker_hand)
-        # try: session.commit()
-        # except Exception as e: session.rollback(); print(f"Error committing on bet legality (must call/raise) for user {user_id}: {e}")
-        return {"error": f"Cannot bet. Must call or raise existing bet of {current_bet_to_match_on_table}. Player has invested {player_invested_this_street}."}
-
-    # `amount` is the additional amount the player wants to bet.
-    # `action_amount_total_for_street` is what their total investment for the street will become.
-    action_amount_total_for_street = player_invested_this_street + amount
-
-    is_valid_bet, validation_message = _validate_bet(
-        player_state=player_state,
-        action_amount=action_amount_total_for_street, # Total investment this player is making it to for the street
-        current_bet_to_match=current_bet_to_match_on_table, # Current highest bet on table player needs to exceed
-        min_next_raise_increment=poker_hand.min_next_raise_amount or poker_table.big_blind, # For opening bet, this effectively sets min open size via logic in _validate_bet
-        limit_type=poker_table.limit_type,
-        poker_table=poker_table,
-        player_amount_invested_this_street=player_invested_this_street,
-        current_hand_pot_size=poker_hand.pot_size_sats or 0 # Pot size before this player's current action
-    )
-
-    if not is_valid_bet:
-        # session.add(player_state) # Save cleared timer before returning error
-        # session.add(poker_hand)
-        # try: session.commit()
-        # except Exception as e: session.rollback(); print(f"Error committing on invalid bet validation for user {user_id}: {e}")
-        return {"error": f"Invalid bet: {validation_message}"}
-
-    # `amount` is the additional amount the player declared to bet.
-    # `actual_bet_amount_put_in_pot` is what they actually can put in (capped by stack).
-    actual_bet_amount_put_in_pot = min(amount, player_state.stack_sats)
-
-    # is_all_in means the player is putting their entire remaining stack into this bet.
-    # This happens if the amount they intend to bet (actual_bet_amount_put_in_pot) is equal to their stack.
-    # And, critically for the "bet_all_in" string, usually implies they *intended* to bet `amount` but were capped by stack,
-    # OR they intended to bet their exact stack.
-    is_all_in = (actual_bet_amount_put_in_pot == player_state.stack_sats)
-
-    player_state.stack_sats -= actual_bet_amount_put_in_pot
-    player_state.total_invested_this_hand = (player_state.total_invested_this_hand or 0) + actual_bet_amount_put_in_pot
-
-    new_player_street_investment = player_invested_this_street + actual_bet_amount_put_in_pot
-    poker_hand.player_street_investments[str(user_id)] = new_player_street_investment
-    poker_hand.pot_size_sats = (poker_hand.pot_size_sats or 0) + actual_bet_amount_put_in_pot
-
-    # This bet action sets a new current_bet_to_match for others.
-    poker_hand.current_bet_to_match = new_player_street_investment
-    poker_hand.last_raiser_user_id = user_id # This player made the latest aggressive action.
-    # The minimum next raise increment is the size of this bet itself (the additional amount put in).
-    poker_hand.min_next_raise_amount = actual_bet_amount_put_in_pot
-
-    action_string = "bet_all_in" if is_all_in else "bet"
-    player_state.last_action = f"{action_string}_{actual_bet_amount_put_in_pot}"
-
-    transaction = Transaction(
-        user_id=user_id,
-        amount=-actual_bet_amount_put_in_pot,
-        transaction_type='poker_action_bet',
-        status='completed',
-        details={
-            "table_id": table_id,
-            "hand_id": hand_id,
-            "action": action_string,
-            "amount": actual_bet_amount_put_in_pot
-        },
-        poker_hand_id=hand_id
-    )
-
-    if poker_hand.hand_history is None:
-        poker_hand.hand_history = []
-
-    poker_hand.hand_history.append({
-        "user_id": user_id,
-        "seat_id": player_state.seat_id,
-        "action": action_string,
-        "amount": actual_bet_amount_put_in_pot, # The amount put into the pot for this bet action
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
-
-    session.add(player_state)
-    session.add(poker_hand)
-    session.add(poker_table) # Though not modified, good practice if accessed
-    session.add(transaction)
-
-    try:
-        game_flow_result = _check_betting_round_completion(hand_id, user_id, session)
-        session.commit()
-        return {
-            "message": f"User {user_id} {action_string}s {actual_bet_amount_put_in_pot} successfully in hand {hand_id}.",
-            "game_flow": game_flow_result
-        }
-    except Exception as e:
-        session.rollback()
-        current_app.logger.error(f"Error during bet action for user {user_id} in hand {hand_id}: {e}")
-        return {"error": "Could not process bet due to a server error.", "details": str(e)}
-
-
-def handle_raise(user_id: int, table_id: int, hand_id: int, amount: int):
-    """Placeholder for handling a player's raise action."""
-    """
-    Handles a player's raise action.
-    - Fetches PokerPlayerState, PokerHand, PokerTable.
-    - If any not found, or amount <= 0, returns error.
-    - Clears player_state.time_to_act_ends.
-    - If player not active, returns error.
-    - Initializes poker_hand.player_street_investments.
-    - Validates raise conditions (prior bet, amount > current bet, min raise increment).
-    - Calculates amounts, is_all_in.
-    - Updates player_state (stack_sats, total_invested_this_hand).
-    - Updates poker_hand (player_street_investments, pot_size_sats, min_next_raise_amount, current_bet_to_match, last_raiser_user_id).
-    - Sets action_string and player_state.last_action.
-    - Creates Transaction.
-    - Initializes and appends to poker_hand.hand_history.
-    - Adds all modified objects to session.
-    - Calls _check_betting_round_completion and commits.
-    - Returns success message or error.
-    """
-    session = db.session
-    player_state = session.query(PokerPlayerState).filter_by(user_id=user_id, table_id=table_id).first()
-    poker_hand = session.query(PokerHand).get(hand_id)
-    poker_table = session.query(PokerTable).get(table_id)
-
-    if not player_state:
-        return {"error": f"Player state for user {user_id} not found at table {table_id}."}
-    if not poker_hand:
-        return {"error": f"Poker hand {hand_id} not found."}
-    if not poker_table:
-        return {"error": f"Poker table {table_id} not found."}
-    if amount <= 0: # Amount is the total sum the player is raising TO for the street
-        return {"error": "Raise amount must be positive."}
-
-    player_state.time_to_act_ends = None
-
-    if not player_state.is_active_in_hand:
-        session.add(player_state) # Save cleared timer
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing player_state on inactive raise for user {user_id}: {e}")
-        return {"error": f"Player {user_id} is not active in hand {hand_id}."}
-
-    if poker_hand.player_street_investments is None:
-        poker_hand.player_street_investments = {}
-
-    player_invested_this_street = poker_hand.player_street_investments.get(str(user_id), 0)
-    previous_bet_to_match_on_table = poker_hand.current_bet_to_match or 0 # This is current_bet_to_match for _validate_bet
-
-    # `amount` for handle_raise IS the total action_amount for the street.
-    action_amount_total_for_street = amount
-
-    # Preliminary check: must be a bet to raise.
-    if previous_bet_to_match_on_table == 0:
-        # try: session.commit() # Commit cleared timer if necessary
-        # except Exception as e: session.rollback(); print(f"Error committing on raise legality (no prior bet) for user {user_id}: {e}")
-        return {"error": "Cannot raise, no prior bet. Use 'bet' action instead."}
-
-    # Preliminary check: raise amount must be greater than the current bet.
-    if action_amount_total_for_street <= previous_bet_to_match_on_table:
-        # try: session.commit()
-        # except Exception as e: session.rollback(); print(f"Error committing on raise legality (amount <= prev bet) for user {user_id}: {e}")
-        return {"error": f"Raise amount ({action_amount_total_for_street}) must be greater than current bet to match ({previous_bet_to_match_on_table})."}
-
-    is_valid_raise, validation_message = _validate_bet(
-        player_state=player_state,
-        action_amount=action_amount_total_for_street, # This is the 'amount' parameter of handle_raise
-        current_bet_to_match=previous_bet_to_match_on_table,
-        min_next_raise_increment=poker_hand.min_next_raise_amount or poker_table.big_blind,
-        limit_type=poker_table.limit_type,
-        poker_table=poker_table,
-        player_amount_invested_this_street=player_invested_this_street,
-        current_hand_pot_size=poker_hand.pot_size_sats or 0 # Pot size before this player's call portion
-    )
-
-    if not is_valid_raise:
-        # try: session.commit()
-        # except Exception as e: session.rollback(); print(f"Error committing on invalid raise validation for user {user_id}: {e}")
-        return {"error": f"Invalid raise: {validation_message}"}
-
-    # Calculate the actual additional chips based on the validated action_amount_total_for_street (raise amount 'amount')
-    amount_player_needs_to_add_for_this_raise = action_amount_total_for_street - player_invested_this_street
-
-    # This check should be covered by _validate_bet (chips_for_this_action < 0) or subsequent logic,
-    # but as a safeguard here if action_amount_total_for_street was somehow miscalculated.
-    if amount_player_needs_to_add_for_this_raise <= 0:
-         return {"error": "Raise results in no additional chips being added to the pot. This should have been caught by validation."}
-
-    actual_amount_added_to_pot = min(amount_player_needs_to_add_for_this_raise, player_state.stack_sats)
-
-    # final_player_investment_this_street is same as action_amount_total_for_street if player not stack constrained,
-    # otherwise it's player_invested_this_street + actual_amount_added_to_pot (their all-in amount).
-    final_player_investment_this_street = player_invested_this_street + actual_amount_added_to_pot
-
-    # is_all_in is true if the player commits their entire stack AND this amount is less than what they *intended* to add for the raise
-    # OR if they intended to raise their exact stack size.
-    # More simply: if actual_amount_added_to_pot is their entire stack.
-    is_all_in = (actual_amount_added_to_pot == player_state.stack_sats)
-    # Refined is_all_in for "raise_all_in" string: implies they might have wanted to raise more but couldn't.
-    # This happens if the actual amount they could add is less than the amount they needed for their declared raise total,
-    # and they indeed added all their chips.
-    is_all_in_short = is_all_in and (actual_amount_added_to_pot < amount_player_needs_to_add_for_this_raise)
-
-
-    player_state.stack_sats -= actual_amount_added_to_pot
-    player_state.total_invested_this_hand = (player_state.total_invested_this_hand or 0) + actual_amount_added_to_pot
-
-    poker_hand.player_street_investments[str(user_id)] = final_player_investment_this_street
-    poker_hand.pot_size_sats = (poker_hand.pot_size_sats or 0) + actual_amount_added_to_pot
-
-    # The new minimum increment for the *next* raise is the size of this raise.
-    poker_hand.min_next_raise_amount = final_player_investment_this_street - previous_bet_to_match_on_table
-    poker_hand.current_bet_to_match = final_player_investment_this_street
-    poker_hand.last_raiser_user_id = user_id
-
-    action_string = "raise_all_in" if is_all_in else "raise"
-    player_state.last_action = f"{action_string}_to_{final_player_investment_this_street}"
-
-    transaction = Transaction(
-        user_id=user_id,
-        amount=-actual_amount_added_to_pot,
-        transaction_type='poker_action_raise',
-        status='completed',
-        details={
-            "table_id": table_id,
-            "hand_id": hand_id,
-            "action": action_string,
-            "raised_to_amount": final_player_investment_this_street,
-            "actual_amount_added_to_pot": actual_amount_added_to_pot
-        },
-        poker_hand_id=hand_id
-    )
-
-    if poker_hand.hand_history is None:
-        poker_hand.hand_history = []
-
-    poker_hand.hand_history.append({
-        "user_id": user_id,
-        "seat_id": player_state.seat_id,
-        "action": action_string,
-        "amount": final_player_investment_this_street, # Total amount player has raised to this street
-        "added_to_pot": actual_amount_added_to_pot, # The portion added in this specific action
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    })
-
-    session.add(player_state)
-    session.add(poker_hand)
-    session.add(poker_table) # Though not modified
-    session.add(transaction)
-
-    try:
-        game_flow_result = _check_betting_round_completion(hand_id, user_id, session)
-        session.commit()
-        return {
-            "message": f"User {user_id} {action_string}s to {final_player_investment_this_street} successfully in hand {hand_id}.",
-            "game_flow": game_flow_result
-        }
-    except Exception as e:
-        session.rollback()
-        current_app.logger.error(f"Error during raise action for user {user_id} in hand {hand_id}: {e}")
-        return {"error": "Could not process raise due to a server error.", "details": str(e)}
-
+# --- Bet Validation ---
 
 def _validate_bet(player_state: PokerPlayerState,
                   action_amount: int, # The total amount the player's street investment will be post-action.
@@ -1394,350 +674,159 @@ def _calculate_pot_limit_raise_sizes(
 
 def _determine_winning_hand(player_hole_cards_map: dict[int, list[str]], board_cards_str: list[str]):
     """
-    Determines the winning hand(s) from players who went to showdown using the 'treys' library.
+    Determines the winning hand(s) from players who went to showdown using the table-driven
+    evaluator in utils.poker_evaluator.
     player_hole_cards_map: {user_id_1: ["AH", "KH"], user_id_2: ["7D", "8D"]}
     board_cards_str: ["5S", "6S", "7S", "QD", "JC"] (String representation)
 
     Returns: A list of winning player dicts, e.g.,
              [{"user_id": X, "winning_hand": "Full House", "best_five_cards": ["AH", "KH", "5S", "6S", "7S"]}]
              Handles split pots by returning multiple players if they tie.
-             "best_five_cards" will contain the player's hole cards and the board cards as a proxy,
-             as treys library doesn't directly return the exact 5 cards forming the best hand.
+             "best_five_cards" is the exact five-card hand behind the player's score.
     """
     if not player_hole_cards_map:
         return []
 
-    evaluator = Evaluator()
-    
-    # Convert board cards from string to treys.Card objects
-    # treys expects card strings like 'Ah', 'Ks', 'Td', '2c' (rank first, then suit, lowercase)
-    # Our format is 'HA', 'SK', 'DT', 'C2' (suit first, then rank, uppercase)
-    # We need to convert: e.g., "HA" -> "Ah", "S2" -> "2s"
-
-    # Helper to convert our card format to treys format
-    def to_treys_card_str(card_str: str) -> str:
-        suit_map = {'H': 'h', 'D': 'd', 'C': 'c', 'S': 's'}
-        # Our format: SUIT RANK e.g. HA, S2
-        # Treys format: RANK SUIT e.g. Ah, 2s
-        original_suit = card_str[0]
-        original_rank = card_str[1:]
-        return original_rank + suit_map[original_suit]
-
     try:
-        board = [Card.from_string(to_treys_card_str(c)) for c in board_cards_str]
-    except Exception as e:
-        # Log error: Invalid card string in board_cards
-        current_app.logger.error(f"Error converting board cards for treys: {board_cards_str} - {e}")
-        # Consider how to handle this - perhaps invalidate the hand or return error
+        board = poker_evaluator.cards_from_strs(board_cards_str)
+    except (ValueError, TypeError) as e:
+        current_app.logger.error(f"Error converting board cards for evaluation: {board_cards_str} - {e}")
         return []
 
-    best_score = float('inf')  # Lower score is better in treys
-    winners = []
-
+    user_ids = []
+    hands = []
     for user_id, hole_cards_str_list in player_hole_cards_map.items():
         if not hole_cards_str_list or len(hole_cards_str_list) != 2:
-            # Log warning or skip player
             current_app.logger.warning(f"User {user_id} has invalid hole cards: {hole_cards_str_list}")
             continue
-
         try:
-            # Ensure hole_cards_str is a list of strings, then convert
-            hand = [Card.from_string(to_treys_card_str(c)) for c in hole_cards_str_list]
-        except Exception as e:
-            # Log error: Invalid card string in hole_cards
+            hands.append(poker_evaluator.cards_from_strs(hole_cards_str_list))
+        except (ValueError, TypeError) as e:
             current_app.logger.error(f"Error converting hole cards for user {user_id}: {hole_cards_str_list} - {e}")
-            continue # Skip this player
-
-        # Evaluate the hand (board + player's hole cards)
-        # treys evaluate function takes board and hand (player's cards)
-        score = evaluator.evaluate(board, hand)
-        hand_class_str = evaluator.class_to_string(evaluator.get_rank_class(score))
+            continue
+        user_ids.append(user_id)
 
-        # For "best_five_cards", we'll just return the combination of hole + board as a proxy.
-        # A more advanced implementation might try to find the exact 5 cards.
-        combined_cards_str = hole_cards_str_list + board_cards_str
+    if not hands:
+        return []
 
-        # DEBUG LOG: Original line logged hole cards: current_app.logger.debug(f"User {user_id}, Hole: {hole_cards_str_list}, Board: {board_cards_str}, Score: {score}, Hand Class: {hand_class_str}")
-        # Hole cards redacted for security in general logging:
-        current_app.logger.info(f"User {user_id} evaluation - Board: {board_cards_str}, Score: {score}, Hand Class: {hand_class_str}")
+    # One board object repeated for every player: the evaluator summarises it once
+    scores = poker_evaluator.evaluate_many([board] * len(hands), hands)
+    best_score = min(scores)
 
-        if score < best_score:
-            best_score = score
-            winners = [{
-                "user_id": user_id,
-                "winning_hand": hand_class_str,
-                "best_five_cards": combined_cards_str, # Proxy
-                "score": score # For debugging or advanced tie-breaking if needed
-            }]
-        elif score == best_score:
-            winners.append({
-                "user_id": user_id,
-                "winning_hand": hand_class_str,
-                "best_five_cards": combined_cards_str, # Proxy
-                "score": score
-            })
+    winners = []
+    for user_id, hand, score in zip(user_ids, hands, scores):
+        # Hole cards redacted for security in general logging
+        current_app.logger.debug(f"User {user_id} evaluation - Board: {board_cards_str}, Score: {score}")
+        if score != best_score:
+            continue
+        _, best_cards = poker_evaluator.best_five(hand + board)
+        winners.append({
+            "user_id": user_id,
+            "winning_hand": poker_evaluator.class_name(score),
+            "best_five_cards": [poker_evaluator.card_to_str(card) for card in best_cards],
+        })
 
-    # Remove score from the final output as it's not part of the required return structure
-    for winner in winners:
-        del winner["score"]
-        
     return winners
 
 
-# --- Showdown & Payout Stubs ---
+# --- Showdown & Payout ---
 
-def _distribute_pot(poker_hand: PokerHand, showdown_player_states: list[PokerPlayerState]):
+def _build_side_pots(contributions: dict[int, int], eligible_user_ids) -> list[tuple[int, frozenset]]:
     """
-    Distributes the pot(s) to the winner(s), handling side pots.
-    Updates PokerHand with rake and winner details.
-    Creates Transaction records for winnings.
+    Layer every player's total investment (folded players included) into main and side pots.
+    contributions: {user_id: chips put in this hand}; eligible_user_ids: players who can still win.
+
+    Investments are sorted once and the levels swept bottom-up: at each level every player still
+    at or above it pays (level - previous level), so a layer is one multiplication. The contenders
+    covering each level are collected in a single top-down pass beforehand.
+    Returns [(amount, frozenset of eligible user ids)]; a layer nobody still in the hand can win is
+    added to the pot below it, as is a layer with the same contenders (a folded player's level).
     """
-    session = db.session
-    poker_table = session.query(PokerTable).get(poker_hand.table_id)
+    ordered = sorted(contributions.items(), key=lambda item: item[1])
+    covering = [frozenset()] * len(ordered)
+    contenders = frozenset()
+    for index in range(len(ordered) - 1, -1, -1):
+        user_id = ordered[index][0]
+        if user_id in eligible_user_ids:
+            contenders = contenders | {user_id}
+        covering[index] = contenders
 
-    if not poker_table:
-        current_app.logger.error(f"PokerTable {poker_hand.table_id} not found for pot distribution of hand {poker_hand.id}.")
-        # This is a critical error, likely indicates data integrity issue or programming error.
-        # Depending on desired robustness, could try to proceed without rake or raise exception.
-        # For now, let's assume this is fatal for pot distribution.
-        return {"error": f"Table not found for pot distribution, hand {poker_hand.id}"}
-
-    # --- 1. Prepare Player Data for Showdown ---
-    players_data_for_pots = []
-    for ps in showdown_player_states:
-        if not ps.hole_cards or len(ps.hole_cards) != 2:
-            # Log this, but might not be critical to stop if other players are valid.
-            # However, a player at showdown should always have hole cards.
-            current_app.logger.warning(f"Player {ps.user_id} at showdown for hand {poker_hand.id} has invalid hole cards: {ps.hole_cards}. Skipping for pot eligibility.")
+    pots = []
+    previous_level = 0
+    for index, (_, level) in enumerate(ordered):
+        if level <= previous_level:
             continue
+        amount = (level - previous_level) * (len(ordered) - index)
+        eligible = covering[index]
+        if pots and (not eligible or pots[-1][1] == eligible):
+            pots[-1] = (pots[-1][0] + amount, pots[-1][1])
+        elif eligible:
+            pots.append((amount, eligible))
+        previous_level = level
+    return pots
 
-        # total_invested_this_hand should be accurately tracked by action handlers.
-        # Fallback or error if not present could be added, but spec assumes it's populated.
-        total_invested = ps.total_invested_this_hand if ps.total_invested_this_hand is not None else 0
 
-        players_data_for_pots.append({
-            'user_id': ps.user_id,
-            'total_invested': total_invested,
-            'hole_cards_str': ps.hole_cards, # String representation like ["HA", "SK"]
-            'player_state_obj': ps # Direct reference to the SQLAlchemy object for stack updates
-        })
+def _award_pots(pots, hole_cards_by_user: dict[int, list[str]], board_cards_str: list[str], distributable: int) -> list[dict]:
+    """
+    Splits pots from _build_side_pots between the best hands.
+    hole_cards_by_user must be in odd-chip order (first clockwise from the button first): a pot's
+    winners are listed in that order and the first of them takes any remainder.
+    Pots are paid bottom-up until `distributable` (the pot after rake) runs out.
 
-    if not players_data_for_pots:
-        if poker_hand.pot_size_sats > 0:
-            # This case means the pot has money, but no valid showdown players were passed.
-            # This might happen if only one player remained due to folds (handled before calling _distribute_pot)
-            # or an error in game flow logic.
-            current_app.logger.warning(f"_distribute_pot called for hand {poker_hand.id} with pot {poker_hand.pot_size_sats} but no valid showdown players. Pot remains unawarded by this function.")
-            # Consider refunding pot or specific error handling based on game rules.
-        # If pot is 0 and no players, it's fine.
-        poker_hand.status = 'completed' # Ensure hand is marked completed
-        poker_hand.end_time = datetime.now(timezone.utc)
-        session.add(poker_hand)
-        try:
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing hand completion with no showdown players for hand {poker_hand.id}: {e}")
-        return # Or return a status indicating no distribution needed/possible.
-
-    # --- 2. Rake Calculation ---
-    total_pot_value_before_rake = poker_hand.pot_size_sats or 0
-    actual_rake = 0
-
-    # Apply rake only if conditions are met (e.g., flop seen, or always if pot > 0 as per simplified rule)
-    # For now, applying if pot > 0 based on table settings.
-    # A more advanced rule: if poker_hand.status not in ['preflop', 'completed'] or len(poker_hand.board_cards) > 0
-    if total_pot_value_before_rake > 0:
-        rake_percentage = poker_table.rake_percentage if poker_table.rake_percentage is not None else Decimal("0.00")
-        max_rake = poker_table.max_rake_sats if poker_table.max_rake_sats is not None else 0
-
-        if rake_percentage > Decimal("0.00"):
-            calculated_rake = int(Decimal(total_pot_value_before_rake) * rake_percentage)
-            if max_rake > 0: # Apply cap only if max_rake is positive
-                actual_rake = min(calculated_rake, max_rake)
-            else: # No cap or cap is 0
-                actual_rake = calculated_rake
-
-        actual_rake = max(0, actual_rake) # Ensure rake is not negative
-        actual_rake = min(actual_rake, total_pot_value_before_rake) # Rake cannot exceed total pot
-
-    poker_hand.rake_sats = actual_rake
-    distributable_pot_overall = total_pot_value_before_rake - actual_rake
-    if distributable_pot_overall < 0: # Should not happen with current logic
-        distributable_pot_overall = 0
-
-
-    # --- 3. Create Pots (Main and Side Pots) ---
-    # Sort players by their total investment for this hand in ascending order
-    # This order is crucial for correctly layering investments into pots.
-    sorted_players_by_investment = sorted(players_data_for_pots, key=lambda x: x['total_invested'])
-
-    created_pots = [] # List of dicts: {'amount': int, 'eligible_user_ids': set[int], 'description': str}
-    last_cap_level = 0 # Tracks the investment level covered by previous pots
-
-    # Iterate through each player's unique investment level to define pot boundaries
-    unique_investment_levels = sorted(list(set(p['total_invested'] for p in sorted_players_by_investment)))
-
-    for cap_level in unique_investment_levels:
-        if cap_level <= last_cap_level: # Already processed up to or beyond this level
-            continue
+    Every contender is scored once, in a single evaluate_many call, and each pot takes the best
+    score among its eligible players; only winners have their best five cards worked out.
+    Returns [{"description", "amount", "winners": [{"user_id", "amount_won", "winning_hand", "best_five_cards"}]}].
+    """
+    try:
+        board = poker_evaluator.cards_from_strs(board_cards_str)
+    except (ValueError, TypeError) as e:
+        current_app.logger.error(f"Error converting board cards for evaluation: {board_cards_str} - {e}")
+        return []
 
-        contribution_this_layer = cap_level - last_cap_level
-        current_pot_value_from_investments = 0
-        eligible_players_for_this_pot = set()
-
-        for p_data in sorted_players_by_investment: # Iterate all players to see who contributes to this layer
-            # Amount this player contributes *to this specific layer*
-            player_contribution_to_layer = min(contribution_this_layer, max(0, p_data['total_invested'] - last_cap_level))
-
-            if player_contribution_to_layer > 0:
-                current_pot_value_from_investments += player_contribution_to_layer
-                eligible_players_for_this_pot.add(p_data['user_id'])
-
-        if current_pot_value_from_investments > 0:
-            pot_description = f"Main Pot" if not created_pots else f"Side Pot {len(created_pots)}"
-            # The actual amount for this pot is capped by what's left in distributable_pot_overall
-            amount_for_this_pot = min(current_pot_value_from_investments, distributable_pot_overall - sum(p['amount'] for p in created_pots))
-
-            if amount_for_this_pot > 0 :
-                 created_pots.append({
-                    'amount': amount_for_this_pot,
-                    'eligible_user_ids': eligible_players_for_this_pot,
-                    'description': pot_description
-                })
-            elif distributable_pot_overall <= sum(p['amount'] for p in created_pots) and current_pot_value_from_investments > 0:
-                # This means no more distributable money left for further side pots from player actual investments.
-                # This can happen if rake consumed the remaining amounts.
-                current_app.logger.info(f"Hand {poker_hand.id}: Pot layer for cap {cap_level} calculated {current_pot_value_from_investments}, but no distributable funds left due to rake. Sum of created pots: {sum(p['amount'] for p in created_pots)}, Distributable: {distributable_pot_overall}")
-                break # No more money to distribute
-
-        last_cap_level = cap_level
-
-    # Sanity check: If sum of created pots (from distributable amount) is less than total distributable_pot_overall
-    # (e.g., due to all players being all-in for same small amount and rake making it complex),
-    # distribute any remaining small amount. This is rare with integer math if rake is handled first.
-    # The current logic should allocate distributable_pot_overall correctly across layers.
-    # If any distributable_pot_overall remains unallocated to a pot layer (shouldn't happen if players invested), it's an issue.
-
-    # --- 4. Determine Winners and Distribute Each Pot ---
-    final_hand_winners_summary = [] # To be stored in PokerHand.winners
-
-    for pot_info in created_pots:
-        pot_amount = pot_info['amount']
-        eligible_user_ids = pot_info['eligible_user_ids']
-        pot_description = pot_info['description']
-
-        if pot_amount <= 0: # No value in this pot to distribute
+    hands = {}
+    for user_id, hole_cards_str_list in hole_cards_by_user.items():
+        if not hole_cards_str_list or len(hole_cards_str_list) != 2:
+            current_app.logger.warning(f"User {user_id} has invalid hole cards: {hole_cards_str_list}")
             continue
+        try:
+            hands[user_id] = poker_evaluator.cards_from_strs(hole_cards_str_list)
+        except (ValueError, TypeError) as e:
+            current_app.logger.error(f"Error converting hole cards for user {user_id}: {hole_cards_str_list} - {e}")
+    if not hands:
+        return []
 
-        # Prepare data for _determine_winning_hand for this specific pot
-        hole_cards_for_this_pot_eval = {
-            p_data['user_id']: p_data['hole_cards_str']
-            for p_data in players_data_for_pots # Use original full list to find user_ids
-            if p_data['user_id'] in eligible_user_ids and p_data['hole_cards_str']
-        }
+    scores = dict(zip(hands, poker_evaluator.evaluate_many([board] * len(hands), list(hands.values()))))
+    best_cards = {}
 
-        if not hole_cards_for_this_pot_eval:
-            current_app.logger.warning(f"Hand {poker_hand.id}, Pot '{pot_description}': No eligible players with cards found for evaluation. Amount {pot_amount} unawarded.")
+    awarded = []
+    for index, (layer_amount, eligible) in enumerate(pots):
+        pot_amount = min(layer_amount, distributable)
+        distributable -= pot_amount
+        if pot_amount <= 0:
             continue
-
-        # Determine winner(s) for this pot
-        # _determine_winning_hand returns list of dicts: [{"user_id": X, "winning_hand": "...", "best_five_cards": [...]}, ...]
-        winners_of_this_pot = _determine_winning_hand(hole_cards_for_this_pot_eval, poker_hand.board_cards or [])
-
-        if not winners_of_this_pot:
-            current_app.logger.warning(f"Hand {poker_hand.id}, Pot '{pot_description}': _determine_winning_hand returned no winners. Amount {pot_amount} unawarded.")
+        description = "Main Pot" if index == 0 else f"Side Pot {index}"
+        contenders = [user_id for user_id in hands if user_id in eligible]
+        if not contenders:
+            current_app.logger.warning(f"Pot '{description}': no eligible players with valid cards. Amount {pot_amount} unawarded.")
             continue
+        best_score = min(scores[user_id] for user_id in contenders)
+        winner_ids = [user_id for user_id in contenders if scores[user_id] == best_score]
+
+        share, odd_chips = divmod(pot_amount, len(winner_ids))
+        winners = []
+        for position, user_id in enumerate(winner_ids):
+            if user_id not in best_cards:
+                _, five = poker_evaluator.best_five(hands[user_id] + board)
+                best_cards[user_id] = [poker_evaluator.card_to_str(card) for card in five]
+            winners.append({
+                "user_id": user_id,
+                "amount_won": share + (odd_chips if position == 0 else 0),
+                "winning_hand": poker_evaluator.class_name(best_score),
+                "best_five_cards": best_cards[user_id],
+            })
+        awarded.append({"description": description, "amount": pot_amount, "winners": winners})
+    return awarded
 
-        num_winners_this_pot = len(winners_of_this_pot)
-        # Handle odd chips: integer division means leftover chips are currently discarded per pot.
-        # For more precise handling, odd chips could be awarded to player in earliest position, or accumulated.
-        amount_per_winner = pot_amount // num_winners_this_pot
-
-        if amount_per_winner <= 0 and pot_amount > 0 : # If pot has value but per-winner is 0 (many winners of tiny pot)
-            current_app.logger.warning(f"Hand {poker_hand.id}, Pot '{pot_description}': pot amount {pot_amount} results in {amount_per_winner} per winner for {num_winners_this_pot} winners. Chips may be lost.")
-            # Potentially award to first winner if amount_per_winner is 0 but pot_amount > 0
-            # For now, proceeding with amount_per_winner as calculated.
-
-        for winner_data in winners_of_this_pot:
-            winner_user_id = winner_data['user_id']
-
-            # Find the PokerPlayerState object for the winner to update their stack
-            winner_player_state = next((p['player_state_obj'] for p in players_data_for_pots if p['user_id'] == winner_user_id), None)
-            winner_user_account = session.query(User).get(winner_user_id) # For username in summary
-
-            if winner_player_state and winner_user_account:
-                if amount_per_winner > 0: # Only process if there's an actual amount to award
-                    winner_player_state.stack_sats += amount_per_winner
-                    session.add(winner_player_state)
-
-                    # Create Transaction for winnings
-                    win_transaction = Transaction(
-                        user_id=winner_user_id,
-                        amount=amount_per_winner,
-                        transaction_type='poker_win',
-                        status='completed',
-                        details={
-                            "hand_id": poker_hand.id,
-                            "table_id": poker_hand.table_id,
-                            "pot_description": pot_description,
-                            "amount_won_from_this_pot": amount_per_winner,
-                            "this_pot_total_value_distributed": pot_amount, # Pot value before this winner's share
-                            "num_winners_for_this_pot": num_winners_this_pot,
-                            "winning_hand_description": winner_data.get("winning_hand", "Unknown"),
-                            "board_cards_at_showdown": poker_hand.board_cards or []
-                        },
-                        poker_hand_id=poker_hand.id
-                    )
-                    session.add(win_transaction)
-
-                # Add to summary regardless of amount (e.g. won a $0 split pot if that's possible)
-                final_hand_winners_summary.append({
-                    "user_id": winner_user_id,
-                    "username": winner_user_account.username,
-                    "amount_won": amount_per_winner, # This is share from this specific pot
-                    "pot_description": pot_description,
-                    "winning_hand": winner_data.get("winning_hand", "Unknown"),
-                    "best_five_cards": winner_data.get("best_five_cards", []) # From _determine_winning_hand
-                })
-            else:
-                current_app.logger.error(f"Hand {poker_hand.id}, Pot '{pot_description}': Could not find PlayerState or User account for winner ID {winner_user_id}.")
-
-    # --- 5. Finalize Hand ---
-    poker_hand.winners = final_hand_winners_summary # Store detailed winner breakdown
-    poker_hand.end_time = datetime.now(timezone.utc)
-    poker_hand.status = 'completed' # Mark hand as fully completed
-    session.add(poker_hand)
-
-    try:
-        session.commit()
-        # current_app.logger.info(f"Hand {poker_hand.id} pot distribution complete. Rake: {poker_hand.rake_sats}. Winners summary: {final_hand_winners_summary}")
-    except Exception as e:
-        session.rollback()
-        current_app.logger.error(f"Error during final commit of pot distribution for hand {poker_hand.id}: {e}")
-        # This is a server-side error; the calling context might need to be aware.
-        # For now, error is logged. Potentially return an error status.
-        return {"error": f"Failed to commit pot distribution for hand {poker_hand.id}: {str(e)}"}
-
-    return {"status": "pot_distributed", "hand_id": poker_hand.id, "winners": final_hand_winners_summary, "rake_taken": poker_hand.rake_sats}
-
-
-# Example of how a full hand might proceed (very simplified flow):
-# 1. new_hand_data = start_new_hand(table_id=1)
-# 2. If error in new_hand_data, handle it.
-# 3. Loop for betting rounds (preflop, flop, turn, river):
-#    - Get actions from players (fold, check, bet, call, raise) using handle_* functions.
-#    - Update hand state (pot, current_bet, player_stacks, hand_history).
-#    - If betting round ends and more than one player remains:
-#        - If street is 'preflop', deal flop: deal_community_cards('flop', deck, board)
-#        - If street is 'flop', deal turn: deal_community_cards('turn', deck, board)
-#        - If street is 'turn', deal river: deal_community_cards('river', deck, board)
-# 4. If showdown:
-#    - active_players_at_showdown = {ps.user_id: ps.hole_cards for ps in active_players if ps.is_active_in_hand}
-#    - winners = _determine_winning_hand(active_players_at_showdown, board_cards)
-#    - _distribute_pot(poker_hand_object, winners)
-# 5. Mark hand as complete.
-# (This is a conceptual flow, actual implementation would be in API endpoints calling these helpers)
 
 # TODO:
 # - Robust dealer button logic (store on PokerTable, rotate correctly)
@@ -1747,7 +836,6 @@ def _distribute_pot(poker_hand: PokerHand, showdown_player_states: list[PokerPla
 # - Full implementation of _validate_bet for different limit types
 # - Accurate Pot-Limit Omaha raise calculation in _calculate_pot_limit_raise_sizes
 # - Robust hand evaluation in _determine_winning_hand (e.g., integrate 'treys' library)
-# - Side pot calculation logic in _distribute_pot
 # - Handling for all-in scenarios throughout betting and showdown
 # - Player timers and auto-actions (e.g., auto-fold if time runs out)
 # - Secure management of hole cards (e.g., only send to the specific player, don't log plaintext if possible long-term)
@@ -1763,17 +851,15 @@ def _distribute_pot(poker_hand: PokerHand, showdown_player_states: list[PokerPla
 #   If kept, ensure strict access controls. For now, it's cleared in `start_new_hand`.
 # - `deal_hole_cards` updates `player_state.hole_cards` in memory. Ensure these are persisted to DB in `start_new_hand` after calling it.
 #   (Added session.add(ps) for this in start_new_hand)
-# - `_deal_card` pops from index 0. If deck is a list, pop() or pop(0) have different performance. For typical deck sizes (52), this is fine.
-#   `collections.deque` could be used if performance for dealing from left becomes an issue with very large/many decks.
-# - `secrets.SystemRandom().shuffle(deck)` is not a direct method. `random.shuffle(deck, random=secrets.SystemRandom())` could be an option
-#   but `random.shuffle(deck)` is generally fine. For more security, one might implement Fisher-Yates with `secrets.randbelow`.
-#   Kept `random.shuffle()` for now.
+# - Decks come from utils.cards: byte-coded cards, a Fisher-Yates shuffle over one bulk CSPRNG read, dealt by cursor
+#   and stored in `deck_state` as a base64 string. Hands dealt before that still hold a list of card strings, which
+#   `cards.Deck.from_state` accepts.
 # - The `start_new_hand` function has grown quite large. It would benefit from being broken down.
 # - The blind collection in `start_new_hand` should correctly handle cases where players have stacks smaller than the blind amounts (all-in for blinds).
 #   (Added min() for this).
 # - `handle_stand_up`: If a player stands up mid-hand, their chips in the current pot are forfeited or handled by game rules.
 #   The current implementation just removes them. This needs more thought for live games.
-# - `_determine_winning_hand` now uses treys. `best_five_cards` is a proxy (hole + board).
+# - `_determine_winning_hand` uses utils.poker_evaluator and returns the exact best five cards.
 # - Transactions for blinds in `start_new_hand` are commented out. They should be implemented.
 # - `Transaction` model might need `poker_hand_id` nullable ForeignKey.
 # - `PokerTable` might need fields like `current_dealer_seat_id`, `current_turn_user_id`, `current_bet_to_match`, `last_raise_amount`, `current_pot_this_street`
@@ -1781,542 +867,13 @@ def _distribute_pot(poker_hand: PokerHand, showdown_player_states: list[PokerPla
 #   For now, some of this state is implicitly managed or intended to be added to PokerHand.
 # - The `deal_hole_cards` function modifies `player_state.hole_cards` directly. These are SQLAlchemy model instances.
 #   The changes are added to the session and committed in `start_new_hand`.
-# - _get_card_value is removed as treys handles card representation.
-# - `_distribute_pot` currently doesn't handle side pots at all. This is a major component for multi-way all-in situations.
+# - _get_card_value is removed as poker_evaluator handles card representation.
 # - The `winners` list in `PokerHand` stores `amount_won`. This is good.
 # - `poker_table.player_states` is accessed. Ensure this relationship is loaded efficiently, e.g. with `joinedload` or `selectinload` where appropriate
 #   (added to `start_new_hand` and `handle_sit_down`).
 # - `Decimal` was imported but not used. It's good for financial calcs but satoshis are integers, so direct integer math is fine.
 # - `handle_sit_down` checks for user already seated at *any* seat at the table. This is correct.
 
-# --- Game Progression Logic ---
-
-# Conceptual placeholder for timeout logic
-# Assumes PokerPlayerState has a 'turn_starts_at' field (db.Column(db.DateTime, nullable=True)).
-# And a POKER_ACTION_TIMEOUT_SECONDS constant is defined in config or globally.
-# def check_and_handle_player_timeouts(poker_hand_id: int, session: Session, POKER_ACTION_TIMEOUT_SECONDS: int = 60):
-#     """
-#     Checks the current player for timeout and auto-folds them.
-#     This would ideally be triggered by a separate scheduler or before processing any player action request.
-#     Returns True if a timeout action was taken, False otherwise.
-#     The actual auto-fold action should call the handle_fold function to ensure game state consistency.
-#     """
-#     poker_hand = session.query(PokerHand).get(poker_hand_id)
-#     if not poker_hand or poker_hand.current_turn_user_id is None or poker_hand.status in ['completed', 'showdown']:
-#         return False # No active turn or hand is over
-#
-#     player_to_act_state = session.query(PokerPlayerState).filter_by(
-#         user_id=poker_hand.current_turn_user_id,
-#         table_id=poker_hand.table_id # Ensure we get player at the correct table
-#     ).first()
-#
-#     if player_to_act_state and hasattr(player_to_act_state, 'turn_starts_at') and player_to_act_state.turn_starts_at:
-#         time_elapsed = (datetime.now(timezone.utc) - player_to_act_state.turn_starts_at).total_seconds()
-#         if time_elapsed > POKER_ACTION_TIMEOUT_SECONDS:
-#             current_app.logger.info(f"Player {player_to_act_state.user_id} at seat {player_to_act_state.seat_id} timed out after {time_elapsed:.2f}s. Auto-folding.")
-#
-#             original_turn_user_id = player_to_act_state.user_id
-#             # It's crucial that handle_fold is called, which then calls _check_betting_round_completion
-#             # to correctly update game state including turn timers and player status.
-#             # The handle_fold function should also ensure player_to_act_state.turn_starts_at is cleared after folding.
-#             fold_result = handle_fold(original_turn_user_id, poker_hand.table_id, poker_hand.id) # handle_fold will manage session commit
-#             current_app.logger.info(f"Auto-fold result for user {original_turn_user_id}: {fold_result}")
-#             return True # Timeout action was taken
-#     return False
-
-
-def _advance_to_next_street(hand_id: int, session: Session) -> dict:
-    """
-    Advances the hand to the next street (Flop, Turn, River) or to Showdown.
-    - Deals community cards for the new street.
-    - Resets street-specific betting state on PokerHand.
-    - Determines the first player to act on the new street.
-    - Updates PokerHand status.
-
-    Args:
-        hand_id (int): The ID of the PokerHand to advance.
-        session (Session): The SQLAlchemy session to use for database operations.
-
-    Returns:
-        dict: A status message, e.g., {"status": "advanced_to_flop", "hand_id": hand_id}
-              or {"status": "showdown_reached", "hand_id": hand_id}
-              or an error dictionary.
-    """
-    poker_hand = session.query(PokerHand).options(
-            joinedload(PokerHand.table).joinedload(PokerTable.player_states).joinedload(PokerPlayerState.user) # Load table and all player states
-            # removed: joinedload(PokerHand.player_states_in_hand)
-    ).get(hand_id)
-
-    if not poker_hand:
-        return {"error": f"PokerHand {hand_id} not found."}
-    if not poker_hand.table:
-        return {"error": f"PokerTable not found for PokerHand {hand_id}."}
-
-    poker_table = poker_hand.table
-    current_board_cards = list(poker_hand.board_cards) if poker_hand.board_cards else [] # Ensure it's a mutable list
-    num_board_cards = len(current_board_cards)
-    next_street_name = None
-    cards_to_deal_count = 0
-
-    if num_board_cards == 0: # Pre-flop -> Flop
-        next_street_name = "flop"
-        cards_to_deal_count = 3
-        poker_hand.status = "flop" # <<< SETTING HAND STATUS
-    elif num_board_cards == 3: # Flop -> Turn
-        next_street_name = "turn"
-        cards_to_deal_count = 1
-        poker_hand.status = "turn" # <<< SETTING HAND STATUS
-    elif num_board_cards == 4: # Turn -> River
-        next_street_name = "river"
-        cards_to_deal_count = 1
-        poker_hand.status = "river" # <<< SETTING HAND STATUS
-    elif num_board_cards == 5: # River -> Showdown
-        poker_hand.status = "showdown" # <<< SETTING HAND STATUS
-        poker_hand.current_turn_user_id = None # No more betting turns
-        poker_hand.hand_history.append({
-            "action": "proceed_to_showdown",
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-        # session.add(poker_hand) # Will be committed at the end of the calling function or here
-        # session.commit() # Or commit immediately
-        return {"status": "showdown_reached", "hand_id": hand_id, "board_cards": poker_hand.board_cards}
-    else:
-        return {"error": f"Invalid number of board cards ({num_board_cards}) for hand {hand_id}."}
-
-    # --- Deck Management: Use poker_hand.deck_state ---
-    # The insecure deck reconstruction is removed.
-    # deal_community_cards will now use and update poker_hand.deck_state directly.
-
-    if cards_to_deal_count > 0:
-        newly_dealt_street_cards = deal_community_cards(poker_hand, next_street_name)
-
-        if newly_dealt_street_cards is None:
-            # Error already logged by deal_community_cards
-            # Potentially rollback or handle error state if critical (e.g. could not deal flop)
-            # For now, assume deal_community_cards handles session correctly or we handle it after call
-            return {"error": f"Failed to deal {next_street_name} for hand {hand_id}."}
-
-        # Hand history for dealing the street
-        poker_hand.hand_history.append({
-            "action": f"deal_{next_street_name}",
-            "cards": newly_dealt_street_cards, # Only the cards dealt this street
-            "board": list(poker_hand.board_cards), # Full board after this street
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-
-    # Reset street-specific betting state
-    poker_hand.current_bet_to_match = 0
-    # min_next_raise_amount is typically BB, but could be SB in fixed limit pre-flop, or based on game rules.
-    poker_hand.min_next_raise_amount = poker_table.big_blind
-    poker_hand.last_raiser_user_id = None
-    poker_hand.player_street_investments = {} # Reset for the new street
-
-    # Determine First Player to Act (Post-flop: SB or first active player left of dealer)
-    active_players_in_hand = [
-        ps for ps in poker_table.player_states
-        if ps.is_active_in_hand and ps.stack_sats > 0 # Must have chips to act
-    ]
-    if not active_players_in_hand:
-        # This implies everyone else is all-in or folded. The hand might go to showdown directly.
-        # This should be caught by logic that calls _advance_to_next_street.
-        # If it reaches here, it's likely an early showdown or hand completion.
-        poker_hand.status = "showdown" # <<< SETTING HAND STATUS (all-in or one left)
-        poker_hand.current_turn_user_id = None
-        poker_hand.hand_history.append({
-            "action": "all_remaining_players_all_in_or_one_left_post_street_deal",
-            "next_street": next_street_name,
-            "board": list(poker_hand.board_cards),
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-        # session.add(poker_hand)
-        # session.commit()
-        return {"status": poker_hand.status, "hand_id": hand_id, "board_cards": poker_hand.board_cards}
-
-    sorted_active_players = sorted(active_players_in_hand, key=lambda ps: ps.seat_id)
-
-    first_to_act_postflop = None
-    dealer_seat_id = poker_table.current_dealer_seat_id
-
-    if dealer_seat_id is not None:
-        dealer_player_idx_in_sorted_active = -1
-        for i, ps in enumerate(sorted_active_players):
-            if ps.seat_id == dealer_seat_id:
-                dealer_player_idx_in_sorted_active = i
-                break
-
-        if dealer_player_idx_in_sorted_active != -1:
-            # Start search from player left of dealer
-            for i in range(len(sorted_active_players)):
-                player_to_check_idx = (dealer_player_idx_in_sorted_active + 1 + i) % len(sorted_active_players)
-                player_candidate = sorted_active_players[player_to_check_idx]
-                if player_candidate.is_active_in_hand and player_candidate.stack_sats > 0:
-                    first_to_act_postflop = player_candidate
-                    break
-        else: # Dealer is not in active players (e.g. dealer folded) - start from lowest seat
-            first_to_act_postflop = sorted_active_players[0] if sorted_active_players else None
-    else: # No dealer button somehow (should not happen in a running hand)
-        first_to_act_postflop = sorted_active_players[0] if sorted_active_players else None
-
-    if first_to_act_postflop:
-        poker_hand.current_turn_user_id = first_to_act_postflop.user_id
-        # Set turn_starts_at for the first player of the new street
-        first_to_act_postflop.time_to_act_ends = datetime.now(timezone.utc) + timedelta(seconds=POKER_ACTION_TIMEOUT_SECONDS)
-        session.add(first_to_act_postflop)
-
-        poker_hand.hand_history.append({
-            "action": "set_next_to_act",
-            "street": next_street_name,
-            "user_id": first_to_act_postflop.user_id,
-            "seat_id": first_to_act_postflop.seat_id,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-    else:
-        # Should be handled by the active_players_in_hand check earlier or implies showdown
-        current_app.logger.warning(f"Could not determine first player to act for {next_street_name} in hand {hand_id}.")
-        poker_hand.status = "showdown" # Default to showdown if no one can act
-        poker_hand.current_turn_user_id = None
-
-
-    session.add(poker_hand)
-    # Commit is typically handled by the calling function (e.g., after a player action that triggers street change)
-    # For standalone testing or if this is the final step of a process, commit here.
-    # For now, assume commit is handled by caller.
-
-    return {
-        "status": f"advanced_to_{next_street_name}",
-        "hand_id": hand_id,
-        "board_cards": list(poker_hand.board_cards),
-        "next_to_act_user_id": poker_hand.current_turn_user_id
-    }
-
-def _check_betting_round_completion(hand_id: int, last_actor_user_id: int, session: Session) -> dict:
-    """
-    Checks if a betting round is complete after a player action.
-    If complete, advances to the next street or showdown.
-    If not complete, determines the next player to act.
-
-    Args:
-        hand_id (int): The ID of the current PokerHand.
-        last_actor_user_id (int): The user_id of the player who just acted.
-        session (Session): SQLAlchemy session.
-
-    Returns:
-        dict: Status of the hand, e.g.,
-              {"status": "hand_completed_by_folds", "winner_user_id": ...},
-              {"status": "round_completed_advancing_street", "next_street_status": ...},
-              {"status": "all_in_showdown"},
-              {"status": "betting_continues", "next_to_act_user_id": ...},
-              or an error dictionary.
-    """
-    poker_hand = session.query(PokerHand).options(
-        joinedload(PokerHand.table).joinedload(PokerTable.player_states).joinedload(PokerPlayerState.user)
-    ).get(hand_id)
-
-    if not poker_hand: return {"error": f"PokerHand {hand_id} not found."}
-    if not poker_hand.table: return {"error": f"PokerTable for hand {hand_id} not found."}
-
-    all_player_states_in_hand = [ps for ps in poker_hand.table.player_states if ps.is_active_in_hand or (poker_hand.player_street_investments and str(ps.user_id) in poker_hand.player_street_investments)]
-
-    # Players who are still in the hand (haven't folded)
-    active_players_still_in_hand = [ps for ps in all_player_states_in_hand if ps.is_active_in_hand]
-
-    # Clear timer for the player who just acted (last_actor_user_id)
-    last_actor_ps = session.query(PokerPlayerState).filter_by(user_id=last_actor_user_id, table_id=poker_hand.table_id).first()
-    if last_actor_ps:
-        last_actor_ps.time_to_act_ends = None
-        session.add(last_actor_ps)
-
-    # 1. Check for Hand End by Folds
-    if len(active_players_still_in_hand) <= 1:
-        winner_user_id = active_players_still_in_hand[0].user_id if active_players_still_in_hand else None
-
-        # Ensure any other potentially active timer is cleared
-        if poker_hand.current_turn_user_id and poker_hand.current_turn_user_id != last_actor_user_id: # If current turn was not the one who folded to end hand
-            other_ps_to_clear = session.query(PokerPlayerState).filter_by(user_id=poker_hand.current_turn_user_id, table_id=poker_hand.table_id).first()
-            if other_ps_to_clear:
-                other_ps_to_clear.time_to_act_ends = None
-                session.add(other_ps_to_clear)
-
-        poker_hand.current_turn_user_id = None # Hand is over, no one's turn
-        # poker_hand.status = 'completed' is set below within the if winner_user_id block or if no winner (already done)
-        # _distribute_pot needs a list of PokerPlayerState objects for showdown.
-        # If one player wins by folds, they are the only one.
-        # Ensure total_invested_this_hand is set on these player_state objects for _distribute_pot.
-        # This part might need adjustment based on how _distribute_pot expects its input for fold scenarios.
-        if winner_user_id:
-             # Pot is awarded to the winner without showdown
-             winner_player_state = active_players_still_in_hand[0]
-             winner_user = session.query(User).get(winner_user_id)
-
-             # Create transaction for the pot won
-             win_transaction = Transaction(
-                 user_id=winner_user_id,
-                 amount=poker_hand.pot_size_sats, # Winner gets the whole pot
-                 transaction_type='poker_win',
-                 status='completed',
-                 poker_hand_id=poker_hand.id,
-                 details={
-                     "hand_id": poker_hand.id,
-                     "table_id": poker_hand.table_id,
-                     "reason": "Opponents folded",
-                     "pot_won": poker_hand.pot_size_sats
-                 }
-             )
-             session.add(win_transaction)
-
-             # Update winner's stack in PokerPlayerState
-             winner_player_state.stack_sats += poker_hand.pot_size_sats
-             session.add(winner_player_state)
-
-             poker_hand.winners = [{ # Record winner info
-                 "user_id": winner_user_id,
-                 "username": winner_user.username if winner_user else "Unknown",
-                 "amount_won": poker_hand.pot_size_sats,
-                 "reason": "Opponents folded"
-             }]
-             poker_hand.status = 'completed' # <<< SETTING HAND STATUS
-             poker_hand.end_time = datetime.now(timezone.utc)
-             poker_hand.hand_history.append({
-                "action": "hand_completed_by_folds",
-                "winner_user_id": winner_user_id,
-                "pot_size": poker_hand.pot_size_sats,
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            })
-        else: # No one left - should not happen if game started with players.
-            poker_hand.hand_history.append({"action": "hand_completed_no_winner", "timestamp": datetime.now(timezone.utc).isoformat()})
-
-        session.add(poker_hand)
-        # session.commit() # Commit handled by calling action function
-        return {"status": "hand_completed_by_folds", "winner_user_id": winner_user_id, "hand_id": hand_id}
-
-    # 2. Check for Betting Round Completion
-    # Players who can still make betting decisions (not folded, have chips)
-    bettable_players = [ps for ps in active_players_still_in_hand if ps.stack_sats > 0]
-
-    current_bet = poker_hand.current_bet_to_match
-    player_investments = poker_hand.player_street_investments if poker_hand.player_street_investments else {}
-
-    # Condition 1: All players who can still bet are all-in (or only one non-all-in player left)
-    non_all_in_bettable_players = [
-        ps for ps in bettable_players
-        if player_investments.get(str(ps.user_id), 0) < current_bet or ps.stack_sats > 0 # Has to call/raise OR has chips to do so
-                                                                                         # More simply: those not all-in for less than current_bet
-    ]
-
-    # More precise: players who are active, have chips, and have not yet matched the current_bet
-    players_who_must_act = []
-    if current_bet > 0: # There is an outstanding bet
-        for ps in active_players_still_in_hand:
-            is_all_in_for_less = (ps.stack_sats == 0 and player_investments.get(str(ps.user_id), 0) < current_bet)
-            if ps.stack_sats > 0 and player_investments.get(str(ps.user_id), 0) < current_bet and not is_all_in_for_less:
-                players_who_must_act.append(ps)
-    else: # current_bet == 0 (checking round, or option to check for BB)
-        if poker_hand.last_raiser_user_id is None: # No bet made yet this street
-            # Players who haven't acted yet (or whose action isn't "final" for a checking round)
-            # This logic aims to keep the round going if players are yet to check.
-            action_closed = True # Assume action is closed until a player is found who must act
-
-            # Determine who would be "first to act" in this round normally to check if action has completed a full circle.
-            # This is a simplified proxy for complex "action closed" logic.
-            # For now, if current_bet is 0 and no raiser, any active player with chips
-            # who isn't the one that just acted is considered to be "pending action".
-            if len(active_players_still_in_hand) > 1 : # Only relevant if multiple players
-                for ps in active_players_still_in_hand:
-                    if ps.user_id == last_actor_user_id:
-                        continue # Skip the player who just acted
-                    if ps.stack_sats > 0 : # Active and has chips
-                        # This player is pending action in a checking round.
-                        players_who_must_act.append(ps)
-                        # No need to break, add all who are pending.
-                        # The "next player to act" logic will pick the correct one.
-
-            # Special case for BB option: If only one player active (must be BB), and they check, round is over.
-            if len(active_players_still_in_hand) == 1 and active_players_still_in_hand[0].user_id == last_actor_user_id:
-                players_who_must_act = [] # BB checked, round is over.
-        # If there was a raise previously, and current_bet is now 0 (should not happen unless side pots settled weirdly),
-        # it implies all bets were matched. players_who_must_act would be empty by default.
-
-    round_complete = False
-    if not players_who_must_act: # No one left who needs to call/raise the current bet or act in a checking round
-        # This means all active players have either matched the current_bet_to_match or are all-in for less,
-        # or all players have checked in a checking round.
-        round_complete = True
-
-
-    if round_complete:
-        # If all bettable players are all-in (or only one is not), proceed to showdown after dealing all cards
-        if len(non_all_in_bettable_players) <= 1 and len(active_players_still_in_hand) > 1:
-            # Advance all remaining streets automatically
-            if poker_hand.board_cards is None: # Ensure board_cards is not None before len()
-                poker_hand.board_cards = []
-            while poker_hand.status not in ['showdown', 'completed'] and len(poker_hand.board_cards) < 5:
-                adv_result = _advance_to_next_street(hand_id, session)
-                if "error" in adv_result: return adv_result
-                if adv_result["status"] == "showdown_reached": break
-
-            # After all streets, it should be showdown
-            if poker_hand.status != 'showdown': poker_hand.status = 'showdown' # Force if not set by advance
-
-            # Clear timer for the current_turn_user_id if it was set
-            if poker_hand.current_turn_user_id:
-                current_turn_player_state = session.query(PokerPlayerState).filter_by(user_id=poker_hand.current_turn_user_id, table_id=poker_hand.table_id).first()
-                if current_turn_player_state:
-                    current_turn_player_state.time_to_act_ends = None
-                    session.add(current_turn_player_state)
-
-            poker_hand.current_turn_user_id = None # No more turns
-            poker_hand.hand_history.append({"action": "all_in_proceed_to_showdown", "timestamp": datetime.now(timezone.utc).isoformat()})
-            session.add(poker_hand)
-            return {"status": "all_in_showdown", "hand_id": hand_id}
-        else: # Normal round completion, advance to next street
-            # last_actor_ps timer already cleared at the start of this function.
-            # _advance_to_next_street will handle setting the timer for the first player of the new street.
-            adv_result = _advance_to_next_street(hand_id, session)
-            if "error" in adv_result: # Check for errors from _advance_to_next_street
-                return adv_result
-            return {"status": "round_completed_advancing_street",
-                    "next_street_status": poker_hand.status, # status on poker_hand would have been updated by _advance_to_next_street
-                    "next_to_act_user_id": poker_hand.current_turn_user_id, # also updated by _advance_to_next_street
-                    "board_cards": list(adv_result.get('board_cards', [])), # Use board_cards from adv_result
-                    "hand_id": hand_id}
-
-    # 3. Determine Next Player to Act
-    # Sort active players who can still make decisions (not folded, have stack)
-    sorted_bettable_players = sorted(bettable_players, key=lambda p: p.seat_id)
-    if not sorted_bettable_players: # Should be caught by earlier checks (all_in_showdown or hand_completed)
-        return {"error": "No bettable players left, but round not deemed complete."}
-
-    last_actor_seat_id = -1
-    for ps in sorted_bettable_players: # Could be all_player_states_in_hand if we need to find last actor even if they folded
-        if ps.user_id == last_actor_user_id:
-            last_actor_seat_id = ps.seat_id
-            break
-
-    if last_actor_seat_id == -1 and sorted_bettable_players: # Fallback or if last actor folded and is not in bettable_players
-        # This indicates an issue or complex scenario not fully handled by simplified logic.
-        # For robustness, pick the first bettable player if last actor cannot be clearly determined.
-        # Or, if current_turn_user_id was the one who just acted:
-        current_player_idx = -1
-        if poker_hand.current_turn_user_id: # This should be the ID of player who just acted
-             for idx, p in enumerate(sorted_bettable_players):
-                 if p.user_id == poker_hand.current_turn_user_id:
-                     current_player_idx = idx
-                     break
-        if current_player_idx != -1 :
-            start_search_idx = (current_player_idx + 1) % len(sorted_bettable_players)
-        else: # Fallback: start from the first player in the sorted list.
-            start_search_idx = 0
-    elif sorted_bettable_players:
-        current_player_idx = next((i for i, p in enumerate(sorted_bettable_players) if p.user_id == last_actor_user_id), -1)
-        start_search_idx = (current_player_idx + 1) % len(sorted_bettable_players) if current_player_idx !=-1 else 0
-    else: # No bettable players, should have been caught
-        return {"error":"Logically should not reach here: No bettable players."}
-
-
-    next_player_to_act = None
-    for i in range(len(sorted_bettable_players)):
-        player_idx = (start_search_idx + i) % len(sorted_bettable_players)
-        candidate_player = sorted_bettable_players[player_idx]
-
-        # Player must be active, have chips, and either owe money or action hasn't closed on them yet.
-        # Simplified: if they are in bettable_players, they are considered needing to act if round not over.
-        # More precise check: if player_investments.get(str(candidate_player.user_id),0) < current_bet
-        # OR if current_bet == 0 and they haven't checked/bet this round.
-        # For now, just finding the next in line from bettable_players.
-        if candidate_player.is_active_in_hand and candidate_player.stack_sats > 0:
-            next_player_to_act = candidate_player
-            break
-
-    if next_player_to_act:
-        poker_hand.current_turn_user_id = next_player_to_act.user_id
-        poker_hand.hand_history.append({
-            "action": "set_next_to_act",
-            "street": poker_hand.status, # current street
-            "user_id": next_player_to_act.user_id,
-            "seat_id": next_player_to_act.seat_id,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-
-        # Set turn_starts_at for the next player
-        next_player_to_act.time_to_act_ends = datetime.now(timezone.utc) + timedelta(seconds=POKER_ACTION_TIMEOUT_SECONDS)
-        session.add(next_player_to_act)
-
-        session.add(poker_hand)
-        return {"status": "betting_continues", "next_to_act_user_id": poker_hand.current_turn_user_id, "hand_id": hand_id}
-    else:
-        # This case implies that all bettable players have acted and matched the bet, or are all-in.
-        # This should ideally be caught by the 'round_complete' logic.
-        # If it reaches here, it's an unexpected state.
-        # Timer for last_actor_user_id was already cleared at the start of the function.
-        current_app.logger.warning(f"Betting round logic fell through for hand {hand_id}. No specific next actor determined, but round not flagged as complete earlier. Current turn on hand: {poker_hand.current_turn_user_id}")
-        # This might indicate an issue in round_complete logic or player state.
-        # For safety, assume round is over and try to advance.
-        # If advancing to showdown, status will be set there.
-        # If advancing to another street, status will be set there.
-        adv_result = _advance_to_next_street(hand_id, session) # This will set status like 'flop', 'turn', 'river', or 'showdown'
-        session.add(poker_hand) # Ensure poker_hand status change from _advance_to_next_street is staged
-        return {"status": "round_completed_advancing_street_fallback",
-                "next_street_status": poker_hand.status, # Reflects status set by _advance_to_next_street
-                "next_to_act_user_id": poker_hand.current_turn_user_id, # Could be None
-                "hand_id": hand_id}
-
-
-def check_and_handle_player_timeouts(table_id: int, session: Session) -> bool:
-    """
-    Checks the current player for timeout and auto-folds them.
-    This would ideally be triggered by a separate scheduler or before processing any player action request.
-    Returns True if a timeout action was taken, False otherwise.
-    The actual auto-fold action should call the handle_fold function to ensure game state consistency.
-    """
-    # Find the current active hand for this table
-    poker_hand = session.query(PokerHand).filter(
-        PokerHand.table_id == table_id,
-        PokerHand.status.notin_(['completed', 'showdown'])
-    ).order_by(PokerHand.start_time.desc()).first()
-
-    if not poker_hand or poker_hand.current_turn_user_id is None:
-        return False # No active hand or no one's turn
-
-    player_to_act_state = session.query(PokerPlayerState).filter_by(
-        user_id=poker_hand.current_turn_user_id,
-        table_id=poker_hand.table_id
-    ).first()
-
-    if not player_to_act_state:
-        current_app.logger.error(f"Player state not found for current turn user {poker_hand.current_turn_user_id} in hand {poker_hand.id}")
-        return False # Should not happen
-
-    if player_to_act_state.time_to_act_ends and datetime.now(timezone.utc) > player_to_act_state.time_to_act_ends:
-        original_turn_user_id = player_to_act_state.user_id
-        seat_id = player_to_act_state.seat_id # For logging
-
-        current_app.logger.info(f"Player {original_turn_user_id} at seat {seat_id} timed out for hand {poker_hand.id}. Auto-folding.")
-
-        # Clear the timer immediately to prevent re-entry if handle_fold has delays or issues
-        player_to_act_state.time_to_act_ends = None
-        session.add(player_to_act_state)
-        try:
-            session.commit() # Commit the timer clear before calling handle_fold
-        except Exception as e:
-            session.rollback()
-            current_app.logger.error(f"Error committing timeout clear for user {original_turn_user_id}: {e}")
-            # Proceed with fold attempt anyway, but this is problematic
-
-        # Call handle_fold. This function is expected to manage its own session commits/rollbacks.
-        fold_result = handle_fold(original_turn_user_id, poker_hand.table_id, poker_hand.id)
-
-        if "error" in fold_result:
-            current_app.logger.error(f"Error during auto-fold for user {original_turn_user_id} due to timeout: {fold_result['error']}")
-            # Potentially mark player as sitting out or other error handling
-        else:
-            current_app.logger.info(f"Auto-fold successful for user {original_turn_user_id} due to timeout.")
-            # The game_flow result from handle_fold will indicate next player and their timer will be set
-            # by _check_betting_round_completion.
-
-        return True # Timeout action was taken (attempted)
-
-    return False
-
 
 def get_table_state(table_id: int, hand_id: int | None, user_id: int):
     """
@@ -2332,9 +889,7 @@ def get_table_state(table_id: int, hand_id: int | None, user_id: int):
         A dictionary containing the table state, or an error dictionary.
     """
     session = db.session
-    table = session.query(PokerTable).options(
-        joinedload(PokerTable.player_states).joinedload(PokerPlayerState.user)
-    ).get(table_id)
+    table = session.get(PokerTable, table_id)
 
     if not table:
         return {"error": "Table not found."}
@@ -2364,7 +919,7 @@ def get_table_state(table_id: int, hand_id: int | None, user_id: int):
 
     # Player States
     player_states_info = []
-    for ps in table.player_states: # Assuming player_states are all relevant states at the table
+    for ps in table.player_states.options(joinedload(PokerPlayerState.user)): # Assuming player_states are all relevant states at the table
         hole_cards_display = None
         if ps.hole_cards: # Player has cards
             if ps.user_id == user_id: # Requesting user sees their own cards
@@ -2435,7 +990,6 @@ def get_table_state(table_id: int, hand_id: int | None, user_id: int):
 # - `handle_stand_up` returns stack to balance. This is typical. If game has specific rules about leaving mid-game with winnings not yet "banked", that's more complex.
 # - Added `session.flush()` in `start_new_hand` to get `new_hand.id` if it were immediately needed for linking transactions,
 #   though the current commented-out transaction lines don't strictly require it if committed at the end.
-# - `deal_community_cards` does not currently burn a card before dealing flop/turn/river. This is a common rule and can be added by uncommenting `_deal_card(deck)`.
 # - The player list for dealing blinds in `start_new_hand` (`sorted_players_by_seat`) uses all active players. This is generally correct.
 #   It also correctly handles wrap-around for SB/BB assignment using modulo.
 # - Initial hand history in `start_new_hand` is a good start. More detailed actions will be appended by betting functions.
@@ -0,0 +1,714 @@
+"""
+In-memory state and betting rules for one poker table.
+
+services/poker_table_actor.py keeps a TableState per active table and applies player actions to
+it serially; the state is written back to PokerHand / PokerPlayerState / Transaction rows in
+batches (write-behind) rather than per action. Each hand's commands are also appended to the
+poker_hand_event log, and snapshot() / replay() rebuild the hand from that log alone. Everything
+here is plain Python with no database access, so the rules can be exercised and replayed without
+a session.
+
+Results mirror the DB-backed handlers in poker_helper: {"message", "game_flow"} on success,
+{"error"} on failure, with the same error wording the routes map to status codes.
+"""
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+
+from casino_be.utils import cards, poker_helper
+
+BETTING_STATUSES = ('preflop', 'flop', 'turn', 'river')
+NEXT_STREET = {0: ('flop', 3), 3: ('turn', 1), 4: ('river', 1)}  # Board size -> street dealt next
+
+
+class SeatState:
+    """A seated player; attribute names match PokerPlayerState so _validate_bet accepts either"""
+
+    PERSISTED_FIELDS = ('stack_sats', 'is_sitting_out', 'is_active_in_hand', 'hole_cards', 'last_action',
+                        'time_to_act_ends', 'total_invested_this_hand')
+
+    def __init__(self, player_state_id, user_id, username, seat_id, stack_sats, is_sitting_out=False,
+                 is_active_in_hand=False, hole_cards=None, last_action=None, time_to_act_ends=None,
+                 total_invested_this_hand=0):
+        self.player_state_id = player_state_id
+        self.user_id = user_id
+        self.username = username
+        self.seat_id = seat_id
+        self.stack_sats = stack_sats
+        self.is_sitting_out = is_sitting_out
+        self.is_active_in_hand = is_active_in_hand
+        self.hole_cards = list(hole_cards or [])
+        self.last_action = last_action
+        self.time_to_act_ends = time_to_act_ends
+        self.total_invested_this_hand = total_invested_this_hand or 0
+
+    @classmethod
+    def from_model(cls, ps):
+        return cls(ps.id, ps.user_id, ps.user.username if ps.user else "Unknown", ps.seat_id, ps.stack_sats,
+                   ps.is_sitting_out, ps.is_active_in_hand, ps.hole_cards, ps.last_action,
+                   _aware(ps.time_to_act_ends), ps.total_invested_this_hand)
+
+    @property
+    def has_acted(self) -> bool:
+        """Acted voluntarily this street; last_action is cleared when a street is dealt"""
+        return bool(self.last_action) and not self.last_action.startswith('posts_') and self.last_action != 'prehand_reset'
+
+    def row(self) -> dict:
+        """Column values for a bulk UPDATE of this player's PokerPlayerState"""
+        values = {field: getattr(self, field) for field in self.PERSISTED_FIELDS}
+        values['hole_cards'] = list(self.hole_cards)
+        values['id'] = self.player_state_id
+        return values
+
+
+class HandState:
+    """The betting state of the table's current PokerHand"""
+
+    PERSISTED_FIELDS = ('status', 'board_cards', 'deck_state', 'pot_size_sats', 'rake_sats', 'current_bet_to_match',
+                        'min_next_raise_amount', 'last_raiser_user_id', 'player_street_investments',
+                        'current_turn_user_id', 'hand_history', 'winners', 'end_time', 'action_seq')
+
+    def __init__(self, hand_id, status, board_cards=None, deck_state=None, pot_size_sats=0, rake_sats=0,
+                 current_bet_to_match=0, min_next_raise_amount=None, last_raiser_user_id=None,
+                 player_street_investments=None, current_turn_user_id=None, hand_history=None, winners=None,
+                 end_time=None, action_seq=0):
+        self.hand_id = hand_id
+        self.status = status
+        self.board_cards = list(board_cards or [])
+        self.deck = cards.Deck.from_state(deck_state)
+        self.pot_size_sats = pot_size_sats or 0
+        self.rake_sats = rake_sats or 0
+        self.current_bet_to_match = current_bet_to_match or 0
+        self.min_next_raise_amount = min_next_raise_amount
+        self.last_raiser_user_id = last_raiser_user_id
+        self.player_street_investments = dict(player_street_investments or {})
+        self.current_turn_user_id = current_turn_user_id
+        self.hand_history = list(hand_history or [])
+        self.winners = winners
+        self.end_time = end_time
+        self.action_seq = action_seq or 0
+        # Settled by comparing two or more hands, whose hole cards are then shown; never set by a fold win
+        self.went_to_showdown = any(entry.get("action") == "showdown_settled" and entry.get("contenders", 0) >= 2
+                                    for entry in self.hand_history)
+
+    @classmethod
+    def from_model(cls, hand):
+        return cls(hand.id, hand.status, hand.board_cards, hand.deck_state, hand.pot_size_sats, hand.rake_sats,
+                   hand.current_bet_to_match, hand.min_next_raise_amount, hand.last_raiser_user_id,
+                   hand.player_street_investments, hand.current_turn_user_id, hand.hand_history, hand.winners,
+                   _aware(hand.end_time), hand.action_seq)
+
+    @property
+    def deck_state(self) -> str:
+        """The undealt cards as stored in PokerHand.deck_state"""
+        return self.deck.to_state()
+
+    @property
+    def is_betting(self) -> bool:
+        return self.status in BETTING_STATUSES
+
+    def invested(self, user_id) -> int:
+        return self.player_street_investments.get(str(user_id), 0)
+
+    def row(self) -> dict:
+        """Column values for an UPDATE of this PokerHand; containers are copied so JSON changes always persist"""
+        values = {field: getattr(self, field) for field in self.PERSISTED_FIELDS}
+        for field in ('board_cards', 'hand_history'):
+            values[field] = list(values[field])
+        values['player_street_investments'] = dict(self.player_street_investments)
+        return values
+
+
+class TableState:
+    """One table: its configuration, seats keyed by user_id, and the current hand (or None)"""
+
+    def __init__(self, table_id, name, game_type, limit_type, small_blind, big_blind, max_seats, is_active,
+                 rake_percentage, max_rake_sats, current_dealer_seat_id, seats, hand=None):
+        self.table_id = table_id
+        self.name = name
+        self.game_type = game_type
+        self.limit_type = limit_type
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.max_seats = max_seats
+        self.is_active = is_active
+        self.rake_percentage = rake_percentage if rake_percentage is not None else Decimal("0.00")
+        self.max_rake_sats = max_rake_sats or 0
+        self.current_dealer_seat_id = current_dealer_seat_id
+        self.seats = seats
+        self.hand = hand
+        self.pending_transactions = []  # Transaction column dicts not yet written
+
+    @classmethod
+    def from_models(cls, table, player_states, hand=None):
+        seats = {ps.user_id: SeatState.from_model(ps) for ps in player_states}
+        return cls(table.id, table.name, table.game_type, table.limit_type, table.small_blind, table.big_blind,
+                   table.max_seats, table.is_active, table.rake_percentage, table.max_rake_sats,
+                   table.current_dealer_seat_id, seats, HandState.from_model(hand) if hand else None)
+
+    def seats_by_position(self) -> list:
+        return sorted(self.seats.values(), key=lambda seat: seat.seat_id)
+
+    def record_transaction(self, user_id, amount, transaction_type, details):
+        self.pending_transactions.append({
+            'user_id': user_id, 'amount': amount, 'transaction_type': transaction_type,
+            'status': 'completed', 'details': details,
+            'poker_hand_id': self.hand.hand_id if self.hand else None,
+        })
+
+
+def _aware(value):
+    """SQLite hands back naive datetimes; the state always works in UTC-aware ones"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _iso(now):
+    return now.isoformat()
+
+
+# --- Player actions ---
+
+def apply_action(state: TableState, user_id: int, action_type: str, amount=None, now=None) -> dict:
+    """Validate and apply one betting action by the player whose turn it is"""
+    now = now or datetime.now(timezone.utc)
+    hand = state.hand
+    if hand is None:
+        return {"error": f"No active hand at table {state.table_id}."}
+    if not hand.is_betting:
+        return {"error": f"Betting is over for hand {hand.hand_id}. Current status: {hand.status}"}
+
+    seat = state.seats.get(user_id)
+    if seat is None:
+        return {"error": f"Player state for user {user_id} not found at table {state.table_id}."}
+    if not seat.is_active_in_hand:
+        return {"error": f"Player {user_id} is not active in hand {hand.hand_id}."}
+    if hand.current_turn_user_id != user_id:
+        return {"error": "It's not your turn."}
+
+    handler = _ACTION_HANDLERS.get(action_type)
+    if handler is None:
+        return {"error": f"Invalid action type: {action_type}"}
+    if action_type in ('bet', 'raise'):
+        if amount is None:
+            return {"error": f"Amount is required for a {action_type}."}
+        result = handler(state, seat, amount, now)
+    else:
+        result = handler(state, seat, now)
+    if "error" in result:
+        return result
+
+    seat.time_to_act_ends = None
+    result["game_flow"] = _after_action(state, user_id, now)
+    return result
+
+
+def _history(state, seat, action, now, **extra):
+    event = {"user_id": seat.user_id, "seat_id": seat.seat_id, "action": action}
+    event.update(extra)
+    event["timestamp"] = _iso(now)
+    state.hand.hand_history.append(event)
+
+
+def _commit_chips(state, seat, chips):
+    hand = state.hand
+    seat.stack_sats -= chips
+    seat.total_invested_this_hand += chips
+    hand.player_street_investments[str(seat.user_id)] = hand.invested(seat.user_id) + chips
+    hand.pot_size_sats += chips
+
+
+def _fold(state, seat, now, reason=None):
+    seat.is_active_in_hand = False
+    seat.last_action = "fold"
+    extra = {"reason": reason} if reason else {}
+    _history(state, seat, "fold", now, **extra)
+    return {"message": f"User {seat.user_id} folded successfully in hand {state.hand.hand_id}."}
+
+
+def _check(state, seat, now):
+    hand = state.hand
+    invested = hand.invested(seat.user_id)
+    if invested < hand.current_bet_to_match:
+        return {"error": f"Cannot check. Player {seat.user_id} needs to call {hand.current_bet_to_match - invested} more to match current bet of {hand.current_bet_to_match}."}
+    seat.last_action = "check"
+    _history(state, seat, "check", now)
+    return {"message": f"User {seat.user_id} checked successfully in hand {hand.hand_id}."}
+
+
+def _call(state, seat, now):
+    hand = state.hand
+    invested = hand.invested(seat.user_id)
+    amount_due = hand.current_bet_to_match - invested
+    if amount_due <= 0:
+        return {"error": f"No pending bet to call for user {seat.user_id}. Amount due is {amount_due}. Current bet: {hand.current_bet_to_match}, Player invested: {invested}."}
+
+    chips = min(amount_due, seat.stack_sats)
+    action = "call_all_in" if chips < amount_due else "call"
+    _commit_chips(state, seat, chips)
+    seat.last_action = f"{action}_{chips}"
+    state.record_transaction(seat.user_id, -chips, 'poker_action_call',
+                             {"table_id": state.table_id, "hand_id": hand.hand_id, "action": action, "amount": chips})
+    _history(state, seat, action, now, amount=chips)
+    return {"message": f"User {seat.user_id} {action}s {chips} successfully in hand {hand.hand_id}."}
+
+
+def _bet(state, seat, amount, now):
+    hand = state.hand
+    if amount <= 0:
+        return {"error": "Bet amount must be positive."}
+    invested = hand.invested(seat.user_id)
+    if hand.current_bet_to_match > invested:
+        return {"error": f"Cannot bet. Must call or raise existing bet of {hand.current_bet_to_match}. Player has invested {invested}."}
+
+    is_valid, message = poker_helper._validate_bet(
+        player_state=seat, action_amount=invested + amount, current_bet_to_match=hand.current_bet_to_match,
+        min_next_raise_increment=hand.min_next_raise_amount or state.big_blind, limit_type=state.limit_type,
+        poker_table=state, player_amount_invested_this_street=invested, current_hand_pot_size=hand.pot_size_sats,
+    )
+    if not is_valid:
+        return {"error": f"Invalid bet: {message}"}
+
+    chips = min(amount, seat.stack_sats)
+    action = "bet_all_in" if chips == seat.stack_sats else "bet"
+    _commit_chips(state, seat, chips)
+    hand.current_bet_to_match = hand.invested(seat.user_id)
+    hand.last_raiser_user_id = seat.user_id
+    hand.min_next_raise_amount = chips
+    seat.last_action = f"{action}_{chips}"
+    state.record_transaction(seat.user_id, -chips, 'poker_action_bet',
+                             {"table_id": state.table_id, "hand_id": hand.hand_id, "action": action, "amount": chips})
+    _history(state, seat, action, now, amount=chips)
+    return {"message": f"User {seat.user_id} {action}s {chips} successfully in hand {hand.hand_id}."}
+
+
+def _raise(state, seat, amount, now):
+    """amount is the total the player raises to for the street, not the increment"""
+    hand = state.hand
+    if amount <= 0:
+        return {"error": "Raise amount must be positive."}
+    previous_bet = hand.current_bet_to_match
+    if previous_bet == 0:
+        return {"error": "Cannot raise, no prior bet. Use 'bet' action instead."}
+    if amount <= previous_bet:
+        return {"error": f"Raise amount ({amount}) must be greater than current bet to match ({previous_bet})."}
+
+    invested = hand.invested(seat.user_id)
+    is_valid, message = poker_helper._validate_bet(
+        player_state=seat, action_amount=amount, current_bet_to_match=previous_bet,
+        min_next_raise_increment=hand.min_next_raise_amount or state.big_blind, limit_type=state.limit_type,
+        poker_table=state, player_amount_invested_this_street=invested, current_hand_pot_size=hand.pot_size_sats,
+    )
+    if not is_valid:
+        return {"error": f"Invalid raise: {message}"}
+
+    chips = min(amount - invested, seat.stack_sats)
+    action = "raise_all_in" if chips == seat.stack_sats else "raise"
+    _commit_chips(state, seat, chips)
+    raised_to = hand.invested(seat.user_id)
+    raise_size = raised_to - previous_bet
+    if raise_size >= (hand.min_next_raise_amount or state.big_blind):
+        # An all-in for less than a full raise doesn't change the minimum raise
+        hand.min_next_raise_amount = raise_size
+    hand.current_bet_to_match = raised_to
+    hand.last_raiser_user_id = seat.user_id
+    seat.last_action = f"{action}_to_{raised_to}"
+    state.record_transaction(seat.user_id, -chips, 'poker_action_raise',
+                             {"table_id": state.table_id, "hand_id": hand.hand_id, "action": action,
+                              "raised_to_amount": raised_to, "actual_amount_added_to_pot": chips})
+    _history(state, seat, action, now, amount=raised_to, added_to_pot=chips)
+    return {"message": f"User {seat.user_id} {action}s to {raised_to} successfully in hand {hand.hand_id}."}
+
+
+_ACTION_HANDLERS = {
+    'fold': lambda state, seat, now: _fold(state, seat, now),
+    'check': _check,
+    'call': _call,
+    'bet': _bet,
+    'raise': _raise,
+}
+
+
+def remove_from_hand(state: TableState, user_id: int, reason: str, now=None) -> dict | None:
+    """
+    Fold a player out of the current hand regardless of whose turn it is (stand-up, timeout).
+    Returns the game flow result, or None if the player wasn't in a betting hand.
+    """
+    now = now or datetime.now(timezone.utc)
+    hand = state.hand
+    seat = state.seats.get(user_id)
+    if hand is None or not hand.is_betting or seat is None or not seat.is_active_in_hand:
+        return None
+    seat.time_to_act_ends = None
+    _fold(state, seat, now, reason=reason)
+    if hand.current_turn_user_id == user_id:
+        return _after_action(state, user_id, now)
+    # Out of turn: only the end of the hand can follow
+    if sum(1 for s in state.seats.values() if s.is_active_in_hand) <= 1:
+        return _after_action(state, user_id, now)
+    return {"status": "betting_continues", "next_to_act_user_id": hand.current_turn_user_id, "hand_id": hand.hand_id}
+
+
+def time_out(state: TableState, user_id: int, now=None) -> dict | None:
+    """
+    Act for a player to act whose clock ran out: check if nothing is owed, otherwise fold.
+    Returns the game flow result, or None if it isn't that player's turn.
+    """
+    now = now or datetime.now(timezone.utc)
+    hand = state.hand
+    seat = state.seats.get(user_id)
+    if hand is None or not hand.is_betting or hand.current_turn_user_id != user_id or seat is None:
+        return None
+    if hand.invested(user_id) < hand.current_bet_to_match:
+        return remove_from_hand(state, user_id, "timeout", now)
+    seat.time_to_act_ends = None
+    seat.last_action = "check"
+    _history(state, seat, "check", now, reason="timeout")
+    return _after_action(state, user_id, now)
+
+
+def expire_turn(state: TableState, now=None) -> dict | None:
+    """Time out the player to act if their clock has run out; returns the game flow or None"""
+    now = now or datetime.now(timezone.utc)
+    hand = state.hand
+    if hand is None or not hand.is_betting or hand.current_turn_user_id is None:
+        return None
+    seat = state.seats.get(hand.current_turn_user_id)
+    if seat is None or seat.time_to_act_ends is None or now <= seat.time_to_act_ends:
+        return None
+    return time_out(state, seat.user_id, now)
+
+
+def turn_deadline(state: TableState):
+    """When the player to act times out, or None"""
+    hand = state.hand
+    if hand is None or not hand.is_betting or hand.current_turn_user_id is None:
+        return None
+    seat = state.seats.get(hand.current_turn_user_id)
+    return seat.time_to_act_ends if seat else None
+
+
+def apply_event(state: TableState, event_type: str, user_id: int, amount=None, now=None) -> dict | None:
+    """Re-apply one logged command (a PokerHandEvent or journal entry) exactly as it was first applied"""
+    now = _aware(now)
+    if event_type == 'timeout':
+        return time_out(state, user_id, now)
+    if event_type == 'stand_up':
+        return remove_from_hand(state, user_id, 'stood_up', now)
+    return apply_action(state, user_id, event_type, amount, now)
+
+
+# --- Game flow ---
+
+def _after_action(state, last_actor_user_id, now) -> dict:
+    """Close the betting round, end the hand, or pass the turn on"""
+    hand = state.hand
+    active = [s for s in state.seats_by_position() if s.is_active_in_hand]
+    if len(active) <= 1:
+        return _complete_by_folds(state, active[0] if active else None, now)
+
+    can_act = [s for s in active if s.stack_sats > 0]
+    pending = [s for s in can_act if hand.invested(s.user_id) < hand.current_bet_to_match or not s.has_acted]
+    if pending:
+        next_seat = _next_clockwise(pending, _seat_of(state, last_actor_user_id))
+        _set_turn(state, next_seat, now)
+        return {"status": "betting_continues", "next_to_act_user_id": next_seat.user_id, "hand_id": hand.hand_id}
+
+    if len(can_act) <= 1:
+        # Everyone else is all-in: run the board out and settle
+        while len(hand.board_cards) < 5:
+            if not _deal_street(state, now):
+                return {"error": f"Failed to deal board for hand {hand.hand_id}."}
+        _set_turn(state, None, now)
+        hand.hand_history.append({"action": "all_in_proceed_to_showdown", "timestamp": _iso(now)})
+        showdown = settle_showdown(state, now)
+        return {"status": "all_in_showdown", "hand_id": hand.hand_id, "winners": showdown.get("winners", [])}
+
+    if len(hand.board_cards) >= 5:
+        _set_turn(state, None, now)
+        hand.hand_history.append({"action": "proceed_to_showdown", "timestamp": _iso(now)})
+        showdown = settle_showdown(state, now)
+        return {"status": "round_completed_advancing_street", "next_street_status": hand.status,
+                "next_to_act_user_id": None, "board_cards": list(hand.board_cards), "hand_id": hand.hand_id,
+                "winners": showdown.get("winners", [])}
+
+    if not _deal_street(state, now):
+        return {"error": f"Failed to deal next street for hand {hand.hand_id}."}
+    first = _next_clockwise(can_act, state.current_dealer_seat_id)
+    _set_turn(state, first, now)
+    hand.hand_history.append({"action": "set_next_to_act", "street": hand.status, "user_id": first.user_id,
+                              "seat_id": first.seat_id, "timestamp": _iso(now)})
+    return {"status": "round_completed_advancing_street", "next_street_status": hand.status,
+            "next_to_act_user_id": first.user_id, "board_cards": list(hand.board_cards), "hand_id": hand.hand_id}
+
+
+def _seat_of(state, user_id):
+    seat = state.seats.get(user_id)
+    return seat.seat_id if seat else None
+
+
+def _next_clockwise(candidates, after_seat_id):
+    """First candidate seated after after_seat_id, wrapping round; candidates sorted by seat"""
+    if after_seat_id is None:
+        return candidates[0]
+    return next((s for s in candidates if s.seat_id > after_seat_id), candidates[0])
+
+
+def _set_turn(state, seat, now):
+    hand = state.hand
+    previous = state.seats.get(hand.current_turn_user_id)
+    if previous is not None:
+        previous.time_to_act_ends = None
+    if seat is None:
+        hand.current_turn_user_id = None
+        return
+    hand.current_turn_user_id = seat.user_id
+    seat.time_to_act_ends = now + timedelta(seconds=poker_helper.POKER_ACTION_TIMEOUT_SECONDS)
+
+
+def _deal_street(state, now) -> bool:
+    hand = state.hand
+    street, count = NEXT_STREET[len(hand.board_cards)]
+    if hand.deck.remaining < count:
+        return False
+    dealt = hand.deck.deal_strs(count)
+    hand.board_cards.extend(dealt)
+    hand.status = street
+    hand.current_bet_to_match = 0
+    hand.min_next_raise_amount = state.big_blind
+    hand.last_raiser_user_id = None
+    hand.player_street_investments = {}
+    for seat in state.seats.values():
+        if seat.is_active_in_hand and seat.stack_sats > 0:
+            seat.last_action = None  # Marks "not yet acted" on the new street
+    hand.hand_history.append({"action": f"deal_{street}", "cards": dealt, "board": list(hand.board_cards),
+                              "timestamp": _iso(now)})
+    return True
+
+
+def _complete_by_folds(state, winner, now) -> dict:
+    hand = state.hand
+    _set_turn(state, None, now)
+    hand.status = 'completed'
+    hand.end_time = now
+    if winner is None:
+        hand.hand_history.append({"action": "hand_completed_no_winner", "timestamp": _iso(now)})
+        return {"status": "hand_completed_by_folds", "winner_user_id": None, "hand_id": hand.hand_id}
+
+    pot = hand.pot_size_sats
+    winner.stack_sats += pot
+    state.record_transaction(winner.user_id, pot, 'poker_win',
+                             {"hand_id": hand.hand_id, "table_id": state.table_id, "reason": "Opponents folded",
+                              "pot_won": pot})
+    hand.winners = [{"user_id": winner.user_id, "username": winner.username, "amount_won": pot,
+                     "reason": "Opponents folded"}]
+    hand.hand_history.append({"action": "hand_completed_by_folds", "winner_user_id": winner.user_id,
+                              "pot_size": pot, "timestamp": _iso(now)})
+    return {"status": "hand_completed_by_folds", "winner_user_id": winner.user_id, "hand_id": hand.hand_id}
+
+
+def _rake(state, pot) -> int:
+    if pot <= 0 or state.rake_percentage <= Decimal("0.00"):
+        return 0
+    rake = int(Decimal(pot) * state.rake_percentage)
+    if state.max_rake_sats > 0:
+        rake = min(rake, state.max_rake_sats)
+    return max(0, min(rake, pot))
+
+
+def settle_showdown(state: TableState, now=None) -> dict:
+    """Take the rake, split the pot(s) between the best hands and complete the hand"""
+    now = now or datetime.now(timezone.utc)
+    hand = state.hand
+    contenders = {s.user_id: s for s in state.seats.values() if s.is_active_in_hand and len(s.hole_cards) == 2}
+    contributions = {s.user_id: s.total_invested_this_hand for s in state.seats.values() if s.total_invested_this_hand > 0}
+
+    hand.rake_sats = _rake(state, hand.pot_size_sats)
+    remaining = hand.pot_size_sats - hand.rake_sats
+    summary = []
+    seat_order = [s.user_id for s in state.seats_by_position()]
+    dealer = state.current_dealer_seat_id or 0
+
+    # Odd chips go to the first winner clockwise from the button
+    clockwise = sorted(contenders, key=lambda uid: ((contenders[uid].seat_id - dealer - 1) % (state.max_seats or 1),
+                                                    seat_order.index(uid)))
+    pots = poker_helper._build_side_pots(contributions, set(contenders))
+    awarded = poker_helper._award_pots(pots, {uid: contenders[uid].hole_cards for uid in clockwise},
+                                       hand.board_cards, remaining)
+    for pot in awarded:
+        for winner in pot["winners"]:
+            seat = state.seats[winner["user_id"]]
+            won = winner["amount_won"]
+            seat.stack_sats += won
+            state.record_transaction(seat.user_id, won, 'poker_win', {
+                "hand_id": hand.hand_id, "table_id": state.table_id, "pot_description": pot["description"],
+                "amount_won_from_this_pot": won, "this_pot_total_value_distributed": pot["amount"],
+                "num_winners_for_this_pot": len(pot["winners"]), "winning_hand_description": winner["winning_hand"],
+                "board_cards_at_showdown": list(hand.board_cards),
+            })
+            summary.append({"user_id": seat.user_id, "username": seat.username, "amount_won": won,
+                            "pot_description": pot["description"], "winning_hand": winner["winning_hand"],
+                            "best_five_cards": winner["best_five_cards"]})
+
+    hand.winners = summary
+    hand.status = 'completed'
+    hand.end_time = now
+    hand.current_turn_user_id = None
+    hand.went_to_showdown = len(contenders) >= 2
+    hand.hand_history.append({"action": "showdown_settled", "rake": hand.rake_sats, "contenders": len(contenders),
+                              "timestamp": _iso(now)})
+    return {"status": "pot_distributed", "hand_id": hand.hand_id, "winners": summary, "rake_taken": hand.rake_sats}
+
+
+# --- Event log ---
+
+_TABLE_FIELDS = ('table_id', 'name', 'game_type', 'limit_type', 'small_blind', 'big_blind', 'max_seats', 'is_active',
+                 'rake_percentage', 'max_rake_sats', 'current_dealer_seat_id')
+_SEAT_FIELDS = ('player_state_id', 'user_id', 'username', 'seat_id') + SeatState.PERSISTED_FIELDS
+_HAND_FIELDS = ('hand_id',) + HandState.PERSISTED_FIELDS
+_TIME_FIELDS = ('time_to_act_ends', 'end_time')
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (list, dict)):
+        return type(value)(value)
+    return value
+
+
+def snapshot(state: TableState) -> dict:
+    """JSON-safe copy of the whole table, stored as the payload of a hand's 'start' event"""
+    return {
+        'table': {field: _plain(getattr(state, field)) for field in _TABLE_FIELDS},
+        'seats': [{field: _plain(getattr(seat, field)) for field in _SEAT_FIELDS} for seat in state.seats_by_position()],
+        'hand': {field: _plain(getattr(state.hand, field)) for field in _HAND_FIELDS} if state.hand else None,
+    }
+
+
+def _parse_times(values: dict) -> dict:
+    values = dict(values)
+    for field in _TIME_FIELDS:
+        if values.get(field):
+            values[field] = datetime.fromisoformat(values[field])
+    return values
+
+
+def from_snapshot(data: dict) -> TableState:
+    """Inverse of snapshot()"""
+    table = dict(data['table'])
+    table['rake_percentage'] = Decimal(table['rake_percentage'])
+    seats = {seat['user_id']: SeatState(**_parse_times(seat)) for seat in data['seats']}
+    hand = HandState(**_parse_times(data['hand'])) if data.get('hand') else None
+    return TableState(seats=seats, hand=hand, **table)
+
+
+def replay(start: dict, events) -> TableState:
+    """
+    Rebuild a hand from its log: the 'start' snapshot plus (seq, event_type, user_id, amount, created_at)
+    tuples in seq order. The result matches what the table actor held after the last event.
+    """
+    state = from_snapshot(start)
+    for seq, event_type, user_id, amount, created_at in events:
+        apply_event(state, event_type, user_id, amount, created_at)
+        state.hand.action_seq = seq
+    return state
+
+
+# --- Views ---
+
+def table_view(state: TableState, viewer_user_id=None) -> dict:
+    """
+    Same shape as poker_helper.get_table_state; only the viewer's own hole cards are shown until the
+    hand goes to showdown. A hand won by everyone else folding shows nobody's.
+    """
+    hand = state.hand
+    show_all = hand is not None and (hand.status == 'showdown' or hand.went_to_showdown)
+    players = []
+    for seat in state.seats_by_position():
+        hole_cards = None
+        if seat.hole_cards:
+            if seat.user_id == viewer_user_id or (show_all and seat.is_active_in_hand):
+                hole_cards = list(seat.hole_cards)
+            else:
+                hole_cards = ["X", "X"]
+        on_turn = hand is not None and hand.current_turn_user_id == seat.user_id and seat.time_to_act_ends
+        players.append({
+            "user_id": seat.user_id,
+            "username": seat.username,
+            "seat_id": seat.seat_id,
+            "stack_sats": seat.stack_sats,
+            "is_sitting_out": seat.is_sitting_out,
+            "is_active_in_hand": seat.is_active_in_hand,
+            "last_action": seat.last_action,
+            "hole_cards": hole_cards,
+            "total_invested_this_hand": seat.total_invested_this_hand,
+            "time_to_act_ends": seat.time_to_act_ends.isoformat() if on_turn else None,
+        })
+
+    if hand is not None:
+        hand_info = {
+            "hand_id": hand.hand_id,
+            "pot_size_sats": hand.pot_size_sats,
+            "board_cards": list(hand.board_cards),
+            "status": hand.status,
+            "current_turn_user_id": hand.current_turn_user_id,
+            "current_bet_to_match": hand.current_bet_to_match,
+            "min_next_raise_amount": hand.min_next_raise_amount or 0,
+            "last_raiser_user_id": hand.last_raiser_user_id,
+            "player_street_investments": dict(hand.player_street_investments),
+            "hand_history_preview": hand.hand_history[-10:],
+        }
+    else:
+        hand_info = {
+            "hand_id": None, "pot_size_sats": 0, "board_cards": [], "status": "no_active_hand",
+            "current_turn_user_id": None, "current_bet_to_match": 0, "min_next_raise_amount": 0,
+            "last_raiser_user_id": None, "player_street_investments": {}, "hand_history_preview": [],
+        }
+
+    return {
+        "table": {
+            "id": state.table_id, "name": state.name, "game_type": state.game_type, "limit_type": state.limit_type,
+            "small_blind": state.small_blind, "big_blind": state.big_blind, "max_seats": state.max_seats,
+            "is_active": state.is_active, "current_dealer_seat_id": state.current_dealer_seat_id,
+        },
+        "players": players,
+        "current_hand": hand_info,
+        "last_updated": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+_UNDIFFED_FIELDS = ('hand_history_preview',)  # New history events are sent alongside a diff instead
+
+
+def view_diff(previous: dict | None, current: dict) -> dict:
+    """
+    The fields of a table_view that differ from a previous one.
+
+    Returns {'table': {...}, 'current_hand': {...}, 'players': {user_id: {...}}} with unchanged
+    sections left out; a player who has left maps to None, a new player carries every field.
+    Applying the diff to the previous view section by section reproduces the current one.
+    """
+    previous = previous or {}
+    diff = {}
+    for section in ('table', 'current_hand'):
+        old = previous.get(section) or {}
+        changed = {key: value for key, value in current[section].items()
+                   if key not in _UNDIFFED_FIELDS and (key not in old or old[key] != value)}
+        if changed:
+            diff[section] = changed
+
+    old_players = {player['user_id']: player for player in previous.get('players', [])}
+    players = {}
+    for player in current['players']:
+        old = old_players.pop(player['user_id'], None)
+        changed = dict(player) if old is None else {key: value for key, value in player.items() if old.get(key) != value}
+        if changed:
+            players[player['user_id']] = changed
+    for user_id in old_players:
+        players[user_id] = None
+    if players:
+        diff['players'] = players
+    return diff
@@ -1,6 +1,12 @@
 import random
 from flask import current_app
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # European Roulette: numbers 0-36
 ROULETTE_NUMBERS = list(range(37)) # 0 to 36
 
@@ -21,6 +27,137 @@ PAYOUTS = {
     "even_money": 1     # Red/Black, Even/Odd, 1-18/19-36
 }
 
+MAX_SLIP_BETS = 50  # Chips on one bet slip
+
+
+# --- Coverage masks ---
+# Every bet compiles to a 37-bit mask with bit n set when it wins on pocket n, so settling it
+# against a spin is one shift and test.
+
+def _mask(numbers) -> int:
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+    return mask
+
+OUTSIDE_MASKS = {
+    "red": _mask(RED_NUMBERS),
+    "black": _mask(BLACK_NUMBERS),
+    "even": _mask(n for n in range(1, 37) if n % 2 == 0),  # 0 is neither even nor odd for payouts
+    "odd": _mask(n for n in range(1, 37) if n % 2 == 1),
+    "low": _mask(range(1, 19)),
+    "high": _mask(range(19, 37)),
+}
+DOZEN_MASKS = {dozen: _mask(range(12 * dozen - 11, 12 * dozen + 1)) for dozen in (1, 2, 3)}
+COLUMN_MASKS = {column: _mask(range(column, 37, 3)) for column in (1, 2, 3)}
+
+def _inside_masks():
+    """Every split, street, corner and six line on the single-zero layout"""
+    splits = [(n, n + 1) for n in range(1, 36) if n % 3 != 0] + [(n, n + 3) for n in range(1, 34)]
+    splits += [(0, 1), (0, 2), (0, 3)]
+    streets = [(n, n + 1, n + 2) for n in range(1, 37, 3)] + [(0, 1, 2), (0, 2, 3)]
+    corners = [(n, n + 1, n + 3, n + 4) for n in range(1, 33) if n % 3 != 0] + [(0, 1, 2, 3)]
+    six_lines = [tuple(range(n, n + 6)) for n in range(1, 32, 3)]
+    return {bet_type: frozenset(_mask(numbers) for numbers in groups) for bet_type, groups in
+            (("split", splits), ("street", streets), ("corner", corners), ("six_line", six_lines))}
+
+INSIDE_MASKS = _inside_masks()
+INSIDE_SIZES = {"split": 2, "street": 3, "corner": 4, "six_line": 6}
+
+
+def compile_bet(bet_type: str, bet_value=None) -> tuple:
+    """
+    (coverage mask, payout multiplier) for a bet. bet_value is the number for straight_up, 1-3
+    for column and dozen (also accepted as 'column_2' / 'dozen_2'), the list of numbers for
+    split, street, corner and six_line, and unused for the even-money bets. Inside bets must be
+    ones the layout has, e.g. a split of two adjacent numbers. ValueError for anything else.
+    """
+    if not isinstance(bet_type, str):
+        raise ValueError("bet_type must be a string.")
+    if bet_type in OUTSIDE_MASKS:
+        return OUTSIDE_MASKS[bet_type], PAYOUTS["even_money"]
+
+    for group in ("dozen", "column"):
+        if bet_type.startswith(f"{group}_"):
+            bet_type, suffix = group, bet_type[len(group) + 1:]
+            bet_value = suffix if bet_value is None else bet_value
+
+    if bet_type == "straight_up":
+        number = _as_int(bet_value)
+        if number not in ROULETTE_NUMBERS:
+            raise ValueError(f"straight_up needs a number from 0 to 36, got {bet_value!r}.")
+        return 1 << number, PAYOUTS["straight_up"]
+
+    if bet_type in ("dozen", "column"):
+        masks = DOZEN_MASKS if bet_type == "dozen" else COLUMN_MASKS
+        index = _as_int(bet_value)
+        if index not in masks:
+            raise ValueError(f"{bet_type} needs 1, 2 or 3, got {bet_value!r}.")
+        return masks[index], PAYOUTS[bet_type]
+
+    if bet_type in INSIDE_MASKS:
+        size = INSIDE_SIZES[bet_type]
+        if not (isinstance(bet_value, (list, tuple)) and len(bet_value) == size):
+            raise ValueError(f"{bet_type} needs a list of {size} numbers, got {bet_value!r}.")
+        numbers = [_as_int(n) for n in bet_value]
+        if any(n not in ROULETTE_NUMBERS for n in numbers) or len(set(numbers)) != size:
+            raise ValueError(f"{bet_type} needs {size} different numbers from 0 to 36, got {bet_value!r}.")
+        mask = _mask(numbers)
+        if mask not in INSIDE_MASKS[bet_type]:
+            raise ValueError(f"{sorted(numbers)} is not a {bet_type} on the layout.")
+        return mask, PAYOUTS[bet_type]
+
+    raise ValueError(f"Unsupported bet_type '{bet_type}'.")
+
+
+def _as_int(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_slip(bets) -> list:
+    """
+    Check and compile a bet slip - a list of {"bet_type", "bet_value", "bet_amount"} chips -
+    into {"bet_type", "amount", "mask", "multiplier"} dicts. bet_type is stored as describe_bet()
+    gives it. ValueError naming the first bad chip.
+    """
+    if not isinstance(bets, list) or not bets:
+        raise ValueError("bets must be a non-empty list.")
+    if len(bets) > MAX_SLIP_BETS:
+        raise ValueError(f"A bet slip takes at most {MAX_SLIP_BETS} bets.")
+    compiled = []
+    for index, bet in enumerate(bets):
+        if not isinstance(bet, dict):
+            raise ValueError(f"Bet {index + 1}: expected an object.")
+        amount = bet.get("bet_amount")
+        if isinstance(amount, bool) or not isinstance(amount, int) or amount <= 0:
+            raise ValueError(f"Bet {index + 1}: bet_amount must be a positive integer (sats).")
+        try:
+            mask, multiplier = compile_bet(bet.get("bet_type"), bet.get("bet_value"))
+        except ValueError as e:
+            raise ValueError(f"Bet {index + 1}: {e}") from None
+        compiled.append({"bet_type": describe_bet(bet["bet_type"], bet.get("bet_value")), "amount": amount,
+                         "mask": mask, "multiplier": multiplier})
+    return compiled
+
+
+def settle_bets(masks, amounts, multipliers, winning_number: int):
+    """
+    Sats returned on each bet (stake included) for one spin, for a whole slip or a whole table
+    at once: a win is bit winning_number of the bet's mask.
+    """
+    if NUMPY_AVAILABLE:
+        hits = (np.asarray(masks, dtype=np.uint64) >> np.uint64(winning_number)) & np.uint64(1)
+        returned = hits.astype(np.int64) * np.asarray(amounts, dtype=np.int64) * (np.asarray(multipliers, dtype=np.int64) + 1)
+        return returned.tolist()
+    return [amount * (multiplier + 1) if mask >> winning_number & 1 else 0
+            for mask, amount, multiplier in zip(masks, amounts, multipliers)]
+
+
 def spin_wheel():
     """Simulates spinning the roulette wheel. Returns a random winning number (0-36)."""
     import secrets
@@ -30,106 +167,28 @@ def spin_wheel():
 def get_bet_type_multiplier(bet_type: str, bet_value, winning_number: int) -> int:
     """
     Calculates the payout multiplier for a given bet type and winning number.
-    bet_type: e.g., "straight_up", "red", "even", "column_1", "dozen_1", "number_7"
-    bet_value: The specific number or group chosen by the player for certain bet types.
-               For "straight_up", it's the number itself (e.g., 7).
-               For "column", it's the column number (1, 2, or 3).
-               For "dozen", it's the dozen number (1, 2, or 3).
-               For color/even/odd etc., this might not be needed or can be implicit.
+    bet_type: e.g., "straight_up", "red", "even", "column_1", "dozen_1", "split"
+    bet_value: The specific number or group chosen by the player, as for compile_bet().
     winning_number: The number that resulted from the wheel spin.
     Returns the multiplier (e.g., 35 for straight_up) if the bet wins, otherwise 0.
+    Unsupported or malformed bets never win.
     """
     if winning_number not in ROULETTE_NUMBERS:
         raise ValueError("Invalid winning number")
 
-    # Straight up bet (e.g., bet_type="straight_up", bet_value=7)
-    if bet_type == "straight_up":
-        if winning_number == int(bet_value):
-            return PAYOUTS["straight_up"]
+    try:
+        mask, multiplier = compile_bet(bet_type, bet_value)
+    except ValueError as e:
+        current_app.logger.warning(f"Unhandled bet_type '{bet_type}' or invalid bet_value '{bet_value}': {e}")
         return 0
+    return multiplier if mask >> winning_number & 1 else 0
 
-    # Red/Black (e.g., bet_type="red")
-    if bet_type == "red":
-        return PAYOUTS["even_money"] if winning_number in RED_NUMBERS else 0
-    if bet_type == "black":
-        return PAYOUTS["even_money"] if winning_number in BLACK_NUMBERS else 0
-
-    # Even/Odd (e.g., bet_type="even")
-    if bet_type == "even": # 0 is not even or odd for payout purposes
-        return PAYOUTS["even_money"] if winning_number != 0 and winning_number % 2 == 0 else 0
-    if bet_type == "odd":
-        return PAYOUTS["even_money"] if winning_number % 2 != 0 else 0 # 0 is not odd
-
-    # Low (1-18) / High (19-36) (e.g., bet_type="low")
-    if bet_type == "low":
-        return PAYOUTS["even_money"] if 1 <= winning_number <= 18 else 0
-    if bet_type == "high":
-        return PAYOUTS["even_money"] if 19 <= winning_number <= 36 else 0
-
-    # Dozens (e.g., bet_type="dozen_1", bet_value=1 for first dozen)
-    # Assumes bet_value is 1, 2, or 3
-    if bet_type.startswith("dozen_"):
-        try:
-            dozen = int(bet_value)
-            if dozen == 1 and 1 <= winning_number <= 12: return PAYOUTS["dozen"]
-            if dozen == 2 and 13 <= winning_number <= 24: return PAYOUTS["dozen"]
-            if dozen == 3 and 25 <= winning_number <= 36: return PAYOUTS["dozen"]
-            return 0
-        except ValueError: # Should not happen if bet_value is validated upstream
-            return 0
-
-
-    # Columns (e.g., bet_type="column_1", bet_value=1 for first column)
-    # Assumes bet_value is 1, 2, or 3
-    if bet_type.startswith("column_"):
-        try:
-            column = int(bet_value)
-            # Column 1: 1, 4, 7, ..., 34
-            # Column 2: 2, 5, 8, ..., 35
-            # Column 3: 3, 6, 9, ..., 36
-            if winning_number == 0: return 0 # 0 is not in any column
-            if column == 1 and winning_number % 3 == 1: return PAYOUTS["column"]
-            if column == 2 and winning_number % 3 == 2: return PAYOUTS["column"]
-            if column == 3 and winning_number % 3 == 0: return PAYOUTS["column"] # Note: 3,6,9...36 are %3==0
-            return 0
-        except ValueError:
-            return 0
-
-    # Bet types requiring a list of numbers in bet_value
-    elif bet_type == "split":
-        if not (isinstance(bet_value, list) and len(bet_value) == 2 and all(isinstance(n, int) for n in bet_value)):
-            current_app.logger.error(f"Invalid bet_value for split bet: {bet_value}. Expected list of 2 integers.")
-            return 0
-        return PAYOUTS["split"] if winning_number in bet_value else 0
-    elif bet_type == "street":
-        if not (isinstance(bet_value, list) and len(bet_value) == 3 and all(isinstance(n, int) for n in bet_value)):
-            current_app.logger.error(f"Invalid bet_value for street bet: {bet_value}. Expected list of 3 integers.")
-            return 0
-        # Additional validation for street might be needed, e.g. numbers are consecutive or form a valid street.
-        # For now, just checking if winning_number is in the list.
-        return PAYOUTS["street"] if winning_number in bet_value else 0
-    elif bet_type == "corner":
-        if not (isinstance(bet_value, list) and len(bet_value) == 4 and all(isinstance(n, int) for n in bet_value)):
-            current_app.logger.error(f"Invalid bet_value for corner bet: {bet_value}. Expected list of 4 integers.")
-            return 0
-        # Additional validation for corner might be needed, e.g. numbers form a valid square on the board.
-        return PAYOUTS["corner"] if winning_number in bet_value else 0
-    elif bet_type == "six_line":
-        if not (isinstance(bet_value, list) and len(bet_value) == 6 and all(isinstance(n, int) for n in bet_value)):
-            current_app.logger.error(f"Invalid bet_value for six_line bet: {bet_value}. Expected list of 6 integers.")
-            return 0
-        # Additional validation for six_line might be needed.
-        return PAYOUTS["six_line"] if winning_number in bet_value else 0
-    # End of newly added bet types. TODO comment updated.
-    # Bet types like split, street, corner, six_line implemented above.
-    # These complex bet types depend on the layout and specific numbers chosen,
-    # and assume bet_value is a list of numbers for these types.
-    # Further validation of the bet_value list against actual roulette layout rules
-    # (e.g., numbers in a split are adjacent, numbers in a street are consecutive)
-    # is not implemented here but may be necessary for a full robust system.
-
-    current_app.logger.warning(f"Unhandled bet_type '{bet_type}' or invalid bet_value '{bet_value}'.")
-    return 0
+
+def describe_bet(bet_type: str, bet_value) -> str:
+    """The bet type as stored on RouletteGame, with its value where it has one, e.g. 'straight_up_7'"""
+    if bet_value is not None and bet_type not in ["red", "black", "even", "odd", "low", "high"]:
+        return f"{bet_type}_{bet_value}"
+    return bet_type
 
 
 def calculate_payout(bet_amount: float, multiplier: int) -> float:
@@ -0,0 +1,350 @@
+"""
+SpaceCrash crash-point distribution auditor.
+
+Recomputes crash points exactly as spacecrash_handler.get_multiplier_from_hash does, in bulk,
+and compares the realised distribution with theory: house edge per cash-out target,
+instant-crash rate, tail percentiles and the share of rounds hitting MAX_MULTIPLIER_CAP.
+Use it to sign off any change to the house edge, the cap or the hash-to-multiplier mapping.
+
+Game hashes come from one of:
+  range   HMAC-SHA256(server_seed, "<client_seed>:<nonce>") over a nonce range (generate_crash_point)
+  random  a fresh server seed per round with nonce 1, as the live game loop does
+  chain   a SHA-256 hash chain: each hash is the digest of the previous one
+
+    python -m casino_be.utils.spacecrash_auditor range --rounds 20000000 --workers 8
+    python -m casino_be.utils.spacecrash_auditor random --rounds 5000000 --house-edge 0.005
+    python -m casino_be.utils.spacecrash_auditor chain --seed <hex> --rounds 1000000
+
+HMACs are computed one by one in C (hmac.digest); bit extraction, the multiplier formula and
+all statistics are vectorised with numpy. Each worker process returns an exact histogram over
+the 0.01x multiplier grid, so merged results are identical to a single-process run.
+Exit status is 1 when any statistic deviates from theory by more than --max-z standard errors.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from casino_be.utils.spacecrash_handler import MAX_MULTIPLIER_CAP
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DEFAULT_TARGETS = (1.01, 1.1, 1.5, 2.0, 3.0, 5.0, 10.0, 100.0, 1000.0)
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99)
+CHUNK_SIZE = 1_000_000  # Rounds hashed per numpy batch
+
+
+# --- Vectorised hash -> multiplier ---
+
+def digests_to_ints(digests):
+    """Top 52 bits of each 32-byte digest, i.e. int(hexdigest[:13], 16), as int64"""
+    head = digests[:, :7].astype(np.int64)
+    value = np.zeros(len(digests), dtype=np.int64)
+    for i in range(6):
+        value = (value << 8) | head[:, i]
+    return (value << 4) | (head[:, 6] >> 4)
+
+
+def multipliers_from_ints(game_hash_ints, house_edge, max_multiplier_cap=MAX_MULTIPLIER_CAP):
+    """
+    Vectorised get_multiplier_from_hash. Returns (multipliers, forced_instant) where
+    forced_instant marks rounds busted by the house-edge modulo check.
+    """
+    if not (0 <= house_edge < 1):
+        raise ValueError("House edge must be between 0 (inclusive) and 1 (exclusive).")
+
+    h = game_hash_ints.copy()
+    if house_edge > 0:
+        forced_instant = (h % int(1.0 / house_edge)) == 0
+    else:
+        forced_instant = np.zeros(len(h), dtype=bool)
+
+    h[h == 2**52 - 1] -= 1
+    multiplier = 1 / (1 - h / (2**52))  # Same float64 operations, in the same order, as the scalar version
+    multiplier = np.floor(multiplier * 100) / 100
+    multiplier = np.minimum(multiplier, max_multiplier_cap)
+    multiplier[forced_instant] = 1.00
+    return multiplier, forced_instant
+
+
+def hmac_digests(server_seed_hex, client_seed, nonce_start, count):
+    key = bytes.fromhex(server_seed_hex)
+    buffer = b''.join(
+        hmac.digest(key, f"{client_seed}:{nonce}".encode('utf-8'), 'sha256')
+        for nonce in range(nonce_start, nonce_start + count)
+    )
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(count, 32)
+
+
+def random_seed_digests(client_seed, count):
+    """One fresh server seed per round with nonce 1, mirroring the live game loop"""
+    message = f"{client_seed}:1".encode('utf-8')
+    seeds = os.urandom(32 * count)
+    buffer = b''.join(
+        hmac.digest(seeds[i:i + 32], message, 'sha256') for i in range(0, 32 * count, 32)
+    )
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(count, 32)
+
+
+def chain_digests(seed_hex, count):
+    """Walk a SHA-256 chain from seed_hex; returns the digests and the last hash for continuation"""
+    current = bytes.fromhex(seed_hex)
+    digests = []
+    for _ in range(count):
+        current = hashlib.sha256(current.hex().encode('ascii')).digest()
+        digests.append(current)
+    return np.frombuffer(b''.join(digests), dtype=np.uint8).reshape(count, 32), current.hex()
+
+
+# --- Histogram accumulation ---
+
+def histogram_size(max_multiplier_cap):
+    return int(round(max_multiplier_cap * 100)) + 1
+
+
+def accumulate(histogram, multipliers):
+    """Add multipliers to a bincount over the 0.01x grid (index = multiplier * 100)"""
+    cents = np.rint(multipliers * 100).astype(np.int64)
+    histogram += np.bincount(cents, minlength=len(histogram))
+
+
+def audit_chunk(task):
+    """Worker entry point: hash a slice of rounds and return (histogram, forced_instant_count)"""
+    mode, params, start, count, house_edge, max_multiplier_cap = task
+    histogram = np.zeros(histogram_size(max_multiplier_cap), dtype=np.int64)
+    forced = 0
+    done = 0
+    while done < count:
+        batch = min(CHUNK_SIZE, count - done)
+        if mode == 'range':
+            digests = hmac_digests(params['server_seed'], params['client_seed'], start + done, batch)
+        else:
+            digests = random_seed_digests(params['client_seed'], batch)
+        multipliers, forced_instant = multipliers_from_ints(digests_to_ints(digests), house_edge, max_multiplier_cap)
+        accumulate(histogram, multipliers)
+        forced += int(forced_instant.sum())
+        done += batch
+    return histogram, forced
+
+
+# --- Theory and statistics ---
+
+def theoretical_survival(target, house_edge, max_multiplier_cap=MAX_MULTIPLIER_CAP):
+    """P(crash point >= target) for target > 1; a cash-out at target pays when this holds"""
+    if target > max_multiplier_cap:
+        return 0.0
+    divisor = int(1.0 / house_edge) if house_edge > 0 else None
+    survive_modulo = 1 - 1 / divisor if divisor else 1.0
+    # floor(100 / (1 - r)) / 100 >= t  <=>  r >= 1 - 1 / t   for t on the 0.01 grid
+    return survive_modulo * min(1.0, 1 / target)
+
+
+def theoretical_instant_rate(house_edge):
+    """P(crash point == 1.00): the modulo bust plus r < 1/101, which floors to 1.00"""
+    forced = 1 / int(1.0 / house_edge) if house_edge > 0 else 0.0
+    return forced + (1 - forced) / 101
+
+
+def theoretical_percentile(pct, house_edge, max_multiplier_cap=MAX_MULTIPLIER_CAP):
+    q = pct / 100.0
+    if q <= theoretical_instant_rate(house_edge):
+        return 1.0
+    survive_modulo = theoretical_survival(1.0, house_edge, max_multiplier_cap)
+    # Smallest grid value x with P(crash <= x) = 1 - survive_modulo / (x + 0.01) >= q
+    value = math.ceil(round((survive_modulo / (1 - q) - 0.01) * 100, 6)) / 100
+    return min(value, max_multiplier_cap)
+
+
+def build_report(histogram, forced, house_edge, max_multiplier_cap, targets, percentiles):
+    n = int(histogram.sum())
+    grid = np.arange(len(histogram)) / 100.0
+    survival_counts = np.cumsum(histogram[::-1])[::-1]  # survival_counts[i] = #(crash >= i/100)
+
+    def z_score(observed, expected, stderr):
+        return (observed - expected) / stderr if stderr > 0 else 0.0
+
+    target_rows = []
+    for target in targets:
+        index = int(round(target * 100))
+        wins = int(survival_counts[index]) if index < len(survival_counts) else 0
+        p_hat = wins / n
+        p_theory = theoretical_survival(target, house_edge, max_multiplier_cap)
+        stderr = math.sqrt(p_theory * (1 - p_theory) / n) if n else 0.0
+        target_rows.append({
+            'target': target,
+            'win_rate': p_hat,
+            'theoretical_win_rate': p_theory,
+            'house_edge': 1 - target * p_hat,
+            'theoretical_house_edge': 1 - target * p_theory,
+            'z': z_score(p_hat, p_theory, stderr),
+        })
+
+    instant = int(histogram[100])
+    instant_rate = instant / n
+    instant_theory = theoretical_instant_rate(house_edge)
+    forced_theory = 1 / int(1.0 / house_edge) if house_edge > 0 else 0.0
+
+    cumulative = np.cumsum(histogram)
+    percentile_rows = []
+    for pct in percentiles:
+        index = int(np.searchsorted(cumulative, pct / 100.0 * n, side='left'))
+        percentile_rows.append({
+            'percentile': pct,
+            'observed': float(grid[min(index, len(grid) - 1)]),
+            'theoretical': theoretical_percentile(pct, house_edge, max_multiplier_cap),
+        })
+
+    capped = int(histogram[-1])
+    capped_theory = theoretical_survival(max_multiplier_cap, house_edge, max_multiplier_cap)
+
+    return {
+        'rounds': n,
+        'house_edge': house_edge,
+        'max_multiplier_cap': max_multiplier_cap,
+        'mean_crash_point': float((grid * histogram).sum() / n),
+        'instant_crash': {
+            'rate': instant_rate,
+            'theoretical_rate': instant_theory,
+            'z': z_score(instant_rate, instant_theory, math.sqrt(instant_theory * (1 - instant_theory) / n)),
+            'forced_rate': forced / n,
+            'theoretical_forced_rate': forced_theory,
+            'forced_z': z_score(forced / n, forced_theory, math.sqrt(forced_theory * (1 - forced_theory) / n)),
+        },
+        'capped': {
+            'rate': capped / n,
+            'theoretical_rate': capped_theory,
+            'z': z_score(capped / n, capped_theory, math.sqrt(capped_theory * (1 - capped_theory) / n)),
+        },
+        'targets': target_rows,
+        'percentiles': percentile_rows,
+    }
+
+
+def failed_checks(report, max_z):
+    """Names of statistics whose deviation from theory exceeds max_z standard errors"""
+    failures = [f"target {row['target']}x" for row in report['targets'] if abs(row['z']) > max_z]
+    if abs(report['instant_crash']['z']) > max_z:
+        failures.append('instant crash rate')
+    if abs(report['instant_crash']['forced_z']) > max_z:
+        failures.append('forced instant crash rate')
+    if abs(report['capped']['z']) > max_z:
+        failures.append('cap rate')
+    return failures
+
+
+# --- Runner ---
+
+def run_audit(mode, rounds, house_edge, max_multiplier_cap, workers, params):
+    histogram = np.zeros(histogram_size(max_multiplier_cap), dtype=np.int64)
+    forced = 0
+
+    if mode == 'chain':
+        # Each hash depends on the previous one, so the chain is walked in one process
+        seed = params['seed']
+        done = 0
+        while done < rounds:
+            batch = min(CHUNK_SIZE, rounds - done)
+            digests, seed = chain_digests(seed, batch)
+            multipliers, forced_instant = multipliers_from_ints(digests_to_ints(digests), house_edge, max_multiplier_cap)
+            accumulate(histogram, multipliers)
+            forced += int(forced_instant.sum())
+            done += batch
+        params['chain_end'] = seed
+        return histogram, forced
+
+    per_task = max(CHUNK_SIZE, math.ceil(rounds / (workers * 4)))  # A few tasks per worker evens out stragglers
+    tasks = []
+    for start in range(0, rounds, per_task):
+        tasks.append((mode, params, params.get('nonce_start', 0) + start, min(per_task, rounds - start),
+                      house_edge, max_multiplier_cap))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for task_histogram, task_forced in executor.map(audit_chunk, tasks):
+            histogram += task_histogram
+            forced += task_forced
+    return histogram, forced
+
+
+def print_report(report, failures, max_z):
+    print("\n--- SpaceCrash Crash-Point Audit ---")
+    print(f"Rounds: {report['rounds']:,}  House edge: {report['house_edge']}  Cap: {report['max_multiplier_cap']}x")
+    print(f"Mean crash point: {report['mean_crash_point']:.4f}x")
+    ic = report['instant_crash']
+    print(f"Instant crash (1.00x): {ic['rate']:.6%} (theory {ic['theoretical_rate']:.6%}, z={ic['z']:+.2f})")
+    print(f"  of which house-edge bust: {ic['forced_rate']:.6%} (theory {ic['theoretical_forced_rate']:.6%}, z={ic['forced_z']:+.2f})")
+    cap = report['capped']
+    print(f"Reached cap: {cap['rate']:.8%} (theory {cap['theoretical_rate']:.8%}, z={cap['z']:+.2f})")
+    print("\nCash-out target    win rate    theory      house edge  theory      z")
+    for row in report['targets']:
+        print(f"{row['target']:>10.2f}x   {row['win_rate']:>10.6f}  {row['theoretical_win_rate']:>10.6f}  "
+              f"{row['house_edge']:>+10.5%}  {row['theoretical_house_edge']:>+10.5%}  {row['z']:>+6.2f}")
+    print("\nPercentile   observed     theory")
+    for row in report['percentiles']:
+        print(f"{row['percentile']:>9}%   {row['observed']:>9.2f}x  {row['theoretical']:>9.2f}x")
+    print(f"\nChecks (|z| <= {max_z}): {'PASS' if not failures else 'FAIL - ' + ', '.join(failures)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SpaceCrash auditor - verifies the realised crash-point distribution against theory.")
+    parser.add_argument("mode", choices=['range', 'random', 'chain'], help="Where game hashes come from.")
+    parser.add_argument("--rounds", type=int, default=10_000_000, help="Number of crash points to compute.")
+    parser.add_argument("--house-edge", type=float, default=0.01, help="House edge passed to the multiplier function.")
+    parser.add_argument("--max-multiplier-cap", type=float, default=MAX_MULTIPLIER_CAP, help="Multiplier cap.")
+    parser.add_argument("--server-seed", type=str, default=None, help="range: server seed hex (default: random).")
+    parser.add_argument("--client-seed", type=str, default="audit_client_seed", help="range/random: client seed.")
+    parser.add_argument("--nonce-start", type=int, default=0, help="range: first nonce.")
+    parser.add_argument("--seed", type=str, default=None, help="chain: starting hash hex (default: random).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (range/random).")
+    parser.add_argument("--targets", type=str, default=",".join(str(t) for t in DEFAULT_TARGETS), help="Comma-separated cash-out targets.")
+    parser.add_argument("--max-z", type=float, default=4.0, help="Fail when a statistic is this many standard errors from theory.")
+    parser.add_argument("--report", type=str, default=None, help="Write the JSON report to this path.")
+
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        parser.error("numpy is required for the SpaceCrash auditor.")
+
+    params = {'client_seed': args.client_seed}
+    if args.mode == 'range':
+        params['server_seed'] = args.server_seed or os.urandom(32).hex()
+        params['nonce_start'] = args.nonce_start
+    elif args.mode == 'chain':
+        params['seed'] = args.seed or os.urandom(32).hex()
+    targets = [float(t) for t in args.targets.split(',') if t.strip()]
+
+    print(f"--- Auditing {args.rounds:,} SpaceCrash rounds ({args.mode}) with {args.workers if args.mode != 'chain' else 1} worker(s) ---")
+    for key, value in params.items():
+        print(f"{key}: {value}")
+
+    started = time.perf_counter()
+    histogram, forced = run_audit(args.mode, args.rounds, args.house_edge, args.max_multiplier_cap, args.workers, params)
+    elapsed = time.perf_counter() - started
+
+    report = build_report(histogram, forced, args.house_edge, args.max_multiplier_cap, targets, DEFAULT_PERCENTILES)
+    report['mode'] = args.mode
+    report['params'] = params
+    report['seconds'] = round(elapsed, 2)
+    failures = failed_checks(report, args.max_z)
+    report['failures'] = failures
+
+    print_report(report, failures, args.max_z)
+    print(f"Computed in {elapsed:.1f}s ({args.rounds / elapsed:,.0f} rounds/s)")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"INFO: Wrote JSON report to {args.report}")
+
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
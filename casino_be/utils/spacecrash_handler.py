@@ -4,6 +4,8 @@ import math
 import os
 from datetime import datetime, timezone
 
+from sqlalchemy import select
+
 from casino_be.models import db, SpacecrashGame, SpacecrashBet, User # Absolute import
 # If your app instance 'app' is needed for config, you might need to import it or pass config values.
 # from casino_be.app import app # Or from casino_be.config import Config
@@ -63,8 +65,8 @@ def generate_crash_point(server_seed_hex: str, client_seed_hex: str, nonce: int,
 
 # --- Game State Management Functions ---
 
-def create_new_game() -> SpacecrashGame:
-    """Creates a new Spacecrash game instance."""
+def create_new_game(room: str = 'classic') -> SpacecrashGame:
+    """Creates a new Spacecrash game instance in the given room."""
     server_seed = generate_server_seed()
     public_seed = hashlib.sha256(server_seed.encode('utf-8')).hexdigest()
 
@@ -73,6 +75,7 @@ def create_new_game() -> SpacecrashGame:
         public_seed=public_seed,
         nonce=0,
         status='pending',
+        room=room,
     )
     db.session.add(new_game)
     return new_game
@@ -85,7 +88,7 @@ def start_betting_phase(game: SpacecrashGame) -> bool:
         return True
     return False
 
-def start_game_round(game: SpacecrashGame, client_seed_param: str, nonce_param: int) -> bool:
+def start_game_round(game: SpacecrashGame, client_seed_param: str, nonce_param: int, house_edge: float = 0.01) -> bool:
     """
     Starts a new game round: sets client_seed, nonce, calculates crash_point,
     sets game_start_time, and updates status to 'in_progress'.
@@ -94,8 +97,7 @@ def start_game_round(game: SpacecrashGame, client_seed_param: str, nonce_param:
         game.client_seed = client_seed_param
         game.nonce = nonce_param
         
-        house_edge_config = 0.01
-        game.crash_point = generate_crash_point(game.server_seed, game.client_seed, game.nonce, house_edge_config)
+        game.crash_point = generate_crash_point(game.server_seed, game.client_seed, game.nonce, house_edge)
         
         game.status = 'in_progress'
         game.game_start_time = datetime.now(timezone.utc)
@@ -103,15 +105,21 @@ def start_game_round(game: SpacecrashGame, client_seed_param: str, nonce_param:
         return True
     return False
 
-def end_game_round(game: SpacecrashGame) -> bool:
-    """Ends the current game round, sets status to 'completed' and records end time."""
+def end_game_round(game: SpacecrashGame, session=None) -> bool:
+    """
+    Ends the current game round, sets status to 'completed' and records end time.
+    Settles open bets in `session` (defaults to db.session); the caller commits.
+    """
+    session = session or db.session
     if game.status == 'in_progress':
         game.status = 'completed'
         game.game_end_time = datetime.now(timezone.utc)
         
-        bets_to_process = SpacecrashBet.query.filter_by(game_id=game.id, status='placed').all()
+        bets_to_process = session.scalars(select(SpacecrashBet).filter_by(game_id=game.id, status='placed')).all()
+        user_ids = {bet.user_id for bet in bets_to_process}
+        users = {user.id: user for user in session.scalars(select(User).filter(User.id.in_(user_ids)))} if user_ids else {}
         for bet in bets_to_process:
-            user = User.query.get(bet.user_id)
+            user = users.get(bet.user_id)
             if not user:
                 continue
 
@@ -128,20 +136,28 @@ def end_game_round(game: SpacecrashGame) -> bool:
         return True
     return False
 
+def ensure_utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes; treat them as UTC like the rest of the app."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
 def get_current_multiplier(game: SpacecrashGame, default_if_not_started: float = 1.0) -> float:
     """
     Calculates the current multiplier for an 'in_progress' game.
     Returns default_if_not_started if game hasn't started or not in progress.
     """
     if game and game.status == 'in_progress' and game.game_start_time:
-        elapsed_seconds = (datetime.now(timezone.utc) - game.game_start_time).total_seconds()
+        elapsed_seconds = (datetime.now(timezone.utc) - ensure_utc(game.game_start_time)).total_seconds()
         if elapsed_seconds < 0: elapsed_seconds = 0
-        # Growth formula: e.g., 1.00 * (1.07^elapsed_seconds)
-        # Adjust base and exponent factor for desired curve
-        # For example, a common curve: multiplier = 1.00 * math.pow(1.07, elapsed_seconds)
-        # Or using `e`: multiplier = math.exp(elapsed_seconds * k) where k controls speed
-        # Using a simple exponential growth for now:
-        multiplier = 1.00 * math.pow(1.015, elapsed_seconds * 5) # Example: faster growth
-        multiplier = math.floor(multiplier * 100) / 100
+        multiplier = multiplier_for_elapsed(elapsed_seconds)
         return multiplier if multiplier <= game.crash_point else game.crash_point
     return default_if_not_started
+
+def multiplier_for_elapsed(elapsed_seconds: float) -> float:
+    """Multiplier curve shown to players, floored to 2 decimals."""
+    # Growth formula: e.g., 1.00 * (1.07^elapsed_seconds)
+    # Adjust base and exponent factor for desired curve
+    # For example, a common curve: multiplier = 1.00 * math.pow(1.07, elapsed_seconds)
+    # Or using `e`: multiplier = math.exp(elapsed_seconds * k) where k controls speed
+    # Using a simple exponential growth for now:
+    multiplier = 1.00 * math.pow(1.015, elapsed_seconds * 5) # Example: faster growth
+    return math.floor(multiplier * 100) / 100
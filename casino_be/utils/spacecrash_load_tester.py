@@ -0,0 +1,484 @@
+"""
+SpaceCrash load simulator and tick-latency benchmark.
+
+Runs the real SpacecrashGameLoop in-process against SQLite or PostgreSQL, attaches
+simulated Socket.IO clients to the rooms under test and drives randomized
+bet / eject / auto-eject traffic through /api/spacecrash/bet and /api/spacecrash/eject.
+Records tick duration and jitter, settlement duration, broadcast fan-out time and
+DB statements per round, then prints a report and a pass/fail verdict.
+
+    python -m casino_be.utils.spacecrash_load_tester --players 2000 --rounds 5
+    python -m casino_be.utils.spacecrash_load_tester --players 4000 --rooms classic,turbo,high_roller,low_edge
+    python -m casino_be.utils.spacecrash_load_tester --database-url postgresql://user:pw@localhost/crash_load --players 5000
+
+Exit status is 1 when any threshold is exceeded, so it can gate CI or a release.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+
+from casino_be.app import create_app
+from casino_be.config import TestingConfig
+from casino_be.models import db, User
+from casino_be.services.spacecrash_game_loop import SpacecrashGameLoop, SpacecrashStateCache, DEFAULT_ROOM_CONFIGS
+from casino_be.services.websocket_manager import websocket_manager
+from casino_be.utils import spacecrash_handler
+
+DEFAULT_THRESHOLDS = {
+    'tick_jitter_p99_ms': 250.0,
+    'settlement_p99_ms': 500.0,
+    'fanout_p99_ms': 250.0,
+    'statements_per_bet_max': 15.0,
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for an empty sample"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else 0.0,
+    }
+
+
+def evaluate_thresholds(report, thresholds):
+    """Compare a report against thresholds; returns a list of (name, observed, limit, passed)"""
+    observed = {
+        'tick_jitter_p99_ms': report['tick_jitter_ms']['p99'],
+        'settlement_p99_ms': report['settlement_ms']['p99'],
+        'fanout_p99_ms': report['fanout_ms']['p99'],
+        'statements_per_bet_max': max((r['statements_per_bet'] for r in report['rounds'] if r['bets']), default=0.0),
+    }
+    results = []
+    for name, limit in thresholds.items():
+        if limit is None:
+            continue
+        results.append((name, observed[name], limit, observed[name] <= limit))
+    return results
+
+
+class LoadTestMetrics:
+    """Thread-safe sample store shared by the instrumented loop, broadcaster and traffic driver"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.rounds = []
+
+    def record(self, name, value):
+        with self._lock:
+            self.samples[name].append(value)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+
+class StatementCounter:
+    """Counts every SQL statement issued by any engine in the process"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def install(self):
+        event.listen(Engine, 'before_cursor_execute', self)
+
+    def remove(self):
+        event.remove(Engine, 'before_cursor_execute', self)
+
+
+class TimedBroadcaster:
+    """Wraps the WebSocket manager so every loop broadcast records its fan-out time"""
+
+    def __init__(self, manager, metrics):
+        self._manager = manager
+        self._metrics = metrics
+
+    def broadcast_spacecrash_update(self, game_data, room='spacecrash'):
+        self._timed(self._manager.broadcast_spacecrash_update, game_data, room=room)
+
+    def broadcast_spacecrash_bets(self, game_id, bet_events, room='spacecrash'):
+        self._timed(self._manager.broadcast_spacecrash_bets, game_id, bet_events, room=room)
+
+    def _timed(self, broadcast, *args, **kwargs):
+        start = time.perf_counter()
+        broadcast(*args, **kwargs)
+        self._metrics.record('fanout_ms', (time.perf_counter() - start) * 1000)
+
+
+class InstrumentedGameLoop(SpacecrashGameLoop):
+    """
+    SpacecrashGameLoop that records tick timing, settlement time and DB statements per round.
+
+    Statements are counted process-wide, so with several rooms a round's count covers
+    everything since the previous settlement in any room.
+    """
+
+    def __init__(self, metrics, statements, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+        self.statements = statements
+        self._last_tick_start = {}
+        self._round_statement_base = 0
+        self._round_bets = 0
+
+    def _process_game_cycle(self, room):
+        start = time.perf_counter()
+        if room.name in self._last_tick_start:
+            interval = start - self._last_tick_start[room.name]
+            self.metrics.record('tick_jitter_ms', abs(interval - room.tick_interval) * 1000)
+        self._last_tick_start[room.name] = start
+
+        super()._process_game_cycle(room)
+        self.metrics.record('tick_ms', (time.perf_counter() - start) * 1000)
+
+    def _settle_game(self, game):
+        start = time.perf_counter()
+        super()._settle_game(game)
+        self.metrics.record('settlement_ms', (time.perf_counter() - start) * 1000)
+
+        statements = self.statements.count - self._round_statement_base
+        bets = self.metrics.counters['bets_accepted'] - self._round_bets
+        self.metrics.rounds.append({
+            'game_id': game.id,
+            'room': game.room,
+            'crash_point': game.crash_point,
+            'bets': bets,
+            'statements': statements,
+            'statements_per_bet': statements / bets if bets else float(statements),
+        })
+        self._round_statement_base = self.statements.count
+        self._round_bets = self.metrics.counters['bets_accepted']
+
+
+class SpacecrashLoadTester:
+    def __init__(self, database_url, num_players, num_sockets, num_rounds, bet_ratio, auto_eject_ratio,
+                 workers, betting_phase, max_game_duration, rooms=('classic',), seed=None):
+        self.database_url = database_url
+        self.num_players = num_players
+        self.num_sockets = num_sockets
+        self.num_rounds = num_rounds
+        self.bet_ratio = bet_ratio
+        self.auto_eject_ratio = auto_eject_ratio
+        self.workers = workers
+        self.betting_phase = betting_phase
+        self.max_game_duration = max_game_duration
+        self.rooms = list(rooms)
+        self.rng = random.Random(seed)
+
+        self.metrics = LoadTestMetrics()
+        self.statements = StatementCounter()
+        self.app = None
+        self.socketio = None
+        self.game_loop = None
+        self.tokens = []
+        self.socket_clients = []
+        self._client_local = threading.local()
+        self._stop = threading.Event()
+
+    # --- Setup ---
+
+    def setup(self):
+        config = self._build_config()
+        self.app, self.socketio = create_app(config)
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            user_ids = self._seed_players()
+            self.tokens = [create_access_token(identity=SimpleNamespace(id=user_id)) for user_id in user_ids]
+
+        self.game_loop = InstrumentedGameLoop(
+            self.metrics, self.statements,
+            websocket_manager=TimedBroadcaster(websocket_manager, self.metrics), app=self.app,
+            room_configs={
+                name: dict(DEFAULT_ROOM_CONFIGS[name], betting_phase_duration=self.betting_phase,
+                           max_game_duration=self.max_game_duration, min_bet=1)
+                for name in self.rooms
+            }
+        )
+        self.app.spacecrash_game_loop = self.game_loop  # Routes resolve the loop through current_app
+
+        print(f"INFO: Connecting {self.num_sockets} Socket.IO clients across rooms {', '.join(self.rooms)}...")
+        for i, token in enumerate(self.tokens[:self.num_sockets]):
+            client = self.socketio.test_client(self.app, auth={'token': token})
+            client.emit('join_room', {'room': self._room_for_player(i).channel})
+            client.get_received()
+            self.socket_clients.append(client)
+
+    def _build_config(self):
+        database_url = self.database_url
+        engine_options = {}
+        if database_url.startswith('sqlite'):
+            engine_options = {'connect_args': {'check_same_thread': False, 'timeout': 30}}
+
+        class LoadTestConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = database_url
+            SQLALCHEMY_ENGINE_OPTIONS = engine_options
+            JWT_TOKEN_LOCATION = ['headers']  # Simulated players send bearer tokens
+            JWT_ACCESS_TOKEN_EXPIRES = False
+
+        return LoadTestConfig
+
+    def _seed_players(self):
+        password_hash = User.hash_password('load-test-password')  # Hash once; pbkdf2 per user is too slow
+        rows = [{
+            'username': f'crash_load_{i}',
+            'email': f'crash_load_{i}@example.com',
+            'password': password_hash,
+            'balance': 10_000_000_000,
+            'deposit_wallet_address': f'crash_load_wallet_{i}',
+        } for i in range(self.num_players)]
+        db.session.execute(insert(User), rows)
+        db.session.commit()
+        return list(db.session.scalars(db.select(User.id).order_by(User.id)))
+
+    # --- Traffic ---
+
+    def _room_for_player(self, index):
+        """Players are spread evenly over the rooms under test"""
+        return self.game_loop.get_room(self.rooms[index % len(self.rooms)])
+
+    def _client(self):
+        client = getattr(self._client_local, 'client', None)
+        if client is None:
+            client = self._client_local.client = self.app.test_client()
+        return client
+
+    def _post(self, route, token, payload=None):
+        start = time.perf_counter()
+        response = self._client().post(route, json=payload, headers={'Authorization': f'Bearer {token}'})
+        name = route.rsplit('/', 1)[-1]
+        self.metrics.record(f'http_{name}_ms', (time.perf_counter() - start) * 1000)
+        self.metrics.increment(f'http_{name}_{response.status_code}')
+        return response
+
+    def _place_bet(self, token, room_name, pending_ejects, game_id):
+        payload = {'bet_amount': self.rng.randint(100, 100_000), 'room': room_name}
+        manual_target = None
+        target = round(1.01 + self.rng.expovariate(1 / 1.5), 2)
+        if self.rng.random() < self.auto_eject_ratio:
+            payload['auto_eject_at'] = target
+        else:
+            manual_target = target
+
+        if self._post('/api/spacecrash/bet', token, payload).status_code == 201:
+            self.metrics.increment('bets_accepted')
+            if manual_target is not None:
+                pending_ejects[game_id].append((manual_target, token))
+
+    def _eject(self, token, room_name):
+        if self._post('/api/spacecrash/eject', token, {'room': room_name}).status_code == 200:
+            self.metrics.increment('ejects_accepted')
+
+    def _current_game(self, room):
+        body, status_code = room.state_cache.get(
+            SpacecrashStateCache.CURRENT_GAME, lambda: ({'status': False}, 404)
+        )
+        return json.loads(body).get('game') if status_code == 200 else None
+
+    def _drive_traffic(self, executor):
+        """Watch the published snapshot and submit bets/ejects as a crowd of players would"""
+        pending_ejects = defaultdict(list)
+        bet_game_ids = set()
+        room_players = {name: self.tokens[i::len(self.rooms)] for i, name in enumerate(self.rooms)}
+
+        while not self._stop.is_set():
+            for name in self.rooms:
+                game = self._current_game(self.game_loop.get_room(name))
+                if game and game['status'] == 'betting' and game['id'] not in bet_game_ids:
+                    bet_game_ids.add(game['id'])
+                    players = room_players[name]
+                    for token in self.rng.sample(players, int(len(players) * self.bet_ratio)):
+                        executor.submit(self._place_bet, token, name, pending_ejects, game['id'])
+
+                elif game and game['status'] == 'in_progress' and game.get('game_start_time'):
+                    started = spacecrash_handler.ensure_utc(datetime.fromisoformat(game['game_start_time']))
+                    elapsed = (datetime.now(started.tzinfo) - started).total_seconds()
+                    multiplier = spacecrash_handler.multiplier_for_elapsed(elapsed)
+                    due = [item for item in pending_ejects[game['id']] if item[0] <= multiplier]
+                    for item in due:
+                        pending_ejects[game['id']].remove(item)
+                        executor.submit(self._eject, item[1], name)
+
+            time.sleep(0.05)
+
+    def _drain_sockets(self):
+        """Consume delivered messages so simulated clients don't accumulate unbounded queues"""
+        while not self._stop.is_set():
+            delivered = sum(len(client.get_received()) for client in self.socket_clients)
+            self.metrics.increment('socket_messages_delivered', delivered)
+            time.sleep(1)
+
+    # --- Run ---
+
+    def run(self, max_duration):
+        self.statements.install()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        helpers = [
+            threading.Thread(target=self._drive_traffic, args=(executor,), daemon=True),
+            threading.Thread(target=self._drain_sockets, daemon=True),
+        ]
+        started = time.monotonic()
+        try:
+            self.game_loop.start()
+            for helper in helpers:
+                helper.start()
+            while len(self.metrics.rounds) < self.num_rounds and time.monotonic() - started < max_duration:
+                time.sleep(0.5)
+        finally:
+            self._stop.set()
+            self.game_loop.stop()
+            for helper in helpers:
+                helper.join(timeout=5)
+            executor.shutdown(wait=True)
+            self.statements.remove()
+        return time.monotonic() - started
+
+    def build_report(self, wall_seconds):
+        samples = self.metrics.samples
+        return {
+            'database': self.database_url.split('@')[-1],
+            'players': self.num_players,
+            'rooms': self.rooms,
+            'socket_clients': len(self.socket_clients),
+            'wall_seconds': round(wall_seconds, 2),
+            'rounds_completed': len(self.metrics.rounds),
+            'tick_ms': summarize(samples['tick_ms']),
+            'tick_jitter_ms': summarize(samples['tick_jitter_ms']),
+            'settlement_ms': summarize(samples['settlement_ms']),
+            'fanout_ms': summarize(samples['fanout_ms']),
+            'http_bet_ms': summarize(samples['http_bet_ms']),
+            'http_eject_ms': summarize(samples['http_eject_ms']),
+            'counters': dict(self.metrics.counters),
+            'rounds': self.metrics.rounds,
+        }
+
+    def teardown(self):
+        for client in self.socket_clients:
+            if client.is_connected():
+                client.disconnect()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+def print_report(report, verdicts):
+    print("\n--- SpaceCrash Load Test Report ---")
+    print(f"Database: {report['database']}")
+    print(f"Rooms: {', '.join(report['rooms'])}")
+    print(f"Players: {report['players']}  Socket clients: {report['socket_clients']}  "
+          f"Rounds: {report['rounds_completed']}  Wall time: {report['wall_seconds']}s")
+    for key in ('tick_ms', 'tick_jitter_ms', 'settlement_ms', 'fanout_ms', 'http_bet_ms', 'http_eject_ms'):
+        s = report[key]
+        print(f"{key:<16} n={s['count']:<7} p50={s['p50']:.2f} p95={s['p95']:.2f} p99={s['p99']:.2f} max={s['max']:.2f}")
+    print("Counters:")
+    for name, value in sorted(report['counters'].items()):
+        print(f"  {name}: {value}")
+    print("Rounds:")
+    for r in report['rounds']:
+        print(f"  game {r['game_id']} ({r['room']}): crash {r['crash_point']}x, {r['bets']} bets, "
+              f"{r['statements']} statements ({r['statements_per_bet']:.1f}/bet)")
+    print("Thresholds:")
+    for name, observed, limit, passed in verdicts:
+        print(f"  [{'PASS' if passed else 'FAIL'}] {name}: {observed:.2f} (limit {limit})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SpaceCrash load simulator - measures game loop tick latency under simulated traffic.")
+    parser.add_argument("--database-url", type=str, default=None, help="SQLAlchemy URL (default: temporary SQLite file). Use a dedicated database; tables are dropped.")
+    parser.add_argument("--players", type=int, default=500, help="Number of simulated players.")
+    parser.add_argument("--sockets", type=int, default=None, help="Number of Socket.IO clients (default: one per player).")
+    parser.add_argument("--rounds", type=int, default=3, help="Completed rounds to measure.")
+    parser.add_argument("--bet-ratio", type=float, default=0.5, help="Fraction of players betting each round.")
+    parser.add_argument("--auto-eject-ratio", type=float, default=0.5, help="Fraction of bets using auto-eject instead of a manual eject.")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent HTTP request workers.")
+    parser.add_argument("--betting-phase", type=float, default=5, help="Betting phase duration in seconds.")
+    parser.add_argument("--max-game-duration", type=float, default=30, help="Forced crash after this many seconds in flight.")
+    parser.add_argument("--rooms", type=str, default="classic", help=f"Comma-separated rooms to run, from: {', '.join(DEFAULT_ROOM_CONFIGS)}.")
+    parser.add_argument("--max-duration", type=float, default=600, help="Abort the run after this many seconds.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for traffic randomization.")
+    parser.add_argument("--report", type=str, default=None, help="Write the JSON report to this path.")
+    for name, default in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--max-{name.replace('_', '-')}", dest=name, type=float, default=default, help=f"Threshold for {name} (default: {default}).")
+
+    args = parser.parse_args()
+
+    rooms = [name.strip() for name in args.rooms.split(',') if name.strip()]
+    unknown = [name for name in rooms if name not in DEFAULT_ROOM_CONFIGS]
+    if not rooms or unknown:
+        parser.error(f"Unknown rooms: {', '.join(unknown) or '(none given)'}")
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='spacecrash_load_'), 'load.db')
+
+    tester = SpacecrashLoadTester(
+        database_url=database_url,
+        num_players=args.players,
+        num_sockets=args.players if args.sockets is None else args.sockets,
+        num_rounds=args.rounds,
+        bet_ratio=args.bet_ratio,
+        auto_eject_ratio=args.auto_eject_ratio,
+        workers=args.workers,
+        betting_phase=args.betting_phase,
+        max_game_duration=args.max_game_duration,
+        rooms=rooms,
+        seed=args.seed,
+    )
+
+    print(f"--- Initializing SpaceCrash load test: {args.players} players against {database_url.split('@')[-1]} ---")
+    tester.setup()
+    try:
+        wall_seconds = tester.run(args.max_duration)
+        report = tester.build_report(wall_seconds)
+    finally:
+        tester.teardown()
+
+    verdicts = evaluate_thresholds(report, {name: getattr(args, name) for name in DEFAULT_THRESHOLDS})
+    if report['rounds_completed'] < args.rounds:
+        verdicts.append(('rounds_completed', report['rounds_completed'], args.rounds, False))
+    report['thresholds'] = [
+        {'name': name, 'observed': observed, 'limit': limit, 'passed': passed}
+        for name, observed, limit, passed in verdicts
+    ]
+    print_report(report, verdicts)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"INFO: Wrote JSON report to {args.report}")
+
+    passed = all(v[3] for v in verdicts)
+    print(f"--- SpaceCrash load test {'PASSED' if passed else 'FAILED'} ---")
+    raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -96,6 +96,10 @@ class WebSocketService {
       this.emit('spacecrash:update', data);
     });
 
+    this.socket.on('spacecrash_bets', (data) => {
+      this.emit('spacecrash:bets', data);
+    });
+
     this.socket.on('poker_update', (data) => {
       console.log('Received poker update:', data);
       this.emit('poker:update', data);